@@ -98,10 +98,11 @@ class AutonomousAgent:
                 full_response += token
                 yield token
                 
-            # After stream finishes, save full response to history
+            # After stream finishes, save full response to history (tokens arrive raw)
+            from app.agent.response_pipeline import clean_spoken_text
             history.append({
                 "role": "assistant",
-                "content": full_response
+                "content": clean_spoken_text(full_response)
             })
             
         except Exception as e:
@@ -217,14 +218,14 @@ class AutonomousAgent:
     async def _generate_direct_response(self) -> str:
         """Generate response without planning (fallback)"""
         
-        from app.services.llm_service import generate_response
+        from app.services.llm_service import generate_response_async
         
         user_input = self.current_context.get("last_user_input", "")
         context = self.current_context.get("rag_context", "")
         history = self.current_context.get("history", [])
         
         try:
-            response = generate_response(
+            response = await generate_response_async(
                 transcript=user_input,
                 goal=self.config.primary_goal or "Answer customer questions",
                 history=history,
@@ -4,7 +4,7 @@ Measures progress toward goal completion
 """
 
 from typing import Dict, List, Any, Tuple
-from app.services.llm_service import generate_response
+from app.services.llm_service import generate_response_async
 
 class Evaluator:
     """Evaluates progress toward goal completion"""
@@ -65,7 +65,7 @@ class Evaluator:
         """
 
         try:
-            response = generate_response(
+            response = await generate_response_async(
                 prompt,
                 self.system_prompt,
                 history=[]
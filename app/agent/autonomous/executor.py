@@ -3,6 +3,7 @@ Agent Executor Module
 Executes actions planned by the agent
 """
 
+import asyncio
 import logging
 from typing import Optional, Dict, Any
 from app.models.action import (
@@ -11,8 +12,10 @@ from app.models.action import (
     RememberAction, ScheduleCallbackAction, AskClarificationAction,
     EndConversationAction, LearnAction
 )
-from app.services.llm_service import generate_response
+from app.services.llm_service import generate_response_async
 from app.services.tts_service import synthesize_speech_with_provider
+from app.audio.transcode import MULAW_8K
+from app.services.cartesia_tts_session import cartesia_sessions
 from app.models.custom_agent import CustomAgent
 
 # Make RAG import optional to prevent server startup failures
@@ -40,7 +43,34 @@ class AgentExecutor:
         self.response_style = custom_agent.response_style
         self.system_prompt = custom_agent.system_prompt or ""
         self.company_name = custom_agent.company_name or "our company"
-        
+
+    async def _synthesize(self, provider: str, text: str, context: Dict[str, Any]) -> Optional[bytes]:
+        """TTS for the call in context: wire-ready µ-law, over the call's Cartesia session when open."""
+        return await synthesize_speech_with_provider(
+            provider,
+            text,
+            output_format=MULAW_8K,
+            tts_session=cartesia_sessions.get(context.get("call_sid")),
+        )
+
+    async def _speak(self, text: str, context: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Speak a response to the caller.
+
+        When the orchestrator passed the turn's ResponseSpeaker in context, the
+        text is synthesized sentence by sentence and queued for playout as each
+        sentence is ready (returns None: the audio is already queued). If the
+        speaker already spoke this turn while the LLM was still writing, the
+        text is not spoken again.
+        Otherwise the whole text is synthesized and returned as one clip.
+        """
+        speaker = context.get("speaker")
+        if speaker is not None:
+            if not speaker.spoke:
+                await speaker.speak(text)
+            return None
+        return await self._synthesize("cartesia", text, context)
+
     async def execute_action(
         self,
         action: Action,
@@ -129,7 +159,7 @@ class AgentExecutor:
         from app.services.tts_service import validate_tts_provider
         tts_provider = validate_tts_provider(tts_provider)
         try:
-            audio_bytes = await synthesize_speech_with_provider(tts_provider, text)
+            audio_bytes = await self._synthesize(tts_provider, text, context)
             
             return ActionResult(
                 action=speak_action,
@@ -284,7 +314,7 @@ class AgentExecutor:
             # Use validated provider
             from app.services.tts_service import validate_tts_provider
             tts_provider = validate_tts_provider("cartesia")
-            tts_audio = await synthesize_speech_with_provider(tts_provider, ask_action.question)
+            tts_audio = await self._synthesize(tts_provider, ask_action.question, context)
             
             return ActionResult(
                 action=ask_action,
@@ -317,7 +347,7 @@ class AgentExecutor:
             # Use validated provider
             from app.services.tts_service import validate_tts_provider
             tts_provider = validate_tts_provider("cartesia")
-            tts_audio = await synthesize_speech_with_provider(tts_provider, final_message)
+            tts_audio = await self._synthesize(tts_provider, final_message, context)
             
             return ActionResult(
                 action=action,
@@ -381,7 +411,7 @@ class AgentExecutor:
             history = []
         
         try:
-            response = generate_response(
+            response = await generate_response_async(
                 transcript=user_input,
                 goal=self.config.primary_goal or "Answer customer questions",
                 history=history,
@@ -403,18 +433,23 @@ class AgentExecutor:
         Execute agent action with intelligent tool selection.
         This is the new intelligent entry point that uses LLM function calling.
         """
-        from app.services.llm_service import generate_response_with_tools
+        from app.services.llm_service import generate_response_with_tools_async
         
         # Get LLM decision (text or tool call)
-        llm_response = generate_response_with_tools(
-            transcript=user_input,
-            goal=context.get("goal", ""),
-            history=context.get("history", []),
-            context=context.get("rag_context", ""),
-            personality=self.personality,
-            company_name=self.company_name,
-            agent_name=context.get("agent_name", "")
-        )
+        speaker = context.get("speaker")
+        if speaker is not None:
+            # Speak the response while the tool JSON is still being generated
+            llm_response = await self._stream_tool_decision(user_input, context, speaker)
+        else:
+            llm_response = await generate_response_with_tools_async(
+                transcript=user_input,
+                goal=context.get("goal", ""),
+                history=context.get("history", []),
+                context=context.get("rag_context", ""),
+                personality=self.personality,
+                company_name=self.company_name,
+                agent_name=context.get("agent_name", "")
+            )
         
         if llm_response["type"] == "tool_call":
             # LLM decided to use a tool
@@ -443,6 +478,80 @@ class AgentExecutor:
             # Regular text response
             return await self._execute_speak_response(llm_response["content"], context)
     
+    def tool_decision_stream(self, user_input: str, context: Dict[str, Any]):
+        """
+        Start the streamed tool-decision reply for a turn.
+
+        Args:
+            user_input: Caller's transcript
+            context: Executor context (goal, history, rag_context, agent_name)
+
+        Returns:
+            Async iterator of ("tool" | "text" | "decision", value) events
+        """
+        from app.services.llm_service import stream_response_with_tools
+
+        return stream_response_with_tools(
+            transcript=user_input,
+            goal=context.get("goal", ""),
+            history=context.get("history", []),
+            context=context.get("rag_context", ""),
+            personality=self.personality,
+            company_name=self.company_name,
+            agent_name=context.get("agent_name", "")
+        )
+
+    async def _stream_tool_decision(
+        self,
+        user_input: str,
+        context: Dict[str, Any],
+        speaker
+    ) -> Dict[str, Any]:
+        """
+        Get the tool decision from a streamed LLM reply, speaking its text as it arrives.
+
+        Args:
+            user_input: Caller's transcript
+            context: Executor context
+            speaker: The turn's ResponseSpeaker
+
+        Returns:
+            dict: Same decision dict as generate_response_with_tools
+        """
+        text_queue: asyncio.Queue = asyncio.Queue()
+
+        async def spoken_tokens():
+            while True:
+                piece = await text_queue.get()
+                if piece is None:
+                    return
+                yield piece
+
+        speaking: Optional[asyncio.Task] = None
+        decision: Optional[Dict[str, Any]] = None
+        # A speculative turn may already have started this stream (app.agent.speculative_turn)
+        events = context.get("decision_stream") or self.tool_decision_stream(user_input, context)
+        try:
+            async for kind, value in events:
+                if kind == "tool":
+                    logger.info(f"🛠️ Tool chosen mid-stream: {value}")
+                elif kind == "text":
+                    if speaking is None:
+                        speaking = asyncio.create_task(speaker.speak(spoken_tokens()))
+                    text_queue.put_nowait(value)
+                elif kind == "decision":
+                    decision = value
+        except BaseException:
+            if speaking is not None:
+                speaking.cancel()
+            raise
+        finally:
+            text_queue.put_nowait(None)
+
+        if speaking is not None:
+            await speaking
+        return decision or {"type": "text", "content": speaker.text or "I understand."}
+
     async def _execute_intelligent_end_call(
         self,
         args: Dict[str, Any],
@@ -500,7 +609,7 @@ class AgentExecutor:
         
         # Generate TTS for final message
         try:
-            audio = await synthesize_speech_with_provider("cartesia", final_message)
+            audio = await self._speak(final_message, context)
         except Exception as e:
             logger.error(f"TTS failed for end call: {e}")
             audio = None
@@ -564,7 +673,7 @@ class AgentExecutor:
         
         # Generate TTS
         try:
-            audio = await synthesize_speech_with_provider("cartesia", confirmation_message)
+            audio = await self._speak(confirmation_message, context)
         except Exception as e:
             logger.error(f"TTS failed for callback: {e}")
             audio = None
@@ -600,7 +709,7 @@ class AgentExecutor:
         
         # Generate TTS
         try:
-            audio = await synthesize_speech_with_provider("cartesia", response)
+            audio = await self._speak(response, context)
         except Exception as e:
             logger.error(f"TTS failed for continue: {e}")
             audio = None
@@ -646,7 +755,7 @@ class AgentExecutor:
         
         # Generate TTS
         try:
-            audio = await synthesize_speech_with_provider("cartesia", transfer_message)
+            audio = await self._speak(transfer_message, context)
         except Exception as e:
             logger.error(f"TTS failed for transfer: {e}")
             audio = None
@@ -676,7 +785,7 @@ class AgentExecutor:
         """Execute a simple speak action"""
         
         try:
-            audio = await synthesize_speech_with_provider("cartesia", text)
+            audio = await self._speak(text, context)
         except Exception as e:
             logger.error(f"TTS failed: {e}")
             audio = None
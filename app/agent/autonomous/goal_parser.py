@@ -4,7 +4,7 @@ Extracts objectives and success criteria from user-defined goals
 """
 
 from typing import Dict, Tuple, Optional
-from app.services.llm_service import generate_response
+from app.services.llm_service import generate_response_async
 
 class GoalParser:
     """Extract objective and success criteria from user-defined goal"""
@@ -53,7 +53,7 @@ class GoalParser:
         """
         
         try:
-            response = generate_response(
+            response = await generate_response_async(
                 prompt, 
                 self.system_prompt,
                 history=[]
@@ -7,7 +7,7 @@ import re
 import logging
 
 # Use the existing LLM service instead of creating a new one
-from app.services.llm_service import generate_response
+from app.services.llm_service import generate_response_async
 from app.services.outbound_service import make_outbound_call
 # Import the callback scheduler
 from app.services.callback_scheduler import callback_scheduler
@@ -39,7 +39,7 @@ def planner_node(state: AgentState) -> AgentState:
     
     return {"next_action": next_action}
 
-def conversation_node(state: AgentState) -> AgentState:
+async def conversation_node(state: AgentState) -> AgentState:
     """Continue the conversation"""
     from langchain_core.messages import HumanMessage, AIMessage
     
@@ -54,7 +54,7 @@ def conversation_node(state: AgentState) -> AgentState:
     # Generate a response using the existing LLM service
     history = [{"role": msg.type, "content": msg.content} for msg in messages]
     try:
-        response = generate_response(user_message, state["goal"], history, state["context"])
+        response = await generate_response_async(user_message, state["goal"], history, state["context"])
     except Exception as e:
         # Fallback response if LLM fails
         response = "I understand. How can I help you further?"
@@ -9,7 +9,7 @@ from app.models.action import (
     Action, ConversationPlan, SpeakAction, ListenAction,
     RetrieveInfoAction, EndConversationAction, AskClarificationAction
 )
-from app.services.llm_service import generate_response
+from app.services.llm_service import generate_response_async
 from app.models.custom_agent import CustomAgent
 
 logger = logging.getLogger(__name__)
@@ -52,7 +52,7 @@ class AgentPlanner:
         
         try:
             # Use LLM to generate plan steps
-            plan_text = generate_response(
+            plan_text = await generate_response_async(
                 transcript=plan_prompt,
                 goal="Create a step-by-step conversation plan",
                 history=[],
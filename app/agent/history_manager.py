@@ -0,0 +1,175 @@
+"""
+Token-budgeted conversation window with a rolling summary.
+
+state.conversation_history grows for the whole call and used to be sent to
+the LLM in full, so prompt size and latency grew with every turn. The
+HistoryManager decides what the LLM sees instead:
+
+- the last HISTORY_KEEP_MESSAGES entries verbatim,
+- everything older folded into one running summary, which a background task
+  refreshes after a turn (never on the turn path),
+- the whole window (summary included) trimmed from the oldest end to
+  HISTORY_TOKEN_BUDGET tokens.
+
+Older entries that the summary has not absorbed yet stay in the window
+verbatim (budget permitting), so nothing is dropped while the summary
+catches up. conversation_history itself is never modified: it is still the
+call record, and playback trims it on barge-in.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.services.prompt_compiler import count_tokens
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1200"))        # History + summary tokens sent per turn
+HISTORY_KEEP_MESSAGES = int(os.getenv("HISTORY_KEEP_MESSAGES", "10"))        # Recent entries kept verbatim
+HISTORY_SUMMARY_BATCH = int(os.getenv("HISTORY_SUMMARY_BATCH", "4"))         # Unsummarized older entries that trigger a refresh
+HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "160"))
+SUMMARY_PREFIX = "Summary of the earlier part of this call: "
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a phone call between a voice agent and a customer. "
+    "Merge the new exchanges into the existing summary. Keep names, numbers, dates, the "
+    "customer's needs, objections, questions still open and anything the agent promised. "
+    "Write at most 5 short sentences of plain text. Output only the summary."
+)
+
+
+def _content(msg: Dict[str, str]) -> str:
+    return (msg.get("content") or msg.get("text") or "").strip()
+
+
+class HistoryManager:
+    """Builds the per-turn history window for one call."""
+
+    def __init__(
+        self,
+        history: List[Dict[str, str]],
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        keep_messages: int = HISTORY_KEEP_MESSAGES,
+        summary_batch: int = HISTORY_SUMMARY_BATCH,
+    ):
+        """
+        Args:
+            history: The call's conversation_history (read only)
+            token_budget: Max tokens of history (summary included) per turn
+            keep_messages: Recent entries always candidates for the window
+            summary_batch: Older entries to accumulate before re-summarizing
+        """
+        self.history = history
+        self.token_budget = token_budget
+        self.keep_messages = keep_messages
+        self.summary_batch = summary_batch
+        self.summary = ""
+        self._summarized: Optional[Dict[str, str]] = None  # Last entry folded into the summary
+        self._summary_task: Optional[asyncio.Task] = None
+        self._stats = {"windows": 0, "trimmed": 0, "summaries": 0, "summary_errors": 0, "last_window_tokens": 0}
+
+    def _summarized_count(self) -> int:
+        """Number of leading history entries already in the summary."""
+        if self._summarized is None:
+            return 0
+        for i, msg in enumerate(self.history):
+            if msg is self._summarized:
+                return i + 1
+        # Entry disappeared (history edited): summarize again from the start
+        self._summarized = None
+        self.summary = ""
+        return 0
+
+    def window(self) -> List[Dict[str, str]]:
+        """
+        History to send to the LLM this turn, within the token budget.
+
+        Returns:
+            List of history entries, oldest first; the summary (if any) is a
+            leading {"role": "system"} entry
+        """
+        entries = [msg for msg in self.history[self._summarized_count():] if _content(msg)]
+        summary = [{"role": "system", "content": SUMMARY_PREFIX + self.summary}] if self.summary else []
+
+        # Newest first until the budget is spent; the latest entry is always kept
+        budget = self.token_budget - sum(count_tokens(msg["content"]) for msg in summary)
+        kept: List[Dict[str, str]] = []
+        used = 0
+        for msg in reversed(entries):
+            tokens = count_tokens(_content(msg))
+            if kept and used + tokens > budget:
+                break
+            kept.append(msg)
+            used += tokens
+        kept.reverse()
+
+        dropped = len(entries) - len(kept)
+        self._stats["windows"] += 1
+        self._stats["last_window_tokens"] = used + self.token_budget - budget
+        if dropped:
+            self._stats["trimmed"] += dropped
+            logger.info(f"✂️ History window over budget: sent {len(kept)}/{len(entries)} entries ({used} tokens)")
+        return summary + kept
+
+    def maybe_summarize(self) -> Optional[asyncio.Task]:
+        """
+        Start a background summary refresh if enough older entries piled up.
+
+        Returns:
+            The running summary task, or None
+        """
+        if self._summary_task and not self._summary_task.done():
+            return self._summary_task
+        start = self._summarized_count()
+        end = len(self.history) - self.keep_messages
+        if end - start < self.summary_batch:
+            return None
+        batch = self.history[start:end]
+        self._summary_task = asyncio.create_task(self._summarize(batch))
+        return self._summary_task
+
+    async def _summarize(self, batch: List[Dict[str, str]]):
+        lines = "\n".join(
+            f"{'Customer' if msg.get('role') == 'user' else 'Agent'}: {_content(msg)}"
+            for msg in batch if _content(msg)
+        )
+        messages = [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": f"Existing summary: {self.summary or '(none)'}\n\nNew exchanges:\n{lines}"},
+        ]
+        try:
+            from app.services.llm_client import get_llm_client
+            summary = (await get_llm_client().chat(
+                messages, max_tokens=HISTORY_SUMMARY_MAX_TOKENS, temperature=0.2
+            )).strip()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._stats["summary_errors"] += 1
+            logger.warning(f"⚠️ History summary failed, keeping verbatim history: {e}")
+            return
+        if not summary:
+            return
+        if not any(msg is batch[-1] for msg in self.history):
+            # History was edited while summarizing; try again next turn
+            return
+        self.summary = summary
+        self._summarized = batch[-1]
+        self._stats["summaries"] += 1
+        logger.info(f"📝 History summary refreshed ({len(batch)} entries folded, {count_tokens(summary)} tokens)")
+
+    def close(self):
+        """Cancel a pending summary refresh (call ended)."""
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["summarized_entries"] = self._summarized_count()
+        stats["summary_tokens"] = count_tokens(self.summary)
+        return stats
@@ -157,7 +157,8 @@ async def _generate_intelligent_response(state: ConversationState, transcript: s
             
             # Generate fallback audio
             from app.services.tts_service import synthesize_speech_with_provider
-            fallback_audio = await synthesize_speech_with_provider(provider, fallback_text)
+            from app.audio.transcode import MULAW_8K
+            fallback_audio = await synthesize_speech_with_provider(provider, fallback_text, output_format=MULAW_8K)
             if fallback_audio:
                 state.outbound_audio_queue.put_nowait(fallback_audio)
                 state.is_speaking = True
@@ -172,7 +173,8 @@ async def _generate_intelligent_response(state: ConversationState, transcript: s
         state.add_message("assistant", fallback_text)
         
         from app.services.tts_service import synthesize_speech_with_provider
-        fallback_audio = await synthesize_speech_with_provider(provider, fallback_text)
+        from app.audio.transcode import MULAW_8K
+        fallback_audio = await synthesize_speech_with_provider(provider, fallback_text, output_format=MULAW_8K)
         if fallback_audio:
             state.outbound_audio_queue.put_nowait(fallback_audio)
             state.is_speaking = True
@@ -1,17 +1,25 @@
 import asyncio
 import time
 import logging
-import audioop
 import numpy as np
 import random
-from typing import Optional, List, Dict, Any
-from scipy.signal import resample_poly
+from typing import Optional, List, Dict, Any, Callable, Tuple
+from app.audio.codec import ulaw_to_pcm16, pcm16_to_ulaw
+from app.audio.vad import StreamingVAD, ulaw_rms
+from app.audio.transcode import MULAW_8K
 
 logger = logging.getLogger(__name__)
 
-from app.services.stt_service import transcribe_audio_with_provider
+from app.services.stt_service import transcribe_audio_with_provider, release_stream
 from app.services.tts_service import synthesize_speech_with_provider
-from app.services.llm_service import generate_response, generate_response_stream
+from app.services.prompt_audio_bank import prompt_audio_bank
+from app.services.playback_tracker import PlaybackTracker
+from app.services.cartesia_tts_session import cartesia_sessions
+from app.services.llm_service import generate_response_stream
+from app.agent.response_pipeline import ResponseSpeaker
+from app.agent.history_manager import HistoryManager
+from app.agent.speculative_turn import PrefetchedStream, SpeculativeTurn, SpeculativeTurnEngine
+from app.agent.turn_detector import EndOfTurnDetector, TurnDetectionConfig
 from app.models.conversation import Conversation
 from app.database.firestore import db as firestore_db
 from app.models.custom_agent import CustomAgent
@@ -156,7 +164,10 @@ STREAMING_MIN_TOKENS = 15
 SILENCE_TIMEOUT = 3.0     # Increased to 3s to allow for natural pauses
 POST_TTS_DELAY = 0.05     # Reduced to 0.05s for faster response (was 0.2s)
 MAX_BUFFER_SIZE = 160000
-MAX_HISTORY_MESSAGES = 10
+GREETING_PRERENDER_WAIT = 1.5  # Seconds to wait for a dial-time greeting still rendering
+GREETING_SYNTHESIS_TIMEOUT = 3.5  # Fallback synthesis budget; with the wait above the caller hears a greeting within 5 s
+BARGE_IN_SPEECH_MS = 500       # Sustained caller speech (VAD) that interrupts the agent; longer than "yeah"/"uh-huh"
+BARGE_IN_RECENT_SPEECH_MS = 1500  # Interim transcripts only barge in if the VAD heard speech this recently
 
 STT_TIMEOUT = 20.0  # Further increased to prevent Deepgram timeouts
 LLM_TIMEOUT = 15.0  # Increased for better response generation
@@ -196,7 +207,11 @@ class ConversationState:
         self.stt_retry_count = 0
         self.fallback_count = 0
         self.conversation_history: List[Dict[str, str]] = []
+        self.history_manager = HistoryManager(self.conversation_history)  # Token-budgeted window sent to the LLM
+        # Starts retrieval + LLM on stable interim transcripts, committed on a matching final
+        self.speculator = SpeculativeTurnEngine(lambda text: _prepare_speculation(self, text))
         self.autonomous_agent: Optional[AutonomousAgent] = None
+        self.agent_init_task: Optional[asyncio.Task] = None  # Agent fetch + setup, shared by whoever needs it first
         self.langgraph_agent: Optional[LangGraphAgent] = None
         self.needs_greeting = True
         self.first_interaction = True
@@ -204,15 +219,14 @@ class ConversationState:
         self.consecutive_empty_transcripts = 0
         self.last_successful_transcript_time = time.time()
         
-        # Dynamic audio threshold handling with improved calibration
-        self.noise_floor = 0.0
-        self.energy_samples = []
-        self.calibration_complete = False
-        self.calibration_samples = 0
-        self.calibration_samples = 0
-        self.base_threshold = 100  # Lower base threshold for better sensitivity
+        # Frame-level VAD on inbound audio (adaptive noise floor, drives barge-in)
+        self.vad = StreamingVAD()
+        # Decides when the caller's turn is over (agent thresholds applied once the agent loads)
+        self.turn_detector = EndOfTurnDetector(lambda text, confidence: _commit_turn(self, text, confidence), vad=self.vad)
         self.is_signal_connected = False # Flag to track if STT callback is registered
         self.current_response_task: Optional[asyncio.Task] = None # Track current response generation task
+        self.interrupt_playback: Optional[Callable[[], None]] = None # Set by the media handler to flush playout on barge-in
+        self.playback = PlaybackTracker(self.conversation_history, on_idle=lambda: _finish_speaking(self))
         self.silence_timer_task: Optional[asyncio.Task] = None # Track silence monitoring
         self.reprompt_count = 0 # Track number of reprompts per turn
         
@@ -240,64 +254,42 @@ class ConversationState:
             "is_speaking": self.is_speaking,
             "call_duration": time.time() - self.call_start_time,
             "conversation_turns": len(self.conversation_history),
+            "history_window": self.history_manager.get_stats(),
+            "speculation": self.speculator.get_stats(),
+            "turn_detection": self.turn_detector.get_stats(),
             "stt_retry_count": self.stt_retry_count,
             "fallback_count": self.fallback_count,
             "barge_in_count": self.barge_in_count,
             "consecutive_empty_transcripts": self.consecutive_empty_transcripts,
-            "calibration_complete": self.calibration_complete
+            "vad_noise_db": round(self.vad.noise_db, 1),
+            "vad_in_speech": self.vad.in_speech
         }
 
     def get_call_duration(self) -> float:
         """Get call duration in seconds"""
         return time.time() - self.call_start_time
 
-    def add_message(self, role: str, content: str):
-        self.conversation_history.append({"role": role, "content": content})
+    def add_message(self, role: str, content: str) -> Dict[str, str]:
+        message = {"role": role, "content": content}
+        self.conversation_history.append(message)
+        return message
+
+    def queue_speech(self, audio: bytes, message: Optional[Dict[str, str]] = None, text: Optional[str] = None):
+        """Queue TTS audio for playout, tracked against the history entry it speaks."""
+        self.outbound_audio_queue.put_nowait(self.playback.track(audio, message, text))
+        self.is_speaking = True
 
     def clear_buffer(self):
         self.audio_buffer = bytearray()
 
 
-def convert_ulaw_8k_to_linear16_16k(raw_ulaw: bytes) -> Optional[bytes]:
-    """
-    Twilio 8 kHz μ‑law -> 16‑bit PCM 16 kHz mono.
-    """
-    try:
-        if not raw_ulaw:
-            return None
-        linear_8k = audioop.ulaw2lin(raw_ulaw, SAMPLE_WIDTH)
-        audio_np = np.frombuffer(linear_8k, dtype=np.int16).astype(np.float32)
-
-        # Moderate gain for better speech detection without distortion
-        audio_np *= 3.0
-        audio_np = np.clip(audio_np, -32768, 32767)
-
-        # Resample 8k -> 16k
-        audio_16k = resample_poly(audio_np, up=2, down=1)
-        audio_16k = np.clip(audio_16k, -32768, 32767).astype(np.int16)
-
-        energy = float(np.sqrt(np.mean(audio_16k.astype(np.float32) ** 2)))
-        logger.info(f"Audio energy after amplification: {energy:.2f}")
-        if energy < 1.0:  # Very low threshold to catch quiet speech
-            logger.warning(f"Audio still too quiet after boost: {energy:.2f}")
-            return None
-
-        return audio_16k.tobytes()
-    except Exception as e:
-        logger.error(f"Error in audio conversion pipeline: {e}")
-        return None
-
-
 def amplify_audio(audio_bytes: bytes, factor: float = 2.0) -> bytes:
     """
     Amplify μ-law audio bytes by a given factor.
     """
     try:
-        # Convert μ-law to linear PCM
-        linear_pcm = audioop.ulaw2lin(audio_bytes, SAMPLE_WIDTH)
-        
-        # Convert to numpy array for easier manipulation
-        audio_array = np.frombuffer(linear_pcm, dtype=np.int16).astype(np.float32)
+        # Convert μ-law to linear PCM (numpy array for easier manipulation)
+        audio_array = ulaw_to_pcm16(audio_bytes).astype(np.float32)
         
         # Apply amplification
         audio_array *= factor
@@ -309,7 +301,7 @@ def amplify_audio(audio_bytes: bytes, factor: float = 2.0) -> bytes:
         amplified_linear = audio_array.astype(np.int16)
         
         # Convert back to μ-law
-        amplified_ulaw = audioop.lin2ulaw(amplified_linear.tobytes(), SAMPLE_WIDTH)
+        amplified_ulaw = pcm16_to_ulaw(amplified_linear).tobytes()
         
         return amplified_ulaw
     except Exception as e:
@@ -319,24 +311,12 @@ def amplify_audio(audio_bytes: bytes, factor: float = 2.0) -> bytes:
 
 def has_speech_bytes(audio_bytes: bytes, threshold: int = 50) -> bool:
     """
-    Simple energy-based VAD directly on μ‑law stream for barge‑in/buffer gating.
+    Stateless energy check on a μ‑law buffer (RMS above threshold).
+    Per-call streaming decisions use state.vad instead.
     """
-    try:
-        if not audio_bytes or len(audio_bytes) < 100:
-            return False
-
-        linear_pcm = audioop.ulaw2lin(audio_bytes, SAMPLE_WIDTH)
-        audio = np.frombuffer(linear_pcm, dtype=np.int16)
-        if len(audio) == 0:
-            return False
-        energy = float(np.sqrt(np.mean(audio.astype(np.float32) ** 2)))
-        print(f"Audio energy: {energy:.2f}, threshold: {threshold}")
-        # Use dynamic threshold based on calibration
-        return energy > threshold
-    except Exception as e:
-        print(f"Error in VAD: {e}")
-        # If we cannot determine, assume speech so we do not drop utterances
-        return True
+    if not audio_bytes or len(audio_bytes) < 100:
+        return False
+    return ulaw_rms(audio_bytes) > threshold
 
 
 async def monitor_silence(state: ConversationState):
@@ -381,7 +361,43 @@ async def monitor_silence(state: ConversationState):
     #     logger.error(f"Error in silence monitor: {e}")
 
 
-async def handle_transcript_event(transcript: str, is_final: bool, confidence: float, call_sid: str):
+def barge_in(state: ConversationState, reason: str):
+    """
+    Stop the agent talking because the caller started speaking.
+
+    Args:
+        state: Conversation state of the call
+        reason: What triggered it (for logging)
+    """
+    logger.info(f"🛑 Barge-in detected ({reason})")
+    state.barge_in_count += 1
+
+    # 1. Cancel the specific response generation task (and any speculation,
+    # which was prepared against history that is about to change)
+    state.speculator.cancel()
+    if state.current_response_task and not state.current_response_task.done():
+        state.current_response_task.cancel()
+        logger.info("❌ Cancelled previous response generation task")
+
+    # 2. Clear queued audio (Stop TTS playback immediately)
+    while not state.outbound_audio_queue.empty():
+        try:
+            state.outbound_audio_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+
+    # 3. Flush audio already handed to the playout task and clear Twilio's buffer
+    if state.interrupt_playback:
+        state.interrupt_playback()
+
+    # 4. Keep only what the caller actually heard in history
+    state.playback.interrupt()
+
+    # 5. Stop speaking state immediately (so we can listen)
+    state.is_speaking = False
+
+
+async def handle_transcript_event(transcript: str, is_final: bool, confidence: float, call_sid: str, speech_final: bool = False):
     state = active_conversations.get(call_sid)
     if not state:
         return
@@ -394,6 +410,16 @@ async def handle_transcript_event(transcript: str, is_final: bool, confidence: f
         logger.debug(f"📉 Ignoring low confidence ({confidence:.2f}) transcript: '{transcript}'")
         return
 
+    # Check if we are currently speaking OR generating a response
+    contact_active = state.is_speaking or (state.current_response_task and not state.current_response_task.done())
+
+    if not is_final and not contact_active:
+        # While the caller talks, interims hold back end of turn and prime a
+        # speculative turn on everything said so far
+        state.turn_detector.on_interim(transcript)
+        state.speculator.on_interim(state.turn_detector.extend(transcript), len(state.conversation_history))
+        return
+
     # Cancel silence timer if it's running (active user input)
     if state.silence_timer_task:
         state.silence_timer_task.cancel()
@@ -404,9 +430,6 @@ async def handle_transcript_event(transcript: str, is_final: bool, confidence: f
         state.reprompt_count = 0
 
     # Smart Barge-in Logic
-    # Check if we are currently speaking OR generating a response
-    contact_active = state.is_speaking or (state.current_response_task and not state.current_response_task.done())
-    
     if contact_active:
          is_long_enough = len(transcript.split()) >= 2
          
@@ -417,90 +440,62 @@ async def handle_transcript_event(transcript: str, is_final: bool, confidence: f
              logger.info(f"🛡️ Smart Barge-in: Ignoring '{transcript}' (Generic/Short) while speaking.")
              return
          
-         logger.info(f"🛑 Smart Barge-in detected! Transcript: '{transcript}'")
-         
-         # 1. Cancel the specific response generation task
-         if state.current_response_task and not state.current_response_task.done():
-             state.current_response_task.cancel()
-             logger.info("❌ Cancelled previous response generation task")
-         
-         # 2. Clear queued audio (Stop TTS playback immediately)
-         while not state.outbound_audio_queue.empty():
-             try:
-                 state.outbound_audio_queue.get_nowait()
-             except asyncio.QueueEmpty:
-                 break
+         # Interims can come from echo or line noise; only trust them if the
+         # VAD actually heard the caller (skipped until the VAD has seen audio)
+         since_speech = state.vad.ms_since_speech
+         if not is_final and state.vad.frames and (since_speech is None or since_speech > BARGE_IN_RECENT_SPEECH_MS):
+             logger.info(f"🛡️ Smart Barge-in: Ignoring '{transcript}' (no speech energy) while speaking.")
+             return
          
-         # 3. Stop speaking state immediately (so we can listen)
-         state.is_speaking = False
+         barge_in(state, f"transcript '{transcript}'")
+
+    if not is_final:
+        state.turn_detector.on_interim(transcript)
+        return  # Turns start once the end-of-turn detector commits
 
+    state.turn_detector.on_final(transcript, confidence, speech_final)
+
+
+async def handle_stt_event(event_type: str, call_sid: str):
+    """Deepgram turn-taking events (UtteranceEnd, SpeechStarted, SpeechFinal) -> end-of-turn detector."""
+    state = active_conversations.get(call_sid)
+    if not state:
+        return
+    if event_type == "UtteranceEnd":
+        state.turn_detector.on_utterance_end()
+    elif event_type == "SpeechStarted":
+        state.turn_detector.on_speech_started()
+    elif event_type == "SpeechFinal":
+        state.turn_detector.on_speech_final()
+
+
+async def _commit_turn(state: ConversationState, transcript: str, confidence: float):
+    """Start the response for a caller turn the end-of-turn detector has closed."""
+    if active_conversations.get(state.call_sid) is not state or state.conversation_ended:
+        return
     logger.info(f"🗣️ Handling Transcript: '{transcript}'")
     
     state.is_processing = True
+    # Reuse the speculative turn if it ran on (nearly) this transcript
+    speculation = state.speculator.take(transcript, len(state.conversation_history))
     # Start response generation (Cancel old one if exists - already done above, but safe to overwrite)
-    state.current_response_task = asyncio.create_task(_generate_and_stream_response(state, transcript))
+    state.current_response_task = asyncio.create_task(_generate_and_stream_response(state, transcript, speculation))
 
 
-async def calibrate_noise_floor(state: ConversationState, audio_bytes: bytes) -> float:
-    """
-    Calibrate noise floor based on first few seconds of audio with improved logic
-    
-    Args:
-        state: Conversation state containing calibration data
-        audio_bytes: Audio bytes to sample for calibration
-        
-    Returns:
-        float: Calculated noise floor threshold
-    """
-    try:
-        if not audio_bytes or len(audio_bytes) < 100:
-            return 50.0  # Lower default threshold
-            
-        linear_pcm = audioop.ulaw2lin(audio_bytes, SAMPLE_WIDTH)
-        audio = np.frombuffer(linear_pcm, dtype=np.int16)
-        if len(audio) == 0:
-            return 50.0  # Lower default threshold
-            
-        energy = float(np.sqrt(np.mean(audio.astype(np.float32) ** 2)))
-        
-        # Only calibrate during agent speaking to avoid using user speech as noise
-        if not state.is_speaking:
-            return state.noise_floor if state.calibration_complete else 50.0
-        
-        # Collect energy samples for calibration during agent speech
-        state.energy_samples.append(energy)
-        state.calibration_samples += 1
-        
-        # Complete calibration after 30 samples (approx 0.6 seconds)
-        if state.calibration_samples >= 30 and not state.calibration_complete:
-            # Calculate noise floor more conservatively
-            if len(state.energy_samples) > 5:
-                # Use 75th percentile instead of mean + 2*std to avoid outliers
-                state.noise_floor = np.percentile(state.energy_samples, 75)
-                # Cap the noise floor to prevent it from being too high
-                state.noise_floor = min(state.noise_floor, 200.0)
-                # Ensure reasonable minimum threshold
-                state.noise_floor = max(state.noise_floor, 30.0)
-                state.calibration_complete = True
-                logger.info(f"Calibration complete for call {state.call_sid}. Noise floor: {state.noise_floor:.2f}")
-            else:
-                # Fallback if not enough samples
-                state.noise_floor = 50.0
-                state.calibration_complete = True
-                
-        # Return current noise floor or default
-        return state.noise_floor if state.calibration_complete else 50.0
-        
-    except Exception as e:
-        logger.error(f"Error in noise floor calibration: {e}")
-        return 50.0  # Lower default threshold
-
+async def reset_speaking_state(state: ConversationState):
+    # Tracked speech: the playback tracker ends the turn when Twilio returns
+    # the last mark, i.e. when the caller has actually heard it
+    if state.playback.is_playing:
+        return
 
+    # Untracked audio (no marks will come back): fall back to a short delay
+    await asyncio.sleep(0.5)
+    if state.playback.is_playing:
+        return
+    _finish_speaking(state)
 
 
-async def reset_speaking_state(state: ConversationState):
-    await asyncio.sleep(0.5)
-    
+def _finish_speaking(state: ConversationState):
     # Safety Check: If a new response task is running, DO NOT reset speaking state
     if state.current_response_task and not state.current_response_task.done():
         logger.debug("Skipping speaking state reset - new task active")
@@ -521,104 +516,208 @@ async def register_calls(call_sid: str):
     from app.services.stt_service import register_transcript_handler
     
     # Bind the handler with the specific call_sid
-    async def bound_handler(text, final, conf):
-        await handle_transcript_event(text, final, conf, call_sid)
+    async def bound_handler(text, final, conf, speech_final=False):
+        await handle_transcript_event(text, final, conf, call_sid, speech_final)
+
+    async def bound_event_handler(event_type):
+        await handle_stt_event(event_type, call_sid)
         
-    register_transcript_handler(call_sid, bound_handler)
+    register_transcript_handler(call_sid, bound_handler, on_event=bound_event_handler)
 
 
-async def _generate_and_stream_response(state: ConversationState, transcript: str):
+def _start_agent_init(state: ConversationState) -> asyncio.Task:
+    """Fetch and set up the call's agent once; concurrent callers share the task (a failed one is retried)."""
+    if state.agent_init_task is None or (state.agent_init_task.done() and not state.autonomous_agent):
+        state.agent_init_task = asyncio.create_task(_init_agent(state))
+    return state.agent_init_task
+
+
+async def _init_agent(state: ConversationState):
+    """Load the custom agent, inject call context and apply its turn-detection settings."""
+    try:
+        logger.info(f"🔄 Lazily initializing Autonomous Agent: {state.custom_agent_id}")
+        custom_agent = await _fetch_custom_agent(state.custom_agent_id)
+        
+        if custom_agent:
+            state.autonomous_agent = create_agent(custom_agent)
+            state.autonomous_agent.conversation_history = state.conversation_history
+            
+            # INJECT CAMPAIGN GOAL
+            if state.goal:
+                state.autonomous_agent.config.primary_goal = state.goal
+                logger.info(f"🎯 Overrode agent goal with campaign goal: {state.goal}")
+            
+            # INJECT IDEAL CUSTOMER PROFILE
+            if state.ideal_customer_description:
+                state.autonomous_agent.current_context["ideal_customer_profile"] = state.ideal_customer_description
+                logger.info(f"👥 Injected ICP into agent context: {state.ideal_customer_description[:100]}...")
+            
+            # INJECT CALL SID into context for tools
+            state.autonomous_agent.current_context["call_sid"] = state.call_sid
+            state.autonomous_agent.current_context["campaign_id"] = state.campaign_id
+            state.autonomous_agent.current_context["lead_id"] = state.lead_id
+            state.autonomous_agent.current_context["phone_number"] = state.phone_number
+            
+            # Caller's end-of-turn thresholds for this agent
+            state.turn_detector.configure(TurnDetectionConfig.from_dict(custom_agent.turn_detection))
+            
+            logger.info(f"✅ Agent '{custom_agent.name}' initialized ({len(state.conversation_history)} history items)")
+        else:
+            logger.error(f"❌ Failed to fetch custom agent: {state.custom_agent_id}")
+            
+    except Exception as e:
+        logger.error(f"❌ Error initializing autonomous agent: {e}", exc_info=True)
+
+
+async def _prepare_turn_context(state: ConversationState, transcript: str) -> str:
+    """
+    Everything a turn needs before generation: the agent (initialized on
+    first use), RAG context for the transcript, lead purpose, goal and ICP.
+
+    Returns:
+        str: Context block for the prompt
+    """
+    # --- 1. Lazy Initialization of Autonomous Agent ---
+    if not state.autonomous_agent and state.custom_agent_id:
+        # Usually already started with the media stream (process_audio_chunk)
+        await asyncio.shield(_start_agent_init(state))
+    elif not state.custom_agent_id:
+        logger.warning(f"⚠️ No custom_agent_id provided - cannot initialize autonomous agent")
+    
+    # --- 2. RAG Context Retrieval ---
+    rag_context = ""
+    client_id_for_rag = state.campaign_id or state.custom_agent_id
+    
+    if client_id_for_rag:
+        try:
+            logger.info(f"🔍 Fetching RAG context for ID: {client_id_for_rag}")
+            rag_context_list = await asyncio.to_thread(
+                get_relevant_context, 
+                query=transcript, 
+                client_id=client_id_for_rag
+            )
+            if rag_context_list:
+                rag_context = "\n\n".join(rag_context_list)
+                logger.info(f"📚 RAG Context Found: {len(rag_context)} chars")
+        except Exception as e:
+            logger.error(f"Error fetching RAG context: {e}")
+    
+    # --- 2.5. Fetch Lead Purpose ---
+    if state.lead_id:
+        try:
+            from app.database.firestore import db
+            lead_doc = db.collection('leads').document(state.lead_id).get()
+            if lead_doc.exists:
+                from app.models.lead import Lead
+                lead = Lead.from_dict(lead_doc.to_dict(), lead_doc.id)
+                lead_purpose = lead.purpose
+                
+                if lead.name:
+                    state.lead_name = lead.name
+                    logger.info(f"📋 Lead Name: {lead.name}")
+                    rag_context = f"LEAD NAME: {lead.name}\n{rag_context}"
+
+                if lead_purpose:
+                    logger.info(f"📋 Lead Purpose: {lead_purpose}")
+                    rag_context = f"CALL PURPOSE: {lead_purpose}\n\n{rag_context}"
+            
+            # Add campaign goal and ICP to context
+            if state.goal:
+                rag_context = f"CAMPAIGN GOAL: {state.goal}\n\n{rag_context}"
+                logger.info(f"🎯 Added campaign goal to context: {state.goal}")
+            
+            if state.ideal_customer_description:
+                rag_context = f"IDEAL CUSTOMER PROFILE: {state.ideal_customer_description}\n\n{rag_context}"
+                logger.info(f"👥 Added ICP to context: {state.ideal_customer_description[:100]}...")
+        except Exception as e:
+            logger.error(f"Error fetching lead purpose: {e}")
+
+    return rag_context
+
+
+def _ensure_executor(state: ConversationState):
+    """Create the call's AgentExecutor (intelligent tool calling) on first use."""
+    from app.agent.autonomous.executor import AgentExecutor
+
+    if state.executor is None:
+        state.executor = AgentExecutor(state.autonomous_agent.config)
+        logger.info("✅ Created AgentExecutor for intelligent tool calling")
+    return state.executor
+
+
+def _executor_context(state: ConversationState, rag_context: str, history: List[Dict[str, str]], speaker: Optional[ResponseSpeaker] = None) -> Dict[str, Any]:
+    """Context passed to the AgentExecutor for one turn."""
+    return {
+        "goal": state.goal or "",
+        "rag_context": rag_context,
+        "history": history,
+        "call_sid": state.call_sid,
+        "campaign_id": state.campaign_id,
+        "lead_id": state.lead_id,
+        "phone_number": state.phone_number,
+        "lead_name": state.lead_name,
+        "agent_name": state.autonomous_agent.config.name if state.autonomous_agent.config else "Assistant",
+        # Speaks tool responses sentence by sentence straight into the outbound queue
+        "speaker": speaker
+    }
+
+
+def _legacy_response_stream(state: ConversationState, transcript: str, history: List[Dict[str, str]], rag_context: str):
+    """LLM token stream for calls without an autonomous agent."""
+    return generate_response_stream(
+        transcript=transcript, 
+        goal=state.goal or "Assist the user",
+        history=history,
+        context=rag_context,
+        personality="helpful",
+        company_name="our company",
+        system_prompt="You are a helpful assistant.",
+        agent_name="Assistant"
+    )
+
+
+async def _prepare_speculation(state: ConversationState, transcript: str) -> Tuple[str, PrefetchedStream]:
+    """
+    Speculative half of a turn, run on a stable interim transcript: context
+    retrieval and the LLM stream, buffered until the final transcript decides.
+    Uses the same inputs the committed turn would (see _generate_and_stream_response).
+    """
+    history = state.history_manager.window()
+    rag_context = await _prepare_turn_context(state, transcript)
+    if state.autonomous_agent:
+        executor = _ensure_executor(state)
+        source = executor.tool_decision_stream(transcript, _executor_context(state, rag_context, history))
+    else:
+        source = _legacy_response_stream(state, transcript, history, rag_context)
+    return rag_context, PrefetchedStream(source)
+
+
+async def _generate_and_stream_response(state: ConversationState, transcript: str, speculation: Optional[SpeculativeTurn] = None):
     """
     Helper task to generate LLM response and stream TTS.
     Designed to be cancellable.
+
+    Args:
+        state: Conversation state of the call
+        transcript: Final transcript of the caller's turn
+        speculation: Matching speculative turn whose context and LLM stream are reused
     """
     full_response_text = ""  # Initialize at the top
-    
+
+    # Record the caller's turn: prompts replay history as chat messages, so
+    # each turn's prompt extends the previous one (see app.services.prompt_compiler)
+    state.add_message("user", transcript)
+    # Recent turns within the token budget, older ones as a rolling summary
+    history = state.history_manager.window()
+
     try:
         logger.info(f"🤖 Generating Streaming AI Response...")
         
-        # --- 1. Lazy Initialization of Autonomous Agent ---
-        if not state.autonomous_agent and state.custom_agent_id:
-            try:
-                logger.info(f"🔄 Lazily initializing Autonomous Agent: {state.custom_agent_id}")
-                custom_agent = await _fetch_custom_agent(state.custom_agent_id)
-                
-                if custom_agent:
-                    state.autonomous_agent = create_agent(custom_agent)
-                    state.autonomous_agent.conversation_history = state.conversation_history
-                    
-                    # INJECT CAMPAIGN GOAL
-                    if state.goal:
-                        state.autonomous_agent.config.primary_goal = state.goal
-                        logger.info(f"🎯 Overrode agent goal with campaign goal: {state.goal}")
-                    
-                    # INJECT IDEAL CUSTOMER PROFILE
-                    if state.ideal_customer_description:
-                        state.autonomous_agent.current_context["ideal_customer_profile"] = state.ideal_customer_description
-                        logger.info(f"👥 Injected ICP into agent context: {state.ideal_customer_description[:100]}...")
-                    
-                    # INJECT CALL SID into context for tools
-                    state.autonomous_agent.current_context["call_sid"] = state.call_sid
-                    state.autonomous_agent.current_context["campaign_id"] = state.campaign_id
-                    state.autonomous_agent.current_context["lead_id"] = state.lead_id
-                    state.autonomous_agent.current_context["phone_number"] = state.phone_number
-                    
-                    logger.info(f"✅ Agent '{custom_agent.name}' initialized ({len(state.conversation_history)} history items)")
-                else:
-                    logger.error(f"❌ Failed to fetch custom agent: {state.custom_agent_id}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error initializing autonomous agent: {e}", exc_info=True)
-        elif not state.custom_agent_id:
-            logger.warning(f"⚠️ No custom_agent_id provided - cannot initialize autonomous agent")
-        
-        # --- 2. RAG Context Retrieval ---
-        rag_context = ""
-        client_id_for_rag = state.campaign_id or state.custom_agent_id
-        
-        if client_id_for_rag:
-            try:
-                logger.info(f"🔍 Fetching RAG context for ID: {client_id_for_rag}")
-                rag_context_list = await asyncio.to_thread(
-                    get_relevant_context, 
-                    query=transcript, 
-                    client_id=client_id_for_rag
-                )
-                if rag_context_list:
-                    rag_context = "\n\n".join(rag_context_list)
-                    logger.info(f"📚 RAG Context Found: {len(rag_context)} chars")
-            except Exception as e:
-                logger.error(f"Error fetching RAG context: {e}")
-        
-        # --- 2.5. Fetch Lead Purpose ---
-        if state.lead_id:
-            try:
-                from app.database.firestore import db
-                lead_doc = db.collection('leads').document(state.lead_id).get()
-                if lead_doc.exists:
-                    from app.models.lead import Lead
-                    lead = Lead.from_dict(lead_doc.to_dict(), lead_doc.id)
-                    lead_purpose = lead.purpose
-                    
-                    if lead.name:
-                        state.lead_name = lead.name
-                        logger.info(f"📋 Lead Name: {lead.name}")
-                        rag_context = f"LEAD NAME: {lead.name}\n{rag_context}"
-
-                    if lead_purpose:
-                        logger.info(f"📋 Lead Purpose: {lead_purpose}")
-                        rag_context = f"CALL PURPOSE: {lead_purpose}\n\n{rag_context}"
-                
-                # Add campaign goal and ICP to context
-                if state.goal:
-                    rag_context = f"CAMPAIGN GOAL: {state.goal}\n\n{rag_context}"
-                    logger.info(f"🎯 Added campaign goal to context: {state.goal}")
-                
-                if state.ideal_customer_description:
-                    rag_context = f"IDEAL CUSTOMER PROFILE: {state.ideal_customer_description}\n\n{rag_context}"
-                    logger.info(f"👥 Added ICP to context: {state.ideal_customer_description[:100]}...")
-            except Exception as e:
-                logger.error(f"Error fetching lead purpose: {e}")
+        prepared = await speculation.result() if speculation else None
+        if prepared:
+            rag_context, llm_stream = prepared
+        else:
+            rag_context, llm_stream = await _prepare_turn_context(state, transcript), None
 
         # --- 3. Response Generation ---
         provider = "cartesia"
@@ -628,25 +727,13 @@ async def _generate_and_stream_response(state: ConversationState, transcript: st
         
         if state.autonomous_agent:
             # --- INTELLIGENT AGENT WITH TOOL CALLING ---
-            from app.agent.autonomous.executor import AgentExecutor
-            
-            # Create executor if not exists
-            if state.executor is None:
-                state.executor = AgentExecutor(state.autonomous_agent.config)
-                logger.info("✅ Created AgentExecutor for intelligent tool calling")
-            
+            _ensure_executor(state)
+            speaker = ResponseSpeaker(state, provider)
+
             # Build context for executor
-            executor_context = {
-                "goal": state.goal or "",
-                "rag_context": rag_context,
-                "history": state.conversation_history,
-                "call_sid": state.call_sid,
-                "campaign_id": state.campaign_id,
-                "lead_id": state.lead_id,
-                "phone_number": state.phone_number,
-                "lead_name": state.lead_name,
-                "agent_name": state.autonomous_agent.config.name if state.autonomous_agent.config else "Assistant"
-            }
+            executor_context = _executor_context(state, rag_context, history, speaker)
+            if llm_stream is not None:
+                executor_context["decision_stream"] = llm_stream
             
             # Execute with intelligence (supports tools)
             action_result = await state.executor.execute_with_intelligence(
@@ -666,10 +753,9 @@ async def _generate_and_stream_response(state: ConversationState, transcript: st
                         logger.info(f"🔵 AI ending call - Reason: {output.get('reason')}")
                         final_text = output.get("text", "Thank you for your time. Goodbye!")
                         final_audio = output.get("audio")
-                        state.add_message("assistant", final_text)
+                        message = speaker.message if speaker.spoke else state.add_message("assistant", final_text)
                         if final_audio:
-                            state.outbound_audio_queue.put_nowait(final_audio)
-                            state.is_speaking = True
+                            state.queue_speech(final_audio, message)
                         state.conversation_ended = True
                         if state.is_speaking:
                             asyncio.create_task(reset_speaking_state(state))
@@ -678,10 +764,9 @@ async def _generate_and_stream_response(state: ConversationState, transcript: st
                         logger.info(f"📞 AI scheduled callback - Delay: {action_result.metadata.get('delay_minutes')} min")
                         confirmation_text = output.get("text", "I'll call you back soon.")
                         confirmation_audio = output.get("audio")
-                        state.add_message("assistant", confirmation_text)
+                        message = speaker.message if speaker.spoke else state.add_message("assistant", confirmation_text)
                         if confirmation_audio:
-                            state.outbound_audio_queue.put_nowait(confirmation_audio)
-                            state.is_speaking = True
+                            state.queue_speech(confirmation_audio, message)
                         state.conversation_ended = True
                         if state.is_speaking:
                             asyncio.create_task(reset_speaking_state(state))
@@ -690,10 +775,9 @@ async def _generate_and_stream_response(state: ConversationState, transcript: st
                         logger.info(f"👤 AI transferring to human - Urgency: {output.get('urgency')}")
                         transfer_text = output.get("text", "Let me connect you with a specialist.")
                         transfer_audio = output.get("audio")
-                        state.add_message("assistant", transfer_text)
+                        message = speaker.message if speaker.spoke else state.add_message("assistant", transfer_text)
                         if transfer_audio:
-                            state.outbound_audio_queue.put_nowait(transfer_audio)
-                            state.is_speaking = True
+                            state.queue_speech(transfer_audio, message)
                         state.conversation_ended = True
                         if state.is_speaking:
                             asyncio.create_task(reset_speaking_state(state))
@@ -701,10 +785,9 @@ async def _generate_and_stream_response(state: ConversationState, transcript: st
                     elif tool_name == "continue_conversation":
                         response_text = output.get("text", "I understand.")
                         response_audio = output.get("audio")
-                        state.add_message("assistant", response_text)
+                        message = speaker.message if speaker.spoke else state.add_message("assistant", response_text)
                         if response_audio:
-                            state.outbound_audio_queue.put_nowait(response_audio)
-                            state.is_speaking = True
+                            state.queue_speech(response_audio, message)
                         if state.is_speaking:
                             asyncio.create_task(reset_speaking_state(state))
                 
@@ -712,55 +795,37 @@ async def _generate_and_stream_response(state: ConversationState, transcript: st
                     # Regular text response (no tool)
                     response_text = output.get("text", "")
                     response_audio = output.get("audio")
-                    if response_text:
-                        state.add_message("assistant", response_text)
+                    if response_text and not speaker.spoke:
+                        message = state.add_message("assistant", response_text)
+                        if not response_audio:
+                            # TTS failed: play a cached clip rather than dead air
+                            response_audio = prompt_audio_bank.get("processing_trouble")
                         if response_audio:
-                            state.outbound_audio_queue.put_nowait(response_audio)
-                            state.is_speaking = True
-                        if state.is_speaking:
-                            asyncio.create_task(reset_speaking_state(state))
+                            state.queue_speech(response_audio, message)
+                    if state.is_speaking:
+                        asyncio.create_task(reset_speaking_state(state))
             
             else:
                 # Action failed
                 logger.error(f"Action execution failed: {action_result.error}")
-                fallback_text = "I apologize, I'm having trouble processing that."
-                state.add_message("assistant", fallback_text)
-                from app.services.tts_service import synthesize_speech_with_provider
-                fallback_audio = await synthesize_speech_with_provider(provider, fallback_text)
+                fallback_text = prompt_audio_bank.text("processing_trouble")
+                message = state.add_message("assistant", fallback_text)
+                fallback_audio = prompt_audio_bank.get("processing_trouble")
                 if fallback_audio:
-                    state.outbound_audio_queue.put_nowait(fallback_audio)
-                    state.is_speaking = True
+                    state.queue_speech(fallback_audio, message)
                 if state.is_speaking:
                     asyncio.create_task(reset_speaking_state(state))
 
         else:
             # Fallback for non-autonomous mode (legacy)
-            ai_text = generate_response(
-                transcript=transcript, 
-                goal=state.goal or "Assist the user",
-                history=state.conversation_history,
-                context=rag_context,
-                personality="helpful",
-                company_name="our company",
-                system_prompt="You are a helpful assistant.",
-                agent_name="Assistant"
-            )
-            if ai_text:
-                full_response_text = ai_text
-                state.add_message("assistant", ai_text)
-                
-                # Streaming TTS Fallback
-                from app.services.tts_service import synthesize_speech_stream
-                
-                async for chunk in synthesize_speech_stream(provider, ai_text):
-                     if chunk:
-                          state.outbound_audio_queue.put_nowait(chunk)
-                          if not state.is_speaking:
-                               state.is_speaking = True
-                
-                # Reset speaking state after stream completes
-                if state.is_speaking:
-                     asyncio.create_task(reset_speaking_state(state))
+            # Tokens are spoken sentence by sentence while the LLM is still writing
+            speaker = ResponseSpeaker(state, provider)
+            tokens = llm_stream or _legacy_response_stream(state, transcript, history, rag_context)
+            await speaker.speak(tokens)
+            
+            # Reset speaking state after stream completes
+            if state.is_speaking:
+                 asyncio.create_task(reset_speaking_state(state))
         
     except asyncio.CancelledError:
         logger.info("🚫 Response generation cancelled")
@@ -776,21 +841,28 @@ async def _generate_and_stream_response(state: ConversationState, transcript: st
                  
              error_msg = "I'm having a bit of trouble, please give me a moment."
              from app.services.tts_service import synthesize_speech
-             audio = await synthesize_speech(error_msg)
+             audio = await synthesize_speech(error_msg, output_format=MULAW_8K)
              if audio:
-                  state.outbound_audio_queue.put_nowait(audio)
+                  state.queue_speech(audio)
         except:
              pass
     finally:
+        if speculation is not None:
+            speculation.cancel()  # Stops a speculative LLM stream nobody read to the end
         state.is_processing = False
         state.current_response_task = None
+        # Fold turns that left the window into the summary, off the turn path
+        state.history_manager.maybe_summarize()
 
 
-async def process_audio_chunk(audio_bytes: bytes, call_sid: str) -> Optional[bytes]:
+async def process_audio_chunk(audio_bytes: bytes, call_sid: str, pull_outbound: bool = True) -> Optional[bytes]:
     """
     Non-blocking main loop handler.
     1. Pushes inbound audio to STT stream.
     2. checks outbound queue for TTS audio to send back.
+
+    pull_outbound=False leaves queued TTS audio where it is (the caller's
+    playout has no room for it yet).
     """
     try:
         # Get or create state
@@ -809,6 +881,11 @@ async def process_audio_chunk(audio_bytes: bytes, call_sid: str) -> Optional[byt
             # Fallback if attribute missing (shouldn't happen with updated class, but safe)
             await register_calls(call_sid)
             state.is_signal_connected = True
+
+        # Load the agent while the caller is still talking: its turn-detection
+        # thresholds apply to the first turn and the first reply skips the fetch
+        if not state.autonomous_agent and state.custom_agent_id and state.agent_init_task is None:
+            _start_agent_init(state)
             
 
         
@@ -825,7 +902,18 @@ async def process_audio_chunk(audio_bytes: bytes, call_sid: str) -> Optional[byt
         # Send raw mulaw audio (Deepgram is configured for it)
         await stream_audio_packet("deepgram", audio_bytes, call_sid)
 
-        # 2. Check Outbound Queue (Non-blocking pop)
+        # 2. Frame-level VAD: barge in on sustained caller speech without
+        # waiting for a transcript
+        vad_event = state.vad.process(audio_bytes)
+        if vad_event:
+            logger.debug(f"🎙️ VAD {vad_event} (level {state.vad.level_db:.1f} dB, noise {state.vad.noise_db:.1f} dB)")
+        if state.is_speaking and state.vad.speech_ms >= BARGE_IN_SPEECH_MS:
+            barge_in(state, f"VAD, {state.vad.speech_ms} ms of caller speech")
+            return None
+
+        # 3. Check Outbound Queue (Non-blocking pop)
+        if not pull_outbound:
+            return None
         try:
             # Get data if available immediately
             outbound_chunk = state.outbound_audio_queue.get_nowait()
@@ -835,307 +923,12 @@ async def process_audio_chunk(audio_bytes: bytes, call_sid: str) -> Optional[byt
             # Nothing to say essentially
             return None
 
-        except Exception as e:
-            logger.error(f"Error in process_audio_chunk: {e}")
-            return None
-
-        # Initial greeting - personalized to agent
-        if state.needs_greeting and state.first_interaction:
-            state.needs_greeting = False
-            state.first_interaction = False
-            state.is_speaking = True
-            
-            # Get agent name and company for personalized greeting
-            agent_name = "there"
-            company_name = "our company"
-            agent_goal = state.goal or "assist you"  # Use campaign goal first
-            
-            if state.autonomous_agent and state.autonomous_agent.config:
-                agent_name = state.autonomous_agent.config.name or "there"
-                company_name = state.autonomous_agent.config.company_name or "our company"
-                # Use campaign goal if available, otherwise use agent's primary goal
-                if not state.goal:
-                    agent_goal = state.autonomous_agent.config.primary_goal or "assist you"
-            
-            # Generate natural greeting based on goal type
-            greeting = _generate_natural_greeting(agent_name, company_name, agent_goal, state.lead_name)
-            
-            logger.info(f"Sending personalized greeting: {greeting}")
-            try:
-                tts_audio = await synthesize_speech_with_provider("cartesia", greeting)
-                if tts_audio:
-                    state.add_message("assistant", greeting)
-                    asyncio.create_task(reset_speaking_state(state))
-                    return tts_audio
-            except Exception as e:
-                logger.error(f"Error generating greeting: {e}")
-            finally:
-                state.is_speaking = False
-
-        # Barge‑in detection while AI speaking - simplified and more reliable
-        if state.is_speaking:
-            # Calibrate noise floor dynamically during agent speech
-            dynamic_threshold = await calibrate_noise_floor(state, audio_bytes)
-            # Use 2x the noise floor for barge-in detection (less aggressive)
-            barge_in_threshold = max(dynamic_threshold * 2, 100)
-            
-            if has_speech_bytes(audio_bytes, threshold=barge_in_threshold):
-                state.barge_in_count += 1
-                # Require ~0.4s of continuous speech (assuming 20ms chunks -> 20 chunks)
-                if state.barge_in_count > 20:
-                    logger.info("Barge-In Detected! User interrupted AI.")
-                    state.is_speaking = False
-                    state.clear_buffer()
-                    state.barge_in_count = 0
-                    await asyncio.sleep(0.1)
-                    state.audio_buffer.extend(audio_bytes)
-                    state.last_audio_time = time.time()
-                    return "interrupt"  # Return interrupt signal
-            else:
-                # Decay the counter if silence
-                state.barge_in_count = max(0, state.barge_in_count - 1)
-                return None
-
-        if state.processing:
-            return None
-
-        # Accumulate raw μ‑law from Twilio
-        state.audio_buffer.extend(audio_bytes)
-        current_time = time.time()
-        time_since_last = current_time - state.last_audio_time
-
-        if len(state.audio_buffer) > MAX_BUFFER_SIZE:
-            logger.warning("Audio buffer overflow - clearing buffer")
-            state.clear_buffer()
-            return None
-
-        has_enough = len(state.audio_buffer) >= MIN_AUDIO_LENGTH
-        silence = time_since_last >= SILENCE_TIMEOUT and len(state.audio_buffer) > 800
-        force_process = len(state.audio_buffer) >= int(MAX_BUFFER_SIZE * 0.9)
-
-        if not has_enough and not silence and not force_process:
-            state.last_audio_time = current_time
-            return None
-
-        if len(state.audio_buffer) < 800:
-            state.last_audio_time = current_time
-            return None
-
-        # Basic VAD on raw μ‑law with conservative threshold
-        # Use fixed threshold during user speech to avoid blocking legitimate speech
-        speech_threshold = 50  # Fixed low threshold for user speech detection
-        
-        if not has_speech_bytes(state.audio_buffer, threshold=speech_threshold):
-            logger.debug("Audio buffer detected as silence/noise; skipping processing")
-            state.clear_buffer()
-            state.processing = False
-            state.last_audio_time = current_time
-            return None
-
-        state.processing = True
-        state.last_audio_time = current_time
-
-        logger.info(f"Processing audio buffer: {len(state.audio_buffer)} bytes")
-
-        raw_ulaw = bytes(state.audio_buffer)
-        
-        # Pass raw mu-law audio directly to Deepgram to reduce latency and CPU usage
-        # Deepgram is now configured to accept encoding=mulaw sample_rate=8000
-        linear_pcm_bytes = raw_ulaw
-
-        if not linear_pcm_bytes:
-            state.clear_buffer()
-            state.processing = False
-            return None
-
-        # ---------------- STT MAIN CALL ----------------
-        stt_provider = "deepgram"  # Only supported provider now
-        tts_provider = "cartesia"
-        llm_provider = "deepseek-v3"
-
-        user_text: Optional[str] = None
-
-        try:
-            user_text = await asyncio.wait_for(
-                transcribe_audio_with_provider(stt_provider, linear_pcm_bytes, call_sid),
-                timeout=STT_TIMEOUT,
-            )
-        except asyncio.TimeoutError:
-            logger.error(f"STT timeout with {stt_provider}")
-            # Don't speak error message, just log and return empty
-            state.clear_buffer()
-            state.processing = False
-            return b""
-
-        # If still nothing recognized, optionally reprompt on long silence
-        if not user_text:
-            state.consecutive_empty_transcripts += 1
-            
-            # Use varied reprompt messages based on consecutive failure count
-            if state.consecutive_empty_transcripts == 1:
-                reprompt = "Sorry about that—could be the connection. Let's try again. Could you please speak a bit louder?"
-            elif state.consecutive_empty_transcripts == 2:
-                reprompt = "I'm still having trouble hearing you. Mind speaking a bit louder or moving to a quieter place?"
-            elif state.consecutive_empty_transcripts == 3:
-                reprompt = "I'm still having difficulty understanding. Would you like me to connect you to a live agent?"
-            elif state.consecutive_empty_transcripts == 4:
-                reprompt = "I'm unable to understand your speech. Connecting you to a live agent now."
-            else:
-                # More varied and empathetic reprompt messages
-                reprompts = [
-                    "I didn't catch that. Could you please repeat what you said?",
-                    "Sorry, I'm having trouble hearing you. Could you speak a bit louder?",
-                    "I'm not picking that up clearly. Mind trying again?",
-                    "Could you please say that one more time?",
-                    "I'm having some difficulty understanding. Would you mind rephrasing?",
-                    "Sorry about that—let's try this again. What were you saying?",
-                    "I missed that. Can you please speak a little more clearly?"
-                ]
-                reprompt = random.choice(reprompts)
-                
-            state.clear_buffer()
-            state.processing = False
-            tts_audio = await synthesize_speech_with_provider(tts_provider, reprompt)
-            if tts_audio:
-                state.is_speaking = True
-                return tts_audio
-
-            if time_since_last >= SILENCE_TIMEOUT * 2:
-                logger.info("Long silence detected, sending reprompt")
-                state.clear_buffer()
-                state.processing = False
-                reprompt = "Hello! Are you still there? How can I help you today?"
-                tts_audio = await synthesize_speech_with_provider(tts_provider, reprompt)
-                if tts_audio:
-                    state.is_speaking = True
-                    return tts_audio
-            state.clear_buffer()
-            state.processing = False
-            return None
-            
-        # Success - reset empty counter
-        state.consecutive_empty_transcripts = 0
-
-        print(f"User: {user_text}")
-        state.add_message("user", user_text)
-
-        # -------------- AUTONOMOUS AGENT PROCESSING -------------------
-        try:
-            # Get relevant context if available (synchronous call)
-            context = ""
-            rag_client_id = state.custom_agent_id or state.campaign_id
-            
-            if rag_client_id:
-                try:
-                    # get_relevant_context is synchronous, no await needed
-                    # Prioritize agent ID for RAG as memory is likely attached to agent
-                    context_list = get_relevant_context(user_text, str(rag_client_id))
-                    # Join the list of context strings into a single string
-                    if context_list and isinstance(context_list, list):
-                        context = "\n".join(context_list)
-                        if context:
-                            logger.info(f"Retrieved RAG context for client {rag_client_id}: {len(context)} chars")
-                        else:
-                            logger.info(f"No RAG context found for client {rag_client_id}")
-                    else:
-                        logger.info(f"No RAG context list returned for client {rag_client_id}")
-                        # Try with campaign ID as fallback if we used custom_agent_id
-                        if state.custom_agent_id and state.campaign_id:
-                            logger.info(f"Trying fallback with campaign ID: {state.campaign_id}")
-                            context_list = get_relevant_context(user_text, str(state.campaign_id))
-                            if context_list and isinstance(context_list, list):
-                                context = "\n".join(context_list)
-                                if context:
-                                    logger.info(f"Retrieved RAG context with fallback for campaign {state.campaign_id}: {len(context)} chars")
-                except Exception as e:
-                    logger.error(f"Error getting context for client {rag_client_id}: {e}")
-                    logger.error(f"Error details: {str(e)}", exc_info=True)
-
-            # Prepare conversation history
-            full_history = state.conversation_history[-MAX_HISTORY_MESSAGES:]
-
-            # Log context being sent to agent
-            if context and context.strip():
-                logger.info(f"Sending RAG context to agent: {len(context)} chars")
-            else:
-                logger.info("No RAG context being sent to agent")
-
-            # Use autonomous agent to process input
-            logger.info("Processing with autonomous agent")
-            try:
-                ai_text = await asyncio.wait_for(
-                    state.autonomous_agent.process_user_input(
-                        user_text=user_text,
-                        context=context,
-                        history=full_history
-                    ),
-                    timeout=LLM_TIMEOUT,
-                )
-            except asyncio.TimeoutError:
-                logger.error("Agent processing timeout")
-                ai_text = "I apologize, I need a moment. Could you please repeat that?"
-            except Exception as e:
-                logger.error(f"Agent processing error: {e}")
-                # Fallback to direct LLM if agent fails
-                ai_text = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        generate_response,
-                        user_text,
-                        goal=state.goal or "Answer customer questions",
-                        history=full_history,
-                        context=context,
-                        personality="professional",
-                        company_name="our company"
-                    ),
-                    timeout=LLM_TIMEOUT,
-                )
-
-            if not ai_text:
-                ai_text = (
-                    "I am sorry, I could not understand that. "
-                    "Could you please repeat?"
-                )
-
-            state.add_message("assistant", ai_text)
-            print(f"AI: {ai_text}")
-            logger.info(f"AI: {ai_text}")
-
-            tts_audio = await asyncio.wait_for(
-                synthesize_speech_with_provider(tts_provider, ai_text),
-                timeout=TTS_TIMEOUT,
-            )
-
-            state.is_speaking = True
-            state.clear_buffer()
-            state.processing = False
-
-            if tts_audio:
-                asyncio.create_task(reset_speaking_state(state))
-                return tts_audio
-            else:
-                return b""
-
-        except asyncio.TimeoutError:
-            logger.error("LLM or TTS timeout")
-            state.clear_buffer()
-            state.processing = False
-            return b""
-
-        except Exception as e:
-            logger.error(f"Error in processing: {e}")
-            state.clear_buffer()
-            state.processing = False
-            return b""
-
     except Exception as e:
         logger.error(f"Error in process_audio_chunk: {e}", exc_info=True)
         # Try to generate an error message for the user
         try:
-            # synthesize_speech_with_provider is already imported at top level
-            error_msg = "I'm sorry, I encountered an unexpected error. Please try again."
-            # Run TTS in a separate task to avoid blocking
-            tts_task = asyncio.create_task(synthesize_speech_with_provider("cartesia", error_msg))
-            tts_audio = await tts_task
+            # Pre-rendered clip, so this works even when TTS is the failure
+            tts_audio = prompt_audio_bank.get("unexpected_error")
             return tts_audio if tts_audio else b""
         except Exception as tts_error:
             logger.error(f"Error generating error TTS: {tts_error}")
@@ -1229,8 +1022,14 @@ def cleanup_conversation(call_sid: str):
     print(f"Exporting conversation: {call_sid}")
     print(f"{'=' * 60}")
 
+    cartesia_sessions.close(call_sid)
+    release_stream(call_sid)
+
     if call_sid in active_conversations:
         state = active_conversations[call_sid]
+        state.history_manager.close()
+        state.speculator.cancel()
+        state.turn_detector.cancel()
         history = memory_store.get_history(call_sid)
 
         try:
@@ -1306,7 +1105,20 @@ async def trigger_outbound_greeting(call_sid: str) -> Optional[bytes]:
         return None
 
     logger.info(f"📢 Triggering outbound greeting for {call_sid}")
-    
+    state.needs_greeting = False  # Claim it before awaiting so it is only sent once
+
+    # 0. Greeting pre-synthesized by the lead caller while the phone was ringing
+    from app.services.greeting_cache import greeting_cache
+    prepared = await greeting_cache.take(state.lead_id, state.campaign_id, timeout=GREETING_PRERENDER_WAIT)
+    if prepared and prepared.audio:
+        logger.info(f"⚡ Using pre-synthesized greeting for {call_sid}")
+        state.first_interaction = False
+        state.is_speaking = True
+        message = state.add_message("assistant", prepared.text)
+        state.queue_speech(prepared.audio, message)
+        asyncio.create_task(reset_speaking_state(state))
+        return prepared.audio
+
     # 1. Determine Agent & Goal context
     agent_name = "there" 
     company_name = "our company"
@@ -1316,14 +1128,14 @@ async def trigger_outbound_greeting(call_sid: str) -> Optional[bytes]:
     if state.autonomous_agent and state.autonomous_agent.config:
         agent_name = state.autonomous_agent.config.name or "there"
         company_name = state.autonomous_agent.config.company_name or "our company"
-        voice_id = state.autonomous_agent.config.voice_id # Fetch configured voice ID
+        voice_id = getattr(state.autonomous_agent.config, "voice_id", None) # Fetch configured voice ID
         
         # If no specific campaign goal, use agent's primary goal
         if not state.goal:
              agent_goal = state.autonomous_agent.config.primary_goal or "assist you"
     
-    # 2. Generate Greeting
-    greeting = _generate_natural_greeting(
+    # 2. Generate Greeting (prefer the pre-rendered text: it knows the lead and agent)
+    greeting = prepared.text if prepared else _generate_natural_greeting(
         agent_name, 
         company_name, 
         agent_goal, 
@@ -1336,25 +1148,34 @@ async def trigger_outbound_greeting(call_sid: str) -> Optional[bytes]:
     state.is_speaking = True
     
     # Add to history so AI knows it said this
-    state.add_message("assistant", greeting)
+    message = state.add_message("assistant", greeting)
     logger.info(f"🤖 Generated Outbound Greeting: {greeting}")
     
     try:
         # 4. Synthesize & Return
         # Pass voice_id to ensure consistent voice
-        tts_audio = await synthesize_speech_with_provider("cartesia", greeting, voice_id=voice_id)
+        tts_audio = await asyncio.wait_for(
+            synthesize_speech_with_provider(
+                "cartesia", greeting, voice_id=voice_id, output_format=MULAW_8K,
+                tts_session=cartesia_sessions.get(call_sid),
+            ),
+            timeout=GREETING_SYNTHESIS_TIMEOUT,
+        )
         if tts_audio:
             logger.info(f"✅ Generated greeting audio ({len(tts_audio)} bytes)")
-            # Also queue it as backup
-            state.outbound_audio_queue.put_nowait(tts_audio)
+            # Queue for the media handler's playout task (played exactly once)
+            state.queue_speech(tts_audio, message)
             asyncio.create_task(reset_speaking_state(state))
-            return tts_audio  # Return for immediate sending
+            return tts_audio
         else:
             logger.error("❌ TTS returned no audio for greeting")
-            state.is_speaking = False
-            return None
-            
+    except asyncio.TimeoutError:
+        logger.error(f"❌ Greeting synthesis timed out after {GREETING_SYNTHESIS_TIMEOUT:.1f}s")
     except Exception as e:
         logger.error(f"Failed to synthesize outbound greeting: {e}", exc_info=True)
-        state.is_speaking = False
-        return None
\ No newline at end of file
+
+    # Not spoken: keep it out of history so the agent does not assume the caller heard it
+    if message in state.conversation_history:
+        state.conversation_history.remove(message)
+    state.is_speaking = False
+    return None
\ No newline at end of file
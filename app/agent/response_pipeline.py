@@ -0,0 +1,391 @@
+"""
+Sentence-pipelined LLM -> TTS response path.
+
+Waiting for the whole LLM reply and then for the whole TTS clip makes the
+caller hear nothing until both are finished. A ResponseSpeaker instead cuts
+the text into sentences (or long clauses) as tokens arrive, starts TTS for
+each segment as soon as it is complete, renders a few segments ahead
+concurrently, and queues the audio for playout strictly in order. The caller
+hears the first sentence while the rest is still being generated and
+synthesized, so perceived latency is roughly first-sentence latency.
+
+On a call with an open Cartesia session the whole turn is one Cartesia
+context instead: each sentence is sent into it with continue=true as soon as
+it is complete, so prosody carries across sentences and audio streams back
+in order without per-sentence requests. Each sentence is also flushed, and
+the flush_done that follows its audio tells which sentence is playing.
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import AsyncIterator, Iterable, List, Optional, Union
+
+from app.audio.transcode import MULAW_8K
+from app.services.cartesia_tts_session import CartesiaSessionError, cartesia_sessions
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_LOOKAHEAD = 3       # Segments synthesized ahead of the one being played
+FIRST_CLAUSE_CHARS = 24      # First segment may end at a comma once this long (fast first audio)
+CLAUSE_CHARS = 80            # Later segments only split at commas once this long (keeps prosody)
+MAX_SEGMENT_CHARS = 220      # Hard split at a space for run-on text without punctuation
+
+_SENTENCE_END = re.compile(r'[.!?…।]+["\'”’)\]]*(?=\s)')
+_CLAUSE_END = re.compile(r'[,;:—–](?=\s)')
+_ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "st", "sr", "jr", "vs", "etc", "inc", "ltd", "co",
+    "no", "approx", "e.g", "i.e", "a.m", "p.m", "u.s",
+}
+
+
+def clean_spoken_text(text: str) -> str:
+    """
+    Strip what must not be read aloud: markdown, stage directions, notes.
+
+    Args:
+        text: One segment of LLM output
+
+    Returns:
+        str: Speakable text (may be empty)
+    """
+    text = re.sub(r'\*{1,2}([^*]+)\*{1,2}', r'\1', text)   # **bold** / *italic*
+    text = re.sub(r'\s*\([^)]*\)', '', text)                 # (parenthetical notes)
+    text = re.sub(r'\s*\[[^\]]*\]', '', text)                # [pause], [thinking...]
+    text = re.sub(r'^\s*(#+|[-•]|\d+\.)\s+', '', text)       # headings / list markers
+    text = re.sub(r'[*_#`]+', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class SentenceSegmenter:
+    """Incrementally split streamed text into speakable segments."""
+
+    def __init__(
+        self,
+        first_clause_chars: int = FIRST_CLAUSE_CHARS,
+        clause_chars: int = CLAUSE_CHARS,
+        max_chars: int = MAX_SEGMENT_CHARS,
+    ):
+        """
+        Args:
+            first_clause_chars: Minimum length before the first segment may end at a clause
+            clause_chars: Minimum length before later segments may end at a clause
+            max_chars: Length at which text without punctuation is split at a space
+        """
+        self.first_clause_chars = first_clause_chars
+        self.clause_chars = clause_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._emitted = 0
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text.
+
+        Returns:
+            List[str]: Segments completed by this text, in order
+        """
+        self._buffer += text
+        segments = []
+        while True:
+            segment = self._next_segment()
+            if segment is None:
+                return segments
+            if segment:
+                segments.append(segment)
+
+    def flush(self) -> List[str]:
+        """End of stream: return whatever text is left as the last segment."""
+        rest, self._buffer = self._buffer.strip(), ""
+        if not rest:
+            return []
+        self._emitted += 1
+        return [rest]
+
+    def _next_segment(self) -> Optional[str]:
+        buffer = self._buffer
+        for match in _SENTENCE_END.finditer(buffer):
+            if not self._is_abbreviation(buffer, match) and self._balanced(buffer, match.end()):
+                return self._cut(match.end())
+
+        min_chars = self.clause_chars if self._emitted else self.first_clause_chars
+        if len(buffer) >= min_chars:
+            for match in _CLAUSE_END.finditer(buffer, min_chars - 1):
+                if self._balanced(buffer, match.end()):
+                    return self._cut(match.end())
+
+        if len(buffer) >= self.max_chars:
+            space = buffer.rfind(" ", 0, self.max_chars)
+            return self._cut(space if space > 0 else self.max_chars)
+        return None
+
+    @staticmethod
+    def _is_abbreviation(buffer: str, match: re.Match) -> bool:
+        if match.group() != ".":
+            return False
+        word = buffer[:match.start()].rsplit(None, 1)[-1] if buffer[:match.start()].strip() else ""
+        word = word.lower()
+        # Initials ("J. Smith") and list numbers ("1. ") are not sentence ends
+        return word in _ABBREVIATIONS or (len(word) == 1 and word.isalpha()) or (len(word) <= 2 and word.isdigit())
+
+    @staticmethod
+    def _balanced(buffer: str, end: int) -> bool:
+        # Never cut inside a parenthetical: cleanup removes it only when whole
+        head = buffer[:end]
+        return head.count("(") <= head.count(")") and head.count("[") <= head.count("]")
+
+    def _cut(self, end: int) -> str:
+        segment, self._buffer = self._buffer[:end].strip(), self._buffer[end:]
+        if segment:
+            self._emitted += 1
+        return segment
+
+
+async def _as_stream(source: Union[str, Iterable[str], AsyncIterator[str]]) -> AsyncIterator[str]:
+    if isinstance(source, str):
+        yield source
+    elif hasattr(source, "__aiter__"):
+        async for piece in source:
+            yield piece
+    else:
+        for piece in source:
+            yield piece
+
+
+async def _chain(first: List[str], rest: asyncio.Queue) -> AsyncIterator[str]:
+    for segment in first:
+        yield segment
+    while True:
+        segment = await rest.get()
+        if segment is None:
+            return
+        yield segment
+
+
+async def segment_stream(source: Union[str, Iterable[str], AsyncIterator[str]]) -> AsyncIterator[str]:
+    """
+    Turn streamed LLM text into cleaned, speakable segments as they complete.
+
+    Args:
+        source: Complete text, or an (async) iterator of tokens
+
+    Yields:
+        str: Segments ready for TTS
+    """
+    segmenter = SentenceSegmenter()
+    async for piece in _as_stream(source):
+        if not piece:
+            continue
+        for segment in segmenter.feed(piece):
+            segment = clean_spoken_text(segment)
+            if segment:
+                yield segment
+    for segment in segmenter.flush():
+        segment = clean_spoken_text(segment)
+        if segment:
+            yield segment
+
+
+class ResponseSpeaker:
+    """
+    Speaks one assistant turn of a call through the sentence pipeline.
+
+    Audio goes straight to the call's outbound queue via state.queue_speech;
+    the turn's conversation_history entry is created with the first audible
+    segment and grows as later segments are queued, so barge-in trimming
+    still sees exactly what was sent.
+    """
+
+    def __init__(self, state, provider: str = "cartesia", voice_id: Optional[str] = None,
+                 lookahead: int = PIPELINE_LOOKAHEAD):
+        """
+        Args:
+            state: The call's ConversationState
+            provider: TTS provider
+            voice_id: Voice override (None = provider default)
+            lookahead: Segments rendered concurrently ahead of playout
+        """
+        self.state = state
+        self.provider = provider
+        self.voice_id = voice_id
+        self.lookahead = max(1, lookahead)
+        self.message: Optional[dict] = None
+        self.segments: List[str] = []
+        self.first_audio_ms: Optional[float] = None
+        self._started = time.monotonic()
+
+    @property
+    def text(self) -> str:
+        """Everything queued for playout so far."""
+        return " ".join(self.segments)
+
+    @property
+    def spoke(self) -> bool:
+        return self.message is not None
+
+    async def speak(self, source: Union[str, Iterable[str], AsyncIterator[str]]) -> str:
+        """
+        Segment, synthesize and queue a response as it is produced.
+
+        Args:
+            source: Complete text, or an (async) iterator of LLM tokens
+
+        Returns:
+            str: Text of the segments that produced audio
+
+        Raises:
+            Exception: Whatever the token source raised (audio already queued stays queued)
+        """
+        texts: asyncio.Queue = asyncio.Queue()  # Segments as they complete, None at the end
+
+        async def collect():
+            try:
+                async for text in segment_stream(source):
+                    texts.put_nowait(text)
+            finally:
+                texts.put_nowait(None)
+
+        collector = asyncio.create_task(collect())
+        try:
+            session = cartesia_sessions.get(self.state.call_sid) if self.provider == "cartesia" else None
+            unspoken: Optional[List[str]] = []
+            if session is not None and session.output_format == MULAW_8K:
+                unspoken = await self._speak_in_context(session, texts)
+            if unspoken is not None:
+                await self._speak_segments(_chain(unspoken, texts))
+            await collector  # Re-raise token source errors
+        finally:
+            collector.cancel()
+        return self.text
+
+    async def _speak_in_context(self, session, texts: asyncio.Queue) -> Optional[List[str]]:
+        """
+        Speak the turn as one Cartesia context.
+
+        Returns:
+            None when the turn was spoken, or the segments still to render one
+            by one when the context failed (the rest stay in texts)
+        """
+        first = await texts.get()
+        if first is None:
+            return None
+        context = session.new_context(self.voice_id)
+        sent = [first]
+        ended = False
+
+        async def send():
+            nonlocal ended
+            try:
+                await context.send(f"{first} ", flush=True)
+                while True:
+                    text = await texts.get()
+                    if text is None:
+                        ended = True
+                        break
+                    sent.append(text)
+                    await context.send(f"{text} ", flush=True)
+                await context.end()
+            except CartesiaSessionError as e:
+                context.fail(str(e))
+
+        sender = asyncio.create_task(send())
+        playing = 0   # Index of the sentence whose audio is arriving
+        voiced = 0    # Sentences already added to history
+        try:
+            async for chunk in context.audio(flushes=True):
+                if chunk is None:
+                    playing += 1
+                    continue
+                # Text joins history with its first audio, as in _play
+                while voiced <= playing and voiced < len(sent):
+                    self._add_text(sent[voiced])
+                    voiced += 1
+                self.state.queue_speech(chunk, self.message)
+            return None
+        except CartesiaSessionError as e:
+            if voiced:
+                logger.error(f"❌ Cartesia context failed mid-turn ({e}), rendering the rest sentence by sentence")
+            else:
+                logger.warning(f"Cartesia context unavailable ({e}), rendering sentence by sentence")
+            sender.cancel()
+            if ended:
+                texts.put_nowait(None)
+            return sent[voiced:]
+        except asyncio.CancelledError:
+            # Barge-in: stop generating the rest of the turn
+            asyncio.create_task(context.cancel())
+            raise
+        finally:
+            sender.cancel()
+
+    async def _speak_segments(self, segments: AsyncIterator[str]):
+        """Render segments concurrently (up to lookahead) and queue their audio in order."""
+        slots = asyncio.Semaphore(self.lookahead)
+        ordered: asyncio.Queue = asyncio.Queue()
+        renders: List[asyncio.Task] = []
+
+        async def feed():
+            try:
+                async for segment in segments:
+                    await slots.acquire()
+                    chunks: asyncio.Queue = asyncio.Queue()
+                    renders.append(asyncio.create_task(self._render(segment, chunks)))
+                    ordered.put_nowait((segment, chunks))
+            finally:
+                ordered.put_nowait(None)
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while True:
+                item = await ordered.get()
+                if item is None:
+                    break
+                segment, chunks = item
+                try:
+                    await self._play(segment, chunks)
+                finally:
+                    slots.release()
+            await feeder
+        finally:
+            feeder.cancel()
+            for task in renders:
+                task.cancel()
+
+    async def _render(self, segment: str, chunks: asyncio.Queue):
+        from app.services.tts_service import synthesize_speech_stream
+        try:
+            async for chunk in synthesize_speech_stream(
+                self.provider,
+                segment,
+                self.voice_id,
+                output_format=MULAW_8K,
+                tts_session=cartesia_sessions.get(self.state.call_sid),
+            ):
+                if chunk:
+                    chunks.put_nowait(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ TTS failed for segment '{segment[:40]}': {e}")
+        finally:
+            chunks.put_nowait(None)
+
+    async def _play(self, segment: str, chunks: asyncio.Queue):
+        first = True
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                return
+            if first:
+                first = False
+                self._add_text(segment)
+            self.state.queue_speech(chunk, self.message)
+
+    def _add_text(self, segment: str):
+        self.segments.append(segment)
+        if self.message is None:
+            self.message = self.state.add_message("assistant", segment)
+            self.first_audio_ms = (time.monotonic() - self._started) * 1000
+            logger.info(f"⚡ First response audio queued after {self.first_audio_ms:.0f} ms")
+        else:
+            self.message["content"] = f"{self.message['content']} {segment}"
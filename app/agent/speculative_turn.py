@@ -0,0 +1,249 @@
+"""
+Speculative turn preparation on stable interim transcripts.
+
+Deepgram sends interim results while the caller is still talking, but a turn
+used to start only on the final transcript, after endpointing. When the same
+interim text arrives SPECULATION_STABLE_INTERIMS times in a row, the engine
+starts the turn's RAG retrieval and LLM generation in the background. Tokens
+are buffered, never spoken. When the final transcript arrives:
+
+- it has the same words as the speculated text, filler words aside (hit):
+  the turn commits the
+  prepared context and replays the buffered tokens, so the reply starts
+  without waiting for retrieval or the model's first token,
+- otherwise (miss): the speculation is cancelled and the turn runs normally.
+
+Hits, misses and the head start gained are kept per call and in total.
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.agent.turn_detector import FILLER_WORDS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "true").lower() == "true"
+SPECULATION_MIN_WORDS = int(os.getenv("SPECULATION_MIN_WORDS", "3"))
+SPECULATION_STABLE_INTERIMS = int(os.getenv("SPECULATION_STABLE_INTERIMS", "2"))  # Identical interims in a row
+
+_WORD_RE = re.compile(r"[\w']+")
+
+# Totals across calls (per-call numbers are in SpeculativeTurnEngine.get_stats)
+_totals = {"started": 0, "hits": 0, "misses": 0, "superseded": 0, "head_start_ms": 0.0}
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercase words of a transcript, without punctuation."""
+    return _WORD_RE.findall((text or "").lower())
+
+
+def transcripts_match(speculated: str, final: str) -> bool:
+    """
+    Whether a final transcript says the same as the speculated one, so its reply can be reused.
+
+    Only filler words may differ: any other word ("not", "Tuesday", "15")
+    can change the meaning, so a near match is still a miss.
+
+    Args:
+        speculated: Interim text the speculation ran on
+        final: Final transcript
+
+    Returns:
+        bool
+    """
+    a = [word for word in normalize_words(speculated) if word not in FILLER_WORDS]
+    b = [word for word in normalize_words(final) if word not in FILLER_WORDS]
+    return bool(a) and a == b
+
+
+class PrefetchedStream:
+    """
+    Consumes an async iterator in the background and replays it to one reader.
+
+    The reader gets everything buffered so far, then items as they arrive.
+    Abandoning the reader (or cancel()) stops the source.
+    """
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self._source = source
+        self._items: List[Any] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._pump())
+
+    @property
+    def buffered(self) -> int:
+        return len(self._items)
+
+    async def _pump(self):
+        try:
+            async for item in self._source:
+                self._items.append(item)
+                self._changed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done = True
+            self._changed.set()
+            aclose = getattr(self._source, "aclose", None)
+            if aclose is not None:
+                try:
+                    await aclose()
+                except Exception:
+                    pass
+
+    async def __aiter__(self):
+        i = 0
+        try:
+            while True:
+                if i < len(self._items):
+                    yield self._items[i]
+                    i += 1
+                    continue
+                if self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return
+                self._changed.clear()
+                await self._changed.wait()
+        finally:
+            if not self._done:
+                self.cancel()
+
+    def cancel(self):
+        if not self._task.done():
+            self._task.cancel()
+
+
+class SpeculativeTurn:
+    """One speculation: the interim text it ran on and its preparation task."""
+
+    def __init__(self, transcript: str, history_len: int, task: "asyncio.Task[Tuple[str, PrefetchedStream]]"):
+        self.transcript = transcript
+        self.history_len = history_len
+        self.task = task
+        self.started_at = time.monotonic()
+
+    async def result(self) -> Optional[Tuple[str, PrefetchedStream]]:
+        """(rag_context, token stream), or None if the preparation failed."""
+        try:
+            return await self.task
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Speculative preparation failed, running the turn normally: {e}")
+            return None
+
+    def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled() and self.task.exception() is None:
+            self.task.result()[1].cancel()
+
+
+class SpeculativeTurnEngine:
+    """Per-call speculation driven by interim transcripts."""
+
+    def __init__(self, prepare: Callable[[str], Awaitable[Tuple[str, PrefetchedStream]]]):
+        """
+        Args:
+            prepare: Runs retrieval and starts generation for a transcript;
+                returns (rag_context, PrefetchedStream of the LLM output)
+        """
+        self.prepare = prepare
+        self.current: Optional[SpeculativeTurn] = None
+        self._last_interim: List[str] = []
+        self._repeats = 0
+        self._stats = {"started": 0, "hits": 0, "misses": 0, "superseded": 0, "head_start_ms": 0.0}
+
+    def on_interim(self, transcript: str, history_len: int):
+        """
+        Track an interim transcript; start speculating once it is stable.
+
+        Args:
+            transcript: Interim text
+            history_len: len(conversation_history) now (the speculation is
+                only valid if no turn is added before the final arrives)
+        """
+        if not SPECULATION_ENABLED:
+            return
+        words = normalize_words(transcript)
+        if words == self._last_interim:
+            self._repeats += 1
+        else:
+            self._last_interim = words
+            self._repeats = 1
+            if self.current is not None and not transcripts_match(self.current.transcript, transcript):
+                # The caller kept talking: the speculated text is out of date
+                self._count("superseded")
+                self.cancel()
+
+        if self.current is not None or len(words) < SPECULATION_MIN_WORDS or self._repeats < SPECULATION_STABLE_INTERIMS:
+            return
+        self.current = SpeculativeTurn(transcript, history_len, asyncio.create_task(self.prepare(transcript)))
+        self._count("started")
+        logger.info(f"🔮 Speculating on stable interim: '{transcript}'")
+
+    def take(self, final_transcript: str, history_len: int) -> Optional[SpeculativeTurn]:
+        """
+        Claim the speculation for a final transcript.
+
+        Args:
+            final_transcript: Final text of the turn
+            history_len: len(conversation_history) before the turn is recorded
+
+        Returns:
+            The speculation on a hit; None on a miss (it is cancelled) or if there was none
+        """
+        speculation, self.current = self.current, None
+        self._last_interim = []
+        self._repeats = 0
+        if speculation is None:
+            return None
+        if speculation.history_len == history_len and transcripts_match(speculation.transcript, final_transcript):
+            head_start_ms = (time.monotonic() - speculation.started_at) * 1000
+            self._count("hits")
+            self._count("head_start_ms", head_start_ms)
+            logger.info(f"🔮 Speculation hit: '{speculation.transcript}' ~ '{final_transcript}' ({head_start_ms:.0f} ms head start)")
+            return speculation
+        self._count("misses")
+        logger.info(f"🔮 Speculation miss: '{speculation.transcript}' vs '{final_transcript}'")
+        speculation.cancel()
+        return None
+
+    def cancel(self):
+        """Drop the current speculation (barge-in, call end, stale text)."""
+        speculation, self.current = self.current, None
+        if speculation is not None:
+            speculation.cancel()
+
+    def _count(self, key: str, amount: float = 1):
+        self._stats[key] += amount
+        _totals[key] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        return _summarize(self._stats)
+
+
+def _summarize(stats: Dict[str, float]) -> Dict[str, Any]:
+    summary = {key: value for key, value in stats.items() if key != "head_start_ms"}
+    decided = stats["hits"] + stats["misses"]
+    summary["hit_rate"] = round(stats["hits"] / decided, 3) if decided else None
+    summary["avg_head_start_ms"] = round(stats["head_start_ms"] / stats["hits"]) if stats["hits"] else None
+    return summary
+
+
+def get_speculation_stats() -> Dict[str, Any]:
+    """Speculation totals across all calls."""
+    return _summarize(_totals)
@@ -0,0 +1,317 @@
+"""
+Multi-signal end-of-turn detection.
+
+Deepgram splits what the caller says into final segments. A segment alone
+does not mean the caller is done: "I'd like to book a demo and" is final as
+far as Deepgram is concerned. EndOfTurnDetector collects the final segments
+of a turn and decides when to hand them over, combining:
+
+- speech_final (Deepgram's endpointing) and UtteranceEnd (a word gap of
+  DEEPGRAM_UTTERANCE_END_MS),
+- silence measured by the call's StreamingVAD, so the hold is counted from
+  when the caller actually stopped, not from when the transcript arrived,
+- the text itself: a complete sentence commits right away, a trailing
+  conjunction or comma waits longer, and a short fragment waits a little
+  unless it is a complete reply ("yes", "no thanks").
+
+Interim results and SpeechStarted mean the caller is talking again: the
+pending hold is cancelled and the next final segment is appended.
+Thresholds come from TurnDetectionConfig, overridable per agent through
+CustomAgent.turn_detection.
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.services.deepgram_websocket import DEEPGRAM_UTTERANCE_END_MS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+COMPLETE = "complete"
+DEFAULT = "default"
+SHORT = "short"
+INCOMPLETE = "incomplete"
+
+# Defaults for TurnDetectionConfig (ms of caller silence before the turn is committed)
+TURN_COMPLETE_HOLD_MS = int(os.getenv("TURN_COMPLETE_HOLD_MS", "0"))
+TURN_DEFAULT_HOLD_MS = int(os.getenv("TURN_DEFAULT_HOLD_MS", "400"))
+TURN_SHORT_HOLD_MS = int(os.getenv("TURN_SHORT_HOLD_MS", "700"))
+TURN_INCOMPLETE_HOLD_MS = int(os.getenv("TURN_INCOMPLETE_HOLD_MS", "1500"))
+TURN_MAX_WAIT_MS = int(os.getenv("TURN_MAX_WAIT_MS", "3000"))
+TURN_MIN_WORDS = int(os.getenv("TURN_MIN_WORDS", "2"))
+VAD_RECHECK_MS = 100  # Poll interval while the VAD still hears the caller at commit time
+
+# Last words that mean the sentence is not over
+TRAILING_WORDS = {
+    "and", "but", "or", "so", "because", "cause", "if", "then", "than", "that", "which", "who",
+    "when", "while", "with", "to", "for", "of", "in", "on", "at", "from", "about", "the", "a", "an",
+    "my", "your", "our", "is", "are", "was", "i", "we", "um", "uh", "uhm", "er", "like", "also",
+}
+FILLER_WORDS = {"um", "uh", "uhm", "er", "hmm", "mm", "ah"}
+# Short phrases that are a whole answer on their own
+SHORT_REPLIES = {
+    "yes", "yeah", "yep", "no", "nope", "sure", "okay", "ok", "right", "correct", "exactly",
+    "hello", "hi", "bye", "thanks", "no thanks", "thank you", "not interested", "of course",
+    "sounds good", "go ahead", "why", "what", "who", "how much", "call me later",
+}
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+class TurnDetectionConfig:
+    """
+    Hold times (ms of caller silence) before a turn is committed.
+
+    Defaults are the TURN_* settings; CustomAgent.turn_detection overrides
+    any of them per agent, e.g. {"incomplete_hold_ms": 1800} for callers
+    who pause a lot.
+    """
+
+    FIELDS = ("complete_hold_ms", "default_hold_ms", "short_hold_ms", "incomplete_hold_ms", "max_wait_ms", "min_words")
+
+    def __init__(
+        self,
+        complete_hold_ms: int = TURN_COMPLETE_HOLD_MS,
+        default_hold_ms: int = TURN_DEFAULT_HOLD_MS,
+        short_hold_ms: int = TURN_SHORT_HOLD_MS,
+        incomplete_hold_ms: int = TURN_INCOMPLETE_HOLD_MS,
+        max_wait_ms: int = TURN_MAX_WAIT_MS,
+        min_words: int = TURN_MIN_WORDS,
+    ):
+        """
+        Args:
+            complete_hold_ms: Sentence ends in . ? ! (or is a complete short reply)
+            default_hold_ms: No strong cue either way
+            short_hold_ms: Fewer than min_words words that are not a known reply
+            incomplete_hold_ms: Ends in a conjunction, article, filler or comma
+            max_wait_ms: Longest wait after the last transcript activity, whatever the cues
+            min_words: Below this a fragment counts as short
+        """
+        self.complete_hold_ms = complete_hold_ms
+        self.default_hold_ms = default_hold_ms
+        self.short_hold_ms = short_hold_ms
+        self.incomplete_hold_ms = incomplete_hold_ms
+        self.max_wait_ms = max_wait_ms
+        self.min_words = min_words
+
+    def to_dict(self) -> Dict[str, int]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @staticmethod
+    def from_dict(source: Optional[Dict[str, Any]]) -> "TurnDetectionConfig":
+        """Defaults overridden by the known, valid keys of source (others are ignored)."""
+        config = TurnDetectionConfig()
+        for field, value in (source or {}).items():
+            if field not in TurnDetectionConfig.FIELDS:
+                continue
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                logger.warning(f"⚠️ Ignoring invalid turn_detection.{field}: {value!r}")
+                continue
+            if value >= 0:
+                setattr(config, field, value)
+        return config
+
+
+def classify(text: str, config: TurnDetectionConfig) -> str:
+    """
+    How finished a transcript sounds.
+
+    Args:
+        text: Transcript so far
+        config: Thresholds (min_words)
+
+    Returns:
+        COMPLETE, INCOMPLETE, SHORT or DEFAULT
+    """
+    stripped = (text or "").rstrip()
+    words = _words(stripped)
+    if not words:
+        return SHORT
+    if stripped.endswith((",", "-", "...", "…")):
+        return INCOMPLETE
+    # Punctuation is Deepgram's read of the intonation: "Who is this for?" is over
+    if stripped.endswith((".", "?", "!")):
+        return COMPLETE
+    if words[-1] in TRAILING_WORDS:
+        return INCOMPLETE
+    if " ".join(words) in SHORT_REPLIES:
+        return COMPLETE
+    if len(words) < config.min_words:
+        return SHORT
+    return DEFAULT
+
+
+class EndOfTurnDetector:
+    """Per-call end-of-turn decision from transcript, endpointing and VAD signals."""
+
+    def __init__(
+        self,
+        on_turn: Callable[[str, float], Awaitable[Any]],
+        vad=None,
+        config: Optional[TurnDetectionConfig] = None,
+    ):
+        """
+        Args:
+            on_turn: Called with (transcript, confidence) once the turn is over
+            vad: The call's StreamingVAD (optional; silence is then taken from the transcript timing)
+            config: Thresholds; defaults until configure() is called with the agent's
+        """
+        self.on_turn = on_turn
+        self.vad = vad
+        self.config = config or TurnDetectionConfig()
+        self._segments: List[str] = []
+        self._confidence = 0.0
+        self._speech_final = False
+        self._utterance_end = False
+        self._last_activity = 0.0
+        self._timer: Optional[asyncio.Task] = None
+        self._stats = {COMPLETE: 0, DEFAULT: 0, SHORT: 0, INCOMPLETE: 0, "resumed": 0, "dropped": 0, "hold_ms": 0.0}
+
+    def configure(self, config: TurnDetectionConfig):
+        self.config = config
+
+    @property
+    def pending_text(self) -> str:
+        return " ".join(self._segments)
+
+    def extend(self, text: str) -> str:
+        """Pending segments followed by text (what the turn would be if it ended now)."""
+        return " ".join(self._segments + [text]) if text else self.pending_text
+
+    def on_final(self, text: str, confidence: float, speech_final: bool = False):
+        """A final transcript segment."""
+        if not text or not text.strip():
+            return
+        if self._timer is not None and not self._timer.done():
+            # The caller went on after a hold had started
+            self._stats["resumed"] += 1
+        self._segments.append(text.strip())
+        self._confidence = confidence
+        self._speech_final = speech_final
+        self._utterance_end = False
+        self._touch()
+        self._schedule()
+
+    def on_interim(self, text: str):
+        """An interim transcript: the caller is talking again."""
+        if self._segments and text and text.strip():
+            self._touch()
+            self._postpone()
+
+    def on_speech_started(self):
+        """Deepgram SpeechStarted."""
+        if self._segments:
+            self._touch()
+            self._postpone()
+
+    def on_speech_final(self):
+        """Endpointing fired after every word was already in a final segment."""
+        if self._segments:
+            self._speech_final = True
+            self._schedule()
+
+    def on_utterance_end(self):
+        """Deepgram UtteranceEnd: no words for DEEPGRAM_UTTERANCE_END_MS."""
+        if self._segments:
+            self._speech_final = True
+            self._utterance_end = True
+            self._schedule()
+
+    def hold_ms(self, text: str) -> float:
+        """Silence still needed before the pending turn commits."""
+        kind = classify(text, self.config)
+        hold = getattr(self.config, f"{kind}_hold_ms")
+        if not self._speech_final:
+            # Deepgram split the segment mid-speech: expect more
+            hold = max(hold, self.config.incomplete_hold_ms)
+        silence = self._silence_ms()
+        if self._utterance_end:
+            silence = max(silence, DEEPGRAM_UTTERANCE_END_MS)
+        return max(0.0, hold - silence)
+
+    def _silence_ms(self) -> float:
+        """Caller silence so far according to the VAD (0 if it has no opinion)."""
+        if self.vad is None or not self.vad.frames or self.vad.in_speech:
+            return 0.0
+        since = self.vad.ms_since_speech
+        return float(since) if since is not None else 0.0
+
+    def _touch(self):
+        self._last_activity = time.monotonic()
+
+    def _schedule(self, delay_ms: Optional[float] = None):
+        if delay_ms is None:
+            delay_ms = self.hold_ms(self.pending_text)
+        self._cancel_timer()
+        self._timer = asyncio.create_task(self._wait_and_commit(delay_ms))
+
+    def _postpone(self):
+        # A final (or UtteranceEnd) will reschedule; max_wait_ms is the safety net
+        self._schedule(self.config.max_wait_ms)
+
+    async def _wait_and_commit(self, delay_ms: float):
+        try:
+            await asyncio.sleep(delay_ms / 1000)
+            # Sound on the line right now: give the caller a moment, up to max_wait_ms
+            while (
+                self.vad is not None and self.vad.in_speech
+                and (time.monotonic() - self._last_activity) * 1000 < self.config.max_wait_ms
+            ):
+                await asyncio.sleep(VAD_RECHECK_MS / 1000)
+        except asyncio.CancelledError:
+            return
+        self._timer = None
+        await self._commit()
+
+    async def _commit(self):
+        text, confidence = self.pending_text, self._confidence
+        kind = classify(text, self.config)
+        held_ms = (time.monotonic() - self._last_activity) * 1000
+        self._reset()
+        if not set(_words(text)) - FILLER_WORDS:
+            self._stats["dropped"] += 1
+            logger.debug(f"Dropping filler-only turn: '{text}'")
+            return
+        self._stats[kind] += 1
+        self._stats["hold_ms"] += held_ms
+        logger.info(f"🔚 End of turn ({kind}, held {held_ms:.0f} ms): '{text}'")
+        try:
+            await self.on_turn(text, confidence)
+        except Exception as e:
+            logger.error(f"Error handling end of turn: {e}", exc_info=True)
+
+    def _cancel_timer(self):
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+
+    def _reset(self):
+        self._segments = []
+        self._confidence = 0.0
+        self._speech_final = False
+        self._utterance_end = False
+
+    def cancel(self):
+        """Forget the pending turn (call end)."""
+        self._cancel_timer()
+        self._reset()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {key: value for key, value in self._stats.items() if key != "hold_ms"}
+        turns = sum(self._stats[kind] for kind in (COMPLETE, DEFAULT, SHORT, INCOMPLETE))
+        stats["avg_hold_ms"] = round(self._stats["hold_ms"] / turns) if turns else None
+        stats["config"] = self.config.to_dict()
+        return stats
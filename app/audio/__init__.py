@@ -0,0 +1,3 @@
+"""
+Audio DSP helpers for the telephony pipeline (codec, resampling, VAD).
+"""
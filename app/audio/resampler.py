@@ -0,0 +1,145 @@
+"""
+Stateful streaming polyphase resampler.
+
+Resampling each 20 ms chunk on its own (resample_poly per chunk, or
+audioop.ratecv with no carried state) restarts the filter at every chunk
+boundary, which adds clicks and rebuilds the filter each time.
+StreamingResampler keeps the filter history between calls, so a stream
+processed chunk by chunk is identical to processing it in one go, and it
+reuses preallocated work buffers.
+
+Typical use, one instance per call and direction:
+    down = StreamingResampler(up=1, down=2)   # 16 kHz TTS -> 8 kHz Twilio
+    up = StreamingResampler(up=2, down=1)     # 8 kHz Twilio -> 16 kHz analysis
+"""
+from functools import lru_cache
+from math import gcd
+from typing import Optional
+
+import numpy as np
+from scipy.signal import firwin
+
+HALF_LEN_PER_RATE = 10   # Same filter length rule as scipy.signal.resample_poly
+KAISER_BETA = 5.0
+
+
+@lru_cache(maxsize=None)
+def _polyphase_bank(up: int, down: int) -> np.ndarray:
+    """
+    Low-pass FIR at the upsampled rate, split into `up` phases.
+
+    Returns:
+        np.ndarray: shape (up, taps_per_phase); row p holds h[p::up] reversed,
+        so a phase is applied with a dot product on the input window
+    """
+    max_rate = max(up, down)
+    num_taps = 2 * HALF_LEN_PER_RATE * max_rate + 1
+    h = firwin(num_taps, 1.0 / max_rate, window=("kaiser", KAISER_BETA)) * up
+    taps_per_phase = -(-num_taps // up)
+    h = np.concatenate([h, np.zeros(taps_per_phase * up - num_taps)])
+    bank = h.reshape(taps_per_phase, up).T[:, ::-1]
+    bank = np.ascontiguousarray(bank, dtype=np.float32)
+    bank.setflags(write=False)
+    return bank
+
+
+class StreamingResampler:
+    """Rational up/down resampler for int16 mono audio that carries state across chunks."""
+
+    def __init__(self, up: int, down: int, max_chunk: int = 4096):
+        """
+        Args:
+            up: Interpolation factor L (output rate = input rate * up / down)
+            down: Decimation factor M
+            max_chunk: Input size the work buffer is preallocated for (grows if exceeded)
+        """
+        g = gcd(up, down)
+        self.up = up // g
+        self.down = down // g
+        self._bank = _polyphase_bank(self.up, self.down)
+        self.taps = self._bank.shape[1]
+        self._set_buffer(np.zeros(self.taps - 1 + max_chunk, dtype=np.float32))
+        self._y = np.empty(max_chunk * self.up // self.down + 1, dtype=np.float32)
+        self.reset()
+
+    def _set_buffer(self, buf: np.ndarray):
+        self._buf = buf
+        # window i covers buf[i : i+taps], whose newest sample is x[i]
+        self._windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps)
+
+    @property
+    def delay(self) -> float:
+        """Filter group delay in output samples."""
+        return HALF_LEN_PER_RATE * max(self.up, self.down) / self.down
+
+    def reset(self):
+        """Forget all history (start of a new, unrelated stream)."""
+        self._buf[:self.taps - 1] = 0.0
+        # Upsampled-time index of the next output, relative to the first new
+        # input sample of the next chunk
+        self._t = 0
+
+    def output_length(self, n_in: int) -> int:
+        """Number of samples process() returns for n_in new input samples."""
+        # Output n is produced once input floor(t_n / up) is available
+        last_t = n_in * self.up - 1
+        if last_t < self._t:
+            return 0
+        return (last_t - self._t) // self.down + 1
+
+    def process(self, pcm, out: Optional[np.ndarray] = None, flush: bool = False) -> np.ndarray:
+        """
+        Resample the next chunk of the stream.
+
+        Args:
+            pcm: int16 array or 16-bit little-endian PCM bytes
+            out: Optional int16 array with room for output_length() samples
+            flush: Also push the filter tail out (end of stream); the
+                resampler is reset afterwards
+
+        Returns:
+            np.ndarray: int16 output samples (a view of ``out`` when given)
+        """
+        x = pcm if isinstance(pcm, np.ndarray) else np.frombuffer(pcm, dtype=np.int16)
+        if flush:
+            tail = -(-int(np.ceil(self.delay * self.down)) // self.up) + 1
+            x = np.concatenate([x, np.zeros(tail, dtype=np.int16)])
+
+        hist = self.taps - 1
+        n_in = len(x)
+        if hist + n_in > len(self._buf):
+            grown = np.zeros(hist + n_in, dtype=np.float32)
+            grown[:hist] = self._buf[:hist]
+            self._set_buffer(grown)
+        buf = self._buf
+        buf[hist:hist + n_in] = x
+
+        n_out = self.output_length(n_in)
+        y = self._y if len(self._y) >= n_out else np.empty(n_out, dtype=np.float32)
+        self._y = y
+        y = y[:n_out]
+        windows = self._windows
+        # Outputs n, n+up, n+2*up, ... share a filter phase and step through the
+        # input by `down`, so each phase is one matrix-vector product on a
+        # strided view (no gathering copy)
+        for r in range(min(self.up, n_out)):
+            t = self._t + self.down * r
+            first = t // self.up
+            count = len(range(r, n_out, self.up))
+            rows = windows[first:first + self.down * (count - 1) + 1:self.down]
+            np.matmul(rows, self._bank[t % self.up], out=y[r::self.up])
+
+        # Carry history and time forward
+        buf[:hist] = buf[n_in:n_in + hist]
+        self._t = int(self._t + self.down * n_out - self.up * n_in)
+
+        np.rint(y, out=y)
+        np.clip(y, -32768, 32767, out=y)
+        if out is None:
+            result = y.astype(np.int16)
+        else:
+            result = out[:n_out]
+            result[:] = y
+        if flush:
+            self.reset()
+        return result
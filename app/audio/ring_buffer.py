@@ -0,0 +1,91 @@
+"""
+Bounded byte ring buffer for audio that has nowhere to go yet.
+
+Storage is one bytearray allocated up front, so buffering a 20 ms frame is a
+slice copy with no allocation. When the buffer is full the oldest audio is
+overwritten: for live speech the latest audio matters most.
+"""
+
+
+class ByteRingBuffer:
+    """Fixed-capacity FIFO of bytes that drops the oldest data on overflow."""
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: Max bytes held (e.g. seconds x 8000 for 8 kHz µ-law)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._start = 0     # Index of the oldest byte
+        self._size = 0
+        self.dropped = 0    # Bytes overwritten before they were read
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data) -> int:
+        """
+        Append data, overwriting the oldest bytes if it does not fit.
+
+        Args:
+            data: Bytes-like object
+
+        Returns:
+            int: Bytes dropped to make room
+        """
+        data = memoryview(data).cast("B")
+        n = len(data)
+        if n == 0:
+            return 0
+        dropped = 0
+        if n >= self.capacity:
+            # Only the newest capacity bytes survive
+            dropped = self._size + n - self.capacity
+            self._buf[:] = data[n - self.capacity:]
+            self._start = 0
+            self._size = self.capacity
+            self.dropped += dropped
+            return dropped
+        overflow = self._size + n - self.capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % self.capacity
+            self._size -= overflow
+            dropped = overflow
+        end = (self._start + self._size) % self.capacity
+        first = min(n, self.capacity - end)
+        self._buf[end:end + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        self._size += n
+        self.dropped += dropped
+        return dropped
+
+    def read(self, n: int = -1) -> bytes:
+        """
+        Remove and return up to n of the oldest bytes (all of them by default).
+
+        Args:
+            n: Max bytes to read; negative reads everything
+
+        Returns:
+            bytes: Oldest-first data
+        """
+        if n < 0 or n > self._size:
+            n = self._size
+        if n == 0:
+            return b""
+        end = self._start + n
+        if end <= self.capacity:
+            out = bytes(self._buf[self._start:end])
+        else:
+            out = bytes(self._buf[self._start:]) + bytes(self._buf[:end - self.capacity])
+        self._start = end % self.capacity
+        self._size -= n
+        return out
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
@@ -0,0 +1,88 @@
+"""
+Audio format descriptors and a streaming transcoder between them.
+
+TTS providers differ in what they can return (Cartesia and Google speak
+8 kHz µ-law natively, Polly only PCM at 8/16 kHz, OpenAI only 24 kHz PCM).
+Callers ask for the format they need; the TTS layer requests the closest
+native format and runs AudioTranscoder only when the two differ.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from app.audio.codec import MulawAudio, pcm16_to_ulaw, ulaw_to_pcm16
+from app.audio.resampler import StreamingResampler
+
+PCM = "pcm_s16le"
+MULAW = "pcm_mulaw"
+
+
+class AudioFormat(NamedTuple):
+    encoding: str      # PCM or MULAW (Cartesia's encoding names)
+    sample_rate: int
+
+
+PCM_8K = AudioFormat(PCM, 8000)
+PCM_16K = AudioFormat(PCM, 16000)
+PCM_24K = AudioFormat(PCM, 24000)
+MULAW_8K = AudioFormat(MULAW, 8000)     # Twilio Media Streams wire format
+
+
+def wrap_audio(audio: bytes, fmt: AudioFormat) -> bytes:
+    """Tag wire-ready µ-law so the media handler skips conversion."""
+    return MulawAudio(audio) if fmt == MULAW_8K else audio
+
+
+class AudioTranscoder:
+    """Converts a stream of chunks from one AudioFormat to another, keeping filter state."""
+
+    def __init__(self, source: AudioFormat, target: AudioFormat):
+        self.source = source
+        self.target = target
+        self.passthrough = source == target
+        self._resampler = None
+        if source.sample_rate != target.sample_rate:
+            self._resampler = StreamingResampler(up=target.sample_rate, down=source.sample_rate)
+        self._odd = b""   # Half of a 16-bit sample split across chunks
+
+    def reset(self):
+        """Drop carried state (the stream was cut off, e.g. on barge-in)."""
+        self._odd = b""
+        if self._resampler is not None:
+            self._resampler.reset()
+
+    def process(self, audio: bytes, flush: bool = False) -> bytes:
+        """
+        Convert the next chunk.
+
+        Args:
+            audio: Bytes in the source format
+            flush: Last chunk of the stream (pushes out the resampler tail)
+
+        Returns:
+            bytes: Audio in the target format (MulawAudio for 8 kHz µ-law)
+        """
+        if self.passthrough:
+            return wrap_audio(bytes(audio), self.target)
+
+        if self.source.encoding == MULAW:
+            pcm = ulaw_to_pcm16(audio)
+        else:
+            data = self._odd + bytes(audio) if self._odd else audio
+            whole = len(data) & ~1
+            self._odd = bytes(data[whole:])
+            pcm = np.frombuffer(memoryview(data)[:whole], dtype=np.int16)
+
+        if self._resampler is not None:
+            pcm = self._resampler.process(pcm, flush=flush)
+        if flush:
+            self._odd = b""
+
+        if self.target.encoding == MULAW:
+            return wrap_audio(pcm16_to_ulaw(pcm).tobytes(), self.target)
+        return pcm.tobytes()
+
+
+def transcode(audio: bytes, source: AudioFormat, target: AudioFormat) -> bytes:
+    """One-shot conversion of a complete clip."""
+    return AudioTranscoder(source, target).process(audio, flush=True)
@@ -0,0 +1,183 @@
+"""
+Streaming frame-level voice activity detection for 8 kHz µ-law.
+
+One StreamingVAD per call looks at each 20 ms frame exactly once: frame
+energy comes from a µ-law -> squared-sample lookup table and the
+zero-crossing rate from the µ-law sign bit, so a frame costs two table
+passes and no PCM decode. The noise floor is an exponential moving average
+that follows quiet frames quickly and loud ones slowly, and attack/hangover
+counters turn the per-frame decision into clean speech_start / speech_end
+events that do not flicker on plosives or short pauses between words.
+"""
+from typing import Optional
+
+import numpy as np
+
+from app.audio.codec import ULAW_DECODE_TABLE
+
+SAMPLE_RATE = 8000
+FRAME_MS = 20
+
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+
+# µ-law code -> squared linear sample, so frame power is one lookup and a mean
+_ULAW_POWER = ULAW_DECODE_TABLE.astype(np.float64) ** 2
+
+
+def ulaw_rms(ulaw) -> float:
+    """RMS level (int16 scale) of a µ-law buffer, without decoding it to PCM."""
+    codes = np.frombuffer(ulaw, dtype=np.uint8)
+    if len(codes) == 0:
+        return 0.0
+    return float(np.sqrt(_ULAW_POWER[codes].mean()))
+
+
+class StreamingVAD:
+    """Per-call speech detector with adaptive noise floor and attack/hangover."""
+
+    def __init__(
+        self,
+        frame_ms: int = FRAME_MS,
+        attack_ms: int = 60,
+        hangover_ms: int = 300,
+        snr_db: float = 9.0,
+        min_speech_db: float = 32.0,
+        max_zcr: float = 0.35,
+        initial_noise_db: float = 30.0,
+        noise_range_db: tuple = (20.0, 60.0),
+    ):
+        """
+        Args:
+            frame_ms: Analysis frame length (10-20 ms)
+            attack_ms: Voiced time needed before speech_start fires
+            hangover_ms: Unvoiced time needed before speech_end fires
+            snr_db: Level above the noise floor a frame needs to count as voiced
+            min_speech_db: Absolute level (dB re 1 LSB) below which nothing is speech
+            max_zcr: Zero-crossing rate above which a frame looks like hiss, unless it is very loud
+            initial_noise_db: Noise floor assumed before any quiet frame was seen
+            noise_range_db: Clamp for the adaptive noise floor
+        """
+        self.frame_bytes = SAMPLE_RATE * frame_ms // 1000
+        self.frame_ms = frame_ms
+        self.attack_frames = max(1, attack_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.snr_db = snr_db
+        self.min_speech_db = min_speech_db
+        self.max_zcr = max_zcr
+        self.noise_min_db, self.noise_max_db = noise_range_db
+        self._initial_noise_db = initial_noise_db
+        self._power = np.empty(self.frame_bytes, dtype=np.float64)
+        self._pending = bytearray()
+        self.reset()
+
+    def reset(self):
+        """Forget the stream (noise floor goes back to its initial estimate)."""
+        self.noise_db = self._initial_noise_db
+        self.level_db = 0.0
+        self.in_speech = False
+        self.frames = 0
+        self._voiced_run = 0
+        self._unvoiced_run = 0
+        self._speech_start_frame = 0
+        self._last_voiced_frame: Optional[int] = None
+        self._pending.clear()
+
+    @property
+    def speech_ms(self) -> int:
+        """Length of the current speech run (0 when not in speech)."""
+        if not self.in_speech:
+            return 0
+        return (self.frames - self._speech_start_frame) * self.frame_ms
+
+    @property
+    def ms_since_speech(self) -> Optional[int]:
+        """Time since the last voiced frame, or None if no speech was heard yet."""
+        if self._last_voiced_frame is None:
+            return None
+        return (self.frames - self._last_voiced_frame) * self.frame_ms
+
+    def _is_voiced(self, codes: np.ndarray) -> bool:
+        # Oversized frames cannot use the preallocated buffer
+        out = self._power[:len(codes)] if len(codes) <= self.frame_bytes else None
+        power = np.take(_ULAW_POWER, codes, out=out).mean()
+        level = 10.0 * np.log10(power + 1.0)
+        self.level_db = level
+        snr = level - self.noise_db
+
+        voiced = level >= self.min_speech_db and snr >= self.snr_db
+        if voiced:
+            # Sign is the top bit of the µ-law code
+            signs = codes >> 7
+            zcr = np.count_nonzero(signs[1:] != signs[:-1]) / (len(codes) - 1)
+            # Broadband noise crosses zero constantly; strong fricatives may too
+            voiced = zcr <= self.max_zcr or snr >= self.snr_db + 20.0
+
+        # Track the floor fast downwards and slowly upwards; voiced frames only
+        # leak in so a permanent change in background level is learned eventually
+        if voiced:
+            alpha = 0.002
+        elif level < self.noise_db:
+            alpha = 0.3
+        else:
+            alpha = 0.05
+        self.noise_db += alpha * (level - self.noise_db)
+        self.noise_db = min(self.noise_max_db, max(self.noise_min_db, self.noise_db))
+        return voiced
+
+    def process_frame(self, frame) -> Optional[str]:
+        """
+        Classify one frame.
+
+        Args:
+            frame: µ-law bytes, ideally exactly frame_bytes long (any other
+                length is classified as a single frame; use process() to split)
+
+        Returns:
+            SPEECH_START, SPEECH_END or None
+        """
+        codes = np.frombuffer(frame, dtype=np.uint8)
+        if len(codes) < 2:
+            return None
+        self.frames += 1
+
+        if self._is_voiced(codes):
+            self._last_voiced_frame = self.frames
+            self._unvoiced_run = 0
+            self._voiced_run += 1
+            if not self.in_speech and self._voiced_run >= self.attack_frames:
+                self.in_speech = True
+                self._speech_start_frame = self.frames - self._voiced_run
+                return SPEECH_START
+        else:
+            # A single dropout does not restart the attack count
+            self._voiced_run = max(0, self._voiced_run - 1)
+            self._unvoiced_run += 1
+            if self.in_speech and self._unvoiced_run >= self.hangover_frames:
+                self.in_speech = False
+                self._voiced_run = 0
+                return SPEECH_END
+        return None
+
+    def process(self, ulaw) -> Optional[str]:
+        """
+        Feed a chunk of any size; it is split into frames and a partial frame
+        is carried over to the next call.
+
+        Returns:
+            The last event raised by the chunk's frames, or None
+        """
+        pending = self._pending
+        if not pending and len(ulaw) == self.frame_bytes:
+            return self.process_frame(ulaw)
+
+        pending.extend(ulaw)
+        event = None
+        n = self.frame_bytes
+        usable = len(pending) - len(pending) % n
+        view = memoryview(pending)
+        for start in range(0, usable, n):
+            event = self.process_frame(view[start:start + n]) or event
+        view.release()
+        del pending[:usable]
+        return event
@@ -65,7 +65,10 @@ class CustomAgent:
         enable_call_transfer: bool = True,
         enable_callback_scheduling: bool = True,
         enable_call_ending: bool = True,
-        enable_lead_scoring: bool = True
+        enable_lead_scoring: bool = True,
+        
+        # Turn Taking (app.agent.turn_detector.TurnDetectionConfig overrides)
+        turn_detection: Optional[Dict[str, Any]] = None
     ):
         self.id = id
         self.user_id = user_id
@@ -123,6 +126,9 @@ class CustomAgent:
         self.enable_callback_scheduling = enable_callback_scheduling
         self.enable_call_ending = enable_call_ending
         self.enable_lead_scoring = enable_lead_scoring
+        
+        # Turn Taking
+        self.turn_detection = turn_detection or {}
 
     def to_dict(self):
         return {
@@ -175,7 +181,9 @@ class CustomAgent:
             "enable_call_transfer": self.enable_call_transfer,
             "enable_callback_scheduling": self.enable_callback_scheduling,
             "enable_call_ending": self.enable_call_ending,
-            "enable_lead_scoring": self.enable_lead_scoring
+            "enable_lead_scoring": self.enable_lead_scoring,
+            # Turn Taking
+            "turn_detection": self.turn_detection
         }
 
     @staticmethod
@@ -231,5 +239,7 @@ class CustomAgent:
             enable_call_transfer=source.get("enable_call_transfer", True),
             enable_callback_scheduling=source.get("enable_callback_scheduling", True),
             enable_call_ending=source.get("enable_call_ending", True),
-            enable_lead_scoring=source.get("enable_lead_scoring", True)
+            enable_lead_scoring=source.get("enable_lead_scoring", True),
+            # Turn Taking
+            turn_detection=source.get("turn_detection")
         )
\ No newline at end of file
@@ -114,53 +114,27 @@ async def voice_webhook(request: Request):
             response.append(connect)
         else:
             # Strict inbound routing based on dialed business number
-            from app.models.campaign import CallSession
-            from app.models.phone_number import VirtualPhoneNumber
+            from app.services.routing_table import routing_table
 
             try:
-                campaign = None
-                target_agent_id = None
+                # 1) Resolve assigned agent from business number, then
+                # 2) its active inbound call session (in-memory routing table)
+                route = await routing_table.resolve(to_num_norm)
+                target_agent_id = route.target_agent_id
+                call_session = route.call_session
 
-                # 1) Resolve assigned agent from business number
-                try:
-                    if phone_docs:
-                        for doc in phone_docs:
-                            pn = VirtualPhoneNumber.from_dict(doc.to_dict())
-                            if pn.is_active and pn.assigned_agents:
-                                target_agent_id = pn.assigned_agents[0]
-                                logger.info(f"STRICT ROUTING: Business line {to_num_norm} assigned to agent {target_agent_id}")
-                                break
-                except Exception as e:
-                    logger.warning(f"Error checking phone number assignment: {e}")
-
-                # 2) Find active inbound call session for that agent
                 if target_agent_id:
-                    call_sessions_ref = db.collection('campaigns')
-                    q = call_sessions_ref.where(filter=FieldFilter('type', '==', 'inbound')) \
-                                      .where(filter=FieldFilter('status', '==', 'active')) \
-                                      .where(filter=FieldFilter('custom_agent_id', '==', target_agent_id))
-                    found_call_sessions = [CallSession.from_dict(d.to_dict(), d.id) for d in q.stream()]
-                    if found_call_sessions:
-                        # Prefer most recently updated
-                        found_call_sessions.sort(key=lambda c: c.updated_at or c.created_at, reverse=True)
-                        call_session = found_call_sessions[0]
+                    logger.info(f"STRICT ROUTING: Business line {to_num_norm} assigned to agent {target_agent_id}")
+                    if call_session:
                         logger.info(f"✅ Found inbound call session {call_session.id} for agent {target_agent_id}")
                     else:
                         logger.warning(f"❌ No active inbound call session for agent {target_agent_id}")
                         response.say("The assigned agent is currently unavailable. Please try again later.", voice="Polly.Joanna")
                         response.hangup()
                         return Response(content=str(response), media_type="application/xml")
-                else:
+                elif call_session:
                     # 3) Generic pool fallback
-                    logger.info("No agent assignment on this number. Checking general inbound call sessions...")
-                    call_sessions_ref = db.collection('campaigns')
-                    q = call_sessions_ref.where(filter=FieldFilter('type', '==', 'inbound')) \
-                                     .where(filter=FieldFilter('status', '==', 'active'))
-                    found_call_sessions = [CallSession.from_dict(d.to_dict(), d.id) for d in q.stream()]
-                    if found_call_sessions:
-                        found_call_sessions.sort(key=lambda c: bool(c.custom_agent_id), reverse=True)
-                        call_session = found_call_sessions[0]
-                        logger.info(f"Using fallback inbound call session {call_session.id}")
+                    logger.info(f"No agent assignment on this number. Using fallback inbound call session {call_session.id}")
 
                 if call_session:
                     resolved_campaign_id = call_session.id
@@ -202,6 +176,11 @@ async def voice_webhook(request: Request):
                 return Response(content=str(response), media_type="application/xml")
 
         # Normalize Indentation - This runs for both if and else blocks (unless returned earlier)
+        # Open the call's Deepgram socket while Twilio sets up the media stream
+        if call_sid != "unknown":
+            from app.services.deepgram_websocket import deepgram_ws_service
+            deepgram_ws_service.prewarm(call_sid)
+
         xml = str(response)
         print(f"TwiML generated successfully")
         logger.info(f"Returning XML: {xml[:200]}")
@@ -242,10 +221,20 @@ async def twilio_websocket_endpoint(websocket: WebSocket):
 @router.get("/health")
 async def twilio_health_check():
     """Health check endpoint"""
+    from app.services.tts_cache import tts_cache
+    from app.services.llm_client import get_llm_stats
+    from app.services.prompt_compiler import prompt_compiler
+    from app.services.deepgram_websocket import deepgram_ws_service
+    from app.agent.speculative_turn import get_speculation_stats
     return {
         "status": "healthy",
         "service": "Twilio Voice Integration",
-        "websocket_url": WEBSOCKET_URL
+        "websocket_url": WEBSOCKET_URL,
+        "tts_cache": tts_cache.get_stats(),
+        "llm": get_llm_stats(),
+        "prompts": prompt_compiler.get_stats(),
+        "stt_pool": deepgram_ws_service.get_pool_stats(),
+        "speculation": get_speculation_stats()
     }
 
 
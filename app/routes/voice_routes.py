@@ -10,6 +10,7 @@ import json
 from app.dependencies import get_db
 from app.services.twilio_service import handle_incoming_call, handle_call_status
 from app.agent.orchestrator import process_audio_chunk, get_conversation_state, get_all_active_calls
+from app.services.playback_tracker import SpeechSegment
 from app.core.security import get_current_user
 
 router = APIRouter(prefix="/voice", tags=["Voice"])
@@ -68,7 +69,12 @@ async def media_stream(websocket: WebSocket, call_sid: str):
                 
                 if response:
                     # Send response back through WebSocket
-                    await websocket.send_bytes(response)
+                    if isinstance(response, SpeechSegment):
+                        # No marks on this stream: treat the segment as played once sent
+                        await websocket.send_bytes(response.audio)
+                        get_conversation_state(call_sid).playback.on_mark(response.mark_name)
+                    else:
+                        await websocket.send_bytes(response)
                     
             elif message["event"] == "start":
                 # Initialize conversation state
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 import json
 
@@ -33,6 +33,8 @@ class CustomAgentCreate(BaseModel):
     success_criteria: Optional[List[str]] = None
     # Phone Number Assignment
     phone_number_id: Optional[str] = None
+    # Turn Taking: end-of-turn hold times in ms, e.g. {"incomplete_hold_ms": 1800}
+    turn_detection: Optional[Dict[str, Any]] = None
 
 class CustomAgentUpdate(BaseModel):
     name: Optional[str] = None
@@ -64,6 +66,8 @@ class CustomAgentUpdate(BaseModel):
     success_criteria: Optional[List[str]] = None
     # Phone Number Assignment
     phone_number_id: Optional[str] = None
+    # Turn Taking: end-of-turn hold times in ms, e.g. {"incomplete_hold_ms": 1800}
+    turn_detection: Optional[Dict[str, Any]] = None
 
 class CustomAgentResponse(CustomAgentCreate):
     id: str
@@ -95,6 +99,7 @@ class CustomAgentResponse(CustomAgentCreate):
             "trained_documents": getattr(obj, 'trained_documents', []) if isinstance(getattr(obj, 'trained_documents', []), list) else (json.loads(getattr(obj, 'trained_documents', '[]')) if getattr(obj, 'trained_documents', None) else []),
             "website_urls": getattr(obj, 'website_urls', []) if isinstance(getattr(obj, 'website_urls', []), list) else (json.loads(getattr(obj, 'website_urls', '[]')) if getattr(obj, 'website_urls', None) else []),
             "vector_db_namespace": getattr(obj, 'vector_db_namespace', ''),
+            "turn_detection": getattr(obj, 'turn_detection', None) or {},
             "is_active": getattr(obj, 'is_active', True),
             "created_at": getattr(obj, 'created_at').isoformat() if getattr(obj, 'created_at', None) else None,
             "updated_at": getattr(obj, 'updated_at').isoformat() if getattr(obj, 'updated_at', None) else None
@@ -0,0 +1,287 @@
+"""
+Persistent Cartesia WebSocket TTS session per call.
+
+Every SSE request pays TLS/HTTP setup and model warm-up before the first
+audio byte. A CartesiaTTSSession opens one WebSocket when the call's media
+stream starts and keeps it for the whole call. Each assistant turn is one
+Cartesia context: sentences are sent into it as they become available with
+continue=true, so prosody carries across them, and audio chunks are yielded
+as soon as they arrive. Many contexts can be in flight on the socket; a
+reader task routes responses to them by context_id.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import uuid
+from typing import AsyncIterator, Dict, Optional
+
+import websockets
+from dotenv import load_dotenv
+
+from app.audio.transcode import MULAW_8K, AudioFormat, wrap_audio
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CARTESIA_WS_URL = "wss://api.cartesia.ai/tts/websocket"
+CARTESIA_VERSION = os.getenv("CARTESIA_VERSION", "2025-04-16")
+CARTESIA_CONNECT_TIMEOUT = 5.0
+CARTESIA_CHUNK_TIMEOUT = 10.0  # Max wait between audio chunks before giving up on a context
+
+
+class CartesiaSessionError(Exception):
+    """The session could not produce audio (not connected, socket lost, API error)."""
+
+
+class CartesiaContext:
+    """One assistant turn on a session; text sent into it continues the same utterance."""
+
+    def __init__(self, session: "CartesiaTTSSession", voice_id: Optional[str], language: str):
+        self.session = session
+        self.context_id = uuid.uuid4().hex
+        self.voice_id = voice_id
+        self.language = language
+        self.finished = False      # Last transcript (continue=false) was sent
+        self._queue: asyncio.Queue = asyncio.Queue()
+        session._contexts[self.context_id] = self._queue
+
+    async def send(self, text: str, final: bool = False, flush: bool = False):
+        """
+        Add text to the turn.
+
+        Args:
+            text: Sentence or fragment (Cartesia stitches fragments of one context)
+            final: No more text follows; the context ends after this
+            flush: Render everything sent so far now; a flush_done follows its audio
+        """
+        if self.finished:
+            raise CartesiaSessionError("context already finished")
+        if self.voice_id is None:
+            from app.services.tts_service import select_cartesia_voice
+            self.voice_id = select_cartesia_voice(text)
+        self.finished = final
+        await self.session._send({
+            "context_id": self.context_id,
+            "model_id": self.session.model_id,
+            "transcript": text,
+            "voice": {"mode": "id", "id": self.voice_id},
+            "language": self.language,
+            "output_format": {
+                "container": "raw",
+                "encoding": self.session.output_format.encoding,
+                "sample_rate": self.session.output_format.sample_rate,
+            },
+            "continue": not final,
+            **({"flush": True} if flush else {}),
+        })
+
+    async def end(self):
+        """Close the turn without more text (flushes buffered text)."""
+        if not self.finished:
+            await self.send("", final=True)
+
+    async def cancel(self):
+        """Stop generation for this turn (barge-in); audio already sent is dropped by the caller."""
+        self.finished = True
+        self.session._contexts.pop(self.context_id, None)
+        if not self.session.connected:
+            return
+        try:
+            await self.session._send({"context_id": self.context_id, "cancel": True})
+        except CartesiaSessionError:
+            pass
+
+    def fail(self, reason: str):
+        """Make audio() raise CartesiaSessionError (text for the turn could not be sent)."""
+        self.finished = True
+        self._queue.put_nowait({"type": "error", "error": reason})
+
+    async def audio(self, flushes: bool = False) -> AsyncIterator[Optional[bytes]]:
+        """
+        Yield audio chunks of this turn as they arrive, until the turn is done.
+
+        Args:
+            flushes: Also yield None at each flush_done (the audio of the text
+                sent before that flush is complete)
+
+        Raises:
+            CartesiaSessionError: API error or socket lost mid-turn
+        """
+        completed = False
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), timeout=CARTESIA_CHUNK_TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise CartesiaSessionError("timed out waiting for audio")
+                kind = message.get("type")
+                if kind == "chunk" and message.get("data"):
+                    yield wrap_audio(base64.b64decode(message["data"]), self.session.output_format)
+                elif kind == "flush_done" and flushes:
+                    yield None
+                elif kind == "error":
+                    raise CartesiaSessionError(message.get("error") or message.get("message") or "unknown error")
+                if kind == "done" or message.get("done"):
+                    completed = True
+                    return
+        finally:
+            if not completed:
+                # Consumer stopped early (barge-in) or failed: stop paying for audio
+                asyncio.create_task(self.cancel())
+            self.session._contexts.pop(self.context_id, None)
+
+
+class CartesiaTTSSession:
+    """One Cartesia TTS WebSocket shared by every utterance of a call."""
+
+    def __init__(self, call_sid: str, output_format: AudioFormat = MULAW_8K, language: str = "en"):
+        """
+        Args:
+            call_sid: Call the session belongs to (for logging)
+            output_format: Audio format requested for every context
+            language: Language hint sent with each request
+        """
+        from app.services.tts_service import CARTESIA_API_KEY, CARTESIA_MODEL_ID
+        self.call_sid = call_sid
+        self.output_format = output_format
+        self.language = language
+        self.model_id = CARTESIA_MODEL_ID
+        self._api_key = CARTESIA_API_KEY
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._connecting: Optional[asyncio.Task] = None
+        self._contexts: Dict[str, asyncio.Queue] = {}
+        self._closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None and not self._closed
+
+    async def connect(self) -> bool:
+        """Open the WebSocket (concurrent callers share one attempt)."""
+        if self.connected:
+            return True
+        if self._closed or not self._api_key:
+            return False
+        if self._connecting is None or self._connecting.done():
+            self._connecting = asyncio.create_task(self._open())
+        return await asyncio.shield(self._connecting)
+
+    async def _open(self) -> bool:
+        try:
+            self._ws = await asyncio.wait_for(
+                websockets.connect(
+                    CARTESIA_WS_URL,
+                    additional_headers={"X-API-Key": self._api_key, "Cartesia-Version": CARTESIA_VERSION},
+                    ping_interval=20,
+                    ping_timeout=20,
+                    close_timeout=2,
+                    max_size=None,
+                    compression=None,
+                ),
+                timeout=CARTESIA_CONNECT_TIMEOUT,
+            )
+        except Exception as e:
+            logger.error(f"❌ Cartesia WebSocket connect failed for call {self.call_sid}: {type(e).__name__}: {e}")
+            self._ws = None
+            return False
+        self._reader = asyncio.create_task(self._read_loop(self._ws))
+        logger.info(f"✅ Cartesia TTS WebSocket open for call {self.call_sid}")
+        return True
+
+    async def _read_loop(self, ws):
+        try:
+            async for raw in ws:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                queue = self._contexts.get(message.get("context_id"))
+                if queue is not None:
+                    queue.put_nowait(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cartesia WebSocket for call {self.call_sid} dropped: {e}")
+        finally:
+            if self._ws is ws:
+                self._ws = None
+            # Wake every waiting turn; the next turn reconnects
+            for queue in list(self._contexts.values()):
+                queue.put_nowait({"type": "error", "error": "connection closed"})
+
+    async def _send(self, message: dict):
+        if not await self.connect():
+            raise CartesiaSessionError("not connected")
+        try:
+            await self._ws.send(json.dumps(message))
+        except Exception as e:
+            raise CartesiaSessionError(f"send failed: {e}")
+
+    def new_context(self, voice_id: Optional[str] = None) -> CartesiaContext:
+        """Start a turn whose sentences are sent with continue=true (see ResponseSpeaker)."""
+        return CartesiaContext(self, voice_id, self.language)
+
+    async def stream(self, text: str, voice_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Synthesize one complete utterance on the shared socket (its own context).
+
+        Yields:
+            bytes: Audio chunks in output_format as they arrive
+        """
+        context = self.new_context(voice_id)
+        await context.send(text, final=True)
+        async for chunk in context.audio():
+            yield chunk
+
+    async def close(self):
+        self._closed = True
+        if self._connecting is not None and not self._connecting.done():
+            self._connecting.cancel()
+        ws, self._ws = self._ws, None
+        if self._reader is not None:
+            self._reader.cancel()
+        if ws is not None:
+            try:
+                await ws.close()
+            except Exception:
+                pass
+        logger.info(f"Cartesia TTS WebSocket closed for call {self.call_sid}")
+
+
+class CartesiaSessionManager:
+    """Per-call registry of Cartesia sessions."""
+
+    def __init__(self):
+        self._sessions: Dict[str, CartesiaTTSSession] = {}
+
+    def open(self, call_sid: str) -> Optional[CartesiaTTSSession]:
+        """Create the call's session and start connecting in the background."""
+        from app.services.tts_service import CARTESIA_API_KEY
+        if not call_sid or not CARTESIA_API_KEY:
+            return None
+        session = self._sessions.get(call_sid)
+        if session is None:
+            session = self._sessions[call_sid] = CartesiaTTSSession(call_sid)
+            asyncio.create_task(session.connect())
+        return session
+
+    def get(self, call_sid: Optional[str]) -> Optional[CartesiaTTSSession]:
+        return self._sessions.get(call_sid) if call_sid else None
+
+    def close(self, call_sid: str):
+        """Close the call's session (safe to call from sync cleanup code)."""
+        session = self._sessions.pop(call_sid, None)
+        if session is None:
+            return
+        try:
+            asyncio.get_running_loop().create_task(session.close())
+        except RuntimeError:
+            pass  # No loop any more (shutdown): the socket dies with the process
+
+
+# Global instance
+cartesia_sessions = CartesiaSessionManager()
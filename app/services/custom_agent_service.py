@@ -75,7 +75,8 @@ class CustomAgentService:
                     "website_urls": json.dumps(agent_data.get("website_urls", [])),
                     "website_urls": json.dumps(agent_data.get("website_urls", [])),
                     "vector_db_namespace": agent_data.get("vector_db_namespace", ""),
-                    "phone_number_id": agent_data.get("phone_number_id")
+                    "phone_number_id": agent_data.get("phone_number_id"),
+                    "turn_detection": agent_data.get("turn_detection") or {}
                 }
                 
                 doc_ref = self.db.collection('custom_agents').document()
@@ -286,6 +287,8 @@ class CustomAgentService:
                     updates["vector_db_namespace"] = str(agent_data["vector_db_namespace"])
                 if "phone_number_id" in agent_data:
                     updates["phone_number_id"] = str(agent_data["phone_number_id"]) if agent_data["phone_number_id"] else None
+                if "turn_detection" in agent_data:
+                    updates["turn_detection"] = agent_data["turn_detection"] or {}
                 
                 # Update in Firestore
                 doc_ref = self.db.collection('custom_agents').document(agent_id)
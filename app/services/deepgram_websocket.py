@@ -1,34 +1,210 @@
 """
 Deepgram WebSocket Service for Real-Time Speech-to-Text
+
+Connections are pre-warmed: when a call is expected (Twilio voice webhook,
+outbound call placed by the lead caller) a socket is opened and reserved for
+its call_sid, and a small pool of idle warm sockets absorbs bursts. connect()
+takes the reserved or an idle socket when the media stream starts, so the
+first utterance does not wait for TLS and WebSocket handshakes. Warm sockets
+are kept open with Deepgram KeepAlive messages until they are handed over.
+
+KeepAlive control messages (not silence audio) are only sent to a socket
+after DEEPGRAM_KEEPALIVE_IDLE seconds without real audio. One shared timer
+wheel (KeepAliveWheel) tracks every socket, so calls that are streaming cost
+a single timestamp update per frame and no timer task of their own.
 """
 import asyncio
 import json
 import logging
+import math
+import time
 import websockets
 import os
-from typing import Dict, Callable, Optional, Any
+from typing import Awaitable, Dict, Callable, List, Optional, Any, Set, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Using nova-2-phonecall with Twilio's 8 kHz mu-law; every call uses the same
+# parameters, so warm sockets are interchangeable
+DEEPGRAM_UTTERANCE_END_MS = 1000  # Word gap after which Deepgram sends UtteranceEnd
+# punctuate + vad_events feed end-of-turn detection (trailing punctuation, SpeechStarted)
+DEEPGRAM_LISTEN_URL = (
+    "wss://api.deepgram.com/v1/listen?encoding=mulaw&sample_rate=8000&channels=1&model=nova-2-phonecall"
+    "&language=en&smart_formatting=true&punctuate=true&interim_results=true&endpointing=300"
+    f"&utterance_end_ms={DEEPGRAM_UTTERANCE_END_MS}&vad_events=true"
+)
+DEEPGRAM_CONNECT_TIMEOUT = 10.0
+DEEPGRAM_WARM_POOL_SIZE = int(os.getenv("DEEPGRAM_WARM_POOL_SIZE", "2"))      # Idle warm sockets kept for bursts
+DEEPGRAM_WARM_TTL = float(os.getenv("DEEPGRAM_WARM_TTL", "90"))               # Reserved socket waits this long for its call (ringing + answer)
+DEEPGRAM_WARM_MAX_AGE = float(os.getenv("DEEPGRAM_WARM_MAX_AGE", "300"))      # Idle pool sockets are recycled after this
+# Deepgram closes a socket after ~10 s without audio or KeepAlive
+DEEPGRAM_KEEPALIVE_IDLE = float(os.getenv("DEEPGRAM_KEEPALIVE_IDLE", "3.0"))  # Seconds without audio before a KeepAlive
+DEEPGRAM_KEEPALIVE_TICK = 0.5   # Timer wheel resolution
+DEEPGRAM_KEEPALIVE_SLOTS = 32   # Wheel horizon = slots x tick; later deadlines are re-checked on the way
+KEEPALIVE_MESSAGE = json.dumps({"type": "KeepAlive"})
+
+
+class KeepAliveWheel:
+    """
+    Hashed timer wheel sending KeepAlive to sockets that went quiet.
+
+    touch() only records the time of the last real audio; the deadline is
+    checked when its slot comes round and pushed back if audio flowed since.
+    """
+
+    def __init__(self, idle_gap: float = DEEPGRAM_KEEPALIVE_IDLE, tick: float = DEEPGRAM_KEEPALIVE_TICK, slots: int = DEEPGRAM_KEEPALIVE_SLOTS):
+        """
+        Args:
+            idle_gap: Seconds without activity before on_idle is called
+            tick: Seconds per wheel slot
+            slots: Number of slots
+        """
+        self.idle_gap = idle_gap
+        self.tick = tick
+        self._slots: List[Set[str]] = [set() for _ in range(slots)]
+        # key -> [on_idle, last_activity, scheduled tick]
+        self._entries: Dict[str, list] = {}
+        self._ticks = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"keepalives": 0, "deferred": 0}
+
+    def register(self, key: str, on_idle: Callable[[], Awaitable[bool]]):
+        """
+        Track a socket.
+
+        Args:
+            key: Socket key (call_sid, or an id for warm sockets)
+            on_idle: Sends the KeepAlive; returns False to stop tracking
+        """
+        self._entries[key] = [on_idle, time.monotonic(), 0]
+        self._schedule(key, self.idle_gap)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def touch(self, key: str):
+        """Record activity (real audio sent) for a socket."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1] = time.monotonic()
+
+    def unregister(self, key: str):
+        self._entries.pop(key, None)  # Slot references are skipped lazily
+
+    def _schedule(self, key: str, delay: float):
+        due = self._ticks + max(1, math.ceil(delay / self.tick))
+        self._entries[key][2] = due
+        self._slots[due % len(self._slots)].add(key)
+
+    async def _run(self):
+        try:
+            while self._entries:
+                await asyncio.sleep(self.tick)
+                self._ticks += 1
+                slot = self._slots[self._ticks % len(self._slots)]
+                keys = list(slot)
+                slot.clear()
+                now = time.monotonic()
+                for key in keys:
+                    entry = self._entries.get(key)
+                    if entry is None or entry[2] < self._ticks:
+                        continue  # Unregistered, or a stale reference from an earlier schedule
+                    if entry[2] > self._ticks:
+                        if entry[2] % len(self._slots) == self._ticks % len(self._slots):
+                            slot.add(key)  # Beyond the horizon: wait another lap
+                        continue
+                    idle = now - entry[1]
+                    if idle < self.idle_gap:
+                        self._stats["deferred"] += 1
+                        self._schedule(key, self.idle_gap - idle)
+                        continue
+                    entry[1] = now
+                    self._schedule(key, self.idle_gap)
+                    asyncio.create_task(self._fire(key, entry[0]))
+        finally:
+            self._task = None
+
+    async def _fire(self, key: str, on_idle: Callable[[], Awaitable[bool]]):
+        try:
+            keep = await on_idle()
+        except Exception as e:
+            logger.debug(f"KeepAlive for {key} failed: {e}")
+            keep = False
+        if keep:
+            self._stats["keepalives"] += 1
+        elif self._entries.get(key, [None])[0] is on_idle:
+            self.unregister(key)
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self._stats)
+        stats["tracked"] = len(self._entries)
+        return stats
+
+
+class WarmConnection:
+    """A connected Deepgram socket waiting for a call, kept open with KeepAlive messages."""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.opened_at = time.monotonic()
+        self._key = f"warm-{id(self)}"
+        keepalive_wheel.register(self._key, self._keepalive)
+
+    @property
+    def is_open(self) -> bool:
+        return self.websocket.close_code is None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.opened_at
+
+    async def _keepalive(self) -> bool:
+        if self.age >= DEEPGRAM_WARM_MAX_AGE:
+            # Unused for too long: let it go rather than hold it open forever
+            await self.close()
+            return False
+        await self.websocket.send(KEEPALIVE_MESSAGE)
+        return True
+
+    def detach(self):
+        """Stop keeping the socket warm and hand it over."""
+        keepalive_wheel.unregister(self._key)
+        return self.websocket
+
+    async def close(self):
+        keepalive_wheel.unregister(self._key)
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+
 class DeepgramWebSocketService:
     """Manages WebSocket connections to Deepgram for real-time transcription"""
     
     def __init__(self):
         self.connections: Dict[str, Dict[str, Any]] = {}
         self.transcript_callbacks: Dict[str, Callable] = {}
+        self.event_callbacks: Dict[str, Callable] = {}  # UtteranceEnd / SpeechStarted / SpeechFinal per call
         self.DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
         self.reconnect_attempts: Dict[str, int] = {}  # Track reconnect attempts per call
+        # Pre-warm pool: call_sid -> (task resolving to a WarmConnection, reserved_at), plus idle sockets
+        self._reserved: Dict[str, Tuple[asyncio.Future, float]] = {}
+        self._idle: List[WarmConnection] = []
+        self._refilling = 0
+        self._pool_closed = False
+        self._pool_stats = {"prewarmed": 0, "warm_hits": 0, "cold_connects": 0, "expired": 0}
         
-    async def connect(self, call_sid: str, on_transcript: Callable) -> bool:
+    async def connect(self, call_sid: str, on_transcript: Callable, on_event: Optional[Callable] = None) -> bool:
         """
         Establish a WebSocket connection to Deepgram for real-time transcription
         
         Args:
             call_sid: Unique identifier for the call
             on_transcript: Callback function to handle transcription results
+            on_event: Optional async (call_sid, event_type) callback for turn-taking events
             
         Returns:
             bool: True if connection successful, False otherwise
@@ -37,35 +213,22 @@ class DeepgramWebSocketService:
             logger.error("DEEPGRAM_API_KEY not found in environment variables")
             return False
             
-        # Deepgram WebSocket URL with parameters optimized for real-time transcription
-        # Using nova-2-general model with en-IN language for Indian accents
         if call_sid in self.connections:
             logger.warning(f"Connection for {call_sid} already exists. Closing old connection.")
             await self.disconnect(call_sid)
-            
-        url = f"wss://api.deepgram.com/v1/listen?encoding=mulaw&sample_rate=8000&channels=1&model=nova-2-phonecall&language=en&smart_formatting=true&interim_results=true&endpointing=300&utterance_end_ms=1000"
-        
-        headers = {
-            "Authorization": f"Token {self.DEEPGRAM_API_KEY}"
-        }
-        
+
         try:
-            # LATENCY OPTIMIZATION: Faster timeout for quicker retry on failure
-            # Reduced from 30s to 10s - if it doesn't connect in 10s, retry faster
-            logger.info(f"Attempting to connect to Deepgram WebSocket for call {call_sid}...")
-            
-            websocket = await asyncio.wait_for(
-                websockets.connect(
-                    url, 
-                    additional_headers=headers,
-                    ping_interval=10,  # Reduced from 20s for more frequent keepalive
-                    ping_timeout=20,   # Reduced from 30s
-                    close_timeout=5,   # Reduced from 10s
-                    max_size=None,     # No limit on message size
-                    compression=None   # Disable compression for lower latency
-                ),
-                timeout=10.0  # CRITICAL: Reduced from 30s to 10s for faster retry
-            )
+            websocket = await self._take_warm(call_sid)
+            if websocket is not None:
+                self._pool_stats["warm_hits"] += 1
+                logger.info(f"♨️ Using pre-warmed Deepgram WebSocket for call {call_sid}")
+            else:
+                # LATENCY OPTIMIZATION: Faster timeout for quicker retry on failure
+                # Reduced from 30s to 10s - if it doesn't connect in 10s, retry faster
+                logger.info(f"Attempting to connect to Deepgram WebSocket for call {call_sid}...")
+                websocket = await self._open_socket()
+                self._pool_stats["cold_connects"] += 1
+            self._refill()
             
             # Store connection info
             self.connections[call_sid] = {
@@ -75,19 +238,21 @@ class DeepgramWebSocketService:
                 "last_heartbeat": asyncio.get_event_loop().time()
             }
             self.transcript_callbacks[call_sid] = on_transcript
+            if on_event is not None:
+                self.event_callbacks[call_sid] = on_event
             self.reconnect_attempts[call_sid] = 0  # Reset reconnect attempts
             
             # Start listening for messages
             asyncio.create_task(self._listen_for_messages(call_sid))
             
-            # Start keep-alive loop to prevent timeouts during agent speech
-            asyncio.create_task(self._keep_alive_loop(call_sid))
+            # KeepAlive if the call stops sending audio (e.g. media stream stalls)
+            keepalive_wheel.register(call_sid, lambda: self._send_keepalive(call_sid))
             
             logger.info(f"✅ Deepgram WebSocket connected for call {call_sid} with language en-IN")
             return True
             
         except asyncio.TimeoutError:
-            logger.error(f"❌ Deepgram WebSocket connection TIMEOUT for call {call_sid} (exceeded 10s)")
+            logger.error(f"❌ Deepgram WebSocket connection TIMEOUT for call {call_sid} (exceeded {DEEPGRAM_CONNECT_TIMEOUT:.0f}s)")
             logger.error(f"   This usually indicates network/firewall issues blocking WSS connections")
             logger.error(f"   Attempted URL: wss://api.deepgram.com/v1/listen...")
             return False
@@ -95,45 +260,171 @@ class DeepgramWebSocketService:
             logger.error(f"❌ Failed to connect to Deepgram WebSocket for call {call_sid}: {type(e).__name__}: {e}")
             return False
     
-    async def _keep_alive_loop(self, call_sid: str):
-        """
-        Send silence frames periodically to keep Deepgram connection alive
-        when we are not sending real audio (e.g. while Agent is speaking).
-        """
-        # Silence frame for 8kHz mulaw (approx 20ms)
-        # 0xFF is silence in mu-law
-        silence_frame = b'\xff' * 160 
-        
+    async def _open_socket(self):
+        """Open a Deepgram listen socket (raises on failure or timeout)."""
+        headers = {
+            "Authorization": f"Token {self.DEEPGRAM_API_KEY}"
+        }
+        return await asyncio.wait_for(
+            websockets.connect(
+                DEEPGRAM_LISTEN_URL,
+                additional_headers=headers,
+                ping_interval=10,  # Reduced from 20s for more frequent keepalive
+                ping_timeout=20,   # Reduced from 30s
+                close_timeout=5,   # Reduced from 10s
+                max_size=None,     # No limit on message size
+                compression=None   # Disable compression for lower latency
+            ),
+            timeout=DEEPGRAM_CONNECT_TIMEOUT  # CRITICAL: Reduced from 30s to 10s for faster retry
+        )
+
+    async def _open_warm(self) -> Optional[WarmConnection]:
         try:
-            while True:
-                if call_sid not in self.connections:
-                    break
-                    
-                connection = self.connections[call_sid]
-                if not connection["connected"]:
-                    break
-                
-                # Check last activity
-                # If we haven't sent audio recently, send silence
-                # Deepgram utterance_end_ms is short (1000ms), so we should send frequently
-                # to avoid triggering end-of-utterance if we just paused briefly, 
-                # BUT here we mainly want to prevent CONNECTION timeout (which is longer).
-                # However, sending silence helps keep the stream "active" logic happy.
-                
-                try:
-                    websocket = connection["websocket"]
-                    await websocket.send(silence_frame)
-                    # logger.debug(f"Sent keep-alive silence for {call_sid}")
-                except Exception:
-                    break
-                    
-                # Send every 150ms (reduced from 200ms for better timeout protection)
-                await asyncio.sleep(0.15)
-                
+            return WarmConnection(await self._open_socket())
         except asyncio.CancelledError:
-            pass
+            raise
         except Exception as e:
-            logger.error(f"Error in keep-alive loop for {call_sid}: {e}")
+            logger.warning(f"⚠️ Deepgram pre-warm connect failed: {type(e).__name__}: {e}")
+            return None
+
+    def prewarm(self, call_sid: str):
+        """
+        Reserve a warm Deepgram socket for a call that is about to start.
+
+        Takes an idle pool socket if one is ready, otherwise starts connecting
+        in the background. connect() for the same call_sid picks it up.
+
+        Args:
+            call_sid: Call the socket is reserved for
+        """
+        if not call_sid or not self.DEEPGRAM_API_KEY:
+            return
+        self._evict_expired()
+        if call_sid in self.connections or call_sid in self._reserved:
+            return
+        warm = self._pop_idle()
+        if warm is not None:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(warm)
+        else:
+            future = asyncio.create_task(self._open_warm())
+        self._reserved[call_sid] = (future, time.monotonic())
+        self._pool_stats["prewarmed"] += 1
+        logger.info(f"♨️ Pre-warming Deepgram WebSocket for call {call_sid} ({'pooled' if warm else 'connecting'})")
+        self._refill()
+
+    def discard(self, call_sid: str):
+        """Drop a call's reserved socket (call not placed, not answered or ended)."""
+        entry = self._reserved.pop(call_sid, None)
+        if entry:
+            self._release_future(entry[0])
+
+    def _release_future(self, future: asyncio.Future):
+        if not future.done():
+            future.cancel()
+        elif not future.cancelled() and future.result() is not None:
+            asyncio.create_task(future.result().close())
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for call_sid, (future, reserved_at) in list(self._reserved.items()):
+            if now - reserved_at > DEEPGRAM_WARM_TTL:
+                del self._reserved[call_sid]
+                self._release_future(future)
+                self._pool_stats["expired"] += 1
+
+    def _pop_idle(self) -> Optional[WarmConnection]:
+        while self._idle:
+            warm = self._idle.pop()
+            if warm.is_open and warm.age < DEEPGRAM_WARM_MAX_AGE:
+                return warm
+            asyncio.create_task(warm.close())
+        return None
+
+    async def _take_warm(self, call_sid: str):
+        """The call's reserved socket, else an idle pool socket, else None (cold connect)."""
+        self._evict_expired()
+        warm = None
+        entry = self._reserved.pop(call_sid, None)
+        if entry:
+            future = entry[0]
+            try:
+                # Already connecting: only the rest of the handshake is left
+                warm = await asyncio.wait_for(asyncio.shield(future), timeout=DEEPGRAM_CONNECT_TIMEOUT)
+            except asyncio.CancelledError:
+                self._release_future(future)
+                raise
+            except Exception:
+                self._release_future(future)
+                warm = None
+            if warm is not None and not warm.is_open:
+                asyncio.create_task(warm.close())
+                warm = None
+        if warm is None:
+            warm = self._pop_idle()
+        return warm.detach() if warm is not None else None
+
+    def _refill(self):
+        """Top the idle pool back up to DEEPGRAM_WARM_POOL_SIZE in the background."""
+        for warm in [w for w in self._idle if not w.is_open]:
+            self._idle.remove(warm)
+        if self._pool_closed:
+            return
+        missing = DEEPGRAM_WARM_POOL_SIZE - len(self._idle) - self._refilling
+        for _ in range(max(0, missing)):
+            self._refilling += 1
+            asyncio.create_task(self._add_idle())
+
+    async def _add_idle(self):
+        try:
+            warm = await self._open_warm()
+        finally:
+            self._refilling -= 1
+        if warm is None:
+            return
+        if self._pool_closed:
+            await warm.close()
+        else:
+            self._idle.append(warm)
+
+    def release(self, call_sid: str):
+        """Close everything held for a call (safe to call from sync cleanup code)."""
+        self.discard(call_sid)
+        if call_sid in self.connections or call_sid in self.transcript_callbacks:
+            try:
+                asyncio.get_running_loop().create_task(self.disconnect(call_sid))
+            except RuntimeError:
+                pass  # No loop any more (shutdown): the socket dies with the process
+
+    async def close_pool(self):
+        """Close reserved and idle warm sockets (application shutdown)."""
+        self._pool_closed = True
+        for call_sid in list(self._reserved):
+            self.discard(call_sid)
+        idle, self._idle = self._idle, []
+        for warm in idle:
+            await warm.close()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        stats = dict(self._pool_stats)
+        stats["reserved"] = len(self._reserved)
+        stats["idle"] = len(self._idle)
+        stats["connections"] = len(self.connections)
+        stats["keepalive"] = keepalive_wheel.get_stats()
+        return stats
+
+    async def _send_keepalive(self, call_sid: str) -> bool:
+        """
+        Send Deepgram's KeepAlive control message (called by the wheel after an idle gap).
+
+        Returns:
+            bool: False once the call's connection is gone
+        """
+        connection = self.connections.get(call_sid)
+        if not connection or not connection["connected"]:
+            return False
+        await connection["websocket"].send(KEEPALIVE_MESSAGE)
+        return True
 
     async def _listen_for_messages(self, call_sid: str):
         """
@@ -184,12 +475,10 @@ class DeepgramWebSocketService:
                 elif data["type"] == "Metadata":
                     # Handle metadata (connection info, etc.)
                     logger.debug(f"Deepgram metadata for call {call_sid}: {data}")
-                elif data["type"] == "UtteranceEnd":
-                    # Handle end of utterance
-                    logger.debug(f"Utterance ended for call {call_sid}")
-                elif data["type"] == "SpeechStarted":
-                    # Handle speech started event
-                    logger.debug(f"Speech started for call {call_sid}")
+                elif data["type"] in ("UtteranceEnd", "SpeechStarted"):
+                    # Turn-taking signals for end-of-turn detection
+                    logger.debug(f"Deepgram {data['type']} for call {call_sid}")
+                    await self._emit_event(call_sid, data["type"])
                 elif data["type"] == "Error":
                     # Handle error messages
                     logger.error(f"Deepgram error for call {call_sid}: {data}")
@@ -222,6 +511,12 @@ class DeepgramWebSocketService:
                     transcript = transcript_data.get("transcript", "").strip()
                     confidence = transcript_data.get("confidence", 0.0)
                     is_final = data.get("is_final", False)
+                    speech_final = data.get("speech_final", False)
+
+                    # Endpointing with no new words (they were all in earlier finals)
+                    if speech_final and not transcript:
+                        await self._emit_event(call_sid, "SpeechFinal")
+                        return
                     
                     # STRICT FILTER: Ignore garbage confidence to prevent false detections
                     if confidence < 0.4:
@@ -237,12 +532,17 @@ class DeepgramWebSocketService:
                          
                          # Call the registered callback with the transcript
                          if call_sid in self.transcript_callbacks:
-                             # Signature expected: (call_sid, transcript, is_final, confidence)
-                             await self.transcript_callbacks[call_sid](call_sid, transcript, is_final, confidence)
+                             # Signature expected: (call_sid, transcript, is_final, confidence, speech_final)
+                             await self.transcript_callbacks[call_sid](call_sid, transcript, is_final, confidence, speech_final)
 
         except Exception as e:
             logger.error(f"Error handling transcription result for call {call_sid}: {e}")
     
+    async def _emit_event(self, call_sid: str, event_type: str):
+        callback = self.event_callbacks.get(call_sid)
+        if callback is not None:
+            await callback(call_sid, event_type)
+
     async def send_audio(self, call_sid: str, audio_data: bytes) -> bool:
         """
         Send audio data to Deepgram for transcription
@@ -266,6 +566,7 @@ class DeepgramWebSocketService:
         try:
             websocket = connection["websocket"]
             await websocket.send(audio_data)
+            keepalive_wheel.touch(call_sid)
             return True
         except Exception as e:
             logger.error(f"Failed to send audio to Deepgram for call {call_sid}: {e}")
@@ -289,6 +590,7 @@ class DeepgramWebSocketService:
                 pass  # Ignore errors when closing
                 
             connection["connected"] = False
+            keepalive_wheel.unregister(call_sid)
             logger.info(f"Deepgram WebSocket disconnected for call {call_sid}")
     
     async def disconnect(self, call_sid: str):
@@ -304,11 +606,13 @@ class DeepgramWebSocketService:
             
         if call_sid in self.transcript_callbacks:
             del self.transcript_callbacks[call_sid]
+        self.event_callbacks.pop(call_sid, None)
             
         if call_sid in self.reconnect_attempts:
             del self.reconnect_attempts[call_sid]
             
         logger.info(f"Deepgram WebSocket fully disconnected for call {call_sid}")
 
-# Global instance
+# Global instances
+keepalive_wheel = KeepAliveWheel()
 deepgram_ws_service = DeepgramWebSocketService()
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Dial-time greeting pre-synthesis for outbound calls.
+
+The lead caller knows the lead, agent and voice when it places a call, so the
+greeting is rendered while the phone is still ringing and parked here in a
+short-lived cache keyed by (lead_id, campaign_id). When the media stream
+starts, trigger_outbound_greeting() takes the ready audio instead of calling
+TTS, so the callee hears the agent as soon as they answer.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GREETING_CACHE_TTL = float(os.getenv("GREETING_CACHE_TTL", "120"))  # Ringing + answer window
+
+
+class PreparedGreeting(NamedTuple):
+    text: str
+    audio: Optional[bytes]
+
+
+class GreetingCacheService:
+    """Per-call cache of greetings rendered during the ringing phase."""
+
+    def __init__(self):
+        # (lead_id, campaign_id) -> (render task, created_at)
+        self._entries: Dict[Tuple[str, str], Tuple[asyncio.Task, float]] = {}
+
+    @staticmethod
+    def _key(lead_id, campaign_id) -> Tuple[str, str]:
+        return (str(lead_id or ""), str(campaign_id or ""))
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key, (task, created_at) in list(self._entries.items()):
+            if now - created_at > GREETING_CACHE_TTL:
+                task.cancel()
+                del self._entries[key]
+
+    async def _render(self, text: str, voice_id: Optional[str]) -> PreparedGreeting:
+        from app.audio.transcode import MULAW_8K
+        from app.services.tts_service import synthesize_speech_with_provider
+        try:
+            audio = await synthesize_speech_with_provider("cartesia", text, voice_id=voice_id, output_format=MULAW_8K)
+        except Exception as e:
+            logger.error(f"Greeting pre-synthesis failed: {e}")
+            audio = None
+        if audio:
+            logger.info(f"✅ Pre-synthesized greeting ({len(audio)} bytes): {text}")
+        return PreparedGreeting(text, audio)
+
+    def prerender(
+        self,
+        lead_id: str,
+        campaign_id: str,
+        lead_name: Optional[str] = None,
+        agent_name: Optional[str] = None,
+        company_name: Optional[str] = None,
+        goal: Optional[str] = None,
+        voice_id: Optional[str] = None,
+    ):
+        """
+        Start rendering a lead's greeting in the background.
+
+        Args:
+            lead_id: Lead being dialed
+            campaign_id: Campaign the call belongs to
+            lead_name: Lead's name (personalizes the greeting)
+            agent_name: Agent display name
+            company_name: Company the agent represents
+            goal: Campaign goal (or agent's primary goal)
+            voice_id: TTS voice to render with
+        """
+        from app.agent.orchestrator import _generate_natural_greeting
+
+        self._evict_expired()
+        text = _generate_natural_greeting(
+            agent_name or "there",
+            company_name or "our company",
+            goal or "assist you",
+            lead_name,
+        )
+        key = self._key(lead_id, campaign_id)
+        old = self._entries.pop(key, None)
+        if old:
+            old[0].cancel()
+        self._entries[key] = (asyncio.create_task(self._render(text, voice_id)), time.monotonic())
+
+    async def take(self, lead_id, campaign_id, timeout: float) -> Optional[PreparedGreeting]:
+        """
+        Remove and return the greeting for a call, waiting for a render in progress.
+
+        Args:
+            lead_id: Lead on the call
+            campaign_id: Campaign the call belongs to
+            timeout: Max seconds to wait for a render that is still running
+
+        Returns:
+            PreparedGreeting or None on a miss, expiry or timeout
+        """
+        entry = self._entries.pop(self._key(lead_id, campaign_id), None)
+        if entry is None:
+            return None
+        task, created_at = entry
+        if time.monotonic() - created_at > GREETING_CACHE_TTL:
+            task.cancel()
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Pre-synthesized greeting not ready in time")
+            return None
+
+    def discard(self, lead_id, campaign_id):
+        """Drop a pending greeting (e.g. the call could not be placed)."""
+        entry = self._entries.pop(self._key(lead_id, campaign_id), None)
+        if entry:
+            entry[0].cancel()
+
+
+# Global instance
+greeting_cache = GreetingCacheService()
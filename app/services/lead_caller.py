@@ -13,6 +13,8 @@ from app.models.lead import Lead
 from app.models.campaign import CallSession
 from app.models.custom_agent import CustomAgent
 from app.services.unified_outbound_service import unified_outbound_service
+from app.services.greeting_cache import greeting_cache
+from app.services.deepgram_websocket import deepgram_ws_service
 from app.database.firestore import db as global_db # Import the global db instance
 
 logger = logging.getLogger(__name__)
@@ -138,6 +140,7 @@ class LeadCallerService:
                     # DYNAMIC PHONE NUMBER FETCH
                     # Fetch fresh agent data to get the current phone number
                     current_phone_source_id = None
+                    agent_data = {}
                     if call_session.custom_agent_id:
                          try:
                              agent_doc = db.collection('custom_agents').document(call_session.custom_agent_id).get()
@@ -168,19 +171,39 @@ class LeadCallerService:
                         "custom_agent_id": str(call_session.custom_agent_id) if call_session.custom_agent_id else ""
                     }
                     
-                    # Use unified outbound service
-                    result = await unified_outbound_service.initiate_call(
-                        phone_source_id=current_phone_source_id,
-                        to_number=lead.phone,
-                        call_context=call_context,
-                        db=db
+                    # Render the greeting while the phone rings (picked up on stream start)
+                    greeting_cache.prerender(
+                        lead_id=str(lead.id),
+                        campaign_id=str(campaign_id),
+                        lead_name=lead.name,
+                        agent_name=agent_data.get('name'),
+                        company_name=agent_data.get('company_name'),
+                        goal=call_session.goal or agent_data.get('primary_goal'),
+                        voice_id=agent_data.get('voice_id'),
                     )
                     
+                    # Use unified outbound service
+                    placed = False
+                    try:
+                        result = await unified_outbound_service.initiate_call(
+                            phone_source_id=current_phone_source_id,
+                            to_number=lead.phone,
+                            call_context=call_context,
+                            db=db
+                        )
+                        placed = bool(result.get("success"))
+                    finally:
+                        if not placed:
+                            # No call, so nobody will take the greeting
+                            greeting_cache.discard(str(lead.id), str(campaign_id))
+                    
                     lead_ref = db.collection('leads').document(lead.id)
                     
                     if result.get("success"):
                         call_sid = result.get("call_sid")
                         provider = result.get("provider", "unknown")
+                        # Connect STT while the phone rings (handed over on stream start)
+                        deepgram_ws_service.prewarm(call_sid)
                         # Update lead status
                         lead_ref.update({
                             "status": "in_progress",
@@ -0,0 +1,278 @@
+"""
+Async, pooled LLM client.
+
+The Hugging Face InferenceClient used by llm_service is synchronous: every
+call made from a coroutine stalls the event loop (and the audio of every
+other call on the node) for the whole LLM round trip. AsyncLLMClient talks to
+OpenAI-compatible chat completion endpoints with one httpx.AsyncClient per
+provider:
+
+- keep-alive connection pool (and HTTP/2 when the h2 package is installed),
+  so turns skip TCP/TLS setup,
+- per-provider concurrency limit,
+- connect / between-chunk / total timeouts,
+- cancellation: cancelling the awaiting task closes the HTTP stream.
+
+Token streaming (stream_chat) is the primary interface; chat() collects it.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "deepseek")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "15"))      # Max gap between streamed chunks
+LLM_TOTAL_TIMEOUT = float(os.getenv("LLM_TOTAL_TIMEOUT", "30"))    # Whole request, including queueing
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_KEEPALIVE_CONNECTIONS", "32"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# OpenAI-compatible providers. DeepSeek-V3 is served through the Hugging Face router.
+LLM_PROVIDERS: Dict[str, Dict[str, Any]] = {
+    "deepseek": {
+        "base_url": os.getenv("DEEPSEEK_BASE_URL", "https://router.huggingface.co/v1"),
+        "api_key": os.getenv("HF_TOKEN"),
+        "model": os.getenv("DEEPSEEK_MODEL", "deepseek-ai/DeepSeek-V3"),
+        "concurrency": int(os.getenv("DEEPSEEK_LLM_CONCURRENCY", "32")),
+    },
+    "openai": {
+        "base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "model": os.getenv("OPENAI_LLM_MODEL", "gpt-4o-mini"),
+        "concurrency": int(os.getenv("OPENAI_LLM_CONCURRENCY", "32")),
+    },
+}
+
+
+class LLMError(Exception):
+    """The provider failed, rejected the request or timed out."""
+
+
+class AsyncLLMClient:
+    """Pooled streaming client for one OpenAI-compatible provider."""
+
+    def __init__(self, provider: str, base_url: str, api_key: Optional[str], model: str, concurrency: int = 32):
+        """
+        Args:
+            provider: Provider name (for logs and stats)
+            base_url: API root, e.g. https://api.openai.com/v1
+            api_key: Bearer token
+            model: Default model id
+            concurrency: Max requests in flight to this provider
+        """
+        self.provider = provider
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model = model
+        self.concurrency = concurrency
+        self._slot: Optional[asyncio.Semaphore] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._stats = {"requests": 0, "errors": 0, "timeouts": 0, "cancelled": 0, "in_flight": 0}
+        self._first_token_ms: List[float] = []
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(
+                    connect=LLM_CONNECT_TIMEOUT, read=LLM_READ_TIMEOUT, write=LLM_CONNECT_TIMEOUT, pool=LLM_TOTAL_TIMEOUT
+                ),
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+            )
+            logger.info(f"✅ LLM client for {self.provider} ready ({'HTTP/2' if HTTP2_AVAILABLE else 'HTTP/1.1'} pool)")
+        return self._http
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 300,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+        timeout: float = LLM_TOTAL_TIMEOUT,
+        **params,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion.
+
+        Args:
+            messages: Chat messages
+            max_tokens: Completion token limit
+            temperature: Sampling temperature
+            model: Model id (default: the provider's)
+            timeout: Deadline in seconds for the whole request
+            **params: Extra body fields (top_p, frequency_penalty, ...)
+
+        Yields:
+            str: Content deltas as the model produces them
+
+        Raises:
+            LLMError: Not configured, HTTP error, provider error or timeout
+        """
+        if not self.configured:
+            raise LLMError(f"{self.provider} LLM is not configured (missing API key)")
+        if self._slot is None:
+            self._slot = asyncio.Semaphore(self.concurrency)
+
+        body = {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+            **params,
+        }
+        start = time.monotonic()
+        deadline = start + timeout
+        first = True
+        self._stats["requests"] += 1
+        try:
+            try:
+                await asyncio.wait_for(self._slot.acquire(), timeout)
+            except asyncio.TimeoutError:
+                raise LLMError(f"{self.provider} LLM busy: no slot within {timeout:.0f}s")
+            self._stats["in_flight"] += 1
+            try:
+                async with self._client().stream("POST", "/chat/completions", json=body) as response:
+                    if response.status_code >= 400:
+                        detail = (await response.aread()).decode("utf-8", "replace")[:300]
+                        raise LLMError(f"{self.provider} HTTP {response.status_code}: {detail}")
+                    async for line in response.aiter_lines():
+                        # The read timeout bounds each gap; this bounds the whole reply
+                        if time.monotonic() > deadline:
+                            raise LLMError(f"{self.provider} LLM exceeded {timeout:.0f}s")
+                        delta = _parse_sse_line(line)
+                        if delta is None:
+                            continue
+                        if first:
+                            first = False
+                            self._record_first_token((time.monotonic() - start) * 1000)
+                        yield delta
+            finally:
+                self._stats["in_flight"] -= 1
+                self._slot.release()
+        except (asyncio.CancelledError, GeneratorExit):
+            # Caller cancelled or stopped reading: the stream context closed the response
+            self._stats["cancelled"] += 1
+            raise
+        except httpx.TimeoutException as e:
+            self._stats["timeouts"] += 1
+            raise LLMError(f"{self.provider} LLM timed out: {type(e).__name__}")
+        except httpx.HTTPError as e:
+            self._stats["errors"] += 1
+            raise LLMError(f"{self.provider} LLM request failed: {type(e).__name__}: {e}")
+        except LLMError:
+            self._stats["errors"] += 1
+            raise
+
+    async def chat(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Complete a chat and return the whole reply (collects stream_chat).
+
+        Args:
+            messages: Chat messages
+            **kwargs: As for stream_chat
+
+        Returns:
+            str: Reply text
+        """
+        parts = []
+        async for delta in self.stream_chat(messages, **kwargs):
+            parts.append(delta)
+        return "".join(parts)
+
+    def _record_first_token(self, ms: float):
+        self._first_token_ms.append(ms)
+        if len(self._first_token_ms) > 200:
+            del self._first_token_ms[:100]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        samples = self._first_token_ms
+        stats["avg_first_token_ms"] = round(sum(samples) / len(samples), 1) if samples else None
+        stats["http2"] = HTTP2_AVAILABLE
+        return stats
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+def _parse_sse_line(line: str) -> Optional[str]:
+    """Content delta of one server-sent-events line (None for keep-alives, [DONE], empty deltas)."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        payload = json.loads(data)
+    except ValueError:
+        return None
+    if payload.get("error"):
+        error = payload["error"]
+        raise LLMError(error.get("message") if isinstance(error, dict) else str(error))
+    choices = payload.get("choices") or []
+    if not choices:
+        return None
+    delta = choices[0].get("delta") or {}
+    return delta.get("content") or None
+
+
+_clients: Dict[str, AsyncLLMClient] = {}
+
+
+def get_llm_client(provider: Optional[str] = None) -> AsyncLLMClient:
+    """
+    Shared client for a provider (created on first use).
+
+    Args:
+        provider: Key of LLM_PROVIDERS (default: LLM_PROVIDER)
+
+    Returns:
+        AsyncLLMClient
+    """
+    provider = provider or LLM_PROVIDER
+    client = _clients.get(provider)
+    if client is None:
+        config = LLM_PROVIDERS.get(provider)
+        if config is None:
+            raise LLMError(f"Unknown LLM provider: {provider}")
+        client = _clients[provider] = AsyncLLMClient(provider, **config)
+    return client
+
+
+def get_llm_stats() -> Dict[str, Any]:
+    return {provider: client.get_stats() for provider, client in _clients.items()}
+
+
+async def close_llm_clients():
+    """Close every pooled connection (application shutdown)."""
+    for client in list(_clients.values()):
+        await client.aclose()
@@ -5,10 +5,13 @@ LLM Service with support for multiple providers
 
 import os
 import time
+import asyncio
 import logging
 from huggingface_hub import InferenceClient
 from dotenv import load_dotenv
-from typing import List, Dict, Optional, AsyncGenerator, Any
+from typing import List, Dict, Optional, AsyncGenerator, Any, Tuple
+from app.services.llm_client import LLMError, get_llm_client
+from app.services.prompt_compiler import prompt_compiler
 
 load_dotenv()
 
@@ -35,48 +38,137 @@ def get_deepseek_client():
             return None
     return deepseek_v3_client
 
-async def generate_response_stream(transcript: str, goal: str, history: Optional[List[Dict[str, str]]] = None, context: str = "", personality: str = "professional", company_name: str = "", system_prompt: str = "", agent_name: str = "") -> AsyncGenerator[str, None]:
+PERSONALITY_INSTRUCTIONS = {
+    "professional": (
+        "You are a world-class professional communicator with decades of experience in high-stakes business meetings, "
+        "executive conversations, and corporate negotiations. You speak with absolute clarity, confidence, and authority. "
+        "You use precise language, avoid filler words, and structure your thoughts logically. "
+        "You have studied and mastered every major book on professional communication — from 'How to Win Friends and Influence People' "
+        "to 'Crucial Conversations', 'Never Split the Difference', and modern business etiquette. "
+        "You always maintain respect, stay concise, and focus on value and outcomes. "
+        "Try to give short and easy responses."
+    ),
+
+    "friendly": (
+        "You are the warmest, most naturally friendly, and approachable person anyone has ever spoken to. "
+        "You instantly make people feel comfortable, valued, and heard. Your tone is light, positive, and full of genuine warmth. "
+        "You use simple, everyday language, smile through your voice, and naturally build rapport. "
+        "You are an expert in making conversations feel like talking to a trusted friend — relaxed, enjoyable, and human. "
+        "Try to give short and easy responses."
+    ),
+
+    "persuasive": (
+        "You are the world's greatest salesperson with unmatched experience closing deals across every industry. "
+        "You deeply understand and masterfully apply all proven sales philosophies and principles: "
+        "Cialdini's 6 principles of influence, SPIN Selling, Challenger Sale, Solution Selling, consultative selling, "
+        "storytelling in sales, handling objections gracefully, building urgency, and creating irresistible value. "
+        "You adapt your approach perfectly to the customer's needs, emotions, and objections. "
+        "You convince naturally and ethically — people feel excited and confident to say yes because it genuinely benefits them. "
+        "Try to give short and easy responses."
+    ),
+
+    "supportive": (
+        "You are the most empathetic, patient, and skilled customer support expert in the world. "
+        "You have helped thousands of people solve problems and always leave them feeling relieved, understood, and cared for. "
+        "You listen deeply, validate emotions, and respond with genuine compassion. "
+        "You master active listening, de-escalation techniques, and clear step-by-step guidance. "
+        "You stay calm under pressure and turn frustrated customers into happy, loyal ones. "
+        "Try to give short and easy responses."
+    )
+}
+
+# The streaming path's supportive persona educates before it sells
+STREAMING_PERSONALITY_INSTRUCTIONS = {
+    **PERSONALITY_INSTRUCTIONS,
+    "supportive": (
+        "You are an expert consultant who builds trust through education and empathy. "
+        "When users ask questions: (1) Give complete, clear explanations with examples and analogies, "
+        "(2) Take time to fully educate before suggesting services, (3) Never rush or push sales. "
+        "When users provide key information (budget, audience, goals), synthesize it into a concrete, "
+        "actionable plan with specific numbers, timelines, and clear next steps. "
+        "Be helpful, patient, and genuinely supportive. Keep responses conversational (2-3 sentences max unless explaining concepts)."
+    )
+}
+
+# Fallback system messages when the agent has no custom system prompt
+STREAM_SYSTEM_MESSAGE = (
+    "You are a helpful voice assistant. "
+    "CRITICAL: Your responses will be spoken aloud. "
+    "NEVER use markdown formatting (**, *, _, etc.), parenthetical notes, or asterisks. "
+    "Speak naturally as if talking directly to someone. "
+    "Do NOT include meta-commentary like '(Short, engaging...)' or '(Pro tip:...)'. "
+    "NEVER include internal thoughts, stage directions, or notes in brackets like [thinking...] or [pause]. "
+    "Output ONLY the exact spoken words - nothing else. "
+    "Only say words that should be heard by the customer."
+)
+
+RESPONSE_SYSTEM_MESSAGE = (
+    "You are a helpful voice assistant. Always respond in a conversational tone suitable for voice interactions. "
+    "CRITICAL: Your responses will be spoken aloud. "
+    "NEVER use markdown formatting (**, *, _, backticks, etc.), parenthetical notes in asterisks like *(note)*, or any special characters. "
+    "Speak naturally as if talking directly to someone on a phone call. "
+    "Do NOT include meta-commentary, tips, or notes like '(Short, engaging...)' or '(Pro tip:...)'. "
+    "NEVER include internal thoughts, stage directions, or notes in brackets like [thinking...] or [pause]. "
+    "Output ONLY the exact spoken words - nothing else. "
+    "Only say words that should be heard by the customer. Be concise and clear."
+)
+
+
+def _safe_identity(agent_name: str, company_name: str) -> Tuple[str, str]:
+    """Agent and company names for introductions, with unfilled template placeholders replaced."""
+    safe_agent = agent_name or "Assistant"
+    safe_company = company_name or "the AI team"
+    if "[" in safe_agent or "{" in safe_agent or "Your Name" in safe_agent:
+        safe_agent = "Assistant"
+    if "[" in safe_company or "{" in safe_company or "Your Company" in safe_company:
+        safe_company = "Digitale"
+    return safe_agent, safe_company
+
+
+def _detect_language_preference(text: str, history: List[Dict[str, str]]) -> str:
+    """'hindi' if the caller asked for Hindi or writes/wrote in Devanagari, else 'english'."""
+    # Check for explicit Hindi requests
+    hindi_triggers = ['hindi', 'हिंदी', 'hindi mein', 'speak hindi', 'in hindi', 'hindi me bolo', 'हिंदी में बोलो']
+    if any(trigger in text.lower() for trigger in hindi_triggers):
+        return 'hindi'
+
+    # Check for Hindi script
+    if any('\u0900' <= ch <= '\u097F' for ch in text):
+        return 'hindi'
+
+    # Check recent history for language preference
+    for msg in history[-2:] if history else []:
+        msg_text = msg.get('content', '') if isinstance(msg, dict) else ''
+        if any('\u0900' <= ch <= '\u097F' for ch in msg_text):
+            return 'hindi'
+
+    return 'english'
+
+
+def _build_stream_messages(transcript: str, goal: str, history: Optional[List[Dict[str, str]]] = None, context: str = "", personality: str = "professional", company_name: str = "", system_prompt: str = "", agent_name: str = "") -> Tuple[List[Dict[str, str]], str]:
     """
-    Generate AI response from user transcript with streaming using Deepseek-V3
+    Messages for a streamed spoken reply: cached static system prompt,
+    earlier turns, then this turn. Also returns the detected language.
     """
-    if not transcript or not transcript.strip():
-        yield "Hello! I'm here to help you. How can I assist you today?"
-        return
+    def build_system() -> str:
+        personality_prompt = STREAMING_PERSONALITY_INSTRUCTIONS.get(personality, STREAMING_PERSONALITY_INSTRUCTIONS["professional"])
+        system_message = system_prompt if system_prompt and system_prompt.strip() else STREAM_SYSTEM_MESSAGE
+        return (
+            f"{system_message}\n\n"
+            f"You are a voice assistant with a {personality} personality. "
+            f"Goal: {goal or 'Help the customer'}. "
+            f"{personality_prompt}\n\n"
+            f"CRITICAL FORMATTING (VOICE CONVERSATION):\n"
+            f"- Your response will be SPOKEN ALOUD - no markdown (**bold**, *italic*)\n"
+            f"- NO parenthetical notes like *(engaging)* or *(tip)*\n"
+            f"- NO meta-commentary - only words customer should hear\n"
+            f"- Speak naturally as if on phone call"
+        )
+
+    system = prompt_compiler.compile(("stream", system_prompt, personality, goal), build_system)
+    past = prompt_compiler.history_messages(history, transcript)
+    language = _detect_language_preference(transcript, past)
 
-    if history is None:
-        history = []
-
-    # Build full conversation
-    conversation = ""
-    for msg in history:
-        if isinstance(msg, dict) and "role" in msg and "content" in msg:
-            role = "Customer" if msg["role"] == "user" else "Assistant"
-            content = msg.get("content", msg.get("text", ""))
-            if content and content.strip():
-                conversation += f"{role}: {content}\n"
-    conversation += f"Customer: {transcript}\nAssistant:"
-
-    # Enhanced language detection with explicit request detection
-    def detect_language_preference(text, hist):
-        # Check for explicit Hindi requests
-        hindi_triggers = ['hindi', 'हिंदी', 'hindi mein', 'speak hindi', 'in hindi', 'hindi me bolo', 'हिंदी में बोलो']
-        if any(trigger in text.lower() for trigger in hindi_triggers):
-            return 'hindi'
-        
-        # Check for Hindi script
-        if any('\u0900' <= ch <= '\u097F' for ch in text):
-            return 'hindi'
-        
-        # Check recent history for language preference
-        for msg in hist[-2:] if hist else []:
-            msg_text = msg.get('content', '') if isinstance(msg, dict) else ''
-            if any('\u0900' <= ch <= '\u097F' for ch in msg_text):
-                return 'hindi'
-        
-        return 'english'
-    
-    language = detect_language_preference(transcript, history)
-    
     if language == 'hindi':
         language_instruction = (
             "IMPORTANT: User wants Hindi/Hinglish. "
@@ -87,70 +179,25 @@ async def generate_response_stream(transcript: str, goal: str, history: Optional
     else:
         language_instruction = "Respond in English."
 
-    # Personality-based instructions
-    personality_instructions = {
-        "professional": (
-            "You are a world-class professional communicator with decades of experience in high-stakes business meetings, "
-            "executive conversations, and corporate negotiations. You speak with absolute clarity, confidence, and authority. "
-            "You use precise language, avoid filler words, and structure your thoughts logically. "
-            "You have studied and mastered every major book on professional communication — from 'How to Win Friends and Influence People' "
-            "to 'Crucial Conversations', 'Never Split the Difference', and modern business etiquette. "
-            "You always maintain respect, stay concise, and focus on value and outcomes. "
-            "Try to give short and easy responses."
-        ),
-        
-        "friendly": (
-            "You are the warmest, most naturally friendly, and approachable person anyone has ever spoken to. "
-            "You instantly make people feel comfortable, valued, and heard. Your tone is light, positive, and full of genuine warmth. "
-            "You use simple, everyday language, smile through your voice, and naturally build rapport. "
-            "You are an expert in making conversations feel like talking to a trusted friend — relaxed, enjoyable, and human. "
-            "Try to give short and easy responses."
-        ),
-        
-        "persuasive": (
-            "You are the world's greatest salesperson with unmatched experience closing deals across every industry. "
-            "You deeply understand and masterfully apply all proven sales philosophies and principles: "
-            "Cialdini's 6 principles of influence, SPIN Selling, Challenger Sale, Solution Selling, consultative selling, "
-            "storytelling in sales, handling objections gracefully, building urgency, and creating irresistible value. "
-            "You adapt your approach perfectly to the customer's needs, emotions, and objections. "
-            "You convince naturally and ethically — people feel excited and confident to say yes because it genuinely benefits them. "
-            "Try to give short and easy responses."
-        ),
-        
-        "supportive": (
-            "You are an expert consultant who builds trust through education and empathy. "
-            "When users ask questions: (1) Give complete, clear explanations with examples and analogies, "
-            "(2) Take time to fully educate before suggesting services, (3) Never rush or push sales. "
-            "When users provide key information (budget, audience, goals), synthesize it into a concrete, "
-            "actionable plan with specific numbers, timelines, and clear next steps. "
-            "Be helpful, patient, and genuinely supportive. Keep responses conversational (2-3 sentences max unless explaining concepts)."
+    # Build enhanced prompt with RAG enforcement and memory awareness
+    if context and context.strip():
+        rag_instruction = (
+            f"KNOWLEDGE BASE (USE THIS):\n{context}\n\n"
+            f"CRITICAL: Base your answer on the Knowledge Base above. "
+            f"If the Knowledge Base doesn't contain the answer, clearly state: "
+            f"'I don't have that specific information. Let me connect you with my team to help.'"
+        )
+    else:
+        rag_instruction = (
+            "WARNING: Limited knowledge base. Only answer if absolutely certain. "
+            "Otherwise, offer to check with the team."
         )
-    }
-
-    
-    personality_prompt = personality_instructions.get(personality, personality_instructions["professional"])
 
-    # Build prompt with enhanced context labeling
-    prompt = ""
-    if context and context.strip():
-        prompt += f"Knowledge Base Information: {context}\n\n"
-    
     # Add company introduction if this is the first message
     intro_instruction = ""
-    is_outbound_call = context and "CALL PURPOSE:" in context
-    
-    if len(history) == 0:
-        # Sanitize defaults
-        safe_agent = agent_name or "Assistant"
-        safe_company = company_name or "the AI team"
-        
-        # Check for placeholders
-        if "[" in safe_agent or "{" in safe_agent or "Your Name" in safe_agent:
-             safe_agent = "Assistant"
-        if "[" in safe_company or "{" in safe_company or "Your Company" in safe_company:
-             safe_company = "Digitale"
-        
-        if is_outbound_call:
+    if not past:
+        safe_agent, safe_company = _safe_identity(agent_name, company_name)
+        if context and "CALL PURPOSE:" in context:
             # OUTBOUND CALL: Agent initiates, introduces self, states purpose
             intro_instruction = (
                 f"IMPORTANT: This is an OUTBOUND call that YOU initiated to the customer.\n"
@@ -174,140 +221,89 @@ async def generate_response_stream(transcript: str, goal: str, history: Optional
                 f"Introduce yourself as {safe_agent} from {safe_company}. "
                 f"Ask how you can help them.\n\n"
             )
-    
-    # Build enhanced prompt with RAG enforcement and memory awareness
-    rag_instruction = ""
-    if context and context.strip():
-        rag_instruction = (
-            f"KNOWLEDGE BASE (USE THIS):\n{context}\n\n"
-            f"CRITICAL: Base your answer on the Knowledge Base above. "
-            f"If the Knowledge Base doesn't contain the answer, clearly state: "
-            f"'I don't have that specific information. Let me connect you with my team to help.'"
-        )
-    else:
-        rag_instruction = (
-            "WARNING: Limited knowledge base. Only answer if absolutely certain. "
-            "Otherwise, offer to check with the team."
-        )
-    
-    prompt += (
-        f"You are a voice assistant with a {personality} personality. "
-        f"Goal: {goal or 'Help the customer'}. "
-        f"{personality_prompt}\n\n"
+
+    turn = (
         f"{rag_instruction}\n\n"
         f"{intro_instruction}"
         f"{language_instruction}\n\n"
-        f"CRITICAL FORMATTING (VOICE CONVERSATION):\n"
-        f"- Your response will be SPOKEN ALOUD - no markdown (**bold**, *italic*)\n"
-        f"- NO parenthetical notes like *(engaging)* or *(tip)*\n"
-        f"- NO meta-commentary - only words customer should hear\n"
-        f"- Speak naturally as if on phone call\n\n"
-        f"Conversation:\n{conversation}"
+        f"Customer: {transcript}"
     )
+    messages, _ = prompt_compiler.assemble(system, history, turn, transcript, label="stream")
+    return messages, language
+
+
+async def generate_response_stream(transcript: str, goal: str, history: Optional[List[Dict[str, str]]] = None, context: str = "", personality: str = "professional", company_name: str = "", system_prompt: str = "", agent_name: str = "") -> AsyncGenerator[str, None]:
+    """
+    Generate AI response from user transcript with streaming using Deepseek-V3
+    """
+    if not transcript or not transcript.strip():
+        yield "Hello! I'm here to help you. How can I assist you today?"
+        return
+
+    messages, language = _build_stream_messages(transcript, goal, history, context, personality, company_name, system_prompt, agent_name)
 
     max_retries = 3
     for attempt in range(max_retries):
+        yielded = False
         try:
-            # Use lazy loader
-            client = get_deepseek_client()
-            if not client:
-                raise ValueError("Deepseek-V3 model not initialized")
-            
-            # Use custom system prompt if provided
-            system_message = system_prompt if system_prompt and system_prompt.strip() else (
-                "You are a helpful voice assistant. "
-                "CRITICAL: Your responses will be spoken aloud. "
-                "NEVER use markdown formatting (**, *, _, etc.), parenthetical notes, or asterisks. "
-                "Speak naturally as if talking directly to someone. "
-                "Do NOT include meta-commentary like '(Short, engaging...)' or '(Pro tip:...)'. "
-                "NEVER include internal thoughts, stage directions, or notes in brackets like [thinking...] or [pause]. "
-                "Output ONLY the exact spoken words - nothing else. "
-                "Only say words that should be heard by the customer."
-            )
-
-            # Build messages for Deepseek-V3
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ]
-            
-            # Call Deepseek-V3 with streaming (increased tokens for detailed explanations)
-            response = client.chat.completions.create(
-                messages=messages,
+            # Stream from Deepseek-V3 over the pooled async client (increased tokens for detailed explanations)
+            # Tokens are yielded as they arrive; markdown and meta-notes are stripped
+            # per sentence by the response pipeline (app.agent.response_pipeline)
+            async for delta in get_llm_client().stream_chat(
+                messages,
                 max_tokens=300,  # Increased for complete explanations
-                temperature=0.7,
-                stream=True
-            )
-            
-            # Stream response with safety checks and markdown filtering
-            import re
-            full_streamed_response = ""
-            
-            for chunk in response:
-                if chunk.choices and len(chunk.choices) > 0:
-                    delta = chunk.choices[0].delta
-                    if hasattr(delta, 'content') and delta.content:
-                        # Accumulate for post-processing
-                        full_streamed_response += delta.content
-            
-            # CRITICAL: Strip ALL meta-notes, markdown, and parenthetical content before yielding
-            cleaned_response = full_streamed_response
-            
-            # Remove markdown bold/italic
-            cleaned_response = re.sub(r'\*{1,2}([^*]+)\*{1,2}', r'\1', cleaned_response)
-            
-            # Remove ALL parenthetical notes (including multi-line)
-            cleaned_response = re.sub(r'\n\n\([^)]+\)', '', cleaned_response)  # Paragraph-level
-            cleaned_response = re.sub(r'\s*\([^)]+\)', '', cleaned_response)  # Inline
-            cleaned_response = re.sub(r'\*\([^)]+\)\*', '', cleaned_response)  # Starred notes
-            
-            # Remove asterisks at start/end
-            cleaned_response = re.sub(r'^\*+\s*', '', cleaned_response)
-            cleaned_response = re.sub(r'\s*\*+$', '', cleaned_response)
-            
-            # Clean up extra whitespace
-            cleaned_response = re.sub(r'\s+', ' ', cleaned_response).strip()
-            cleaned_response = re.sub(r'\n{3,}', '\n\n', cleaned_response)
-            
-            # Log if meta-notes were found (for monitoring)
-            if full_streamed_response != cleaned_response:
-                logger.info(f"Cleaned meta-notes from LLM output (removed {len(full_streamed_response) - len(cleaned_response)} chars)")
-            
-            # Yield the cleaned response
-            yield cleaned_response
+                temperature=0.7
+            ):
+                yielded = True
+                yield delta
             return
 
         except Exception as e:
             logger.error(f"LLM streaming error (attempt {attempt + 1}): {e}")
+            if yielded:
+                # Part of the answer is already being spoken; a retry would repeat it
+                return
             if attempt < max_retries - 1:
                 # Wait before retrying
-                time.sleep(1)
+                await asyncio.sleep(1)
                 continue
             else:
                 # No fallback, just return error message
-                if is_hindi:
+                if language == "hindi":
                     yield "माफ़ कीजिए, मुझे तकनीकी समस्या हो रही है।"
                 else:
                     yield "I apologize, I'm experiencing technical difficulties."
                 return
 
-def generate_response(transcript: str, goal: str, history: Optional[List[Dict[str, str]]] = None, context: str = "", personality: str = "professional", company_name: str = "", system_prompt: str = "", agent_name: str = "") -> str:
-
-    if not transcript or not transcript.strip():
-        return "Hello! I'm here to help you. How can I assist you today?"
-
-    if history is None:
-        history = []
+def _build_response_messages(transcript: str, goal: str, history: Optional[List[Dict[str, str]]] = None, context: str = "", personality: str = "professional", company_name: str = "", system_prompt: str = "", agent_name: str = "") -> Tuple[List[Dict[str, str]], bool]:
+    """
+    Messages for a plain spoken reply: cached static system prompt, earlier
+    turns, then this turn. Also returns whether the caller speaks Hindi.
+    """
+    def build_system() -> str:
+        personality_prompt = PERSONALITY_INSTRUCTIONS.get(personality, PERSONALITY_INSTRUCTIONS["professional"])
+        system_message = system_prompt if system_prompt and system_prompt.strip() else RESPONSE_SYSTEM_MESSAGE
+        return (
+            f"{system_message}\n\n"
+            f"You are a voice assistant with a {personality} personality. "
+            f"Goal: {goal or 'Answer customer questions'}. "
+            f"{personality_prompt} "
+            f"Use the conversation history to stay on topic. "
+            f"Be concise (1-2 sentences), natural, and conversational. "
+            f"Always respond directly to the customer's last message. "
+            f"If you don't understand, ask clarifying questions. "
+            f"IMPORTANT: Always use the Knowledge Base Context to answer questions accurately. "
+            f"If the Knowledge Base Context contains relevant information, you MUST use it. \n\n"
+            f"CRITICAL FORMATTING RULES:\n"
+            f"- This is a VOICE conversation - your response will be SPOKEN ALOUD\n"
+            f"- DO NOT use **bold**, *italics*, or any markdown\n"
+            f"- DO NOT add notes in parentheses like *(tip)* or *(engaging)*\n"
+            f"- DO NOT add commentary - only words the customer should hear\n"
+            f"- Speak naturally as if on a phone call"
+        )
 
-    # Build full conversation
-    conversation = ""
-    for msg in history:
-        if isinstance(msg, dict) and "role" in msg and "content" in msg:
-            role = "Customer" if msg["role"] == "user" else "Assistant"
-            content = msg.get("content", msg.get("text", ""))
-            if content and content.strip():
-                conversation += f"{role}: {content}\n"
-    conversation += f"Customer: {transcript}\nAssistant:"
+    system = prompt_compiler.compile(("response", system_prompt, personality, goal), build_system)
+    past = prompt_compiler.history_messages(history, transcript)
 
     # Detect language
     is_hindi = any("\u0900" <= ch <= "\u097F" for ch in transcript)
@@ -317,88 +313,44 @@ def generate_response(transcript: str, goal: str, history: Optional[List[Dict[st
         "Respond in English."
     )
 
-    # Personality-based instructions
-    personality_instructions = {
-        "professional": (
-            "You are a world-class professional communicator with decades of experience in high-stakes business meetings, "
-            "executive conversations, and corporate negotiations. You speak with absolute clarity, confidence, and authority. "
-            "You use precise language, avoid filler words, and structure your thoughts logically. "
-            "You have studied and mastered every major book on professional communication — from 'How to Win Friends and Influence People' "
-            "to 'Crucial Conversations', 'Never Split the Difference', and modern business etiquette. "
-            "You always maintain respect, stay concise, and focus on value and outcomes. "
-            "Try to give short and easy responses."
-        ),
-        
-        "friendly": (
-            "You are the warmest, most naturally friendly, and approachable person anyone has ever spoken to. "
-            "You instantly make people feel comfortable, valued, and heard. Your tone is light, positive, and full of genuine warmth. "
-            "You use simple, everyday language, smile through your voice, and naturally build rapport. "
-            "You are an expert in making conversations feel like talking to a trusted friend — relaxed, enjoyable, and human. "
-            "Try to give short and easy responses."
-        ),
-        
-        "persuasive": (
-            "You are the world's greatest salesperson with unmatched experience closing deals across every industry. "
-            "You deeply understand and masterfully apply all proven sales philosophies and principles: "
-            "Cialdini's 6 principles of influence, SPIN Selling, Challenger Sale, Solution Selling, consultative selling, "
-            "storytelling in sales, handling objections gracefully, building urgency, and creating irresistible value. "
-            "You adapt your approach perfectly to the customer's needs, emotions, and objections. "
-            "You convince naturally and ethically — people feel excited and confident to say yes because it genuinely benefits them. "
-            "Try to give short and easy responses."
-        ),
-        
-        "supportive": (
-            "You are the most empathetic, patient, and skilled customer support expert in the world. "
-            "You have helped thousands of people solve problems and always leave them feeling relieved, understood, and cared for. "
-            "You listen deeply, validate emotions, and respond with genuine compassion. "
-            "You master active listening, de-escalation techniques, and clear step-by-step guidance. "
-            "You stay calm under pressure and turn frustrated customers into happy, loyal ones. "
-            "Try to give short and easy responses."
-        )
-    }
-    
-    personality_prompt = personality_instructions.get(personality, personality_instructions["professional"])
-
-    # Build prompt with enhanced context labeling
-    prompt = ""
+    turn = ""
     if context and context.strip():
-        prompt += f"Knowledge Base Context: {context}\n\n"
-    
+        turn += f"Knowledge Base Context: {context}\n\n"
     # Add company introduction if this is the first message
-    intro_instruction = ""
-    if len(history) == 0:
-        # Sanitize defaults
-        safe_agent = agent_name or "Assistant"
-        safe_company = company_name or "the AI team"
-        
-        # Check for placeholders
-        if "[" in safe_agent or "{" in safe_agent or "Your Name" in safe_agent:
-             safe_agent = "Assistant"
-        if "[" in safe_company or "{" in safe_company or "Your Company" in safe_company:
-             safe_company = "Digitale"
-             
-        intro_instruction = f"Introduce yourself as {safe_agent} from {safe_company}. "
-    
-    prompt += (
-        f"You are a voice assistant with a {personality} personality. "
-        f"Goal: {goal or 'Answer customer questions'}. "
-        f"{personality_prompt} "
-        f"{intro_instruction}"
-        f"{language_instruction} "
-        f"Use the conversation history to stay on topic. "
-        f"Be concise (1-2 sentences), natural, and conversational. "
-        f"Always respond directly to the customer's last message. "
-        f"If you don't understand, ask clarifying questions. "
-        f"IMPORTANT: Always use the Knowledge Base Context to answer questions accurately. "
-        f"If the Knowledge Base Context contains relevant information, you MUST use it. \n\n"
-        f"CRITICAL FORMATTING RULES:\n"
-        f"- This is a VOICE conversation - your response will be SPOKEN ALOUD\n"
-        f"- DO NOT use **bold**, *italics*, or any markdown\n"
-        f"- DO NOT add notes in parentheses like *(tip)* or *(engaging)*\n"
-        f"- DO NOT add commentary - only words the customer should hear\n"
-        f"- Speak naturally as if on a phone call\n\n"
-        f"Conversation:\n{conversation}"
-    )
+    if not past:
+        safe_agent, safe_company = _safe_identity(agent_name, company_name)
+        turn += f"Introduce yourself as {safe_agent} from {safe_company}. "
+    turn += f"{language_instruction}\n\nCustomer: {transcript}"
+
+    messages, _ = prompt_compiler.assemble(system, history, turn, transcript, label="response")
+    return messages, is_hindi
+
+
+def _clean_response_text(response_text: str) -> str:
+    """Strip markdown and notes from a complete reply and keep it short enough for voice."""
+    import re
+    # Remove markdown bold/italic (including partial matches)
+    response_text = re.sub(r'\*{1,2}([^*]+)\*{1,2}', r'\1', response_text)
+    # Remove ALL parenthetical notes (including multi-line and nested)
+    response_text = re.sub(r'\n\n\([^)]+\)', '', response_text)  # Paragraph-level notes
+    response_text = re.sub(r'\s*\([^)]+\)', '', response_text)  # Inline notes
+    # Remove quotes around responses if present
+    response_text = re.sub(r'^"(.+)"$', r'\1', response_text.strip())
+    # Clean up extra spaces and newlines
+    response_text = re.sub(r'\s+', ' ', response_text).strip()
+
+    # Ensure response is not too long for voice
+    if len(response_text) > 300:  # Limit to ~300 characters for voice
+        response_text = response_text[:297] + "..."
+    return response_text
+
+
+def generate_response(transcript: str, goal: str, history: Optional[List[Dict[str, str]]] = None, context: str = "", personality: str = "professional", company_name: str = "", system_prompt: str = "", agent_name: str = "") -> str:
+
+    if not transcript or not transcript.strip():
+        return "Hello! I'm here to help you. How can I assist you today?"
+
+    messages, is_hindi = _build_response_messages(transcript, goal, history, context, personality, company_name, system_prompt, agent_name)
 
     max_retries = 3
     for attempt in range(max_retries):
@@ -407,24 +359,6 @@ def generate_response(transcript: str, goal: str, history: Optional[List[Dict[st
             if not client:
                 raise ValueError("Deepseek-V3 model not initialized")
             
-            # Use custom system prompt if provided, otherwise use default
-            system_message = system_prompt if system_prompt and system_prompt.strip() else (
-                "You are a helpful voice assistant. Always respond in a conversational tone suitable for voice interactions. "
-                "CRITICAL: Your responses will be spoken aloud. "
-                "NEVER use markdown formatting (**, *, _, backticks, etc.), parenthetical notes in asterisks like *(note)*, or any special characters. "
-                "Speak naturally as if talking directly to someone on a phone call. "
-                "Do NOT include meta-commentary, tips, or notes like '(Short, engaging...)' or '(Pro tip:...)'. "
-                "NEVER include internal thoughts, stage directions, or notes in brackets like [thinking...] or [pause]. "
-                "Output ONLY the exact spoken words - nothing else. "
-                "Only say words that should be heard by the customer. Be concise and clear."
-            )
-            
-            # Build messages for Deepseek-V3
-            messages = [
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ]
-            
             # Call Deepseek-V3 (increased tokens for complete explanations)
             response = client.chat.completions.create(
                 messages=messages,
@@ -452,22 +386,7 @@ def generate_response(transcript: str, goal: str, history: Optional[List[Dict[st
                         return "I'm sorry, I'm having trouble understanding that. Could you repeat?"
 
             # CRITICAL: Strip markdown and notes before returning  
-            import re
-            # Remove markdown bold/italic (including partial matches)
-            response_text = re.sub(r'\*{1,2}([^*]+)\*{1,2}', r'\1', response_text)
-            # Remove ALL parenthetical notes (including multi-line and nested)
-            response_text = re.sub(r'\n\n\([^)]+\)', '', response_text)  # Paragraph-level notes
-            response_text = re.sub(r'\s*\([^)]+\)', '', response_text)  # Inline notes
-            # Remove quotes around responses if present
-            response_text = re.sub(r'^"(.+)"$', r'\1', response_text.strip())
-            # Clean up extra spaces and newlines
-            response_text = re.sub(r'\s+', ' ', response_text).strip()
-
-            # Ensure response is not too long for voice
-            if len(response_text) > 300:  # Limit to ~300 characters for voice
-                response_text = response_text[:297] + "..."
-                
-            return response_text
+            return _clean_response_text(response_text)
 
         except Exception as e:
             logger.error(f"LLM error (attempt {attempt + 1}): {e}")
@@ -486,7 +405,52 @@ def generate_response(transcript: str, goal: str, history: Optional[List[Dict[st
     return "I'm sorry, I'm unable to assist right now. Please try again later."
 
 
-def generate_response_with_tools(
+async def generate_response_async(transcript: str, goal: str, history: Optional[List[Dict[str, str]]] = None, context: str = "", personality: str = "professional", company_name: str = "", system_prompt: str = "", agent_name: str = "") -> str:
+    """
+    generate_response for async callers: same prompt and cleanup, sent through
+    the pooled async LLM client so the event loop never waits on the network.
+    """
+    if not transcript or not transcript.strip():
+        return "Hello! I'm here to help you. How can I assist you today?"
+
+    messages, is_hindi = _build_response_messages(transcript, goal, history, context, personality, company_name, system_prompt, agent_name)
+
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            response_text = (await get_llm_client().chat(
+                messages,
+                max_tokens=300,  # Increased for detailed answers
+                temperature=0.7,
+                top_p=0.9,
+                frequency_penalty=0.5,
+                presence_penalty=0.5
+            )).strip()
+
+            if not response_text:
+                if attempt < max_retries - 1:
+                    logger.warning(f"Empty LLM response, retrying... (attempt {attempt + 1})")
+                    await asyncio.sleep(1)
+                    continue
+                if is_hindi:
+                    return "माफ़ कीजिए, मुझे समझने में थोड़ी दिक्कत हो रही है। क्या आप दोहरा सकते हैं?"
+                return "I'm sorry, I'm having trouble understanding that. Could you repeat?"
+
+            return _clean_response_text(response_text)
+
+        except LLMError as e:
+            logger.error(f"LLM error (attempt {attempt + 1}): {e}")
+            if attempt < max_retries - 1:
+                await asyncio.sleep(1)
+                continue
+            if is_hindi:
+                return "माफ़ कीजिए, मुझे तकनीकी समस्या हो रही है। कृपया दोबारा कोशिश करें।"
+            return "I apologize, I'm experiencing technical difficulties. Please try again."
+
+    return "I'm sorry, I'm unable to assist right now. Please try again later."
+
+
+def _build_tool_messages(
     transcript: str,
     goal: str,
     history: Optional[List[Dict[str, str]]] = None,
@@ -494,48 +458,14 @@ def generate_response_with_tools(
     personality: str = "professional",
     company_name: str = "",
     agent_name: str = ""
-) -> Dict[str, Any]:
+) -> List[Dict[str, str]]:
     """
-    Generate response with intelligent tool calling capability using DeepSeek.
-    Returns either a text response or a tool call decision.
-    
-    This enables the AI agent to proactively:
-    - End calls with unqualified leads (competitors, not interested, etc.)
-    - Schedule callbacks when timing is bad
-    - Continue conversations strategically
-    - Transfer to human agents when needed
+    Messages for a tool-calling turn (JSON output): cached static system
+    prompt (identity, goal, tools, formats), earlier turns, then this turn.
     """
-    import json
-    import re
-    
-    if not transcript or not transcript.strip():
-        return {
-            "type": "text",
-            "content": "Hello! I'm here to help you. How can I assist you today?"
-        }
-    
-    if history is None:
-        history = []
-    
-    # Build conversation context
-    conversation_history = ""
-    for msg in history:
-        if isinstance(msg, dict) and "role" in msg and "content" in msg:
-            role = "Customer" if msg["role"] == "user" else "Assistant"
-            content = msg.get("content", msg.get("text", ""))
-            if content and content.strip():
-                conversation_history += f"{role}: {content}\n"
-    
-    # Detect language
-    is_hindi = any("\u0900" <= ch <= "\u097F" for ch in transcript)
-    language_instruction = (
-        "Respond in Hindi/Hinglish if appropriate."
-        if is_hindi else
-        "Respond in English."
-    )
-    
     # Build enhanced system prompt for intelligent decision making with JSON output
-    system_prompt = f"""You are {agent_name or 'an AI sales agent'} from {company_name or 'our company'}.
+    def build_system() -> str:
+        return f"""You are {agent_name or 'an AI sales agent'} from {company_name or 'our company'}.
 
 Your goal: {goal or 'Help the customer'}
 
@@ -608,20 +538,61 @@ For transfer_to_human:
   "response": "Let me connect you with one of our specialists who can help you better."
 }}
 
-{language_instruction}
+REMEMBER: Always respond with VALID JSON only. No extra text before or after the JSON."""
 
-Knowledge Base: {context if context else 'Limited information available'}
+    system = prompt_compiler.compile(("tools", agent_name, company_name, goal, personality), build_system)
 
-REMEMBER: Always respond with VALID JSON only. No extra text before or after the JSON."""
+    # Detect language
+    is_hindi = any("\u0900" <= ch <= "\u097F" for ch in transcript)
+    language_instruction = (
+        "Respond in Hindi/Hinglish if appropriate."
+        if is_hindi else
+        "Respond in English."
+    )
 
     # Build user message
-    user_message = f"""Conversation History:
-{conversation_history}
+    turn = f"""Knowledge Base: {context if context else 'Limited information available'}
+
+{language_instruction}
 
 Customer's Latest Message: {transcript}
 
 Analyze this and respond with the appropriate tool in JSON format."""
 
+    messages, _ = prompt_compiler.assemble(system, history, turn, transcript, label="tools")
+    return messages
+
+
+def generate_response_with_tools(
+    transcript: str,
+    goal: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    context: str = "",
+    personality: str = "professional",
+    company_name: str = "",
+    agent_name: str = ""
+) -> Dict[str, Any]:
+    """
+    Generate response with intelligent tool calling capability using DeepSeek.
+    Returns either a text response or a tool call decision.
+    
+    This enables the AI agent to proactively:
+    - End calls with unqualified leads (competitors, not interested, etc.)
+    - Schedule callbacks when timing is bad
+    - Continue conversations strategically
+    - Transfer to human agents when needed
+    """
+    import json
+    import re
+    
+    if not transcript or not transcript.strip():
+        return {
+            "type": "text",
+            "content": "Hello! I'm here to help you. How can I assist you today?"
+        }
+    
+    messages = _build_tool_messages(transcript, goal, history, context, personality, company_name, agent_name)
+
     try:
         # Use DeepSeek for tool calling via prompt engineering
         client = get_deepseek_client()
@@ -633,11 +604,6 @@ Analyze this and respond with the appropriate tool in JSON format."""
             }
         
         # Call DeepSeek
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ]
-        
         response = client.chat.completions.create(
             model="deepseek-ai/DeepSeek-V3",
             messages=messages,
@@ -691,3 +657,82 @@ Analyze this and respond with the appropriate tool in JSON format."""
             "content": generate_response(transcript, goal, history, context, personality, company_name, "", agent_name)
         }
 
+
+
+async def stream_response_with_tools(
+    transcript: str,
+    goal: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    context: str = "",
+    personality: str = "professional",
+    company_name: str = "",
+    agent_name: str = ""
+) -> AsyncGenerator[Tuple[str, Any], None]:
+    """
+    Streaming version of generate_response_with_tools.
+
+    The JSON reply is parsed while it is generated (ToolCallStreamParser), so
+    the words for the caller can be spoken before the object is complete.
+
+    Yields:
+        ("tool", name): As soon as the tool field has been written
+        ("text", piece): Text to speak, as it is generated
+        ("decision", dict): Last event; same dict as generate_response_with_tools
+    """
+    from app.services.tool_call_parser import ToolCallStreamParser
+
+    if not transcript or not transcript.strip():
+        yield ("decision", {
+            "type": "text",
+            "content": "Hello! I'm here to help you. How can I assist you today?"
+        })
+        return
+
+    messages = _build_tool_messages(transcript, goal, history, context, personality, company_name, agent_name)
+    parser = ToolCallStreamParser()
+    try:
+        async for delta in get_llm_client().stream_chat(
+            messages,
+            temperature=0.3,  # Lower temperature for more consistent JSON
+            max_tokens=500
+        ):
+            for event in parser.feed(delta):
+                yield event
+
+    except LLMError as e:
+        logger.error(f"Error in stream_response_with_tools: {e}")
+        if parser.tool is None and not parser.spoken_text:
+            # Nothing usable yet: fall back to a regular response
+            content = await generate_response_async(transcript, goal, history, context, personality, company_name, "", agent_name)
+            yield ("decision", {"type": "text", "content": content})
+            return
+        # Part of the decision was already streamed (and maybe spoken): keep it
+
+    decision = parser.close()
+    logger.info(f"🛠️ Tool decision (streamed): {decision.get('tool')} with args: {decision.get('arguments')}")
+    yield ("decision", decision)
+
+
+async def generate_response_with_tools_async(
+    transcript: str,
+    goal: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    context: str = "",
+    personality: str = "professional",
+    company_name: str = "",
+    agent_name: str = ""
+) -> Dict[str, Any]:
+    """
+    generate_response_with_tools for async callers that do not speak while
+    the reply streams: collects stream_response_with_tools.
+
+    Returns:
+        dict: Same decision dict as generate_response_with_tools
+    """
+    decision: Dict[str, Any] = {"type": "text", "content": "I understand."}
+    async for kind, value in stream_response_with_tools(
+        transcript, goal, history, context, personality, company_name, agent_name
+    ):
+        if kind == "decision":
+            decision = value
+    return decision
@@ -0,0 +1,119 @@
+"""
+Fast-path parser for inbound Twilio Media Stream messages.
+
+`media` frames arrive 50 times per second per call, and all we need from
+them is the event name and the µ-law payload. parse_twilio_message() pulls
+those two fields out with as little allocation as possible and only builds
+the full nested dict for the rare control events (start/stop/mark/...).
+
+Backends, fastest first: msgspec (typed decode of just the needed fields),
+orjson, then a pure-Python string scan with json as the safety net.
+"""
+import binascii
+import json
+from typing import Any, Dict, NamedTuple, Optional
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class TwilioMessage(NamedTuple):
+    event: Optional[str]
+    payload: Optional[bytes] = None            # Decoded µ-law for `media` events
+    message: Optional[Dict[str, Any]] = None   # Full message for every other event
+
+
+if ORJSON_AVAILABLE:
+    _loads = orjson.loads
+elif MSGSPEC_AVAILABLE:
+    _loads = msgspec.json.decode
+else:
+    _loads = json.loads
+
+
+def _b64decode(payload: str) -> bytes:
+    # Strict: a corrupt payload is an error, not silently skipped characters
+    return binascii.a2b_base64(payload, strict_mode=True)
+
+
+_EVENT_KEY = '"event":"'
+_PAYLOAD_KEY = '"payload":"'
+
+
+def _scan_fast_path(raw: str) -> Optional[TwilioMessage]:
+    # Twilio sends compact JSON; anything else falls back to a full parse
+    start = raw.find(_EVENT_KEY)
+    if start < 0:
+        return None
+    start += len(_EVENT_KEY)
+    if not raw.startswith('media"', start):
+        return None
+    p = raw.find(_PAYLOAD_KEY)
+    if p < 0:
+        return None
+    p += len(_PAYLOAD_KEY)
+    end = raw.find('"', p)
+    if end < 0 or raw.count("{") != raw.count("}"):
+        return None  # Truncated frame: let the full parse reject it
+    # Base64 never contains quotes or escapes, so the slice is the payload
+    return TwilioMessage("media", _b64decode(raw[p:end]))
+
+
+if MSGSPEC_AVAILABLE:
+    class _MediaBody(msgspec.Struct):
+        payload: str = ""
+
+    class _Envelope(msgspec.Struct):
+        event: Optional[str] = None
+        media: Optional[_MediaBody] = None
+
+    _envelope_decoder = msgspec.json.Decoder(_Envelope)
+
+    def _msgspec_fast_path(raw: str) -> Optional[TwilioMessage]:
+        try:
+            envelope = _envelope_decoder.decode(raw)
+        except msgspec.DecodeError:
+            return None
+        if envelope.event != "media":
+            return None
+        payload = envelope.media.payload if envelope.media else ""
+        return TwilioMessage("media", _b64decode(payload) if payload else b"")
+
+    _media_fast_path = _msgspec_fast_path
+else:
+    _media_fast_path = _scan_fast_path
+
+
+def parse_twilio_message(raw: str) -> TwilioMessage:
+    """
+    Parse one Twilio Media Stream text frame.
+
+    Args:
+        raw: JSON text received from the WebSocket
+
+    Returns:
+        TwilioMessage: `payload` is set for media events, `message` holds the
+        fully parsed dict for all other events
+
+    Raises:
+        ValueError: If the frame is not valid JSON or has a bad payload
+    """
+    fast = _media_fast_path(raw)
+    if fast is not None:
+        return fast
+
+    msg = _loads(raw)
+    event = msg.get("event") if isinstance(msg, dict) else None
+    if event == "media":
+        payload_b64 = (msg.get("media") or {}).get("payload", "")
+        return TwilioMessage("media", _b64decode(payload_b64) if payload_b64 else b"", msg)
+    return TwilioMessage(event, None, msg)
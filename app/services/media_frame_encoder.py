@@ -0,0 +1,66 @@
+"""
+Outbound Twilio media frame encoder.
+
+Every outbound media message for a stream has the same JSON envelope; only
+the base64 payload changes. MediaFrameEncoder renders the stream-specific
+envelope once as a byte template, splices each frame's base64 payload into
+it and keeps constant messages (silence, clear) pre-encoded. A frame still
+costs two small allocations (the base64 output and the str that
+ws.send_text needs, since Twilio only accepts text frames), but no dict
+build, json.dumps or string formatting.
+"""
+import binascii
+import json
+
+FRAME_BYTES = 160                      # 20 ms of 8 kHz µ-law
+SILENCE_MULAW_20MS = b"\xff" * FRAME_BYTES
+
+
+def _b64_len(n: int) -> int:
+    return 4 * ((n + 2) // 3)
+
+
+class MediaFrameEncoder:
+    """Builds Twilio `media`/`clear` messages for a single stream."""
+
+    def __init__(self, stream_sid: str, frame_bytes: int = FRAME_BYTES):
+        """
+        Args:
+            stream_sid: Twilio stream SID the messages are addressed to
+            frame_bytes: Size of the regular frame the buffer is sized for
+        """
+        self.stream_sid = stream_sid
+        self.frame_bytes = frame_bytes
+
+        # json.dumps once so the SID is escaped exactly like the old path
+        sid_json = json.dumps(stream_sid)
+        self._prefix = f'{{"event": "media", "streamSid": {sid_json}, "media": {{"payload": "'
+        self._suffix = '"}}'
+        prefix = self._prefix.encode("ascii")
+        self._payload_start = len(prefix)
+        self._payload_end = self._payload_start + _b64_len(frame_bytes)
+        self._buffer = bytearray(prefix + b"=" * _b64_len(frame_bytes) + self._suffix.encode("ascii"))
+
+        self.silence = self.media(SILENCE_MULAW_20MS)
+        self.clear = json.dumps({"event": "clear", "streamSid": stream_sid})
+
+    def mark(self, name: str) -> str:
+        """Encode a Twilio `mark` message (echoed back once audio before it has played)."""
+        return json.dumps({"event": "mark", "streamSid": self.stream_sid, "mark": {"name": name}})
+
+    def media(self, frame) -> str:
+        """
+        Encode one audio frame as a Twilio `media` message.
+
+        Args:
+            frame: µ-law bytes (bytes, bytearray or memoryview)
+
+        Returns:
+            str: JSON text ready for ws.send_text (a new string per call)
+        """
+        payload = binascii.b2a_base64(frame, newline=False)
+        if len(frame) == self.frame_bytes:
+            self._buffer[self._payload_start:self._payload_end] = payload
+            return self._buffer.decode("ascii")
+        # Odd-sized frame: rare, so a plain concatenation is fine
+        return self._prefix + payload.decode("ascii") + self._suffix
@@ -0,0 +1,109 @@
+"""
+Clock-paced media playout for Twilio Media Streams.
+
+Twilio plays whatever we send at 8 kHz and buffers anything that arrives
+early. Sending audio faster than real time fills that buffer, so a barge-in
+`clear` has to throw away seconds of speech. MediaPlayout sends fixed 20 ms
+µ-law frames paced off time.monotonic() and keeps at most a small, configurable
+lookahead of audio queued on Twilio's side.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FRAME_BYTES = 160          # 8 kHz µ-law * 20 ms
+FRAME_DURATION = 0.020     # seconds per frame
+MULAW_SILENCE_BYTE = b"\xff"
+
+# How much audio we allow Twilio to hold ahead of real time
+PLAYOUT_LOOKAHEAD_MS = int(os.getenv("PLAYOUT_LOOKAHEAD_MS", "60"))
+
+
+class MediaPlayout:
+    """
+    Paces outbound 20 ms frames for one media stream.
+
+    The scheduler tracks the absolute monotonic time at which Twilio will
+    finish playing everything sent so far. Each frame is released only when
+    that point is within the lookahead window, so timing errors from sleep
+    jitter never accumulate (drift correction), and after an underrun the
+    clock simply resynchronises to "now".
+    """
+
+    def __init__(
+        self,
+        send_frame: Callable[[bytes], Awaitable[None]],
+        lookahead_ms: int = PLAYOUT_LOOKAHEAD_MS,
+        frame_bytes: int = FRAME_BYTES,
+        frame_duration: float = FRAME_DURATION,
+    ):
+        """
+        Args:
+            send_frame: Coroutine that delivers one µ-law frame to Twilio
+            lookahead_ms: Maximum audio kept buffered on Twilio's side
+            frame_bytes: Bytes per frame (160 for 20 ms at 8 kHz)
+            frame_duration: Seconds of audio per frame
+        """
+        self._send_frame = send_frame
+        self.frame_bytes = frame_bytes
+        self.frame_duration = frame_duration
+        # Always allow at least one frame in flight so playback never starves
+        self.lookahead = max(lookahead_ms / 1000.0, frame_duration)
+        self._buffer_end = 0.0  # monotonic time when Twilio's buffer runs dry
+        self.frames_sent = 0
+
+    @property
+    def buffered_seconds(self) -> float:
+        """Audio we estimate Twilio still has queued."""
+        return max(0.0, self._buffer_end - time.monotonic())
+
+    def clear(self):
+        """Forget scheduled audio after Twilio was told to `clear` its buffer."""
+        self._buffer_end = time.monotonic()
+
+    async def play(self, mulaw: bytes, interrupt_event: Optional[asyncio.Event] = None) -> int:
+        """
+        Send µ-law audio as real-time paced frames.
+
+        Args:
+            mulaw: 8 kHz µ-law audio of any length (last frame is padded with silence)
+            interrupt_event: Stop before the next frame once this is set
+
+        Returns:
+            int: Number of frames sent
+        """
+        view = memoryview(mulaw)
+        sent = 0
+
+        for offset in range(0, len(view), self.frame_bytes):
+            now = time.monotonic()
+            if self._buffer_end < now:
+                # Underrun (or first frame): restart the clock from now
+                self._buffer_end = now
+
+            wait = self._buffer_end - self.lookahead - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            if interrupt_event is not None and interrupt_event.is_set():
+                logger.info(f"Playback interrupted after {sent} frames")
+                break
+
+            frame = view[offset:offset + self.frame_bytes]
+            if len(frame) < self.frame_bytes:
+                frame = bytes(frame) + MULAW_SILENCE_BYTE * (self.frame_bytes - len(frame))
+
+            await self._send_frame(frame)
+            self._buffer_end += self.frame_duration
+            sent += 1
+
+        self.frames_sent += sent
+        return sent
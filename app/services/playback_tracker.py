@@ -0,0 +1,145 @@
+"""
+Playback tracking with Twilio `mark` events.
+
+Every chunk of assistant speech is queued as a SpeechSegment. The playout
+task stamps when it starts sending a segment and follows its audio with a
+Twilio `mark`; Twilio echoes the mark back once that audio has actually been
+played to the caller. From these two signals the tracker knows the playout
+position at any moment, which lets the orchestrator:
+
+- end the speaking state exactly when the last segment finished playing
+  (instead of sleeping blindly), and
+- on barge-in, rewrite conversation history so it only contains what the
+  caller really heard.
+"""
+import itertools
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechSegment:
+    """One chunk of queued assistant audio and the text it speaks."""
+
+    def __init__(self, audio: bytes, mark_name: str, message: Optional[dict] = None, text: Optional[str] = None):
+        self.audio = audio
+        self.mark_name = mark_name
+        self.message = message        # conversation_history entry this audio belongs to
+        self.text = text              # exact text of this segment, if known
+        self.started_at: Optional[float] = None   # set by playout when sending starts
+        self.duration: float = 0.0                # seconds, set by playout
+        self.played = False                       # Twilio returned our mark
+
+    def played_fraction(self, now: float) -> float:
+        if self.played:
+            return 1.0
+        if self.started_at is None or self.duration <= 0:
+            return 0.0
+        return min(1.0, max(0.0, (now - self.started_at) / self.duration))
+
+
+def _leading_words(text: str, fraction: float) -> str:
+    words = text.split()
+    return " ".join(words[:int(len(words) * fraction)])
+
+
+class PlaybackTracker:
+    """Per-call view of which queued speech the caller has actually heard."""
+
+    def __init__(self, history: List[dict], on_idle: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            history: The call's conversation_history list (trimmed on barge-in)
+            on_idle: Called when the last outstanding segment finished playing
+        """
+        self._history = history
+        self._segments: Dict[str, SpeechSegment] = {}
+        self._counter = itertools.count(1)
+        self._message_bytes: Dict[int, int] = {}  # id(message) -> audio bytes queued for it
+        self.on_idle = on_idle
+
+    @property
+    def is_playing(self) -> bool:
+        """True while any tracked audio is queued or still playing."""
+        return bool(self._segments)
+
+    def track(self, audio: bytes, message: Optional[dict] = None, text: Optional[str] = None) -> SpeechSegment:
+        """
+        Wrap audio in a tracked segment.
+
+        Args:
+            audio: TTS audio to play
+            message: History entry the audio speaks (trimmed if interrupted)
+            text: Exact text of this segment when the message is split into several
+
+        Returns:
+            SpeechSegment: Item to put on the outbound queue
+        """
+        segment = SpeechSegment(audio, f"seg-{next(self._counter)}", message, text)
+        self._segments[segment.mark_name] = segment
+        if message is not None:
+            self._message_bytes[id(message)] = self._message_bytes.get(id(message), 0) + len(audio)
+        return segment
+
+    def on_mark(self, name: str):
+        """Twilio reports that all audio before this mark has been played."""
+        if name not in self._segments:
+            return  # Unknown, or flushed by an interrupt
+        # Segments are in queue order: a mark also settles any earlier one whose mark went missing
+        for mark_name in list(self._segments):
+            self._segments.pop(mark_name).played = True
+            if mark_name == name:
+                break
+        if not self._segments:
+            self._message_bytes.clear()
+            if self.on_idle:
+                self.on_idle()
+
+    def interrupt(self) -> str:
+        """
+        Stop tracking after barge-in and trim unplayed text from history.
+
+        Returns:
+            str: The assistant text that was cut off (for logging)
+        """
+        now = time.monotonic()
+        by_message: Dict[int, List[SpeechSegment]] = {}
+        for segment in self._segments.values():
+            if segment.message is not None:
+                by_message.setdefault(id(segment.message), []).append(segment)
+        message_bytes = self._message_bytes
+        self._segments.clear()
+        self._message_bytes = {}
+
+        cut_off = []
+        for key, segments in by_message.items():
+            message = segments[0].message
+            words = message["content"].split()
+            if all(s.text for s in segments):
+                # Exact: outstanding segments are the tail of the message
+                unplayed = sum(
+                    len(s.text.split()) - len(_leading_words(s.text, s.played_fraction(now)).split())
+                    for s in segments
+                )
+            else:
+                # Approximate by the share of this message's audio not yet played
+                total = message_bytes.get(key) or 1
+                left = sum(len(s.audio) * (1.0 - s.played_fraction(now)) for s in segments)
+                unplayed = int(round(len(words) * min(1.0, left / total)))
+
+            kept = words[:max(0, len(words) - unplayed)]
+            cut_off.append(" ".join(words[len(kept):]))
+            if kept:
+                message["content"] = " ".join(kept)
+            else:
+                for i, entry in enumerate(self._history):
+                    if entry is message:
+                        del self._history[i]
+                        break
+
+        unplayed_text = " ".join(t for t in cut_off if t)
+        if unplayed_text:
+            logger.info(f"✂️ Trimmed unplayed assistant text from history: '{unplayed_text}'")
+        return unplayed_text
@@ -0,0 +1,96 @@
+"""
+Pre-synthesized audio for fixed system prompts.
+
+Error and fallback lines are needed exactly when a provider is already
+failing, so synthesizing them on demand adds seconds of dead air. The bank
+renders each phrase once per voice (at startup, or lazily on first use),
+stores it as 8 kHz µ-law ready for Twilio and serves it with no provider
+dependency.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from app.audio.codec import MulawAudio
+from app.audio.transcode import MULAW_8K
+
+logger = logging.getLogger(__name__)
+
+# Phrase key -> text
+SYSTEM_PROMPTS: Dict[str, str] = {
+    "error_retry": "I'm sorry, I encountered an error. Please try again.",
+    "unexpected_error": "I'm sorry, I encountered an unexpected error. Please try again.",
+    "application_error": "We're sorry, an application error has occurred.",
+    "processing_trouble": "I apologize, I'm having trouble processing that.",
+}
+
+# Providers tried in order when rendering a clip
+BANK_PROVIDERS = ("cartesia", "openai")
+
+
+class PromptAudioBank:
+    """Caches rendered system prompts per voice."""
+
+    def __init__(self):
+        self._clips: Dict[Tuple[Optional[str], str], MulawAudio] = {}
+        self._warming: Dict[Optional[str], asyncio.Task] = {}
+
+    async def _render(self, text: str, voice_id: Optional[str]) -> Optional[MulawAudio]:
+        from app.services.tts_service import synthesize_speech_with_provider
+        for provider in BANK_PROVIDERS:
+            try:
+                audio = await synthesize_speech_with_provider(provider, text, voice_id, output_format=MULAW_8K)
+            except Exception as e:
+                logger.warning(f"Prompt bank: {provider} failed for '{text}': {e}")
+                continue
+            if audio:
+                return MulawAudio(audio)
+        return None
+
+    async def warmup(self, voice_id: Optional[str] = None):
+        """Render every system prompt for a voice (None = provider default voice)."""
+        rendered = 0
+        for key, text in SYSTEM_PROMPTS.items():
+            if (voice_id, key) in self._clips:
+                continue
+            clip = await self._render(text, voice_id)
+            if clip:
+                self._clips[(voice_id, key)] = clip
+                rendered += 1
+        logger.info(f"🔊 Prompt audio bank: {rendered} clips rendered for voice {voice_id or 'default'}")
+
+    def ensure_voice(self, voice_id: Optional[str] = None):
+        """Start rendering a voice's clips in the background if not already done."""
+        task = self._warming.get(voice_id)
+        if task is None or (task.done() and not self.has_voice(voice_id)):
+            self._warming[voice_id] = asyncio.create_task(self.warmup(voice_id))
+
+    def has_voice(self, voice_id: Optional[str]) -> bool:
+        return all((voice_id, key) in self._clips for key in SYSTEM_PROMPTS)
+
+    def get(self, key: str, voice_id: Optional[str] = None) -> Optional[MulawAudio]:
+        """
+        Get a pre-rendered clip instantly.
+
+        Args:
+            key: Phrase key from SYSTEM_PROMPTS
+            voice_id: Preferred voice; falls back to the default voice clip
+
+        Returns:
+            MulawAudio or None if the phrase has never been rendered
+        """
+        clip = self._clips.get((voice_id, key))
+        if clip is None and voice_id is not None:
+            self.ensure_voice(voice_id)
+            clip = self._clips.get((None, key))
+        if clip is None:
+            logger.warning(f"Prompt bank: no clip for '{key}' yet")
+        return clip
+
+    @staticmethod
+    def text(key: str) -> str:
+        return SYSTEM_PROMPTS[key]
+
+
+# Global instance
+prompt_audio_bank = PromptAudioBank()
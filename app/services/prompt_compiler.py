@@ -0,0 +1,217 @@
+"""
+Prompt compilation for LLM turns.
+
+Prompts used to be rebuilt from scratch on every turn, with the
+conversation, knowledge base and per-turn instructions mixed into one
+string, so no two turns of a call shared a prefix. The compiler lays every
+turn out the same way:
+
+    system     static per agent: identity, goal, personality, tools, rules
+               (compiled once and cached)
+    history    one chat message per earlier turn
+    user       this turn only: knowledge base, language, latest message
+
+The prefix shared with the previous turn is the system prompt plus the
+history before that turn's message. It is not the whole previous prompt:
+its last message was the full turn block, while history replays only the
+caller's words for it. Once the history window starts dropping or
+summarizing the oldest turns (app.agent.history_manager), a turn that
+moves the window shares only the system prompt. Providers with
+prefix / KV caching reuse whatever matches.
+
+Compiled system prompts live in one process-wide LRU keyed by everything
+they depend on, not on the agent objects, which are rebuilt per call.
+Token counts (system, history, turn) are measured with tiktoken and returned
+by assemble() for each turn. The compiler is shared by concurrent calls, so
+it keeps totals only.
+"""
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+PROMPT_CACHE_SIZE = 256       # Compiled system prompts kept (agents x goals x kinds)
+TOKEN_CACHE_SIZE = 4096       # Per-message token counts kept (history is re-counted every turn)
+MESSAGE_OVERHEAD_TOKENS = 4   # Chat formatting tokens per message (OpenAI accounting)
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens in text (cl100k_base; a chars/4 estimate if tiktoken or its encoding is missing).
+
+    Args:
+        text: Any text
+
+    Returns:
+        int: Token count
+    """
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None and TIKTOKEN_AVAILABLE:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # The encoding is downloaded on first use; estimate if that fails
+            logger.warning(f"⚠️ tiktoken encoding unavailable, estimating tokens: {e}")
+            _encoding = False
+    if not _encoding:
+        return len(text) // 4 + 1
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+class CompiledPrompt(NamedTuple):
+    """A static system prompt and its token count."""
+    text: str
+    tokens: int
+
+
+class PromptTokens(NamedTuple):
+    """Token counts of one assembled turn."""
+    system: int
+    history: int
+    turn: int
+
+    @property
+    def total(self) -> int:
+        return self.system + self.history + self.turn
+
+
+class PromptCompiler:
+    """Caches static system prompts and assembles turns in a stable layout."""
+
+    def __init__(self, max_prompts: int = PROMPT_CACHE_SIZE, max_counts: int = TOKEN_CACHE_SIZE):
+        """
+        Args:
+            max_prompts: Compiled system prompts kept (LRU)
+            max_counts: Per-message token counts kept (LRU)
+        """
+        self.max_prompts = max_prompts
+        self.max_counts = max_counts
+        self._prompts: "OrderedDict[Hashable, CompiledPrompt]" = OrderedDict()
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._stats = {"compiled": 0, "reused": 0, "turns": 0, "prompt_tokens": 0, "max_prompt_tokens": 0}
+
+    def compile(self, key: Hashable, build: Callable[[], str]) -> CompiledPrompt:
+        """
+        Get the static system prompt for key, building it only the first time.
+
+        Args:
+            key: Everything the prompt depends on (kind, agent, company, goal, personality, ...)
+            build: Produces the prompt text on a cache miss
+
+        Returns:
+            CompiledPrompt
+        """
+        compiled = self._prompts.get(key)
+        if compiled is not None:
+            self._prompts.move_to_end(key)
+            self._stats["reused"] += 1
+            return compiled
+        text = build().strip()
+        compiled = CompiledPrompt(text, count_tokens(text))
+        self._prompts[key] = compiled
+        self._stats["compiled"] += 1
+        if len(self._prompts) > self.max_prompts:
+            self._prompts.popitem(last=False)
+        logger.info(f"🧩 Compiled system prompt {key[0] if isinstance(key, tuple) else key} ({compiled.tokens} tokens)")
+        return compiled
+
+    @staticmethod
+    def history_messages(history: Optional[List[Dict[str, str]]], transcript: str = "") -> List[Dict[str, str]]:
+        """
+        Earlier turns as chat messages, in order.
+
+        The current transcript is left out if the caller already appended it
+        to history: it is sent in the turn message instead.
+
+        Args:
+            history: Conversation history entries ({"role", "content"})
+            transcript: This turn's user text
+
+        Returns:
+            List of {"role": "user"|"assistant"|"system", "content"} messages
+            (system entries are history summaries, see app.agent.history_manager)
+        """
+        entries = [
+            msg for msg in (history or [])
+            if isinstance(msg, dict) and "role" in msg and (msg.get("content") or msg.get("text") or "").strip()
+        ]
+        if entries and entries[-1]["role"] == "user" and transcript and \
+                (entries[-1].get("content") or entries[-1].get("text") or "").strip() == transcript.strip():
+            entries = entries[:-1]
+        return [
+            {"role": msg["role"] if msg["role"] in ("user", "system") else "assistant",
+             "content": (msg.get("content") or msg.get("text") or "").strip()}
+            for msg in entries
+        ]
+
+    def assemble(
+        self,
+        system: CompiledPrompt,
+        history: Optional[List[Dict[str, str]]],
+        turn: str,
+        transcript: str = "",
+        label: str = "turn",
+    ) -> Tuple[List[Dict[str, str]], PromptTokens]:
+        """
+        Lay out one turn: static system prompt, earlier turns, this turn.
+
+        Args:
+            system: Compiled system prompt
+            history: Conversation history
+            turn: This turn's user message (knowledge base, instructions, latest message)
+            transcript: This turn's user text (dropped from history if already there)
+            label: Name used in the token log line
+
+        Returns:
+            (messages, PromptTokens)
+        """
+        past = self.history_messages(history, transcript)
+        messages = [{"role": "system", "content": system.text}] + past + [{"role": "user", "content": turn}]
+        tokens = PromptTokens(
+            system=system.tokens + MESSAGE_OVERHEAD_TOKENS,
+            history=sum(self._message_tokens(msg["content"]) for msg in past),
+            turn=count_tokens(turn) + MESSAGE_OVERHEAD_TOKENS,
+        )
+        self._record(tokens)
+        logger.info(
+            f"📏 Prompt tokens ({label}): {tokens.total} = system {tokens.system} (cached) "
+            f"+ history {tokens.history} ({len(past)} msgs) + turn {tokens.turn}"
+        )
+        return messages, tokens
+
+    def _message_tokens(self, content: str) -> int:
+        count = self._counts.get(content)
+        if count is None:
+            count = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+            self._counts[content] = count
+            if len(self._counts) > self.max_counts:
+                self._counts.popitem(last=False)
+        else:
+            self._counts.move_to_end(content)
+        return count
+
+    def _record(self, tokens: PromptTokens):
+        self._stats["turns"] += 1
+        self._stats["prompt_tokens"] += tokens.total
+        self._stats["max_prompt_tokens"] = max(self._stats["max_prompt_tokens"], tokens.total)
+
+    def get_stats(self) -> Dict[str, int]:
+        stats = dict(self._stats)
+        stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / stats["turns"]) if stats["turns"] else 0
+        stats["cached_prompts"] = len(self._prompts)
+        return stats
+
+
+# Global instance
+prompt_compiler = PromptCompiler()
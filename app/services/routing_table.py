@@ -0,0 +1,182 @@
+"""
+In-memory routing table for inbound calls.
+
+Resolves business number -> assigned agent -> active inbound campaign without
+touching Firestore on the call path. The table is loaded once at startup and
+kept current with Firestore snapshot listeners; if listeners cannot be
+attached it falls back to a TTL refresh that runs in a worker thread, so the
+event loop never waits on a Firestore round trip.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+from app.models.campaign import CallSession
+from app.models.phone_number import VirtualPhoneNumber
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ROUTING_TABLE_TTL = float(os.getenv("ROUTING_TABLE_TTL", "60"))
+AGENT_NAME_TTL = 300.0
+
+
+def normalize_phone(p: Optional[str]) -> str:
+    """Strip formatting characters, keep the leading +."""
+    if not p:
+        return ""
+    return p.replace(" ", "").replace("-", "").replace("(", "").replace(")", "").strip()
+
+
+class RouteResolution(NamedTuple):
+    target_agent_id: Optional[str]         # Agent assigned to the dialed number, if any
+    call_session: Optional[CallSession]    # Active inbound campaign to route to, if any
+
+
+class RoutingTableService:
+    """Keeps phone -> agent -> campaign mappings in memory."""
+
+    def __init__(self):
+        self._phones: Dict[str, List[VirtualPhoneNumber]] = {}
+        self._inbound_sessions: List[CallSession] = []
+        self._agent_names: Dict[str, tuple] = {}  # agent_id -> (name, fetched_at)
+        self._loaded_at = 0.0
+        self._listeners = []
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------ #
+    # Loading
+    # ------------------------------------------------------------------ #
+    def _set_phones(self, docs):
+        phones: Dict[str, List[VirtualPhoneNumber]] = {}
+        for doc in docs:
+            pn = VirtualPhoneNumber.from_dict(doc.to_dict(), doc.id)
+            phones.setdefault(normalize_phone(pn.phone_number), []).append(pn)
+        self._phones = phones  # Atomic swap; readers never see a partial table
+
+    def _set_inbound_sessions(self, docs):
+        sessions = [CallSession.from_dict(doc.to_dict(), doc.id) for doc in docs]
+        self._inbound_sessions = [s for s in sessions if s.status == "active"]
+
+    def _inbound_query(self, db):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        return db.collection('campaigns').where(filter=FieldFilter('type', '==', 'inbound'))
+
+    def refresh(self):
+        """Reload the whole table from Firestore (blocking; run in a thread)."""
+        from app.database.firestore import db
+        self._set_phones(db.collection('virtual_phone_numbers').stream())
+        self._set_inbound_sessions(self._inbound_query(db).stream())
+        self._loaded_at = time.monotonic()
+        logger.info(
+            f"📇 Routing table loaded: {len(self._phones)} numbers, "
+            f"{len(self._inbound_sessions)} active inbound campaigns"
+        )
+
+    def _attach_listeners(self):
+        """Keep the table current with Firestore snapshot listeners (blocking)."""
+        from app.database.firestore import db
+
+        def on_phones(docs, changes, read_time):
+            self._set_phones(docs)
+            self._loaded_at = time.monotonic()
+
+        def on_campaigns(docs, changes, read_time):
+            self._set_inbound_sessions(docs)
+            self._loaded_at = time.monotonic()
+
+        self._listeners = [
+            db.collection('virtual_phone_numbers').on_snapshot(on_phones),
+            self._inbound_query(db).on_snapshot(on_campaigns),
+        ]
+
+    async def start(self):
+        """Initial load plus snapshot listeners; falls back to TTL refresh."""
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            logger.error(f"Routing table initial load failed: {e}")
+            return
+        try:
+            await asyncio.to_thread(self._attach_listeners)
+            logger.info("✅ Routing table snapshot listeners attached")
+        except Exception as e:
+            self._listeners = []
+            logger.warning(f"⚠️ Routing table listeners unavailable, using {ROUTING_TABLE_TTL:.0f}s TTL refresh: {e}")
+
+    def stop(self):
+        for listener in self._listeners:
+            try:
+                listener.unsubscribe()
+            except Exception:
+                pass
+        self._listeners = []
+
+    async def _ensure_fresh(self):
+        if not self._loaded_at:
+            # Cold table (startup load failed or not run): load once inline
+            await asyncio.to_thread(self.refresh)
+            return
+        if self._listeners or time.monotonic() - self._loaded_at < ROUTING_TABLE_TTL:
+            return
+        # Stale: serve current data and refresh in the background
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(asyncio.to_thread(self.refresh))
+
+    # ------------------------------------------------------------------ #
+    # Lookups
+    # ------------------------------------------------------------------ #
+    def resolve_cached(self, phone_number: Optional[str]) -> RouteResolution:
+        """
+        Resolve a dialed business number from memory.
+
+        Args:
+            phone_number: Business 'To' number
+
+        Returns:
+            RouteResolution: Assigned agent (if any) and the campaign to use.
+            With an assigned agent only that agent's campaigns qualify; without
+            one, any active inbound campaign is used as a fallback.
+        """
+        target_agent_id = None
+        for pn in self._phones.get(normalize_phone(phone_number), []):
+            if pn.is_active and pn.assigned_agents:
+                target_agent_id = pn.assigned_agents[0]
+                break
+
+        if target_agent_id:
+            sessions = [s for s in self._inbound_sessions if s.custom_agent_id == target_agent_id]
+            sessions.sort(key=lambda c: c.updated_at or c.created_at, reverse=True)
+        else:
+            sessions = sorted(self._inbound_sessions, key=lambda c: bool(c.custom_agent_id), reverse=True)
+
+        return RouteResolution(target_agent_id, sessions[0] if sessions else None)
+
+    async def resolve(self, phone_number: Optional[str]) -> RouteResolution:
+        """Async wrapper that makes sure the table is loaded first."""
+        await self._ensure_fresh()
+        return self.resolve_cached(phone_number)
+
+    async def get_agent_name(self, agent_id: str) -> Optional[str]:
+        """Agent display name, cached; a miss is fetched in a worker thread."""
+        cached = self._agent_names.get(agent_id)
+        if cached and time.monotonic() - cached[1] < AGENT_NAME_TTL:
+            return cached[0]
+
+        def fetch():
+            from app.database.firestore import db
+            doc = db.collection("custom_agents").document(str(agent_id)).get()
+            return doc.to_dict().get("name") if doc.exists else None
+
+        name = await asyncio.to_thread(fetch)
+        self._agent_names[agent_id] = (name, time.monotonic())
+        return name
+
+
+# Global instance
+routing_table = RoutingTableService()
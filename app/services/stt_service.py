@@ -4,7 +4,8 @@ import numpy as np
 from dotenv import load_dotenv
 import logging
 import asyncio
-from typing import Optional
+from typing import Dict, Optional
+from app.audio.ring_buffer import ByteRingBuffer
 from app.services.deepgram_websocket import deepgram_ws_service
 
 # Import Google Cloud Speech
@@ -26,17 +27,28 @@ _http_client: httpx.AsyncClient | None = None
 
 # Storage for transcription results from WebSocket
 transcription_results = {}
+# Audio that arrives while a call's Deepgram socket is (re)connecting, flushed once it is open
+STT_EARLY_AUDIO_SECONDS = float(os.getenv("STT_EARLY_AUDIO_SECONDS", "5"))
+STT_EARLY_AUDIO_BYTES = int(STT_EARLY_AUDIO_SECONDS * 8000)  # 8 kHz mu-law: one byte per sample
+STT_MAX_RECONNECTS = 3  # Failed connect rounds in a row before giving up on a call's stream
+STT_CONNECT_BACKOFF = 0.5  # Seconds before the first retry, doubling per attempt
+_early_audio: Dict[str, ByteRingBuffer] = {}
+_connect_tasks: Dict[str, asyncio.Task] = {}
 # Callback registry for streaming architecture
 # Callback registry for streaming architecture
 _transcript_handlers = {}
+_event_handlers = {}
 
-def register_transcript_handler(call_sid: str, handler):
+def register_transcript_handler(call_sid: str, handler, on_event=None):
     """
     Register an async handler function for a specific call.
-    Handler signature: async (text, is_final, confidence)
+    Handler signature: async (text, is_final, confidence, speech_final=False)
+    on_event signature: async (event_type) for UtteranceEnd / SpeechStarted / SpeechFinal
     """
     logger.info(f"✅ Registered handler for call {call_sid}")
     _transcript_handlers[call_sid] = handler
+    if on_event is not None:
+        _event_handlers[call_sid] = on_event
 
 
 def get_http_client() -> httpx.AsyncClient:
@@ -114,15 +126,17 @@ def _normalize_transcript(transcript: str) -> str:
 
 # ---- WebSocket transcription callback ----------------------------------------
 
-async def transcription_callback(call_sid: str, transcript: str, confidence: float, is_final: bool):
+async def transcription_callback(call_sid: str, transcript: str, is_final: bool, confidence: float, speech_final: bool = False):
     """
     Callback function to handle transcription results from Deepgram WebSocket
+    (same argument order as DeepgramWebSocketService invokes it with)
     
     Args:
         call_sid: Unique identifier for the call
         transcript: Transcribed text
-        confidence: Confidence score of the transcription
         is_final: Whether this is a final transcription
+        confidence: Confidence score of the transcription
+        speech_final: Whether Deepgram's endpointing closed the utterance
     """
     # Normalize transcript first (fix email patterns, etc.)
     transcript = _normalize_transcript(transcript)
@@ -131,17 +145,24 @@ async def transcription_callback(call_sid: str, transcript: str, confidence: flo
     if is_final:
         logger.info(f"STT Final: '{transcript}' ({confidence:.2f})")
     
+    word_count = len(transcript.strip().split())
+
+    # Interim results prime speculative turns (app.agent.speculative_turn) and
+    # tell end-of-turn detection the caller is still talking
+    if not is_final:
+        if word_count and call_sid in _transcript_handlers:
+            asyncio.create_task(_transcript_handlers[call_sid](transcript, False, confidence))
+        return
+
     # CRITICAL: Only trigger on final transcripts with sufficient confidence
     # Lowered from 0.9 to 0.8 to prevent cutting off users mid-sentence
-    if not is_final or confidence < 0.8:
-        return  # Skip low confidence or non-final transcripts
+    if confidence < 0.8:
+        if speech_final:
+            await stt_event_callback(call_sid, "SpeechFinal")  # The endpoint still counts
+        return  # Skip low confidence transcripts
     
-    # Prevent single-word or very short utterances from triggering
-    # This helps avoid premature triggers during natural pauses
-    word_count = len(transcript.strip().split())
-    if word_count < 2:
-        logger.debug(f"Skipping short utterance: '{transcript}' ({word_count} words)")
-        return
+    # Short utterances are not dropped here: the handler's end-of-turn
+    # detector (app.agent.turn_detector) waits to see if the caller goes on
     
     # Trigger the handler if registered
     if call_sid in _transcript_handlers:
@@ -149,7 +170,7 @@ async def transcription_callback(call_sid: str, transcript: str, confidence: flo
         handler = _transcript_handlers[call_sid]
         try:
             # Create a task to run the async handler effectively
-            asyncio.create_task(handler(transcript, is_final, confidence))
+            asyncio.create_task(handler(transcript, is_final, confidence, speech_final))
         except Exception as e:
             logger.error(f"Error triggering transcript handler for {call_sid}: {e}")
     else:
@@ -164,6 +185,18 @@ async def transcription_callback(call_sid: str, transcript: str, confidence: flo
         "is_final": is_final
     })
 
+async def stt_event_callback(call_sid: str, event_type: str):
+    """
+    Turn-taking events from Deepgram WebSocket (UtteranceEnd, SpeechStarted, SpeechFinal)
+
+    Args:
+        call_sid: Unique identifier for the call
+        event_type: Deepgram event name
+    """
+    handler = _event_handlers.get(call_sid)
+    if handler is not None:
+        asyncio.create_task(handler(event_type))
+
 # ---- Google Cloud Speech fallback -------------------------------------------
 
 async def _transcribe_with_google(audio_bytes: bytes, language_code: str = "en-US") -> str | None:
@@ -260,63 +293,94 @@ async def transcribe_audio_with_provider(provider: str, audio_bytes: bytes, call
 async def stream_audio_packet(provider: str, audio_bytes: bytes, call_sid: str) -> bool:
     """
     Non-blocking audio streaming to STT provider.
-    Simply pushes audio to the WebSocket and returns immediately.
+
+    Pushes audio to the call's Deepgram WebSocket when it is open. While it is
+    connecting (first frames of the call, or a reconnect) frames go into the
+    call's early-audio ring buffer and are flushed in order once the socket is
+    up, so the media loop never waits on STT connection setup.
+
+    Returns:
+        bool: False only if the audio had to be dropped
     """
     if provider != "deepgram":
         logger.warning(f"Streaming only supported for 'deepgram', got '{provider}'")
         return False
 
-    # Ensure connection exists with aggressive retry logic
-    if call_sid not in deepgram_ws_service.connections:
-        logger.info(f"Initiating new Deepgram stream for call {call_sid}")
-        
-        # OPTIMIZATION: Aggressive retry on initial connection failure
-        max_initial_retries = 3
-        for retry_attempt in range(max_initial_retries):
+    connection = deepgram_ws_service.connections.get(call_sid)
+    if connection and connection["connected"] and call_sid not in _connect_tasks:
+        # Send and forget (non-blocking)
+        if await deepgram_ws_service.send_audio(call_sid, audio_bytes):
+            return True
+        logger.warning(f"Failed to push audio packet for {call_sid}, reconnecting in background")
+
+    if call_sid not in _connect_tasks:
+        if deepgram_ws_service.reconnect_attempts.get(call_sid, 0) >= STT_MAX_RECONNECTS:
+            return False  # Gave up on this call's stream; see _connect_stream
+        _connect_tasks[call_sid] = asyncio.create_task(_connect_stream(call_sid))
+
+    buffer = _early_audio.get(call_sid)
+    if buffer is None:
+        buffer = _early_audio[call_sid] = ByteRingBuffer(STT_EARLY_AUDIO_BYTES)
+    if buffer.write(audio_bytes):
+        logger.warning(f"Early-audio buffer full for {call_sid}: dropping oldest audio")
+    return True
+
+
+async def _connect_stream(call_sid: str):
+    """Connect (or reconnect) the call's Deepgram stream, then flush its buffered audio in order."""
+    logger.info(f"Initiating Deepgram stream for call {call_sid}")
+    try:
+        # OPTIMIZATION: Aggressive retry on connection failure
+        max_attempts = 3
+        for attempt in range(max_attempts):
             # We pass our updated callback
-            success = await deepgram_ws_service.connect(call_sid, transcription_callback)
-            
-            if success:
-                logger.info(f"✅ Deepgram connected on attempt {retry_attempt + 1}")
-                break
-            
-            if retry_attempt < max_initial_retries - 1:
+            if await deepgram_ws_service.connect(call_sid, transcription_callback, on_event=stt_event_callback):
+                logger.info(f"✅ Deepgram connected on attempt {attempt + 1}")
+                if await _flush_early_audio(call_sid):
+                    return
+            if attempt < max_attempts - 1:
                 # Exponential backoff: 0.5s, 1s
-                backoff = 0.5 * (2 ** retry_attempt)
-                logger.warning(f"🔄 Retry {retry_attempt + 2}/{max_initial_retries} in {backoff}s...")
+                backoff = STT_CONNECT_BACKOFF * (2 ** attempt)
+                logger.warning(f"🔄 Retry {attempt + 2}/{max_attempts} in {backoff}s...")
                 await asyncio.sleep(backoff)
-            else:
-                logger.error(f"❌ Failed to connect after {max_initial_retries} attempts for call {call_sid}")
-                return False
-
-    # Send and forget (non-blocking)
-    success = await deepgram_ws_service.send_audio(call_sid, audio_bytes)
-    if not success:
-        logger.warning(f"Failed to push audio packet for {call_sid}, attempting reconnect")
-        
-        # Get reconnect attempt count
-        retry_count = deepgram_ws_service.reconnect_attempts.get(call_sid, 0)
-        max_retries = 3
-        
-        if retry_count >= max_retries:
-            logger.error(f"Max reconnect attempts ({max_retries}) reached for {call_sid}")
+
+        # connect() resets the counter on success, so this counts failed rounds in a row
+        failures = deepgram_ws_service.reconnect_attempts.get(call_sid, 0) + 1
+        deepgram_ws_service.reconnect_attempts[call_sid] = failures
+        logger.error(f"❌ Failed to connect after {max_attempts} attempts for call {call_sid} ({failures}/{STT_MAX_RECONNECTS})")
+        if failures >= STT_MAX_RECONNECTS:
+            logger.error(f"Max reconnect attempts ({STT_MAX_RECONNECTS}) reached for {call_sid}")
+            _early_audio.pop(call_sid, None)
+    finally:
+        _connect_tasks.pop(call_sid, None)
+
+
+async def _flush_early_audio(call_sid: str) -> bool:
+    """Send buffered audio oldest-first, including frames that arrive meanwhile."""
+    buffer = _early_audio.get(call_sid)
+    flushed = 0
+    while buffer:
+        data = buffer.read()
+        if not await deepgram_ws_service.send_audio(call_sid, data):
+            # Put it back in front of anything newer and reconnect
+            data += buffer.read()
+            buffer.write(data)
             return False
-        
-        # Exponential backoff: 0.5s, 1s, 2s
-        backoff_delay = 0.5 * (2 ** retry_count)
-        logger.info(f"Reconnect attempt {retry_count + 1}/{max_retries} after {backoff_delay}s backoff")
-        await asyncio.sleep(backoff_delay)
-        
-        # Increment retry counter
-        deepgram_ws_service.reconnect_attempts[call_sid] = retry_count + 1
-        
-        # Try one reconnect attempt
-        if await deepgram_ws_service.connect(call_sid, transcription_callback):
-            return await deepgram_ws_service.send_audio(call_sid, audio_bytes)
-        return False
-    
+        flushed += len(data)
+    if flushed:
+        logger.info(f"📤 Flushed {flushed} bytes ({flushed * 1000 // 8000} ms) of early audio to Deepgram for {call_sid}")
     return True
 
+
+def release_stream(call_sid: str):
+    """Stop streaming for a call: cancel a pending connect, drop buffered audio, close the socket."""
+    task = _connect_tasks.pop(call_sid, None)
+    if task is not None:
+        task.cancel()
+    _early_audio.pop(call_sid, None)
+    _event_handlers.pop(call_sid, None)
+    deepgram_ws_service.release(call_sid)
+
 async def _transcribe_with_websocket(provider: str, audio_bytes: bytes, call_sid: str) -> str | None:
     """
     Legacy method - retained for backward compatibility if needed, 
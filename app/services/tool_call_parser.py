@@ -0,0 +1,208 @@
+"""
+Incremental parser for the tool-call JSON that generate_response_with_tools
+asks the LLM for:
+
+    {"tool": "end_call", "arguments": {..., "final_message": "..."}, "response": "..."}
+
+Parsing once the reply is complete means nothing can be spoken until the
+model has written the closing brace. ToolCallStreamParser is fed the reply
+chunk by chunk and reports, as soon as they appear:
+
+- the tool name, the moment its string value closes, and
+- the text to speak (the first of the spoken fields below), character by
+  character while its string value is still being generated.
+
+Anything before the opening brace (```json fences, stray prose) is skipped.
+At the end it returns the same decision dict as generate_response_with_tools.
+"""
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fields holding words for the caller, at top level or inside "arguments"
+SPOKEN_FIELDS = ("final_message", "confirmation_message", "transfer_message", "response")
+
+TOOL_EVENT = "tool"
+TEXT_EVENT = "text"
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class ToolCallStreamParser:
+    """Streaming reader for one tool-call reply."""
+
+    def __init__(self):
+        self.tool: Optional[str] = None
+        self.spoken_field: Optional[str] = None   # Field whose text was streamed
+        self.spoken_text = ""
+        self.complete = False                     # Outer object closed
+        self._raw: List[str] = []
+        self._started = False
+        self._path: List[Optional[str]] = []      # Key each open container is the value of
+        self._containers: List[str] = []          # "{" or "[" for each open container
+        self._in_string = False
+        self._is_key = False
+        self._expect_key = False
+        self._key: Optional[str] = None           # Last key read, awaiting its value
+        self._string: List[str] = []
+        self._escape: Optional[str] = None        # Pending escape sequence after a backslash
+        self._high_surrogate: Optional[int] = None
+        self._streaming = False                   # Current string is the spoken field
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Consume the next piece of the reply.
+
+        Args:
+            chunk: Text as streamed by the LLM
+
+        Returns:
+            List of (TOOL_EVENT, name) and (TEXT_EVENT, text) events, in order
+        """
+        self._raw.append(chunk)
+        events: List[Tuple[str, Any]] = []
+        text: List[str] = []
+        for ch in chunk:
+            if self.complete:
+                break
+            if not self._started:
+                # Skip anything before the object (```json fences, stray prose)
+                if ch == "{":
+                    self._started = True
+                    self._open(ch)
+            elif self._in_string:
+                self._string_char(ch, text, events)
+            else:
+                self._structure_char(ch)
+        if text:
+            piece = "".join(text)
+            self.spoken_text += piece
+            events.append((TEXT_EVENT, piece))
+        return events
+
+    def _open(self, ch: str):
+        self._path.append(self._key)
+        self._containers.append(ch)
+        self._expect_key = ch == "{"
+        self._key = None
+
+    def _close(self):
+        self._path.pop()
+        self._containers.pop()
+        self._key = None
+        self._expect_key = False
+        if not self._containers:
+            self.complete = True
+
+    def _structure_char(self, ch: str):
+        if ch == '"':
+            self._in_string = True
+            self._is_key = self._expect_key
+            self._string = []
+            self._streaming = (
+                not self._is_key
+                and self.spoken_field is None
+                and self._key in SPOKEN_FIELDS
+                and self._containers[-1] == "{"
+                and self._path in ([None], [None, "arguments"])
+            )
+            if self._streaming:
+                self.spoken_field = self._key
+        elif ch in "{[":
+            self._open(ch)
+        elif ch in "}]":
+            self._close()
+        elif ch == ",":
+            in_object = self._containers[-1] == "{"
+            self._expect_key = in_object
+            if in_object:
+                self._key = None
+        elif ch == ":":
+            self._expect_key = False
+
+    def _string_char(self, ch: str, text: List[str], events: List[Tuple[str, Any]]):
+        if self._escape is not None:
+            self._escape += ch
+            decoded = self._decode_escape()
+            if decoded is None:
+                return
+            self._escape = None
+            self._append(decoded, text)
+        elif ch == "\\":
+            self._escape = ""
+        elif ch == '"':
+            self._in_string = False
+            self._close_string(events)
+        else:
+            self._append(ch, text)
+
+    def _decode_escape(self) -> Optional[str]:
+        escape = self._escape
+        if escape[0] != "u":
+            return _ESCAPES.get(escape, escape)
+        if len(escape) < 5:
+            return None  # \uXXXX still arriving
+        try:
+            code = int(escape[1:5], 16)
+        except ValueError:
+            return ""
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return ""
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        return chr(code)
+
+    def _append(self, decoded: str, text: List[str]):
+        self._string.append(decoded)
+        if self._streaming:
+            text.append(decoded)
+
+    def _close_string(self, events: List[Tuple[str, Any]]):
+        value = "".join(self._string)
+        if self._is_key:
+            self._key = value
+            self._expect_key = False
+            return
+        if self._key == "tool" and self._path == [None] and self.tool is None:
+            self.tool = value.strip()
+            events.append((TOOL_EVENT, self.tool))
+        self._streaming = False
+
+    def close(self) -> Dict[str, Any]:
+        """
+        End of reply: parse the whole object.
+
+        Returns:
+            dict: {"type": "tool_call", "tool", "arguments"} like
+            generate_response_with_tools (continue_conversation with the raw
+            text when the reply is not valid tool JSON)
+        """
+        raw = "".join(self._raw).strip()
+        match = re.search(r"\{.*\}", raw, re.DOTALL)
+        if match:
+            try:
+                tool_data = json.loads(match.group(0))
+                if isinstance(tool_data, dict) and "tool" in tool_data and "arguments" in tool_data:
+                    arguments = tool_data["arguments"] if isinstance(tool_data["arguments"], dict) else {}
+                    if self.spoken_field and self.spoken_field not in arguments and "response" not in arguments:
+                        # Spoken text came from the top level: keep it with the decision
+                        arguments["response"] = self.spoken_text
+                    return {"type": "tool_call", "tool": tool_data["tool"], "arguments": arguments}
+                logger.warning(f"Invalid tool JSON structure: {tool_data}")
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse streamed tool JSON: {e}")
+
+        logger.warning("No valid JSON found in streamed reply, defaulting to continue_conversation")
+        return {
+            "type": "tool_call",
+            "tool": self.tool or "continue_conversation",
+            "arguments": {
+                "strategy": "answer_questions",
+                "response": self.spoken_text or raw,
+            },
+        }
@@ -0,0 +1,228 @@
+"""
+Content-addressed cache for synthesized speech.
+
+Agents say the same short lines on thousands of calls (greetings,
+confirmations, goodbyes, end_call/callback messages). Audio is stored under a
+SHA-256 of everything that determines it (provider, voice, model, text,
+output format) in two tiers:
+
+- an in-memory LRU bounded by bytes, answering hits with no I/O, and
+- an on-disk LRU directory bounded by bytes, which survives restarts. The
+  index is per process: it is read from the directory once, then only this
+  process's writes are added and evicted against it. Workers pointed at the
+  same TTS_CACHE_DIR do not see each other's later writes and each enforce
+  the limit on their own view.
+
+Disk reads and writes run in worker threads so the event loop never waits on
+the filesystem.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "64"))
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "512"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "voice_agent_tts_cache"))
+TTS_CACHE_MAX_TEXT = int(os.getenv("TTS_CACHE_MAX_TEXT", "300"))  # Longer lines are one-off LLM answers
+
+_SUFFIX = ".audio"
+
+
+class TTSCacheService:
+    """Two-tier (memory, disk) LRU of rendered TTS audio."""
+
+    def __init__(
+        self,
+        memory_bytes: int = int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+        disk_bytes: int = int(TTS_CACHE_DISK_MB * 1024 * 1024),
+        directory: Optional[str] = TTS_CACHE_DIR,
+    ):
+        """
+        Args:
+            memory_bytes: Size limit of the in-memory tier
+            disk_bytes: Size limit of the on-disk tier (0 disables it)
+            directory: Directory for the on-disk tier (None disables it)
+        """
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes if directory else 0
+        self.directory = directory
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        # key -> size, least recently used first; loaded from disk on first use
+        self._disk: Optional["OrderedDict[str, int]"] = None
+        self._disk_size = 0
+        self._disk_lock = threading.Lock()
+        self._writes: Set[asyncio.Task] = set()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(provider: str, voice_id: Optional[str], model: Optional[str], text: str, output_format) -> str:
+        """
+        Hash everything that determines the audio.
+
+        Args:
+            provider: TTS provider
+            voice_id: Requested voice (None = provider's automatic choice)
+            model: Provider model/engine name
+            text: Text being spoken
+            output_format: AudioFormat the audio is stored in
+
+        Returns:
+            str: Hex SHA-256 cache key
+        """
+        material = json.dumps([provider, voice_id, model, text, list(output_format)], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def cacheable(text: str) -> bool:
+        return bool(text) and len(text) <= TTS_CACHE_MAX_TEXT
+
+    # ---------------- memory tier ----------------
+
+    def _memory_put(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self._stats["evictions"] += 1
+
+    # ---------------- disk tier (worker threads) ----------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def _load_disk_index(self):
+        if self._disk is not None:
+            return
+        entries = []
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(_SUFFIX) and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-len(_SUFFIX)], stat.st_size))
+        except OSError as e:
+            logger.warning(f"TTS cache: disk tier unavailable ({e})")
+            self.disk_bytes = 0
+        entries.sort()
+        self._disk = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_size = sum(size for _, _, size in entries)
+        if entries:
+            logger.info(f"💾 TTS cache: {len(entries)} clips ({self._disk_size / 1e6:.1f} MB) on disk")
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        with self._disk_lock:
+            self._load_disk_index()
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # mtime is the LRU order after a restart
+            return audio
+        except OSError:
+            with self._disk_lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_size -= size
+            return None
+
+    def _disk_put(self, key: str, audio: bytes):
+        with self._disk_lock:
+            self._load_disk_index()
+            if not self.disk_bytes or len(audio) > self.disk_bytes or key in self._disk:
+                return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)  # Readers never see a partial file
+        except OSError as e:
+            logger.warning(f"TTS cache: disk write failed ({e})")
+            return
+        with self._disk_lock:
+            self._disk[key] = len(audio)
+            self._disk_size += len(audio)
+            while self._disk_size > self.disk_bytes and self._disk:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                self._stats["evictions"] += 1
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+
+    # ---------------- public API ----------------
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Look a clip up, memory first, then disk (promoting disk hits to memory).
+
+        Returns:
+            bytes or None on a miss
+        """
+        audio = self._memory.get(key)
+        if audio is not None:
+            self._memory.move_to_end(key)
+            self._stats["memory_hits"] += 1
+            return audio
+        if self.disk_bytes:
+            audio = await asyncio.to_thread(self._disk_get, key)
+            if audio is not None:
+                self._memory_put(key, audio)
+                self._stats["disk_hits"] += 1
+                return audio
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, audio: bytes):
+        """Store a clip in memory now and on disk in the background."""
+        if not audio:
+            return
+        audio = bytes(audio)
+        self._memory_put(key, audio)
+        self._stats["stores"] += 1
+        if self.disk_bytes:
+            task = asyncio.create_task(asyncio.to_thread(self._disk_put, key, audio))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+
+    def clear_memory(self):
+        self._memory.clear()
+        self._memory_size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["memory_clips"] = len(self._memory)
+        stats["memory_mb"] = round(self._memory_size / 1e6, 2)
+        stats["disk_clips"] = len(self._disk) if self._disk is not None else None
+        stats["disk_mb"] = round(self._disk_size / 1e6, 2)
+        return stats
+
+
+# Global instance
+tts_cache = TTSCacheService()
@@ -1,14 +1,24 @@
 # app/services/tts_service.py
 """
 Text-to-Speech Service with support for multiple providers
-Returns PCM audio bytes directly
+Returns audio bytes in the format the caller asks for (16 kHz PCM by default,
+8 kHz µ-law for telephony), requesting it natively from the provider when possible
 """
+import asyncio
+import functools
+import inspect
 import os
 import logging
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import io
 
+from app.audio.transcode import (
+    AudioFormat, AudioTranscoder, MULAW, MULAW_8K, PCM_8K, PCM_16K, PCM_24K, transcode, wrap_audio,
+)
+from app.services.tts_cache import tts_cache
+
 # Load environment variables
 load_dotenv()
 
@@ -32,16 +42,70 @@ DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
 CARTESIA_API_KEY = os.getenv("CARTESIA_API_KEY")
 CARTESIA_MODEL_ID = "sonic-3"
 
+# OpenAI Configuration
+OPENAI_TTS_MODEL = "tts-1-hd"  # HD model has lower latency than standard tts-1
+
 # Cartesia Voice IDs
 CARTESIA_ENGLISH_VOICE = "6ccbfb76-1fc6-48f7-b71d-91ac6298247b"  # Tessa - Friendly Female
 CARTESIA_HINDI_VOICE = "694f9389-aac1-45b6-b726-9d9369183238"  # Aadhya - Hindi Female
 CARTESIA_HINGLISH_VOICE = "846d6cb0-2301-48b6-9683-48f5618ea2f6"  # Apoorva - Hinglish Female
 
+# Formats each provider can return natively, in order of preference
+PROVIDER_OUTPUT_FORMATS = {
+    "cartesia": (MULAW_8K, PCM_16K),
+    "gemini": (MULAW_8K, PCM_16K),       # Google Cloud TTS MULAW / LINEAR16
+    "aws_polly": (PCM_8K, PCM_16K),      # Polly PCM is 8 or 16 kHz only
+    "openai": (PCM_24K,),                # OpenAI "pcm" is fixed at 24 kHz
+}
+
+# Model/engine per provider (part of the TTS cache key)
+PROVIDER_MODELS = {
+    "cartesia": CARTESIA_MODEL_ID,
+    "openai": OPENAI_TTS_MODEL,
+    "gemini": "cloud-tts",
+    "aws_polly": "neural",
+}
+
+# Max syntheses in flight per provider (excess requests wait their turn)
+PROVIDER_CONCURRENCY = {
+    "cartesia": int(os.getenv("CARTESIA_TTS_CONCURRENCY", "16")),
+    "openai": int(os.getenv("OPENAI_TTS_CONCURRENCY", "8")),
+    "gemini": int(os.getenv("GOOGLE_TTS_CONCURRENCY", "8")),
+    "aws_polly": int(os.getenv("POLLY_TTS_CONCURRENCY", "8")),
+}
+# Threads for SDKs with no async client (Polly); never runs on the event loop
+TTS_BLOCKING_WORKERS = int(os.getenv("TTS_BLOCKING_WORKERS", "8"))
+POLLY_READ_CHUNK = 4096
+
 # Global clients (lazy initialized)
 _polly_client = None
 _google_tts_client = None
 _openai_client = None
 _cartesia_client = None
+_blocking_pool: Optional[ThreadPoolExecutor] = None
+_provider_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def _provider_slot(provider: str) -> asyncio.Semaphore:
+    slot = _provider_slots.get(provider)
+    if slot is None:
+        slot = _provider_slots[provider] = asyncio.Semaphore(PROVIDER_CONCURRENCY.get(provider, 8))
+    return slot
+
+
+async def _run_blocking(func, *args, **kwargs):
+    """Run a blocking SDK call on the bounded TTS thread pool."""
+    global _blocking_pool
+    if _blocking_pool is None:
+        _blocking_pool = ThreadPoolExecutor(max_workers=TTS_BLOCKING_WORKERS, thread_name_prefix="tts-blocking")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_pool, functools.partial(func, *args, **kwargs))
+
+
+async def _maybe_await(value):
+    # Cartesia SDK 2.x returns async generators, 4.x coroutines resolving to streams
+    return await value if inspect.isawaitable(value) else value
+
 
 def get_polly_client():
     global _polly_client
@@ -63,9 +127,8 @@ def get_google_tts_client():
     global _google_tts_client
     if _google_tts_client is None and GEMINI_API_KEY:
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=GEMINI_API_KEY)
-            _google_tts_client = genai.GenerativeModel('gemini-1.5-flash')
+            from google.cloud import texttospeech
+            _google_tts_client = texttospeech.TextToSpeechAsyncClient()
             logger.info("✅ Google TTS initialized")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Google TTS: {e}")
@@ -76,7 +139,7 @@ def get_openai_client():
     if _openai_client is None and OPENAI_API_KEY:
         try:
             import openai
-            _openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+            _openai_client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
             logger.info("✅ OpenAI TTS initialized")
         except Exception as e:
             logger.error(f"❌ Failed to initialize OpenAI TTS: {e}")
@@ -86,8 +149,8 @@ def get_cartesia_client():
     global _cartesia_client
     if _cartesia_client is None and CARTESIA_API_KEY:
         try:
-            from cartesia import Cartesia
-            _cartesia_client = Cartesia(api_key=CARTESIA_API_KEY)
+            from cartesia import AsyncCartesia
+            _cartesia_client = AsyncCartesia(api_key=CARTESIA_API_KEY)
             logger.info("✅ Cartesia TTS initialized")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Cartesia TTS: {e}")
@@ -119,17 +182,102 @@ def validate_tts_provider(provider: str) -> str:
     return "cartesia"
 
 
-async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Optional[str] = None) -> Optional[bytes]:
+def select_cartesia_voice(text: str) -> str:
+    """Pick the Cartesia voice for text when the agent has none configured."""
+    is_hindi = any('\u0900' <= ch <= '\u097F' for ch in text)
+    has_english = any(ch.isalpha() and ord(ch) < 128 for ch in text)
+    if is_hindi and has_english:
+        return CARTESIA_HINGLISH_VOICE
+    if is_hindi:
+        return CARTESIA_HINDI_VOICE
+    return CARTESIA_ENGLISH_VOICE
+
+
+def resolve_voice(provider: str, text: str, voice_id: Optional[str] = None) -> Optional[str]:
+    """
+    The voice a provider will actually speak text in.
+
+    Both synthesis paths and the TTS cache key use this, so a clip cached by
+    one path is only replayed where the other would pick the same voice.
+
+    Args:
+        provider: Validated TTS provider
+        text: Text to synthesize
+        voice_id: Requested voice (None = automatic choice)
+
+    Returns:
+        str: Voice ID (None for providers without a voice choice)
+    """
+    if voice_id:
+        return voice_id
+    if provider == "cartesia":
+        return select_cartesia_voice(text)
+    if provider == "aws_polly":
+        return "Aditi" if any('\u0900' <= ch <= '\u097F' for ch in text) else "Joanna"
+    if provider == "gemini":
+        return "en-US-Standard-C"
+    if provider == "openai":
+        return "alloy"
+    return None
+
+
+def negotiate_output_format(provider: str, wanted: AudioFormat) -> AudioFormat:
+    """
+    Pick the format to request from a provider for a wanted output format.
+
+    Args:
+        provider: Validated TTS provider
+        wanted: Format the caller needs
+
+    Returns:
+        AudioFormat: wanted itself when native, else the native format with the
+        same sample rate, else the lowest native rate at or above it
+    """
+    native = PROVIDER_OUTPUT_FORMATS.get(provider, (PCM_16K,))
+    if wanted in native:
+        return wanted
+    for fmt in native:
+        if fmt.sample_rate == wanted.sample_rate:
+            return fmt
+    higher = [fmt for fmt in native if fmt.sample_rate >= wanted.sample_rate]
+    if higher:
+        return min(higher, key=lambda fmt: fmt.sample_rate)
+    return max(native, key=lambda fmt: fmt.sample_rate)
+
+
+def _strip_wav_header(audio: bytes) -> bytes:
+    """Google returns LINEAR16/MULAW inside a WAV container; keep only the samples."""
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return audio
+    pos = 12
+    while pos + 8 <= len(audio):
+        chunk_id = audio[pos:pos + 4]
+        size = int.from_bytes(audio[pos + 4:pos + 8], "little")
+        if chunk_id == b"data":
+            return audio[pos + 8:pos + 8 + size]
+        pos += 8 + size + (size & 1)
+    return audio
+
+
+async def synthesize_speech_with_provider(
+    provider: str,
+    text: str,
+    voice_id: Optional[str] = None,
+    output_format: AudioFormat = PCM_16K,
+    tts_session=None,
+) -> Optional[bytes]:
     """
     Synthesize speech using the specified provider
 
     Args:
-        provider: TTS provider to use (aws_polly, gemini, openai)
+        provider: TTS provider to use (aws_polly, gemini, openai, cartesia)
         text: Text to convert to speech
         voice_id: Voice to use (provider-specific)
+        output_format: Format to return; MULAW_8K gives wire-ready Twilio audio
+        tts_session: The call's CartesiaTTSSession, used instead of a new HTTP request
 
     Returns:
-        PCM audio bytes @ 16kHz or None if failed
+        Audio bytes in output_format (MulawAudio for MULAW_8K) or None if failed
     """
     # Validate and normalize provider
     provider = validate_tts_provider(provider)
@@ -139,7 +287,52 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
         return None
 
     text = text.strip()
-    logger.info(f"Synthesizing speech with {provider}: {text[:50]}...")
+    voice_id = resolve_voice(provider, text, voice_id)
+    cache_key = _cache_key(provider, voice_id, text, output_format)
+    if cache_key:
+        cached = await tts_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ TTS cache hit ({len(cached)} bytes): {text[:50]}")
+            return wrap_audio(cached, output_format)
+
+    native = negotiate_output_format(provider, output_format)
+    async with _provider_slot(provider):
+        result = await _synthesize_native(provider, text, voice_id, native, tts_session)
+    if not result:
+        return None
+    audio, fmt = result
+    if fmt != output_format:
+        logger.debug(f"Transcoding TTS audio {fmt} -> {output_format}")
+    audio = transcode(audio, fmt, output_format)
+    # A different format means another provider answered (fallback): not cached
+    if cache_key and fmt == native:
+        tts_cache.put(cache_key, audio)
+    return audio
+
+
+def _cache_key(provider: str, voice_id: Optional[str], text: str, output_format: AudioFormat) -> Optional[str]:
+    if not tts_cache.cacheable(text):
+        return None
+    return tts_cache.make_key(provider, voice_id, PROVIDER_MODELS.get(provider), text, output_format)
+
+
+class _StreamStatus:
+    """Set by _stream_native when a stream ended early because of an error."""
+
+    def __init__(self):
+        self.failed = False
+
+
+async def _synthesize_native(
+    provider: str, text: str, voice_id: Optional[str], native: AudioFormat, tts_session=None
+) -> Optional[Tuple[bytes, AudioFormat]]:
+    """
+    Synthesize with one provider in one of its native formats.
+
+    Returns:
+        (audio bytes, format they are in) or None if failed
+    """
+    logger.info(f"Synthesizing speech with {provider} ({native.encoding} @ {native.sample_rate} Hz): {text[:50]}...")
 
     try:
         if provider == "aws_polly":
@@ -148,28 +341,26 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
                 logger.error("Polly client not initialized")
                 return None
 
-            # Auto-detect language
-            if not voice_id:
-                is_hindi = any('\u0900' <= ch <= '\u097F' for ch in text)
-                voice_id = "Aditi" if is_hindi else "Joanna"
+            voice_id = resolve_voice(provider, text, voice_id)
 
-            # Synthesize speech
+            # Synthesize speech (boto3 is blocking: run it on the TTS thread pool)
             try:
-                response = client.synthesize_speech(
+                response = await _run_blocking(
+                    client.synthesize_speech,
                     Text=text,
                     OutputFormat='pcm',
                     VoiceId=voice_id,
                     Engine='neural',  # Use neural for better quality
-                    SampleRate='16000',
+                    SampleRate=str(native.sample_rate),
                     TextType='text'
                 )
 
                 # Read audio stream
                 if 'AudioStream' in response:
-                    audio_bytes = response['AudioStream'].read()
+                    audio_bytes = await _run_blocking(response['AudioStream'].read)
                     if audio_bytes and len(audio_bytes) > 0:
                         logger.info(f"AWS Polly generated {len(audio_bytes)} bytes of audio")
-                        return audio_bytes
+                        return audio_bytes, native
                     else:
                         logger.warning("AWS Polly returned empty audio stream")
                         return None
@@ -187,11 +378,13 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
 
             try:
                 # Use Google's TTS API directly since Gemini doesn't have a dedicated TTS model
-                # We'll use the Google Cloud Text-to-Speech API
+                # We'll use the Google Cloud Text-to-Speech API (async gRPC client)
                 from google.cloud import texttospeech
                 
-                # Initialize the client
-                client = texttospeech.TextToSpeechClient()
+                client = get_google_tts_client()
+                if not client:
+                    logger.error("Google TTS client not initialized")
+                    return None
                 
                 # Set the text input to be synthesized
                 synthesis_input = texttospeech.SynthesisInput(text=text)
@@ -204,20 +397,23 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
                 
                 # Select the type of audio file you want returned
                 audio_config = texttospeech.AudioConfig(
-                    audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-                    sample_rate_hertz=16000
+                    audio_encoding=(
+                        texttospeech.AudioEncoding.MULAW if native.encoding == MULAW
+                        else texttospeech.AudioEncoding.LINEAR16
+                    ),
+                    sample_rate_hertz=native.sample_rate
                 )
                 
                 # Perform the text-to-speech request
-                response = client.synthesize_speech(
+                response = await client.synthesize_speech(
                     input=synthesis_input, voice=voice, audio_config=audio_config
                 )
                 
                 # Return the audio content
                 if response.audio_content:
-                    audio_bytes = response.audio_content
+                    audio_bytes = _strip_wav_header(response.audio_content)
                     logger.info(f"Google TTS generated {len(audio_bytes)} bytes of audio")
-                    return audio_bytes
+                    return audio_bytes, native
                 else:
                     logger.error("Gemini TTS returned empty audio content")
                     return None
@@ -237,8 +433,8 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
 
             # Synthesize speech with OpenAI (using tts-1-hd for lower latency)
             try:
-                response = client.audio.speech.create(
-                    model="tts-1-hd",  # HD model has lower latency than standard tts-1
+                response = await client.audio.speech.create(
+                    model=OPENAI_TTS_MODEL,
                     voice=voice_id or "alloy",
                     input=text,
                     response_format="pcm"  # Request PCM directly for faster processing
@@ -248,7 +444,7 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
                 audio_bytes = response.content
                 if audio_bytes and len(audio_bytes) > 0:
                     logger.info(f"OpenAI TTS generated {len(audio_bytes)} bytes of audio")
-                    return audio_bytes
+                    return audio_bytes, PCM_24K
                 else:
                     logger.warning("OpenAI TTS returned empty audio content")
                     return None
@@ -268,25 +464,24 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
                 return None
 
             try:
-                # Auto-detect language if voice not specified
-                # Default to Apoorva (Hinglish) for best bilingual support
-                if not voice_id:
-                    is_hindi = any('\u0900' <= ch <= '\u097F' for ch in text)
-                    has_english = any(ch.isalpha() and ord(ch) < 128 for ch in text)
-                    
-                    if is_hindi and not has_english:
-                        voice_id = CARTESIA_HINDI_VOICE  # Pure Hindi → Aadhya
-                        lang = "Hindi"
-                    else:
-                        voice_id = CARTESIA_HINGLISH_VOICE  # Default: Apoorva (Hinglish)
-                        lang = "Hinglish/English"
-                    
-                    logger.info(f"Auto-selected voice: {lang}")
+                # Same voice as the streaming path (and the cache key)
+                voice_id = resolve_voice(provider, text, voice_id)
+
+                # Reuse the call's open WebSocket when there is one
+                if tts_session is not None and tts_session.output_format == native:
+                    from app.services.cartesia_tts_session import CartesiaSessionError
+                    try:
+                        audio_bytes = b"".join([chunk async for chunk in tts_session.stream(text, voice_id)])
+                        if audio_bytes:
+                            logger.info(f"Cartesia session generated {len(audio_bytes)} bytes of audio")
+                            return audio_bytes, native
+                    except CartesiaSessionError as e:
+                        logger.warning(f"Cartesia session unavailable ({e}), using HTTP")
 
                 # Generate audio using Cartesia bytes API (for non-streaming)
                 # Note: True streaming happens in synthesize_speech_stream()
-                # OPTIMIZATION: Use raw PCM to avoid WAV container overhead
-                output = client.tts.bytes(
+                # OPTIMIZATION: Raw samples (no WAV container) in the negotiated format
+                output = await _maybe_await(client.tts.bytes(
                     model_id=CARTESIA_MODEL_ID,
                     transcript=text,
                     voice={
@@ -294,21 +489,19 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
                         "id": voice_id
                     },
                     output_format={
-                        "container": "raw",  # Raw PCM for faster processing
-                        "encoding": "pcm_s16le",
-                        "sample_rate": 16000
+                        "container": "raw",
+                        "encoding": native.encoding,
+                        "sample_rate": native.sample_rate
                     },
                     language="en"  # Hint for faster processing
-                )
+                ))
                 
                 # Collect audio data
-                audio_bytes = b""
-                for chunk in output:
-                    audio_bytes += chunk
+                audio_bytes = b"".join([chunk async for chunk in output])
                 
                 if audio_bytes and len(audio_bytes) > 0:
                     logger.info(f"Cartesia TTS generated {len(audio_bytes)} bytes of audio")
-                    return audio_bytes
+                    return audio_bytes, native
                 else:
                     logger.error("Cartesia TTS returned empty audio")
                     return None
@@ -322,7 +515,7 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
                     logger.warning("⚠️ Cartesia credits exhausted, falling back to OpenAI TTS")
                     # Fallback to OpenAI
                     try:
-                        return await synthesize_speech_with_provider("openai", text, voice_id)
+                        return await _synthesize_native("openai", text, None, PCM_24K)
                     except Exception as fallback_error:
                         logger.error(f"OpenAI fallback also failed: {fallback_error}")
                         return None
@@ -349,24 +542,34 @@ async def synthesize_speech_with_provider(provider: str, text: str, voice_id: Op
         return None
 
 # Keep the original function for backward compatibility
-async def synthesize_speech(text: str, voice_id: Optional[str] = None) -> Optional[bytes]:
+async def synthesize_speech(
+    text: str, voice_id: Optional[str] = None, output_format: AudioFormat = PCM_16K
+) -> Optional[bytes]:
     """
     Synthesize speech using AWS Polly (backward compatibility)
     """
-    return await synthesize_speech_with_provider("aws_polly", text, voice_id)
+    return await synthesize_speech_with_provider("aws_polly", text, voice_id, output_format)
 
 
-async def synthesize_speech_stream(provider: str, text: str, voice_id: Optional[str] = None):
+async def synthesize_speech_stream(
+    provider: str,
+    text: str,
+    voice_id: Optional[str] = None,
+    output_format: AudioFormat = PCM_16K,
+    tts_session=None,
+):
     """
     Stream speech synthesis audio chunks.
     
     Args:
-        provider: TTS provider (aws_polly, gemini, openai)
+        provider: TTS provider (aws_polly, gemini, openai, cartesia)
         text: Text to synthesize
         voice_id: Optional voice ID
+        output_format: Format to yield; MULAW_8K gives wire-ready Twilio audio
+        tts_session: The call's CartesiaTTSSession, used instead of a new SSE request
         
     Yields:
-        bytes: Audio chunks (PCM 16k)
+        bytes: Audio chunks in output_format (MulawAudio for MULAW_8K)
     """
     # Validate and normalize provider
     provider = validate_tts_provider(provider)
@@ -375,7 +578,48 @@ async def synthesize_speech_stream(provider: str, text: str, voice_id: Optional[
         return
 
     text = text.strip()
-    
+    voice_id = resolve_voice(provider, text, voice_id)
+    cache_key = _cache_key(provider, voice_id, text, output_format)
+    if cache_key:
+        cached = await tts_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ TTS cache hit ({len(cached)} bytes): {text[:50]}")
+            yield wrap_audio(cached, output_format)
+            return
+
+    native = negotiate_output_format(provider, output_format)
+    transcoder: Optional[AudioTranscoder] = None
+    status = _StreamStatus()
+    rendered = []  # Kept for the cache; only stored if the stream finishes cleanly
+    async with _provider_slot(provider):
+        async for chunk, fmt in _stream_native(provider, text, voice_id, native, status, tts_session):
+            if transcoder is None or transcoder.source != fmt:
+                transcoder = AudioTranscoder(fmt, output_format)
+            if fmt != native:
+                status.failed = True  # Fallback provider: do not cache under this key
+            converted = transcoder.process(chunk)
+            if converted:
+                rendered.append(converted)
+                yield converted
+    if transcoder is not None and not transcoder.passthrough:
+        tail = transcoder.process(b"", flush=True)
+        if tail:
+            rendered.append(tail)
+            yield tail
+    if cache_key and rendered and not status.failed:
+        tts_cache.put(cache_key, b"".join(rendered))
+
+
+async def _stream_native(
+    provider: str,
+    text: str,
+    voice_id: Optional[str],
+    native: AudioFormat,
+    status: Optional[_StreamStatus] = None,
+    tts_session=None,
+) -> AsyncIterator[Tuple[bytes, AudioFormat]]:
+    """Stream (chunk, format) pairs from one provider in one of its native formats."""
+    status = status or _StreamStatus()
     try:
         if provider == "aws_polly":
             client = get_polly_client()
@@ -383,60 +627,63 @@ async def synthesize_speech_stream(provider: str, text: str, voice_id: Optional[
                 logger.error("Polly client not initialized")
                 return
 
-            # Auto-detect language if voice not specified
-            if not voice_id:
-                is_hindi = any('\u0900' <= ch <= '\u097F' for ch in text)
-                voice_id = "Aditi" if is_hindi else "Joanna"
+            voice_id = resolve_voice(provider, text, voice_id)
 
-            response = client.synthesize_speech(
+            response = await _run_blocking(
+                client.synthesize_speech,
                 Text=text,
                 OutputFormat='pcm',
                 VoiceId=voice_id,
                 Engine='neural',
-                SampleRate='16000',
+                SampleRate=str(native.sample_rate),
                 TextType='text'
             )
             
             if 'AudioStream' in response:
-                # AWS Polly AudioStream is a botocore.response.StreamingBody
-                # Read in chunks
+                # AWS Polly AudioStream is a blocking botocore StreamingBody:
+                # each read runs on the TTS thread pool
                 stream = response['AudioStream']
-                chunk_size = 1024 # 1KB chunks
-                
-                # If the stream supports iteration (it should):
-                for chunk in stream.iter_chunks(chunk_size=chunk_size):
-                    if chunk:
-                        yield chunk
+                try:
+                    while True:
+                        chunk = await _run_blocking(stream.read, POLLY_READ_CHUNK)
+                        if not chunk:
+                            break
+                        yield chunk, native
+                finally:
+                    stream.close()
             else:
                  logger.error("AWS Polly response missing AudioStream")
+                 status.failed = True
 
         elif provider == "gemini":
             # Google TTS doesn't support true streaming via their standard client easily for this setup
             # So we fallback to synthesizing full audio and yielding it as one big chunk
-            full_audio = await synthesize_speech_with_provider("gemini", text, voice_id)
+            full_audio = await _synthesize_native("gemini", text, voice_id, native)
             if full_audio:
                 yield full_audio
+            else:
+                status.failed = True
 
         elif provider == "openai":
-            # OpenAI TTS API also returns a full response usually, unless using 'stream' param
+            # Streaming response: chunks are yielded as the body arrives
             client = get_openai_client()
             if not client:
                  return
                  
             try:
-                response = client.audio.speech.create(
-                    model="tts-1-hd",  # HD model for lower latency
+                async with client.audio.speech.with_streaming_response.create(
+                    model=OPENAI_TTS_MODEL,
                     voice=voice_id or "alloy",
                     input=text,
                     response_format="pcm"  # PCM for faster processing
-                )
-                
-                audio_bytes = response.content
-                if audio_bytes:
-                    yield audio_bytes
+                ) as response:
+                    async for chunk in response.iter_bytes(4096):
+                        if chunk:
+                            yield chunk, PCM_24K
 
             except Exception as e:
                 logger.error(f"OpenAI TTS Stream Error: {e}")
+                status.failed = True
 
         elif provider == "cartesia":
             # Cartesia TTS - Using SSE for REAL streaming (not blocking)
@@ -445,23 +692,31 @@ async def synthesize_speech_stream(provider: str, text: str, voice_id: Optional[
                 return
                 
             try:
-                # Auto-detect language if voice not specified
-                if not voice_id:
-                    is_hindi = any('\u0900' <= ch <= '\u097F' for ch in text)
-                    has_english = any(ch.isalpha() and ord(ch) < 128 for ch in text)
-                    
-                    if is_hindi and has_english:
-                        voice_id = CARTESIA_HINGLISH_VOICE
-                    elif is_hindi:
-                        voice_id = CARTESIA_HINDI_VOICE
-                    else:
-                        voice_id = CARTESIA_ENGLISH_VOICE
+                voice_id = resolve_voice(provider, text, voice_id)
+
+                # Reuse the call's open WebSocket when there is one (no connection
+                # setup, chunks arrive as generated)
+                if tts_session is not None and tts_session.output_format == native:
+                    from app.services.cartesia_tts_session import CartesiaSessionError
+                    chunk_count = 0
+                    try:
+                        async for audio_bytes in tts_session.stream(text, voice_id):
+                            chunk_count += 1
+                            yield audio_bytes, native
+                        logger.info(f"✅ Cartesia streamed {chunk_count} audio chunks via session WebSocket")
+                        return
+                    except CartesiaSessionError as e:
+                        if chunk_count:
+                            logger.error(f"Cartesia session failed mid-utterance: {e}")
+                            status.failed = True
+                            return
+                        logger.warning(f"Cartesia session unavailable ({e}), using SSE")
 
                 # Use SSE for TRUE streaming - chunks arrive in real-time!
                 logger.info(f"Starting Cartesia SSE streaming for text: {text[:50]}...")
                 
                 # SSE method REQUIRES model_id and streams chunks as they're generated
-                output = client.tts.sse(
+                output = await _maybe_await(client.tts.sse(
                     model_id=CARTESIA_MODEL_ID,
                     transcript=text,
                     voice={
@@ -469,40 +724,41 @@ async def synthesize_speech_stream(provider: str, text: str, voice_id: Optional[
                         "id": voice_id
                     },
                     output_format={
-                        "container": "raw",  # Raw PCM for streaming
-                        "encoding": "pcm_s16le",
-                        "sample_rate": 16000
+                        "container": "raw",  # Raw samples for streaming
+                        "encoding": native.encoding,
+                        "sample_rate": native.sample_rate
                     },
                     language="en"  # Language hint for faster processing
-                )
+                ))
                 
                 # Stream chunks as they arrive in REAL-TIME
                 import base64
                 chunk_count = 0
-                for event in output:
+                async for event in output:
                     # SSE events have 'data' attribute with base64 audio
                     if hasattr(event, 'data') and event.data:
                         try:
                             audio_bytes = base64.b64decode(event.data)
                             if audio_bytes:
                                 chunk_count += 1
-                                yield audio_bytes  # Yield immediately as chunks arrive!
+                                yield audio_bytes, native  # Yield immediately as chunks arrive!
                         except Exception as decode_error:
                             logger.error(f"Failed to decode chunk: {decode_error}")
+                            status.failed = True
                 
                 logger.info(f"✅ Cartesia streamed {chunk_count} audio chunks via SSE")
 
             except Exception as e:
                 error_msg = str(e)
                 logger.error(f"Cartesia TTS Stream Error: {e}")
+                status.failed = True
                 
                 # Check if it's a credit/quota error and fallback to OpenAI
                 if "402" in error_msg or "credit" in error_msg.lower() or "quota" in error_msg.lower():
                     logger.warning("⚠️ Cartesia credits exhausted in streaming, falling back to OpenAI TTS")
                     # Fallback to OpenAI streaming
-                    async for chunk in synthesize_speech_stream("openai", text, voice_id):
-                        if chunk:
-                            yield chunk
+                    async for chunk in _stream_native("openai", text, None, PCM_24K):
+                        yield chunk
                     return
 
 
@@ -512,12 +768,15 @@ async def synthesize_speech_stream(provider: str, text: str, voice_id: Optional[
 
         else:
             # Fallback for others
-            full_audio = await synthesize_speech_with_provider(provider, text, voice_id)
+            full_audio = await _synthesize_native(provider, text, voice_id, native)
             if full_audio:
                 yield full_audio
+            else:
+                status.failed = True
 
     except Exception as e:
         logger.error(f"Streaming TTS error with {provider}: {e}")
+        status.failed = True
 
         
 
@@ -1,126 +1,212 @@
 import asyncio
-import json
-import base64
-import audioop
 import logging
 import time
+from typing import Set
 from fastapi import WebSocket
 from app.agent.orchestrator import process_audio_chunk, cleanup_conversation
 from app.middleware.usage_tracker import check_voice_minutes_before_call, track_voice_minutes
+from app.services.media_playout import MediaPlayout
+from app.services.media_frame_encoder import MediaFrameEncoder, SILENCE_MULAW_20MS
+from app.services.media_event_parser import parse_twilio_message
+from app.services.prompt_audio_bank import prompt_audio_bank
+from app.audio.codec import MulawAudio
+from app.services.cartesia_tts_session import cartesia_sessions
+from app.services.deepgram_websocket import deepgram_ws_service
+from app.services.playback_tracker import SpeechSegment
+from app.audio.transcode import AudioTranscoder, MULAW_8K, PCM_16K
 
 # --------------------------------------------------------------------------- #
 logger = logging.getLogger(__name__)
 # --------------------------------------------------------------------------- #
 
 # 20 ms of µ-law silence (all 0xFF = silence in µ-law)
-_SILENCE_MULAW_20MS = b"\xff" * 160   # 8 kHz * 0.02 s = 160 samples
+_SILENCE_MULAW_20MS = SILENCE_MULAW_20MS   # 8 kHz * 0.02 s = 160 samples
 
+# Reader -> playout hand-off. Each item is one segment of TTS audio. When the
+# queue is full the reader stops pulling from the conversation's outbound
+# queue (backpressure at the source), so nothing here is ever dropped.
+PLAYOUT_QUEUE_MAXSIZE = 16
+KEEPALIVE_INTERVAL = 5.0       # Send silence if nothing was played for this long
+PLAYOUT_DRAIN_TIMEOUT = 10.0   # Max wait for queued audio when closing on error
 
-async def _send_keepalive(ws: WebSocket, stream_sid: str):
-    """Send a tiny silence packet every 5s to keep Twilio alive and prevent timeouts."""
-    while True:
-        await asyncio.sleep(5)  # Reduced to 5 seconds for better reliability
+# Playout control sentinels
+_CLEAR = object()   # Flush Twilio's buffer (barge-in)
+_STOP = object()    # Finish queued audio, then exit
+
+
+def _enqueue_playout(playout_queue: asyncio.Queue, item, pending: Set[asyncio.Task]):
+    """
+    Put an item on the playout queue without blocking and without dropping it.
+
+    If the queue is full the put is awaited in a background task kept in
+    pending, so speech and control sentinels always reach the playout task.
+    """
+    try:
+        playout_queue.put_nowait(item)
+    except asyncio.QueueFull:
+        logger.debug("Playout queue full - waiting for room")
+        task = asyncio.create_task(playout_queue.put(item))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+
+def _interrupt_playout(playout_queue: asyncio.Queue, pending: Set[asyncio.Task], interrupt_event: asyncio.Event):
+    """
+    Barge-in: abort current playback, drop pending audio and queue a clear.
+
+    Puts still waiting for room are cancelled first; otherwise they would
+    land behind _CLEAR and play the interrupted reply after Twilio's buffer
+    was flushed.
+    """
+    for task in list(pending):
+        task.cancel()
+    pending.clear()
+    while not playout_queue.empty():
         try:
-            # Check if WebSocket is still connected
-            if not hasattr(ws, 'client_state') or ws.client_state.name != "CONNECTED":
-                logger.warning("WebSocket not connected, stopping keepalive")
-                break
-                
-            payload = base64.b64encode(_SILENCE_MULAW_20MS).decode()
-            message = {
-                "event": "media",
-                "streamSid": stream_sid,
-                "media": {
-                    "payload": payload
-                }
-            }
-            message_str = json.dumps(message)
-            logger.debug(f"Sending keepalive message: {message_str}")
-            await ws.send_text(message_str)
-            logger.debug("Keep-alive silence sent")
-        except asyncio.CancelledError:
-            # Task was cancelled, exit gracefully
-            logger.debug("Keep-alive task cancelled")
-            break
-        except Exception as e:
-            logger.warning(f"Keep-alive failed: {e}")
-            # If we fail to send, it likely means connection is dead. 
-            # We break to stop the loop, the main loop will catch the disconnect.
+            playout_queue.get_nowait()
+        except asyncio.QueueEmpty:
             break
+    interrupt_event.set()
+    _enqueue_playout(playout_queue, _CLEAR, pending)
+
+
+def _ws_connected(ws: WebSocket) -> bool:
+    return hasattr(ws, 'client_state') and ws.client_state.name == "CONNECTED"
 
 
-async def _send_tts_chunked(ws: WebSocket, stream_sid: str, tts_pcm16: bytes):
+async def _send_clear(ws: WebSocket, encoder: MediaFrameEncoder):
+    """Tell Twilio to drop any audio it has buffered but not yet played."""
+    try:
+        await ws.send_text(encoder.clear)
+        logger.info("Sent 'clear' signal for barge-in")
+    except Exception as e:
+        logger.error(f"Error sending clear signal: {e}")
+
+
+async def _playout_loop(
+    ws: WebSocket,
+    encoder: MediaFrameEncoder,
+    playout_queue: asyncio.Queue,
+    interrupt_event: asyncio.Event,
+):
     """
-    Convert 16 kHz PCM to 8 kHz µ-law and stream in proper chunks for Twilio.
+    Dedicated outbound task for one call.
+
+    Streams queued TTS audio to Twilio as clock-paced 20 ms frames so the
+    reader loop never waits on playback, and sends keep-alive silence while
+    nothing is being played.
     """
-    try:
-        logger.info(f"Sending TTS audio: {len(tts_pcm16)} bytes")
-        
-        # 16 kHz to 8 kHz PCM
-        pcm8k, _ = audioop.ratecv(tts_pcm16, 2, 1, 16000, 8000, None)
-        # PCM to µ-law
-        mulaw8k = audioop.lin2ulaw(pcm8k, 2)
-
-        # Use safe chunk size for Twilio (3200 bytes as suggested)
-        chunk_size = 3200
-        chunks_sent = 0
-        
-        for i in range(0, len(mulaw8k), chunk_size):
-            # Check if WebSocket is still open
-            if not hasattr(ws, 'client_state') or ws.client_state.name != "CONNECTED":
-                logger.warning("WebSocket is not connected, stopping audio stream")
+    async def send_frame(frame) -> None:
+        if frame == _SILENCE_MULAW_20MS:
+            await ws.send_text(encoder.silence)
+        else:
+            await ws.send_text(encoder.media(frame))
+
+    playout = MediaPlayout(send_frame)
+    # 16 kHz PCM TTS -> 8 kHz µ-law; filter state and a split sample carry across consecutive chunks
+    transcoder = AudioTranscoder(PCM_16K, MULAW_8K)
+
+    while True:
+        try:
+            item = await asyncio.wait_for(playout_queue.get(), timeout=KEEPALIVE_INTERVAL)
+        except asyncio.TimeoutError:
+            if not _ws_connected(ws):
+                logger.warning("WebSocket not connected, stopping playout")
                 break
-                
-            chunk = mulaw8k[i:i + chunk_size]
-            payload_b64 = base64.b64encode(chunk).decode("utf-8")
-            
-            message = {
-                "event": "media",
-                "streamSid": stream_sid,
-                "media": {
-                    "payload": payload_b64
-                }
-            }
-            
             try:
-                # Ensure we're sending a string, not bytes
-                message_str = json.dumps(message)
-                logger.debug(f"Sending media message: {message_str}")
-                await ws.send_text(message_str)
-                chunks_sent += 1
-                logger.debug(f"Sent media chunk {chunks_sent} with {len(chunk)} bytes")
-                await asyncio.sleep(0.010)  # 10 ms delay to match real-time
+                await playout.play(_SILENCE_MULAW_20MS)
+                logger.debug("Keep-alive silence sent")
             except Exception as e:
-                logger.error(f"Error sending media chunk {chunks_sent}: {e}")
-                # Break on send errors to prevent infinite retries
+                # Connection is likely dead; the reader will notice the disconnect
+                logger.warning(f"Keep-alive failed: {e}")
                 break
-                
-        logger.info(f"Sent {chunks_sent} audio chunks")
+            continue
+
+        if item is _STOP:
+            break
+
+        if item is _CLEAR:
+            interrupt_event.clear()
+            await _send_clear(ws, encoder)
+            playout.clear()
+            transcoder.reset()
+            continue
+
+        if not _ws_connected(ws):
+            logger.warning("WebSocket not connected, skipping audio send")
+            continue
+
+        segment = item if isinstance(item, SpeechSegment) else None
+        # Nothing queued behind this chunk: the speech ends here, so push the
+        # filter tail out now instead of prepending it to the next reply
+        await _send_tts_chunked(
+            playout, transcoder, segment.audio if segment else item, interrupt_event, segment,
+            flush=playout_queue.empty(),
+        )
+
+        # Twilio echoes the mark once everything before it has been played
+        if segment and not interrupt_event.is_set():
+            try:
+                await ws.send_text(encoder.mark(segment.mark_name))
+            except Exception as e:
+                logger.error(f"Error sending mark: {e}")
+
+
+async def _send_tts_chunked(
+    playout: MediaPlayout,
+    transcoder: AudioTranscoder,
+    tts_pcm16: bytes,
+    interrupt_event: asyncio.Event | None = None,
+    segment: SpeechSegment | None = None,
+    flush: bool = False,
+):
+    """
+    Convert 16 kHz PCM to 8 kHz µ-law and stream it to Twilio in real-time
+    paced 20 ms frames. Stops within a frame if interrupt_event is set (barge-in).
+    MulawAudio (native µ-law TTS, pre-rendered prompts) is sent without conversion.
+    flush marks the last chunk of the speech (the transcoder's tail is sent too).
+    """
+    try:
+        logger.info(f"Sending TTS audio: {len(tts_pcm16)} bytes")
         
+        if isinstance(tts_pcm16, MulawAudio):
+            mulaw8k = tts_pcm16
+        else:
+            # An odd trailing byte is kept for the next chunk
+            mulaw8k = transcoder.process(tts_pcm16, flush=flush)
+
+        if segment is not None:
+            # Lets the playback tracker estimate the position inside this segment
+            segment.duration = len(mulaw8k) / 8000
+            segment.started_at = time.monotonic()
+
+        try:
+            frames_sent = await playout.play(mulaw8k, interrupt_event)
+        except Exception as e:
+            logger.error(f"Error sending media frame: {e}")
+            return
+        logger.info(f"Sent {frames_sent} audio frames")
+
+        if interrupt_event is not None and interrupt_event.is_set():
+            return
+
         # Send a small silence packet at the end to ensure clean ending
         try:
-            silence_payload = base64.b64encode(_SILENCE_MULAW_20MS).decode()
-            message = {
-                "event": "media",
-                "streamSid": stream_sid,
-                "media": {
-                    "payload": silence_payload
-                }
-            }
-            message_str = json.dumps(message)
-            logger.debug(f"Sending ending silence message: {message_str}")
-            await ws.send_text(message_str)
-            logger.info("Sent ending silence packet")
+            await playout.play(_SILENCE_MULAW_20MS)
         except Exception as e:
             logger.error(f"Error sending ending silence: {e}")
     except Exception as e:
         logger.error(f"Error in _send_tts_chunked: {e}")
-        logger.error(f"Error in _send_tts_chunked: {e}")
 
 
 async def handle_twilio_ws(ws: WebSocket):
     """
     Clean, reliable WebSocket handler.
+
+    This coroutine is the per-call reader: it receives Twilio frames and
+    forwards inbound audio to the orchestrator. Outbound audio is handed to a
+    dedicated playout task through a bounded queue, so inbound frames keep
+    flowing to STT while a long response is being played.
     """
     stream_sid = None
     call_sid = None
@@ -139,8 +225,72 @@ async def handle_twilio_ws(ws: WebSocket):
         return
     # ------------------------------------------------------------------- #
 
-    # Keep-alive task (starts after we know stream_sid)
-    keepalive_task: asyncio.Task | None = None
+    # Playout task (starts after we know stream_sid); also sends keep-alives
+    playout_task: asyncio.Task | None = None
+    playout_queue: asyncio.Queue = asyncio.Queue(maxsize=PLAYOUT_QUEUE_MAXSIZE)
+    interrupt_event = asyncio.Event()
+    background_tasks: set[asyncio.Task] = set()
+    pending_puts: set[asyncio.Task] = set()  # Playout puts waiting for room
+
+    def enqueue_playout(item):
+        """Hand audio to the playout task without blocking the reader or dropping anything."""
+        _enqueue_playout(playout_queue, item, pending_puts)
+
+    def interrupt_playback():
+        """Barge-in: abort current playback, drop pending audio and clear Twilio's buffer."""
+        _interrupt_playout(playout_queue, pending_puts, interrupt_event)
+
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        return task
+
+    def attach_state(sid: str):
+        """Let the orchestrator flush our playout when it detects barge-in."""
+        from app.agent.orchestrator import active_conversations
+        state = active_conversations.get(sid)
+        if state is not None:
+            state.interrupt_playback = interrupt_playback
+        # Open the call's TTS WebSocket now so the first reply skips connection setup
+        cartesia_sessions.open(sid)
+        # Same for STT: no-op if the webhook or lead caller already pre-warmed it
+        deepgram_ws_service.prewarm(sid)
+
+    async def play_outbound_greeting(sid: str):
+        from app.agent.orchestrator import trigger_outbound_greeting
+        try:
+            # The greeting is queued on the conversation state and picked up
+            # by the reader on the next media frame. trigger_outbound_greeting
+            # bounds its own waits: cancelling it here after it claimed the
+            # greeting would leave the caller with none at all.
+            greeting_audio = await trigger_outbound_greeting(sid)
+            if greeting_audio:
+                logger.info(f"✅ Greeting ready: {len(greeting_audio)} bytes")
+            else:
+                logger.warning("⚠️ No greeting audio generated")
+        except Exception as e:
+            logger.error(f"❌ Error generating greeting: {e}")
+
+    def play_error_prompt(key: str):
+        # Pre-rendered clip: no TTS round trip while the system is degraded
+        error_audio = prompt_audio_bank.get(key)
+        if error_audio:
+            logger.info(f"Queueing error audio: {len(error_audio)} bytes")
+            enqueue_playout(error_audio)
+
+    async def log_agent_details(agent_id: str):
+        from app.services.routing_table import routing_table
+        try:
+            name = await routing_table.get_agent_name(agent_id)
+            if name is not None:
+                logger.info(f"Custom agent details - Name: {name}, ID: {agent_id}")
+            else:
+                logger.warning(f"No custom agent found with ID: {agent_id}")
+        except Exception as e:
+            logger.error(f"Error fetching custom agent details: {e}")
+
+    stopped_cleanly = False
 
     try:
         while True:
@@ -152,10 +302,9 @@ async def handle_twilio_ws(ws: WebSocket):
             # ------------------- RECEIVE ------------------- #
             try:
                 raw = await asyncio.wait_for(ws.receive_text(), timeout=30.0)
-                msg = json.loads(raw)
-                event = msg.get("event")
+                # Media frames skip the full JSON parse; msg is only built for control events
+                event, raw_mulaw_bytes, msg = parse_twilio_message(raw)
                 last_activity = time.time()  # Update last activity
-                logger.debug(f"Received WebSocket message: {event}")
             except asyncio.TimeoutError:
                 logger.warning("WebSocket timeout – closing")
                 break
@@ -196,84 +345,26 @@ async def handle_twilio_ws(ws: WebSocket):
                     # SKIP IF OUTBOUND - Trust the params passed from outbound service
                     if not is_outbound_flag:
                         try:
-                            from app.database.firestore import db
-                            from app.models.campaign import CallSession
-                            from app.models.phone_number import VirtualPhoneNumber
-                            from google.cloud.firestore_v1.base_query import FieldFilter
-
-                            resolved = {
-                                "campaign_id": None,
-                                "custom_agent_id": None,
-                                "goal": None,
-                                "phone_number": phone_number,
-                            }
+                            from app.services.routing_table import routing_table
 
                             logger.info(f"WS: Attempting to resolve mapping using phone_number: {phone_number}")
+                            route = await routing_table.resolve(phone_number)
 
-                            if phone_number:
-                                phone_ref = db.collection('virtual_phone_numbers')  # CRITICAL FIX: was 'phone_numbers'
-                                # Try exact match
-                                phone_docs = list(phone_ref.where(filter=FieldFilter('phone_number', '==', phone_number)).stream())
-                                
-                                if not phone_docs:
-                                    logger.info(f"WS: No exact phone match for '{phone_number}'; listing all phone numbers for debugging")
-                                    all_phones = list(phone_ref.limit(10).stream())
-                                    for p in all_phones:
-                                        pdata = p.to_dict()
-                                        logger.info(f"  Available phone: {pdata.get('phone_number')} -> agents: {pdata.get('assigned_agents', [])}")
-                                else:
-                                    logger.info(f"WS: Found {len(phone_docs)} phone record(s) for {phone_number}")
-
-                            target_agent_id = None
-                            if phone_docs:
-                                for d in phone_docs:
-                                    pn = VirtualPhoneNumber.from_dict(d.to_dict())
-                                    if pn.is_active and pn.assigned_agents:
-                                        target_agent_id = pn.assigned_agents[0]
-                                        logger.info(f"WS: Resolved agent from phone: {target_agent_id}")
-                                        break
-
-                            if target_agent_id:
-                                call_sessions_ref = db.collection('campaigns')
-                                q = call_sessions_ref.where(filter=FieldFilter('type', '==', 'inbound')) \
-                                                  .where(filter=FieldFilter('status', '==', 'active')) \
-                                                  .where(filter=FieldFilter('custom_agent_id', '==', target_agent_id))
-                                found_call_sessions = [CallSession.from_dict(doc.to_dict(), doc.id) for doc in q.stream()]
-                                if found_call_sessions:
-                                    found_call_sessions.sort(key=lambda c: c.updated_at or c.created_at, reverse=True)
-                                    chosen = found_call_sessions[0]
-                                    resolved["campaign_id"] = chosen.id
-                                    resolved["custom_agent_id"] = chosen.custom_agent_id
-                                    resolved["goal"] = chosen.goal or ""
-                                    logger.info(f"WS: ✅ Resolved call session {resolved['campaign_id']} for agent {target_agent_id}")
-                                    logger.info(f"WS: Goal: {resolved['goal']}")
-                                else:
-                                    logger.warning(f"WS: ❌ No active inbound call session for agent {target_agent_id}")
+                            if route.target_agent_id:
+                                logger.info(f"WS: Resolved agent from phone: {route.target_agent_id}")
                             else:
                                 logger.warning(f"WS: ❌ Could not resolve agent from phone number {phone_number}")
-                                # Fallback: try to find ANY active inbound call session
-                                logger.info("WS: Attempting fallback to any active inbound call session...")
-                                call_sessions_ref = db.collection('campaigns')
-                                q = call_sessions_ref.where(filter=FieldFilter('type', '==', 'inbound')) \
-                                                  .where(filter=FieldFilter('status', '==', 'active'))
-                                fallback_call_sessions = [CallSession.from_dict(doc.to_dict(), doc.id) for doc in q.stream()]
-                                if fallback_call_sessions:
-                                    fallback_call_sessions.sort(key=lambda c: bool(c.custom_agent_id), reverse=True)
-                                    chosen = fallback_call_sessions[0]
-                                    resolved["campaign_id"] = chosen.id
-                                    resolved["custom_agent_id"] = chosen.custom_agent_id
-                                    resolved["goal"] = chosen.goal or ""
-                                    logger.info(f"WS: Using fallback call session {resolved['campaign_id']}")
 
+                            chosen = route.call_session
                             # If authoritative resolution succeeded, override
-                            if resolved["campaign_id"] and resolved["custom_agent_id"]:
+                            if chosen and chosen.custom_agent_id:
                                 stream_params.update({
-                                    "campaign_id": resolved["campaign_id"],
-                                    "custom_agent_id": resolved["custom_agent_id"],
-                                    "goal": resolved["goal"],
+                                    "campaign_id": chosen.id,
+                                    "custom_agent_id": chosen.custom_agent_id,
+                                    "goal": chosen.goal or "",
                                     "phone_number": phone_number,
                                 })
-                                logger.info("✅ WS parameters OVERRIDDEN using Firestore mapping")
+                                logger.info(f"✅ WS parameters OVERRIDDEN using routing table: call session {chosen.id}")
                             else:
                                 logger.warning("⚠️ WS: Could not resolve campaign/agent; using provided params (may be incorrect)")
 
@@ -284,94 +375,53 @@ async def handle_twilio_ws(ws: WebSocket):
                     else:
                         logger.info("WS: Outbound call detected - skipping inbound re-resolution and trusting params.")
 
-                    # Log custom agent existence for visibility
+                    # Log custom agent existence for visibility (off the call path)
                     if stream_params.get('custom_agent_id'):
-                        try:
-                            from app.database.firestore import db
-                            from app.models.custom_agent import CustomAgent
-                            doc_ref = db.collection("custom_agents").document(str(stream_params['custom_agent_id']))
-                            doc = doc_ref.get()
-                            if doc.exists:
-                                custom_agent = CustomAgent.from_dict(doc.to_dict(), doc.id)
-                                logger.info(f"Custom agent details - Name: {custom_agent.name}, ID: {custom_agent.id}")
-                            else:
-                                logger.warning(f"No custom agent found with ID: {stream_params['custom_agent_id']}")
-                        except Exception as e:
-                            logger.error(f"Error fetching custom agent details: {e}")
+                        spawn(log_agent_details(str(stream_params['custom_agent_id'])))
 
                 logger.info(f"CALL STARTED – SID: {call_sid}")
 
-                # Start keep-alive now that we know stream_sid
-                if stream_sid and not keepalive_task:
-                    logger.info(f"Starting keep-alive task for stream {stream_sid}")
-                    keepalive_task = asyncio.create_task(
-                        _send_keepalive(ws, stream_sid)
-                    )
-                    
+                # Start playout now that we know stream_sid
+                if stream_sid and not playout_task:
                     # Send initial silence packet to establish media stream
+                    encoder = MediaFrameEncoder(stream_sid)
                     try:
-                        silence_payload = base64.b64encode(_SILENCE_MULAW_20MS).decode()
-                        message = {
-                            "event": "media",
-                            "streamSid": stream_sid,
-                            "media": {
-                                "payload": silence_payload
-                            }
-                        }
-                        await ws.send_text(json.dumps(message))
+                        await ws.send_text(encoder.silence)
                         logger.info("✅ Sent initial silence packet to establish media stream")
                     except Exception as e:
                         logger.error(f"Error sending initial silence: {e}")
+
+                    logger.info(f"Starting playout task for stream {stream_sid}")
+                    playout_task = asyncio.create_task(
+                        _playout_loop(ws, encoder, playout_queue, interrupt_event)
+                    )
                 
                 # Pass parameters to orchestrator (after override)
                 if stream_params and call_sid:
                     from app.agent.orchestrator import get_conversation_state_with_params
                     get_conversation_state_with_params(call_sid, stream_params)
+                    attach_state(call_sid)
 
-                    # CRITICAL: Trigger and SEND greeting immediately for outbound calls
+                    # CRITICAL: Trigger greeting immediately for outbound calls.
+                    # Synthesis runs in the background so the reader keeps
+                    # forwarding inbound audio meanwhile.
                     if is_outbound_flag:
                         logger.info(f"📢 Outbound call detected: {call_sid} - Triggering initial greeting")
-                        from app.agent.orchestrator import trigger_outbound_greeting
-                        
-                        # Await the greeting generation and send it immediately
-                        try:
-                            greeting_audio = await asyncio.wait_for(
-                                trigger_outbound_greeting(call_sid),
-                                timeout=5.0  # 5 second timeout for greeting generation
-                            )
-                            
-                            if greeting_audio and stream_sid:
-                                logger.info(f"🎤 Sending greeting immediately: {len(greeting_audio)} bytes")
-                                await _send_tts_chunked(ws, stream_sid, greeting_audio)
-                                logger.info("✅ Greeting sent successfully")
-                            else:
-                                logger.warning("⚠️ No greeting audio generated")
-                        except asyncio.TimeoutError:
-                            logger.error("❌ Greeting generation timeout")
-                        except Exception as e:
-                            logger.error(f"❌ Error sending greeting: {e}")
+                        spawn(play_outbound_greeting(call_sid))
 
             # ------------------- MEDIA ------------------- #
             elif event == "media":
                 # Ensure we have a call_sid
                 if not call_sid:
-                    call_sid = msg.get("media", {}).get("callSid", "")
-                    if not call_sid:
-                        logger.warning("No call_sid available for media processing")
-                        continue
+                    logger.warning("No call_sid available for media processing")
+                    continue
                         
                 media_count += 1
-                payload_b64 = msg.get("media", {}).get("payload", "")
-                if not payload_b64:
+                # Raw μ-law bytes directly from Twilio (no conversion)
+                if not raw_mulaw_bytes:
                     continue
 
                 try:
-                    # Get raw μ-law bytes directly from Twilio (no conversion)
-                    raw_mulaw_bytes = base64.b64decode(payload_b64)
-
-                    # ADD: Log audio chunk info for debugging
-                    logger.debug(f"Received audio chunk #{media_count}: {len(raw_mulaw_bytes)} bytes")
-
                     # Ensure conversation state exists before processing
                     # This handles cases where media arrives before start event is fully processed
                     from app.agent.orchestrator import active_conversations, get_conversation_state_with_params
@@ -380,26 +430,16 @@ async def handle_twilio_ws(ws: WebSocket):
                         # Create a minimal conversation state
                         # Use empty params for now, they'll be updated when start event arrives
                         get_conversation_state_with_params(call_sid, stream_params or {})
+                        attach_state(call_sid)
 
                     # AI pipeline - send raw μ-law bytes directly to orchestrator
-                    tts_pcm16 = await process_audio_chunk(raw_mulaw_bytes, call_sid)
+                    # Only take TTS audio off the conversation's queue when playout has room for it
+                    tts_pcm16 = await process_audio_chunk(raw_mulaw_bytes, call_sid, pull_outbound=not playout_queue.full())
 
                     # ========== Barge-In Handle "interrupt" signal ====
                     if tts_pcm16 == "interrupt":
-                        logger.info("BARGE-IN: Sending 'clear' to stop AI speech")
-                        # Check if WebSocket is still connected before sending
-                        if hasattr(ws, 'client_state') and ws.client_state.name == "CONNECTED" and stream_sid:
-                            try:
-                                message = {
-                                    "event": "clear",
-                                    "streamSid": stream_sid
-                                }
-                                message_str = json.dumps(message)
-                                logger.debug(f"Sending clear message: {message_str}")
-                                await ws.send_text(message_str)
-                                logger.info("Sent 'clear' signal for barge-in")
-                            except Exception as e:
-                                logger.error(f"Error sending clear signal: {e}")
+                        logger.info("BARGE-IN: Stopping AI speech")
+                        interrupt_playback()
                         # Reset the conversation state to ensure continued listening
                         if call_sid:
                             from app.agent.orchestrator import active_conversations
@@ -409,17 +449,12 @@ async def handle_twilio_ws(ws: WebSocket):
                                 state.processing = False
                         continue # skip sending any audio
 
-                    # ---- SEND ONLY IF MEANINGFUL ----
-                    elif isinstance(tts_pcm16, bytes) and len(tts_pcm16) > 0 and stream_sid:
-                        # Check if WebSocket is still connected before sending
-                        if hasattr(ws, 'client_state') and ws.client_state.name == "CONNECTED":
-                            logger.info(f"Sending AI response audio: {len(tts_pcm16)} bytes")
-                            await _send_tts_chunked(ws, stream_sid, tts_pcm16)
-                            logger.info("AI response audio sent successfully")
-                        else:
-                            logger.warning("WebSocket not connected, skipping audio send")
+                    # ---- QUEUE ONLY IF MEANINGFUL ----
+                    elif isinstance(tts_pcm16, SpeechSegment) or (isinstance(tts_pcm16, bytes) and len(tts_pcm16) > 0):
+                        # Playout task sends it; we go straight back to reading
+                        enqueue_playout(tts_pcm16)
                     # Handle empty but not None response
-                    elif isinstance(tts_pcm16, bytes) and len(tts_pcm16) == 0 and stream_sid:
+                    elif isinstance(tts_pcm16, bytes) and len(tts_pcm16) == 0:
                         logger.warning("Empty audio response received - no audio will be sent")
                         # Don't send any processing message, just continue
 
@@ -428,18 +463,16 @@ async def handle_twilio_ws(ws: WebSocket):
                     logger.error(f"Media processing error: {e}")
                     import traceback
                     traceback.print_exc()
-                    # Send error message to user
-                    try:
-                        from app.services.tts_service import synthesize_speech_with_provider
-                        error_audio = await synthesize_speech_with_provider("cartesia", "I'm sorry, I encountered an error. Please try again.")
-                        if not error_audio:  # TRY FALLBACK
-                            error_audio = await synthesize_speech_with_provider("openai", "I'm sorry, I encountered an error. Please try again.")
-                        if error_audio and stream_sid and hasattr(ws, 'client_state') and ws.client_state.name == "CONNECTED":
-                            logger.info(f"Sending error audio: {len(error_audio)} bytes")
-                            await _send_tts_chunked(ws, stream_sid, error_audio)
-                            logger.info("Error audio sent successfully")
-                    except Exception as tts_error:
-                        logger.error(f"Error generating error audio: {tts_error}")
+                    # Send error message to user (synthesized off the reader path)
+                    play_error_prompt("error_retry")
+
+            # ------------------- MARK ------------------- #
+            elif event == "mark":
+                # Our segment finished playing on the caller's side
+                from app.agent.orchestrator import active_conversations
+                state = active_conversations.get(call_sid)
+                if state is not None:
+                    state.playback.on_mark((msg.get("mark") or {}).get("name", ""))
 
             # ------------------- STOP ------------------- #
             elif event == "stop":
@@ -450,6 +483,7 @@ async def handle_twilio_ws(ws: WebSocket):
 
                 if call_sid:
                     cleanup_conversation(call_sid)
+                stopped_cleanly = True
                 break
 
     except Exception as e:
@@ -458,25 +492,27 @@ async def handle_twilio_ws(ws: WebSocket):
         import traceback
         traceback.print_exc()
         # Try to send an error message to the user
-        try:
-            if stream_sid and hasattr(ws, 'client_state') and ws.client_state.name == "CONNECTED":
-                from app.services.tts_service import synthesize_speech_with_provider
-                error_audio = await synthesize_speech_with_provider("cartesia", "We're sorry, an application error has occurred.")
-                if not error_audio:  # TRY FALLBACK
-                    error_audio = await synthesize_speech_with_provider("openai", "We're sorry, an application error has occurred.")
-                if error_audio:
-                    logger.info(f"Sending final error audio: {len(error_audio)} bytes")
-                    await _send_tts_chunked(ws, stream_sid, error_audio)
-                    logger.info("Final error audio sent successfully")
-        except Exception as tts_error:
-            logger.error(f"Error generating final error audio: {tts_error}")
+        if playout_task and _ws_connected(ws):
+            play_error_prompt("application_error")
 
     finally:
-        # Cancel keep-alive
-        if keepalive_task and not keepalive_task.done():
-            keepalive_task.cancel()
+        for task in list(background_tasks):
+            task.cancel()
+
+        # Stop playout: on a clean stop the call is over, so drop pending
+        # audio; otherwise let queued audio (e.g. the error prompt) finish.
+        if playout_task and not playout_task.done():
+            if not stopped_cleanly:
+                try:
+                    await asyncio.wait_for(playout_queue.put(_STOP), timeout=PLAYOUT_DRAIN_TIMEOUT)
+                    await asyncio.wait_for(asyncio.shield(playout_task), timeout=PLAYOUT_DRAIN_TIMEOUT)
+                except (asyncio.TimeoutError, Exception):
+                    pass
+            playout_task.cancel()
+            for task in list(pending_puts):
+                task.cancel()
             try:
-                await keepalive_task
+                await playout_task
             except asyncio.CancelledError:
                 pass
 
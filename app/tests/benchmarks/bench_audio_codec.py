@@ -0,0 +1,71 @@
+"""
+Microbenchmark: µ-law codec, app.audio.codec vs audioop.
+
+Measures a single 20 ms Twilio frame (160 samples) and a 5 s utterance, for
+decode and encode, including the preallocated-output variants.
+
+Run from the repository root (needs Python < 3.13 for the audioop side):
+    python -m app.tests.benchmarks.bench_audio_codec
+"""
+import timeit
+import warnings
+
+import numpy as np
+
+from app.audio.codec import lin2ulaw, pcm16_to_ulaw, ulaw2lin, ulaw_to_pcm16
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+FRAME_SAMPLES = 160              # 20 ms at 8 kHz
+UTTERANCE_SAMPLES = 8000 * 5     # 5 s at 8 kHz
+
+
+def _bench(fn, number: int) -> float:
+    """Best-of-5 seconds per call."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def _report(label: str, samples: int, ours: float, ref: float = None):
+    line = f"{label:<32} {ours * 1e6:9.2f} µs  {samples / ours / 1e6:8.1f} Msamples/s"
+    if ref:
+        line += f"   audioop {ref * 1e6:9.2f} µs  ({ref / ours:.1f}x)"
+    print(line)
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    if audioop is not None:
+        every_sample = np.arange(-32768, 32768, dtype=np.int16).tobytes()
+        assert lin2ulaw(every_sample) == audioop.lin2ulaw(every_sample, 2), "encode not bit-exact"
+        assert ulaw2lin(bytes(range(256))) == audioop.ulaw2lin(bytes(range(256)), 2), "decode not bit-exact"
+        print("bit-exact with audioop: yes\n")
+    else:
+        print("audioop not available: showing app.audio.codec only\n")
+
+    for label, n, number in (("frame (20 ms)", FRAME_SAMPLES, 20000), ("utterance (5 s)", UTTERANCE_SAMPLES, 200)):
+        pcm = rng.integers(-12000, 12000, n, dtype=np.int16)
+        pcm_bytes = pcm.tobytes()
+        ulaw_bytes = lin2ulaw(pcm_bytes)
+        ulaw_arr = np.frombuffer(ulaw_bytes, dtype=np.uint8)
+        pcm_out = np.empty(n, dtype=np.int16)
+        ulaw_out = np.empty(n, dtype=np.uint8)
+
+        ref_dec = _bench(lambda: audioop.ulaw2lin(ulaw_bytes, 2), number) if audioop else None
+        ref_enc = _bench(lambda: audioop.lin2ulaw(pcm_bytes, 2), number) if audioop else None
+
+        print(f"--- {label}: {n} samples ---")
+        _report("decode ulaw2lin (bytes)", n, _bench(lambda: ulaw2lin(ulaw_bytes), number), ref_dec)
+        _report("decode into preallocated array", n, _bench(lambda: ulaw_to_pcm16(ulaw_arr, out=pcm_out), number), ref_dec)
+        _report("encode lin2ulaw (bytes)", n, _bench(lambda: lin2ulaw(pcm_bytes), number), ref_enc)
+        _report("encode into preallocated array", n, _bench(lambda: pcm16_to_ulaw(pcm, out=ulaw_out), number), ref_enc)
+        print()
+
+
+if __name__ == "__main__":
+    main()
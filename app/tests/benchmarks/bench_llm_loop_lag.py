@@ -0,0 +1,91 @@
+"""
+Benchmark: event-loop lag while N calls wait on the LLM concurrently.
+
+The old path called the synchronous InferenceClient from coroutines, so the
+loop stalled for each LLM round trip in turn. The new path streams through
+the pooled AsyncLLMClient. Both talk to fakes that take LLM_SECONDS per
+reply; a probe task ticking every 10 ms records how late the loop wakes it.
+
+Run from the repository root:
+    python -m app.tests.benchmarks.bench_llm_loop_lag
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.services import llm_service
+from app.services.llm_client import get_llm_client
+
+LLM_SECONDS = 0.4
+TOKENS = 20
+PROBE_INTERVAL = 0.01
+
+
+class _FakeInferenceClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        time.sleep(LLM_SECONDS)
+        message = SimpleNamespace(content="word " * TOKENS)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class _FakeStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        for _ in range(TOKENS):
+            await asyncio.sleep(LLM_SECONDS / TOKENS)
+            yield ("data: " + json.dumps({"choices": [{"delta": {"content": "word "}}]}) + "\n\n").encode()
+        yield b"data: [DONE]\n\n"
+
+
+async def _handler(request):
+    return httpx.Response(200, stream=_FakeStream())
+
+
+async def _old_path(text: str):
+    return llm_service.generate_response(text, "benchmark")
+
+
+async def _new_path(text: str):
+    return await llm_service.generate_response_async(text, "benchmark")
+
+
+async def _probe(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _run(path, calls: int) -> tuple:
+    stop = asyncio.Event()
+    lags: list = []
+    probe = asyncio.create_task(_probe(stop, lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(path(f"question {i}") for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return max(lags) * 1000, elapsed
+
+
+async def main():
+    llm_service.deepseek_v3_client = _FakeInferenceClient()
+    client = get_llm_client()
+    client.api_key = client.api_key or "benchmark"
+    client._http = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(_handler))
+    print(f"Fake LLM reply time {LLM_SECONDS * 1000:.0f} ms, concurrency limit {client.concurrency}")
+    print(f"{'calls':>5}  {'old max lag':>12}  {'new max lag':>12}  {'old wall':>9}  {'new wall':>9}")
+    for calls in (1, 4, 8, 16):
+        old_lag, old_wall = await _run(_old_path, calls)
+        new_lag, new_wall = await _run(_new_path, calls)
+        print(f"{calls:>5}  {old_lag:>9.1f} ms  {new_lag:>9.1f} ms  {old_wall:>7.2f} s  {new_wall:>7.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
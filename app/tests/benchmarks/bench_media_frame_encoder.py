@@ -0,0 +1,60 @@
+"""
+Microbenchmark: outbound Twilio media frame encoding.
+
+Compares the previous per-frame path (dict + json.dumps + base64.b64encode
++ debug f-string) with MediaFrameEncoder.
+
+Run from the repository root:
+    python -m app.tests.benchmarks.bench_media_frame_encoder
+"""
+import base64
+import json
+import logging
+import os
+import timeit
+
+from app.services.media_frame_encoder import MediaFrameEncoder
+
+logger = logging.getLogger(__name__)
+
+STREAM_SID = "MZ" + "0123456789abcdef" * 2
+FRAME = os.urandom(160)
+N = 200_000
+
+
+def legacy_encode(frame: bytes) -> str:
+    payload_b64 = base64.b64encode(frame).decode("utf-8")
+    message = {
+        "event": "media",
+        "streamSid": STREAM_SID,
+        "media": {
+            "payload": payload_b64
+        }
+    }
+    message_str = json.dumps(message)
+    logger.debug(f"Sending media message: {message_str}")
+    return message_str
+
+
+def main():
+    encoder = MediaFrameEncoder(STREAM_SID)
+    view = memoryview(FRAME)
+
+    # Same wire format as before
+    assert json.loads(encoder.media(view)) == json.loads(legacy_encode(FRAME))
+
+    legacy = min(timeit.repeat(lambda: legacy_encode(FRAME), number=N, repeat=3))
+    fast = min(timeit.repeat(lambda: encoder.media(view), number=N, repeat=3))
+    silence = min(timeit.repeat(lambda: encoder.silence, number=N, repeat=3))
+
+    print(f"frames per run:          {N}")
+    print(f"legacy json+b64:         {legacy / N * 1e6:.2f} µs/frame")
+    print(f"MediaFrameEncoder.media: {fast / N * 1e6:.2f} µs/frame  ({legacy / fast:.1f}x)")
+    print(f"pre-encoded silence:     {silence / N * 1e6:.2f} µs/frame")
+    # 50 frames/s per call
+    print(f"CPU per 100 calls:       legacy {legacy / N * 5000 * 100:.2f}%  "
+          f"encoder {fast / N * 5000 * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    main()
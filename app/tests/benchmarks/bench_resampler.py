@@ -0,0 +1,84 @@
+"""
+Microbenchmark: 8k<->16k resampling, StreamingResampler vs the old paths.
+
+Old paths: scipy resample_poly on every chunk (8k -> 16k analysis) and
+audioop.ratecv without carried state (16k -> 8k TTS). Also reports the
+chunk-boundary error each approach introduces on a sine sweep, relative to
+resampling the whole signal at once.
+
+Run from the repository root:
+    python -m app.tests.benchmarks.bench_resampler
+"""
+import timeit
+import warnings
+
+import numpy as np
+from scipy.signal import chirp, resample_poly
+
+from app.audio.resampler import StreamingResampler
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+
+def _bench(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def _sweep(rate: int, seconds: float = 2.0) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return np.round(12000 * chirp(t, f0=100, t1=seconds, f1=3400)).astype(np.int16)
+
+
+def _boundary_error_db(chunked: np.ndarray, whole: np.ndarray) -> float:
+    n = min(len(chunked), len(whole))
+    err = chunked[:n].astype(np.float64) - whole[:n]
+    return 10 * np.log10(np.sum(err ** 2) / np.sum(whole[:n].astype(np.float64) ** 2) + 1e-20)
+
+
+def main():
+    # ---- 8k -> 16k, one 20 ms Twilio frame ----
+    frame_8k = _sweep(8000)[:160]
+    up = StreamingResampler(up=2, down=1)
+    out16 = np.empty(up.output_length(160) + 1, dtype=np.int16)
+    t_poly = _bench(lambda: resample_poly(frame_8k.astype(np.float32), 2, 1), 5000)
+    t_ours = _bench(lambda: up.process(frame_8k, out=out16), 5000)
+    print("8k -> 16k, 20 ms frame")
+    print(f"  resample_poly per chunk: {t_poly * 1e6:8.1f} µs")
+    print(f"  StreamingResampler:      {t_ours * 1e6:8.1f} µs  ({t_poly / t_ours:.1f}x)")
+
+    # ---- 16k -> 8k, 20 ms frame and 3 s utterance ----
+    sweep_16k = _sweep(16000)
+    frame_16k = sweep_16k[:320]
+    down = StreamingResampler(up=1, down=2)
+    print("16k -> 8k")
+    for label, pcm, number in (("20 ms frame", frame_16k, 5000), ("3 s utterance", np.resize(sweep_16k, 48000), 50)):
+        t_ours = _bench(lambda: down.process(pcm), number)
+        line = f"  {label:<14} StreamingResampler {t_ours * 1e6:9.1f} µs"
+        if audioop is not None:
+            data = pcm.tobytes()
+            t_ratecv = _bench(lambda: audioop.ratecv(data, 2, 1, 16000, 8000, None), number)
+            line += f"   audioop.ratecv {t_ratecv * 1e6:9.1f} µs"
+        print(line)
+
+    # ---- chunk-boundary artefacts on a sweep (lower is better) ----
+    print("Chunk-boundary error vs whole-signal processing (20 ms chunks)")
+    sweep_8k = _sweep(8000)
+    whole = resample_poly(sweep_8k.astype(np.float64), 2, 1)
+    per_chunk = np.concatenate([
+        resample_poly(sweep_8k[i:i + 160].astype(np.float64), 2, 1) for i in range(0, len(sweep_8k), 160)
+    ])
+    print(f"  resample_poly per chunk: {_boundary_error_db(per_chunk, whole):7.1f} dB")
+
+    streaming = StreamingResampler(up=2, down=1)
+    whole_ours = StreamingResampler(up=2, down=1).process(sweep_8k)
+    chunked_ours = np.concatenate([streaming.process(sweep_8k[i:i + 160]) for i in range(0, len(sweep_8k), 160)])
+    print(f"  StreamingResampler:      {_boundary_error_db(chunked_ours, whole_ours):7.1f} dB (identical)")
+
+
+if __name__ == "__main__":
+    main()
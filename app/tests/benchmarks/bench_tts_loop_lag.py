@@ -0,0 +1,71 @@
+"""
+Benchmark: event-loop lag while N calls synthesize speech concurrently.
+
+A fake Polly client blocks for SYNTH_SECONDS per request, like the real
+boto3 call. The old path called it straight from the coroutine, so the
+loop stalled for each synthesis in turn; the new path runs it on the
+bounded TTS thread pool. A probe task ticking every 10 ms records how late
+the loop wakes it up.
+
+Run from the repository root:
+    python -m app.tests.benchmarks.bench_tts_loop_lag
+"""
+import asyncio
+import io
+import time
+
+from app.services import tts_service
+
+SYNTH_SECONDS = 0.15
+PROBE_INTERVAL = 0.01
+
+
+class _FakePolly:
+    def synthesize_speech(self, **kwargs):
+        time.sleep(SYNTH_SECONDS)
+        return {"AudioStream": io.BytesIO(b"\x00\x00" * 1600)}
+
+
+async def _old_path(text: str):
+    response = tts_service.get_polly_client().synthesize_speech(Text=text)
+    return response["AudioStream"].read()
+
+
+async def _new_path(text: str):
+    return await tts_service.synthesize_speech_with_provider("aws_polly", text)
+
+
+async def _probe(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _run(path, calls: int) -> tuple:
+    stop = asyncio.Event()
+    lags: list = []
+    probe = asyncio.create_task(_probe(stop, lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(path(f"utterance {i}") for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return max(lags) * 1000, elapsed
+
+
+async def main():
+    tts_service._polly_client = _FakePolly()
+    print(f"Fake synthesis time {SYNTH_SECONDS * 1000:.0f} ms, "
+          f"pool {tts_service.TTS_BLOCKING_WORKERS} threads, "
+          f"Polly limit {tts_service.PROVIDER_CONCURRENCY['aws_polly']}")
+    print(f"{'calls':>5}  {'old max lag':>12}  {'new max lag':>12}  {'old wall':>9}  {'new wall':>9}")
+    for calls in (1, 4, 8, 16):
+        old_lag, old_wall = await _run(_old_path, calls)
+        new_lag, new_wall = await _run(_new_path, calls)
+        print(f"{calls:>5}  {old_lag:>9.1f} ms  {new_lag:>9.1f} ms  {old_wall:>7.2f} s  {new_wall:>7.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""
+Tests for app.agent.history_manager.HistoryManager.
+"""
+import asyncio
+
+from app.agent.history_manager import SUMMARY_PREFIX, HistoryManager
+from app.services import llm_client
+from app.services.prompt_compiler import count_tokens
+
+
+class _FakeLLM:
+    def __init__(self, reply="Customer is Priya, wants 3 seats, asked about pricing."):
+        self.reply = reply
+        self.calls = []
+
+    async def chat(self, messages, **kwargs):
+        self.calls.append(messages)
+        await asyncio.sleep(0)
+        return self.reply
+
+
+def _call(turns: int):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"Question number {i} about the plan and its pricing details?"})
+        history.append({"role": "assistant", "content": f"Answer number {i}: the plan covers that, at no extra cost."})
+    return history
+
+
+def test_window_stays_within_budget_and_keeps_latest_turn():
+    history = _call(20)
+    manager = HistoryManager(history, token_budget=120, keep_messages=10)
+    window = manager.window()
+
+    assert window[-1] is history[-1]
+    assert sum(count_tokens(msg["content"]) for msg in window) <= 120
+    assert len(window) < len(history)
+    assert manager.get_stats()["trimmed"] == len(history) - len(window)
+    # The call record itself is untouched
+    assert len(history) == 40
+
+    # A single oversized latest entry is still sent
+    history.append({"role": "user", "content": "word " * 500})
+    assert manager.window() == [history[-1]]
+
+
+def test_older_turns_are_summarized_in_the_background(monkeypatch):
+    fake = _FakeLLM()
+    monkeypatch.setattr(llm_client, "get_llm_client", lambda provider=None: fake)
+    history = _call(2)
+    manager = HistoryManager(history, token_budget=1000, keep_messages=4, summary_batch=4)
+
+    async def run():
+        assert manager.maybe_summarize() is None  # Nothing older than the kept turns yet
+        history.extend(_call(3))
+        task = manager.maybe_summarize()
+        assert manager.window()[0]["role"] == "user"  # Verbatim until the summary lands
+        await task
+        return manager.window()
+
+    window = asyncio.run(run())
+    assert len(fake.calls) == 1
+    assert "Question number 0" in fake.calls[0][1]["content"]
+    assert window[0] == {"role": "system", "content": SUMMARY_PREFIX + fake.reply}
+    assert window[1:] == history[-4:]
+    assert manager.get_stats()["summarized_entries"] == len(history) - 4
+
+
+def test_failed_summary_keeps_history_verbatim(monkeypatch):
+    class _Broken:
+        async def chat(self, messages, **kwargs):
+            raise llm_client.LLMError("offline")
+
+    monkeypatch.setattr(llm_client, "get_llm_client", lambda provider=None: _Broken())
+    history = _call(6)
+    manager = HistoryManager(history, token_budget=10000, keep_messages=4, summary_batch=2)
+
+    async def run():
+        await manager.maybe_summarize()
+
+    asyncio.run(run())
+    assert manager.summary == ""
+    assert manager.window() == history
+    assert manager.get_stats()["summary_errors"] == 1
@@ -0,0 +1,296 @@
+"""
+Tests for app.agent.response_pipeline: segmentation, ordered concurrent TTS and Cartesia turn contexts.
+"""
+import asyncio
+import base64
+import json
+
+from app.agent import response_pipeline
+from app.agent.response_pipeline import ResponseSpeaker, SentenceSegmenter, clean_spoken_text
+from app.services import tts_service
+from app.services.cartesia_tts_session import CartesiaTTSSession, cartesia_sessions
+
+
+def _segment(tokens):
+    segmenter = SentenceSegmenter()
+    segments = []
+    for token in tokens:
+        segments.extend(segmenter.feed(token))
+    return segments + segmenter.flush()
+
+
+def test_sentences_complete_as_tokens_arrive():
+    segmenter = SentenceSegmenter()
+    assert segmenter.feed("Sure, I can") == []
+    assert segmenter.feed(" help. Our plans") == ["Sure, I can help."]
+    assert segmenter.feed(" start at $9.99 a month! ") == ["Our plans start at $9.99 a month!"]
+    assert segmenter.flush() == []
+
+
+def test_abbreviations_initials_and_parentheses_do_not_split():
+    text = "Dr. Smith from J. P. Morgan called (about the demo. Really) yesterday. Thanks."
+    assert _segment([word + " " for word in text.split(" ")]) == [
+        "Dr. Smith from J. P. Morgan called (about the demo. Really) yesterday.",
+        "Thanks.",
+    ]
+
+
+def test_long_first_clause_splits_early_and_run_on_text_is_capped():
+    assert _segment(["Well, ", "that depends on which of our plans you mean, honestly"]) == [
+        "Well, that depends on which of our plans you mean,",
+        "honestly",
+    ]
+    run_on = " ".join(["word"] * 100)
+    segments = _segment([run_on])
+    assert all(len(s) <= response_pipeline.MAX_SEGMENT_CHARS for s in segments)
+    assert " ".join(segments) == run_on
+
+
+def test_clean_spoken_text_strips_markdown_and_notes():
+    assert clean_spoken_text("**Great** question (engaging tone) [pause] - see *this*") == "Great question - see this"
+    assert clean_spoken_text("(internal note only)") == ""
+
+
+class _State:
+    call_sid = "CA-test"
+
+    def __init__(self):
+        self.conversation_history = []
+        self.queued = []
+
+    def add_message(self, role, content):
+        message = {"role": role, "content": content}
+        self.conversation_history.append(message)
+        return message
+
+    def queue_speech(self, audio, message=None, text=None):
+        self.queued.append((audio, message))
+
+
+def _fake_tts(delays, started):
+    async def synthesize_speech_stream(provider, text, voice_id=None, output_format=None, tts_session=None):
+        started.append(text)
+        await asyncio.sleep(delays.get(text, 0.0))
+        yield text.encode() + b"|1"
+        yield text.encode() + b"|2"
+    return synthesize_speech_stream
+
+
+async def _tokens(text, delay=0.0):
+    for word in text.split(" "):
+        await asyncio.sleep(delay)
+        yield word + " "
+
+
+def test_segments_render_concurrently_but_play_in_order(monkeypatch):
+    started = []
+    # The first sentence is the slowest to synthesize; later ones must wait for it
+    monkeypatch.setattr(tts_service, "synthesize_speech_stream",
+                        _fake_tts({"One two three.": 0.05, "Four.": 0.0, "Five six.": 0.01}, started))
+    state = _State()
+    speaker = ResponseSpeaker(state, lookahead=3)
+
+    text = asyncio.run(speaker.speak(_tokens("One two three. Four. Five six.")))
+
+    assert text == "One two three. Four. Five six."
+    assert [audio for audio, _ in state.queued] == [
+        b"One two three.|1", b"One two three.|2", b"Four.|1", b"Four.|2", b"Five six.|1", b"Five six.|2",
+    ]
+    assert state.conversation_history == [{"role": "assistant", "content": "One two three. Four. Five six."}]
+    assert all(message is speaker.message for _, message in state.queued)
+    assert speaker.first_audio_ms is not None
+
+
+def test_first_sentence_is_queued_before_the_llm_finishes(monkeypatch):
+    monkeypatch.setattr(tts_service, "synthesize_speech_stream", _fake_tts({}, []))
+    state = _State()
+    speaker = ResponseSpeaker(state)
+    seen_at_first_audio = []
+
+    async def tokens():
+        yield "Hello there. "
+        await asyncio.sleep(0.05)
+        seen_at_first_audio.append(len(state.queued))
+        yield "How are you?"
+
+    asyncio.run(speaker.speak(tokens()))
+    assert seen_at_first_audio == [2]
+    assert state.conversation_history[0]["content"] == "Hello there. How are you?"
+
+
+def test_lookahead_bounds_segments_in_flight(monkeypatch):
+    started = []
+    monkeypatch.setattr(tts_service, "synthesize_speech_stream", _fake_tts({"Ay.": 0.05}, started))
+    state = _State()
+    speaker = ResponseSpeaker(state, lookahead=2)
+
+    async def run():
+        task = asyncio.create_task(speaker.speak("Ay. Bee. Cee. Dee."))
+        await asyncio.sleep(0.02)
+        in_flight = list(started)
+        await task
+        return in_flight
+
+    assert asyncio.run(run()) == ["Ay.", "Bee."]
+
+
+def test_cancel_stops_pending_renders(monkeypatch):
+    started = []
+    monkeypatch.setattr(tts_service, "synthesize_speech_stream", _fake_tts({"First.": 1.0}, started))
+    state = _State()
+    speaker = ResponseSpeaker(state)
+
+    async def run():
+        task = asyncio.create_task(speaker.speak("First. Second."))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert state.queued == []
+    assert state.conversation_history == []
+
+
+class _FakeCartesiaSocket:
+    """Cartesia WebSocket stand-in: two audio chunks per transcript, flush_done and done as asked."""
+
+    def __init__(self, chunk_delay=0.0, fail_at=None):
+        self.requests = []
+        self.chunk_delay = chunk_delay
+        self.fail_at = fail_at  # Transcript number answered with an error
+        self._transcripts = 0
+        self._inbox: asyncio.Queue = asyncio.Queue()
+
+    async def send(self, raw):
+        request = json.loads(raw)
+        self.requests.append(request)
+        if request.get("cancel"):
+            return
+        asyncio.create_task(self._respond(request))
+
+    async def _respond(self, request):
+        context_id = request["context_id"]
+        if request["transcript"]:
+            self._transcripts += 1
+            if self._transcripts == self.fail_at:
+                self._inbox.put_nowait({"type": "error", "context_id": context_id, "error": "overloaded"})
+                return
+        await asyncio.sleep(self.chunk_delay)
+        transcript = request["transcript"].encode()
+        for part in (transcript[:len(transcript) // 2], transcript[len(transcript) // 2:]):
+            if part:
+                data = base64.b64encode(part).decode()
+                self._inbox.put_nowait({"type": "chunk", "context_id": context_id, "data": data})
+        if request.get("flush"):
+            self._inbox.put_nowait({"type": "flush_done", "context_id": context_id, "flush_done": True})
+        if not request["continue"]:
+            self._inbox.put_nowait({"type": "done", "context_id": request["context_id"], "done": True})
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return json.dumps(await self._inbox.get())
+
+    async def close(self):
+        pass
+
+
+def _open_session(monkeypatch, socket):
+    session = CartesiaTTSSession(_State.call_sid)
+    session._ws = socket
+    session._reader = asyncio.create_task(session._read_loop(socket))
+    monkeypatch.setattr(cartesia_sessions, "_sessions", {_State.call_sid: session})
+    return session
+
+
+def test_turn_is_one_cartesia_context_with_continue(monkeypatch):
+    monkeypatch.setattr(tts_service, "synthesize_speech_stream", _fake_tts({}, []))
+    socket = _FakeCartesiaSocket()
+    state = _State()
+
+    async def run():
+        _open_session(monkeypatch, socket)
+        return await ResponseSpeaker(state, voice_id="voice-a").speak(_tokens("Hello there. How can I help?", 0.01))
+
+    assert asyncio.run(run()) == "Hello there. How can I help?"
+    assert {request["context_id"] for request in socket.requests} == {socket.requests[0]["context_id"]}
+    assert [(r["transcript"], r["continue"], r.get("flush", False)) for r in socket.requests] == [
+        ("Hello there. ", True, True), ("How can I help? ", True, True), ("", False, False),
+    ]
+    assert b"".join(audio for audio, _ in state.queued) == b"Hello there. How can I help? "
+    assert state.conversation_history == [{"role": "assistant", "content": "Hello there. How can I help?"}]
+
+
+def test_barge_in_cancels_the_turn_context(monkeypatch):
+    socket = _FakeCartesiaSocket(chunk_delay=0.05)
+    state = _State()
+
+    async def run():
+        _open_session(monkeypatch, socket)
+        task = asyncio.create_task(ResponseSpeaker(state).speak("First. Second."))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.06)
+
+    asyncio.run(run())
+    assert socket.requests[-1] == {"context_id": socket.requests[0]["context_id"], "cancel": True}
+    assert state.queued == [] and state.conversation_history == []
+
+
+def test_context_failure_before_audio_falls_back_to_sentence_rendering(monkeypatch):
+    started = []
+    monkeypatch.setattr(tts_service, "synthesize_speech_stream", _fake_tts({}, started))
+    state = _State()
+
+    async def run():
+        session = _open_session(monkeypatch, _FakeCartesiaSocket())
+        session._closed = True  # Socket unusable: every send fails
+        return await ResponseSpeaker(state).speak(_tokens("One. Two. Three.", 0.01))
+
+    assert asyncio.run(run()) == "One. Two. Three."
+    assert started == ["One.", "Two.", "Three."]
+    assert state.conversation_history == [{"role": "assistant", "content": "One. Two. Three."}]
+
+
+def test_context_history_holds_only_sentences_whose_audio_started(monkeypatch):
+    socket = _FakeCartesiaSocket(chunk_delay=0.01)
+    state = _State()
+    heard = []
+    state.queue_speech = lambda audio, message=None, text=None: heard.append((audio, message["content"]))
+
+    async def run():
+        _open_session(monkeypatch, socket)
+        # Both sentences are sent before any audio comes back
+        await ResponseSpeaker(state).speak("Hello there. How can I help?")
+
+    asyncio.run(run())
+    assert heard == [
+        (b"Hello ", "Hello there."),
+        (b"there. ", "Hello there."),
+        (b"How can ", "Hello there. How can I help?"),
+        (b"I help? ", "Hello there. How can I help?"),
+    ]
+
+
+def test_context_failure_mid_turn_renders_the_rest_sentence_by_sentence(monkeypatch):
+    started = []
+    monkeypatch.setattr(tts_service, "synthesize_speech_stream", _fake_tts({}, started))
+    socket = _FakeCartesiaSocket(chunk_delay=0.01, fail_at=2)
+    state = _State()
+
+    async def run():
+        _open_session(monkeypatch, socket)
+        return await ResponseSpeaker(state).speak(_tokens("One. Two. Three.", 0.02))
+
+    assert asyncio.run(run()) == "One. Two. Three."
+    assert started == ["Two.", "Three."]
+    assert [audio for audio, _ in state.queued] == [b"On", b"e. ", b"Two.|1", b"Two.|2", b"Three.|1", b"Three.|2"]
+    assert state.conversation_history == [{"role": "assistant", "content": "One. Two. Three."}]
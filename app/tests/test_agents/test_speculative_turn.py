@@ -0,0 +1,121 @@
+"""
+Tests for speculative turns on interim transcripts (app.agent.speculative_turn).
+"""
+import asyncio
+
+from app.agent import speculative_turn
+from app.agent.speculative_turn import PrefetchedStream, SpeculativeTurnEngine, transcripts_match
+
+
+async def _tokens(words, delay=0.0, log=None):
+    try:
+        for word in words:
+            await asyncio.sleep(delay)
+            yield word
+    finally:
+        if log is not None:
+            log.append("closed")
+
+
+def _engine(prepared):
+    async def prepare(text):
+        prepared.append(text)
+        return "rag for " + text, PrefetchedStream(_tokens(["Sure", ",", " happy", " to", " help"]))
+    return SpeculativeTurnEngine(prepare)
+
+
+def test_transcripts_match_ignores_case_and_punctuation():
+    assert transcripts_match("what does the pro plan cost", "What does the Pro plan cost?")
+    assert not transcripts_match("what does the pro plan cost", "what does the pro plan cost for ten seats")
+    assert not transcripts_match("", "anything")
+
+
+def test_transcripts_match_allows_only_filler_differences():
+    assert transcripts_match("um what does the pro plan cost", "What does the, uh, pro plan cost?")
+    assert not transcripts_match("um uh", "hmm")
+    # One changed word can flip the meaning: never reuse the reply
+    assert not transcripts_match("I am interested in the demo", "I am not interested in the demo")
+    assert not transcripts_match("can we meet on Tuesday at ten", "can we meet on Thursday at ten")
+    assert not transcripts_match("we have 15 seats", "we have 50 seats")
+    assert not transcripts_match("book me for the 3rd of May", "book me for the 13th of May")
+
+
+def test_prefetched_stream_replays_buffered_tokens_and_stops_when_cancelled():
+    async def run():
+        stream = PrefetchedStream(_tokens(["a", "b", "c"]))
+        await asyncio.sleep(0.01)
+        assert stream.buffered == 3
+        replayed = [token async for token in stream]
+
+        log = []
+        slow = PrefetchedStream(_tokens(["x"] * 100, delay=0.01, log=log))
+        await asyncio.sleep(0.025)
+        slow.cancel()
+        await asyncio.sleep(0.01)
+        return replayed, slow.buffered, log
+
+    replayed, buffered, log = asyncio.run(run())
+    assert replayed == ["a", "b", "c"]
+    assert buffered < 100 and log == ["closed"]
+
+
+def test_stable_interim_hit_reuses_the_prepared_turn():
+    prepared = []
+
+    async def run():
+        engine = _engine(prepared)
+        engine.on_interim("what does the pro plan cost", 4)
+        assert engine.current is None  # Seen once: not stable yet
+        engine.on_interim("what does the pro plan cost", 4)
+        await asyncio.sleep(0.01)
+        speculation = engine.take("What does the Pro plan cost?", 4)
+        rag_context, stream = await speculation.result()
+        return engine.get_stats(), rag_context, [token async for token in stream]
+
+    stats, rag_context, tokens = asyncio.run(run())
+    assert prepared == ["what does the pro plan cost"]
+    assert rag_context == "rag for what does the pro plan cost"
+    assert "".join(tokens) == "Sure, happy to help"
+    assert stats["started"] == 1 and stats["hits"] == 1 and stats["hit_rate"] == 1.0
+
+
+def test_miss_superseded_and_stale_history_fall_back_to_a_normal_turn():
+    prepared = []
+
+    async def run():
+        engine = _engine(prepared)
+        for _ in range(2):
+            engine.on_interim("I want to book a demo", 2)
+        first = engine.current
+        # The caller kept talking
+        engine.on_interim("I want to book a demo for next Tuesday afternoon", 2)
+        assert engine.current is None
+        await asyncio.sleep(0)
+        assert first.task.cancelled()
+
+        for _ in range(2):
+            engine.on_interim("I want to book a demo for next Tuesday afternoon", 2)
+        miss = engine.take("Actually, can you call me back tomorrow", 2)
+
+        for _ in range(2):
+            engine.on_interim("send me the pricing sheet", 2)
+        stale = engine.take("send me the pricing sheet", 4)  # A turn was added meanwhile
+        assert engine.take("nothing speculated", 4) is None
+        return engine.get_stats(), miss, stale
+
+    stats, miss, stale = asyncio.run(run())
+    assert miss is None and stale is None
+    assert stats["started"] == 3 and stats["superseded"] == 1 and stats["misses"] == 2 and stats["hits"] == 0
+
+
+def test_disabled_speculation_never_starts(monkeypatch):
+    monkeypatch.setattr(speculative_turn, "SPECULATION_ENABLED", False)
+    prepared = []
+
+    async def run():
+        engine = _engine(prepared)
+        for _ in range(3):
+            engine.on_interim("what does the pro plan cost", 0)
+        return engine.current
+
+    assert asyncio.run(run()) is None and prepared == []
@@ -0,0 +1,125 @@
+"""
+Tests for multi-signal end-of-turn detection (app.agent.turn_detector).
+"""
+import asyncio
+
+from app.agent.turn_detector import (
+    COMPLETE, DEFAULT, INCOMPLETE, SHORT, EndOfTurnDetector, TurnDetectionConfig, classify,
+)
+from app.models.custom_agent import CustomAgent
+
+
+class _FakeVAD:
+    def __init__(self, ms_since_speech=None, in_speech=False):
+        self.frames = 1
+        self.ms_since_speech = ms_since_speech
+        self.in_speech = in_speech
+
+
+def _config(**overrides):
+    values = dict(complete_hold_ms=0, default_hold_ms=40, short_hold_ms=80, incomplete_hold_ms=200, max_wait_ms=400)
+    values.update(overrides)
+    return TurnDetectionConfig(**values)
+
+
+def _detector(vad=None, config=None):
+    turns = []
+
+    async def on_turn(text, confidence):
+        turns.append((text, confidence))
+
+    return EndOfTurnDetector(on_turn, vad=vad, config=config or _config()), turns
+
+
+def test_classify_reads_punctuation_conjunctions_and_short_replies():
+    config = _config()
+    assert classify("What does the pro plan cost?", config) == COMPLETE
+    assert classify("no thanks", config) == COMPLETE
+    assert classify("I want to book a demo and", config) == INCOMPLETE
+    assert classify("So the thing is,", config) == INCOMPLETE
+    assert classify("Tuesday", config) == SHORT
+    assert classify("we have about forty people", config) == DEFAULT
+
+
+def test_end_punctuation_wins_over_trailing_words():
+    config = TurnDetectionConfig()
+    assert classify("What is this about?", config) == COMPLETE
+    assert classify("Where are you calling from?", config) == COMPLETE
+    assert classify("Who is this for?", config) == COMPLETE
+    assert classify("That's the one I was looking for.", config) == COMPLETE
+    assert classify("...that's the one I was looking for.", config) == COMPLETE
+    assert classify("I was looking for...", config) == INCOMPLETE
+    assert classify("I was looking for", config) == INCOMPLETE
+
+
+def test_complete_sentence_commits_before_trailing_conjunction():
+    async def run():
+        detector, turns = _detector()
+        detector.on_final("What does the pro plan cost?", 0.95, speech_final=True)
+        await asyncio.sleep(0.02)
+        assert [text for text, _ in turns] == ["What does the pro plan cost?"]
+
+        detector.on_final("I want to book a demo and", 0.95, speech_final=True)
+        await asyncio.sleep(0.1)
+        assert len(turns) == 1  # Still holding for the rest of the sentence
+        detector.on_interim("next")
+        detector.on_final("next Tuesday works.", 0.95, speech_final=True)
+        await asyncio.sleep(0.02)
+        return detector, turns
+
+    detector, turns = asyncio.run(run())
+    assert turns[1][0] == "I want to book a demo and next Tuesday works."
+    stats = detector.get_stats()
+    assert stats[COMPLETE] == 2 and stats["resumed"] == 1
+
+
+def test_vad_silence_and_utterance_end_shorten_the_hold():
+    async def run():
+        # The VAD already measured 300 ms of silence: a 200 ms hold is over
+        detector, turns = _detector(vad=_FakeVAD(ms_since_speech=300))
+        detector.on_final("I want to book a demo and", 0.9, speech_final=True)
+        await asyncio.sleep(0.02)
+        quiet = list(turns)
+
+        detector, turns = _detector(config=_config(incomplete_hold_ms=1200))
+        detector.on_final("I want to book a demo and", 0.9, speech_final=True)
+        await asyncio.sleep(0.02)
+        assert turns == []
+        detector.on_utterance_end()  # 1000 ms word gap counted towards the hold
+        await asyncio.sleep(0.25)
+        return quiet, turns
+
+    quiet, turns = asyncio.run(run())
+    assert len(quiet) == 1 and len(turns) == 1
+
+
+def test_caller_still_talking_and_fillers_do_not_commit():
+    async def run():
+        vad = _FakeVAD(ms_since_speech=0, in_speech=True)
+        detector, turns = _detector(vad=vad, config=_config(max_wait_ms=150))
+        detector.on_final("we have about forty people", 0.9, speech_final=True)
+        await asyncio.sleep(0.08)
+        assert turns == []  # The VAD still hears speech
+        vad.in_speech = False
+        await asyncio.sleep(0.15)
+        committed = list(turns)
+
+        detector.on_final("um", 0.9, speech_final=True)
+        await asyncio.sleep(0.3)
+        return detector, committed, turns
+
+    detector, committed, turns = asyncio.run(run())
+    assert [text for text, _ in committed] == ["we have about forty people"]
+    assert turns == committed
+    assert detector.get_stats()["dropped"] == 1
+
+
+def test_per_agent_thresholds_round_trip_through_custom_agent():
+    agent = CustomAgent(user_id="u1", name="Closer", turn_detection={"incomplete_hold_ms": 1800, "bogus": 1, "short_hold_ms": "x"})
+    restored = CustomAgent.from_dict(agent.to_dict(), "agent-1")
+    config = TurnDetectionConfig.from_dict(restored.turn_detection)
+
+    assert restored.turn_detection == {"incomplete_hold_ms": 1800, "bogus": 1, "short_hold_ms": "x"}
+    assert config.incomplete_hold_ms == 1800
+    assert config.short_hold_ms == TurnDetectionConfig().short_hold_ms
+    assert CustomAgent.from_dict({"name": "Old agent"}, "agent-2").turn_detection == {}
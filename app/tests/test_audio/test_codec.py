@@ -0,0 +1,72 @@
+"""
+Bit-exactness tests for app.audio.codec against a scalar G.711 reference.
+
+The reference is a line-by-line port of the Sun g711.c routines that
+audioop uses (st_ulaw2linear16 / st_14linear2ulaw), so the tables are
+checked without audioop, which is gone in Python 3.13.
+"""
+import warnings
+
+import numpy as np
+import pytest
+
+from app.audio.codec import lin2ulaw, pcm16_to_ulaw, ulaw2lin, ulaw_to_pcm16
+
+BIAS = 0x84
+CLIP = 32635
+SEG_UEND = (0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF)
+
+
+def _ref_decode(code: int) -> int:
+    u = ~code & 0xFF
+    t = ((u & 0x0F) << 3) + BIAS
+    t <<= (u & 0x70) >> 4
+    return BIAS - t if u & 0x80 else t - BIAS
+
+
+def _ref_encode(sample: int) -> int:
+    pcm = sample >> 2
+    if pcm < 0:
+        pcm, mask = -pcm, 0x7F
+    else:
+        mask = 0xFF
+    pcm = min(pcm, CLIP) + (BIAS >> 2)
+    seg = next((i for i, end in enumerate(SEG_UEND) if pcm <= end), 8)
+    if seg >= 8:
+        return 0x7F ^ mask
+    return ((seg << 4) | ((pcm >> (seg + 1)) & 0x0F)) ^ mask
+
+
+ALL_CODES = np.arange(256, dtype=np.uint8)
+ALL_SAMPLES = np.arange(-32768, 32768, dtype=np.int16)
+
+
+def test_decode_matches_reference_for_all_256_codes():
+    expected = np.array([_ref_decode(code) for code in range(256)], dtype=np.int16)
+    np.testing.assert_array_equal(ulaw_to_pcm16(ALL_CODES), expected)
+    assert ulaw2lin(ALL_CODES.tobytes()) == expected.tobytes()
+
+
+def test_encode_matches_reference_over_full_pcm_sweep():
+    expected = np.array([_ref_encode(int(sample)) for sample in ALL_SAMPLES], dtype=np.uint8)
+    np.testing.assert_array_equal(pcm16_to_ulaw(ALL_SAMPLES), expected)
+    assert lin2ulaw(ALL_SAMPLES.tobytes()) == expected.tobytes()
+
+
+def test_round_trip_is_stable_and_out_buffers_are_filled():
+    decoded = np.empty(256, dtype=np.int16)
+    encoded = np.empty(256, dtype=np.uint8)
+    assert ulaw_to_pcm16(ALL_CODES, out=decoded) is decoded
+    assert pcm16_to_ulaw(decoded, out=encoded) is encoded
+    # 0x7F and 0xFF both decode to 0, which encodes back as 0xFF
+    expected = ALL_CODES.copy()
+    expected[0x7F] = 0xFF
+    np.testing.assert_array_equal(encoded, expected)
+
+
+def test_matches_audioop_when_available():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        audioop = pytest.importorskip("audioop")
+    assert ulaw2lin(ALL_CODES.tobytes()) == audioop.ulaw2lin(ALL_CODES.tobytes(), 2)
+    assert lin2ulaw(ALL_SAMPLES.tobytes()) == audioop.lin2ulaw(ALL_SAMPLES.tobytes(), 2)
@@ -0,0 +1,78 @@
+"""
+Quality tests for app.audio.resampler.StreamingResampler using sine sweeps.
+"""
+import numpy as np
+from scipy.signal import chirp
+
+from app.audio.resampler import StreamingResampler
+
+AMPLITUDE = 12000
+DURATION = 2.0
+
+
+def _sweep(rate: int, f0: float, f1: float, delay_samples: float = 0.0) -> np.ndarray:
+    t = (np.arange(int(rate * DURATION)) - delay_samples) / rate
+    return AMPLITUDE * chirp(t, f0=f0, t1=DURATION, f1=f1, method="linear")
+
+
+def _snr_db(signal: np.ndarray, reference: np.ndarray) -> float:
+    noise = signal - reference
+    return 10 * np.log10(np.sum(reference ** 2) / np.sum(noise ** 2))
+
+
+def _stream(resampler: StreamingResampler, pcm: np.ndarray, chunk: int) -> np.ndarray:
+    parts = [resampler.process(pcm[i:i + chunk]) for i in range(0, len(pcm), chunk)]
+    return np.concatenate(parts).astype(np.float64)
+
+
+def _trim(y: np.ndarray, expected: np.ndarray, edge: int) -> tuple:
+    n = min(len(y), len(expected))
+    return y[edge:n - edge], expected[edge:n - edge]
+
+
+def test_chunked_output_matches_one_shot():
+    pcm = np.round(_sweep(8000, 100, 3400)).astype(np.int16)
+    one_shot = StreamingResampler(up=2, down=1).process(pcm, flush=True)
+
+    streaming = StreamingResampler(up=2, down=1)
+    parts = [streaming.process(pcm[i:i + 160]) for i in range(0, len(pcm), 160)]
+    parts.append(streaming.process(np.zeros(0, dtype=np.int16), flush=True))
+
+    assert np.array_equal(np.concatenate(parts), one_shot)
+
+
+def test_upsample_8k_to_16k_sweep_quality():
+    resampler = StreamingResampler(up=2, down=1)
+    pcm = np.round(_sweep(8000, 100, 3400)).astype(np.int16)
+    y = _stream(resampler, pcm, 160)
+    expected = _sweep(16000, 100, 3400, delay_samples=resampler.delay)
+
+    y, expected = _trim(y, expected, edge=200)
+    assert _snr_db(y, expected) > 40.0
+
+
+def test_downsample_16k_to_8k_sweep_quality():
+    resampler = StreamingResampler(up=1, down=2)
+    pcm = np.round(_sweep(16000, 100, 3400)).astype(np.int16)
+    y = _stream(resampler, pcm, 320)
+    expected = _sweep(8000, 100, 3400, delay_samples=resampler.delay)
+
+    y, expected = _trim(y, expected, edge=100)
+    assert _snr_db(y, expected) > 40.0
+
+
+def test_downsample_rejects_content_above_new_nyquist():
+    resampler = StreamingResampler(up=1, down=2)
+    pcm = np.round(_sweep(16000, 4600, 7500)).astype(np.int16)
+    y = _stream(resampler, pcm, 320)
+
+    rms_in = np.sqrt(np.mean(pcm.astype(np.float64) ** 2))
+    rms_out = np.sqrt(np.mean(y[100:] ** 2))
+    assert 20 * np.log10(rms_out / rms_in) < -40.0
+
+
+def test_reset_clears_history():
+    resampler = StreamingResampler(up=1, down=2)
+    resampler.process(np.full(320, 20000, dtype=np.int16))
+    resampler.reset()
+    assert not resampler.process(np.zeros(320, dtype=np.int16)).any()
@@ -0,0 +1,47 @@
+"""
+Tests for app.audio.ring_buffer.ByteRingBuffer.
+"""
+import pytest
+
+from app.audio.ring_buffer import ByteRingBuffer
+
+
+def test_fifo_order_across_wraparound():
+    ring = ByteRingBuffer(10)
+    assert ring.write(b"abcdef") == 0
+    assert ring.read(4) == b"abcd"
+    ring.write(b"ghijkl")  # Wraps past the end of the storage
+    assert len(ring) == 8
+    assert ring.read() == b"efghijkl"
+    assert len(ring) == 0 and ring.read() == b""
+
+
+def test_overflow_drops_oldest_bytes():
+    ring = ByteRingBuffer(8)
+    ring.write(b"012345")
+    assert ring.write(b"6789") == 2
+    assert ring.read() == b"23456789"
+
+    assert ring.write(b"x" * 3 + b"0123456789") == 5  # Larger than capacity: newest 8 survive
+    assert ring.read() == b"23456789"
+    assert ring.dropped == 7
+
+
+def test_storage_is_preallocated_and_reused():
+    ring = ByteRingBuffer(160 * 4)
+    storage = ring._buf
+    for i in range(50):
+        ring.write(bytes([i]) * 160)
+        if i % 3 == 0:
+            ring.read(160)
+    assert ring._buf is storage and len(storage) == 640
+    assert ring.read() == b"".join(bytes([i]) * 160 for i in range(46, 50))
+
+    ring.write(memoryview(b"abc"))
+    ring.clear()
+    assert len(ring) == 0
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        ByteRingBuffer(0)
@@ -0,0 +1,100 @@
+"""
+Event tests for app.audio.vad.StreamingVAD on synthetic speech-like bursts.
+"""
+import numpy as np
+
+from app.audio.codec import pcm16_to_ulaw
+from app.audio.vad import SPEECH_END, SPEECH_START, StreamingVAD
+
+RATE = 8000
+FRAME = 160
+
+
+def _noise(seconds: float, level: float = 30.0, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0, level, int(RATE * seconds))
+
+
+def _voiced(seconds: float, amplitude: float = 3000.0) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return amplitude * np.sin(2 * np.pi * 180 * t) * (1.0 + 0.5 * np.sin(2 * np.pi * 3 * t))
+
+
+def _ulaw(pcm: np.ndarray) -> bytes:
+    return pcm16_to_ulaw(np.clip(np.round(pcm), -32768, 32767).astype(np.int16)).tobytes()
+
+
+def _events(vad: StreamingVAD, ulaw: bytes, chunk: int = FRAME) -> list:
+    events = []
+    for i in range(0, len(ulaw), chunk):
+        event = vad.process(ulaw[i:i + chunk])
+        if event:
+            events.append((round(vad.frames * vad.frame_ms / 1000, 2), event))
+    return events
+
+
+def test_burst_raises_start_and_end_with_attack_and_hangover():
+    pcm = np.concatenate([_noise(1.0), _voiced(1.0) + _noise(1.0, seed=1), _noise(1.0, seed=2)])
+    vad = StreamingVAD(attack_ms=60, hangover_ms=300)
+
+    events = _events(vad, _ulaw(pcm))
+
+    assert [e for _, e in events] == [SPEECH_START, SPEECH_END]
+    start, end = events[0][0], events[1][0]
+    assert 1.0 < start <= 1.1
+    assert 2.25 <= end <= 2.35
+
+
+def test_short_pause_between_words_is_bridged_by_hangover():
+    word = _voiced(0.4)
+    gap = np.zeros(int(RATE * 0.15))
+    pcm = np.concatenate([_noise(0.5), word, gap, word, _noise(0.6, seed=3)])
+    vad = StreamingVAD(hangover_ms=300)
+
+    events = [e for _, e in _events(vad, _ulaw(pcm))]
+
+    assert events == [SPEECH_START, SPEECH_END]
+
+
+def test_steady_noise_is_never_speech():
+    for level in (10.0, 60.0, 300.0):
+        vad = StreamingVAD()
+        assert _events(vad, _ulaw(_noise(3.0, level=level))) == []
+
+
+def test_odd_chunk_sizes_match_frame_stream():
+    pcm = np.concatenate([_noise(0.5), _voiced(0.5), _noise(0.6, seed=4)])
+    ulaw = _ulaw(pcm)
+
+    framed = StreamingVAD()
+    odd = StreamingVAD()
+    expected = _events(framed, ulaw, chunk=FRAME)
+
+    assert _events(odd, ulaw, chunk=97) != []
+    assert [e for _, e in expected] == [SPEECH_START, SPEECH_END]
+    assert framed.frames == odd.frames
+    assert abs(framed.noise_db - odd.noise_db) < 1e-9
+
+
+def test_process_frame_accepts_any_frame_length():
+    vad = StreamingVAD()
+    silence = _ulaw(np.zeros(FRAME * 2))
+    speech = _ulaw(_voiced(0.04))
+    assert vad.process_frame(silence) is None   # Twice frame_bytes
+    assert vad.process_frame(bytes(FRAME * 2)) is None
+    vad.process_frame(speech[:FRAME // 2])
+    assert vad.frames == 3
+    # Regular frames still go through the preallocated buffer afterwards
+    vad.process_frame(speech[:FRAME])
+    assert vad.frames == 4 and vad.level_db > 60
+
+
+def test_speech_ms_tracks_current_run():
+    vad = StreamingVAD(attack_ms=60)
+    _events(vad, _ulaw(_noise(0.5)))
+    assert vad.speech_ms == 0 and vad.ms_since_speech is None
+
+    _events(vad, _ulaw(_voiced(0.5)))
+    assert vad.in_speech
+    assert 480 <= vad.speech_ms <= 520
+    assert vad.ms_since_speech == 0
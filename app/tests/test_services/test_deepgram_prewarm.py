@@ -0,0 +1,185 @@
+"""
+Tests for the Deepgram pre-warm pool in app.services.deepgram_websocket.
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.services import deepgram_websocket
+from app.services.deepgram_websocket import DeepgramWebSocketService
+
+
+class _FakeSocket:
+    def __init__(self, number: int):
+        self.number = number
+        self.close_code = None
+        self.sent = []
+        self._closed = asyncio.Event()
+
+    async def send(self, data):
+        if self.close_code is not None:
+            raise ConnectionError("closed")
+        self.sent.append(data)
+
+    async def close(self):
+        self.close_code = 1000
+        self._closed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._closed.wait()
+        raise StopAsyncIteration
+
+
+def _service(monkeypatch, pool_size=1, connect_delay=0.0):
+    monkeypatch.setattr(deepgram_websocket, "DEEPGRAM_WARM_POOL_SIZE", pool_size)
+    service = DeepgramWebSocketService()
+    service.DEEPGRAM_API_KEY = "test"
+    opened = []
+
+    async def open_socket():
+        await asyncio.sleep(connect_delay)
+        opened.append(_FakeSocket(len(opened)))
+        return opened[-1]
+
+    service._open_socket = open_socket
+    return service, opened
+
+
+async def _on_transcript(*args):
+    pass
+
+
+def test_prewarmed_socket_is_handed_to_its_call(monkeypatch):
+    service, opened = _service(monkeypatch, pool_size=1, connect_delay=0.01)
+
+    async def run():
+        service.prewarm("CA1")
+        service.prewarm("CA1")  # Webhook and stream start both ask: one socket
+        await asyncio.sleep(0.05)
+        assert await service.connect("CA1", _on_transcript)
+        socket = service.connections["CA1"]["websocket"]
+        await service.disconnect("CA1")
+        await service.close_pool()
+        return socket
+
+    socket = asyncio.run(run())
+    assert socket is opened[0]
+    stats = service.get_pool_stats()
+    assert stats["warm_hits"] == 1 and stats["cold_connects"] == 0 and stats["prewarmed"] == 1
+    # One reserved socket plus one idle pool socket
+    assert len(opened) == 2
+
+
+def test_idle_pool_absorbs_calls_that_were_not_prewarmed(monkeypatch):
+    service, opened = _service(monkeypatch, pool_size=2)
+
+    async def run():
+        service.prewarm("CA1")
+        await asyncio.sleep(0.01)
+        assert len(service._idle) == 2
+        # Burst: two calls start with no reservation of their own
+        assert await service.connect("CA2", _on_transcript)
+        assert await service.connect("CA3", _on_transcript)
+        stats = service.get_pool_stats()
+        for call_sid in ("CA2", "CA3"):
+            await service.disconnect(call_sid)
+        service.discard("CA1")
+        await service.close_pool()
+        await asyncio.sleep(0.01)  # Let pool refills started by the burst finish
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["warm_hits"] == 2 and stats["cold_connects"] == 0
+    assert all(socket.close_code is not None for socket in opened)
+
+
+def test_expired_or_dead_reservations_fall_back_to_a_cold_connect(monkeypatch):
+    service, opened = _service(monkeypatch, pool_size=0)
+
+    async def run():
+        service.prewarm("CA1")
+        await asyncio.sleep(0.01)
+        monkeypatch.setattr(deepgram_websocket, "DEEPGRAM_WARM_TTL", 0.0)
+        service._evict_expired()
+        assert service.get_pool_stats()["expired"] == 1
+        await asyncio.sleep(0)
+        assert opened[0].close_code is not None
+
+        monkeypatch.setattr(deepgram_websocket, "DEEPGRAM_WARM_TTL", 90.0)
+        service.prewarm("CA2")
+        await asyncio.sleep(0.01)
+        await opened[1].close()  # Server dropped the warm socket
+        assert await service.connect("CA2", _on_transcript)
+        socket = service.connections["CA2"]["websocket"]
+        await service.disconnect("CA2")
+        return socket
+
+    socket = asyncio.run(run())
+    assert socket is opened[2]
+    assert service.get_pool_stats()["cold_connects"] == 1
+
+
+def test_warm_socket_sends_keepalive_messages(monkeypatch):
+    monkeypatch.setattr(deepgram_websocket, "keepalive_wheel", deepgram_websocket.KeepAliveWheel(idle_gap=0.01, tick=0.005))
+
+    async def run():
+        socket = _FakeSocket(0)
+        warm = deepgram_websocket.WarmConnection(socket)
+        await asyncio.sleep(0.05)
+        assert warm.detach() is socket
+        sent = len(socket.sent)
+        await asyncio.sleep(0.03)
+        return socket, sent
+
+    socket, sent = asyncio.run(run())
+    assert sent >= 2 and len(socket.sent) == sent
+    assert json.loads(socket.sent[0]) == {"type": "KeepAlive"}
+
+
+def test_keepalive_only_after_an_idle_gap_from_one_shared_timer(monkeypatch):
+    wheel = deepgram_websocket.KeepAliveWheel(idle_gap=0.03, tick=0.005, slots=4)
+    fired = []
+
+    def on_idle(key, keep=True):
+        async def send():
+            fired.append(key)
+            return keep
+        return send
+
+    async def run():
+        for i in range(50):
+            wheel.register(f"CA{i}", on_idle(f"CA{i}"))
+        wheel.register("gone", on_idle("gone", keep=False))
+        task = wheel._task
+        # CA0 streams audio the whole time; everyone else is silent
+        for _ in range(20):
+            wheel.touch("CA0")
+            await asyncio.sleep(0.005)
+        assert wheel._task is task  # One timer for every socket
+        for i in range(50):
+            wheel.unregister(f"CA{i}")
+        await asyncio.sleep(0.02)
+        return wheel._task
+
+    task = asyncio.run(run())
+    assert "CA0" not in fired
+    assert {f"CA{i}" for i in range(1, 50)} <= set(fired)
+    assert fired.count("gone") == 1  # on_idle returned False: no longer tracked
+    assert wheel.get_stats()["tracked"] == 0 and task is None
+    assert wheel.get_stats()["deferred"] > 0
+
+
+@pytest.mark.parametrize("call_sid", ["", None])
+def test_prewarm_ignores_unknown_calls(monkeypatch, call_sid):
+    service, opened = _service(monkeypatch)
+
+    async def run():
+        service.prewarm(call_sid)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert opened == [] and service.get_pool_stats()["reserved"] == 0
@@ -0,0 +1,129 @@
+"""
+Tests for app.services.llm_client.AsyncLLMClient against a mock SSE endpoint.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.llm_client import AsyncLLMClient, LLMError
+
+
+def _sse(*deltas: str) -> bytes:
+    lines = [": keep-alive"]
+    for delta in deltas:
+        lines.append("data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}))
+    lines.append("data: [DONE]")
+    return ("\n\n".join(lines) + "\n\n").encode()
+
+
+class _SlowStream(httpx.AsyncByteStream):
+    """Streams one SSE event per delay, tracking how many streams are open."""
+
+    def __init__(self, deltas, delay, counter):
+        self.deltas = deltas
+        self.delay = delay
+        self.counter = counter
+
+    async def __aiter__(self):
+        self.counter["open"] += 1
+        self.counter["max_open"] = max(self.counter["max_open"], self.counter["open"])
+        try:
+            for delta in self.deltas:
+                await asyncio.sleep(self.delay)
+                yield _sse(delta).split(b"data: [DONE]")[0]
+            yield b"data: [DONE]\n\n"
+        finally:
+            self.counter["open"] -= 1
+
+    async def aclose(self):
+        pass
+
+
+def _client(handler, concurrency: int = 4) -> AsyncLLMClient:
+    client = AsyncLLMClient("test", "https://llm.test/v1", "key", "test-model", concurrency=concurrency)
+    client._http = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_stream_chat_yields_deltas_and_sends_request():
+    seen = {}
+
+    async def handler(request: httpx.Request):
+        seen["url"] = str(request.url)
+        seen["body"] = json.loads(request.content)
+        seen["auth"] = request.headers.get("authorization")
+        return httpx.Response(200, content=_sse("Hello", " there", "."))
+
+    async def run():
+        client = _client(handler)
+        deltas = [d async for d in client.stream_chat([{"role": "user", "content": "hi"}], max_tokens=20, top_p=0.9)]
+        return client, deltas
+
+    client, deltas = asyncio.run(run())
+    assert deltas == ["Hello", " there", "."]
+    assert seen["url"] == "https://llm.test/v1/chat/completions"
+    assert seen["body"]["stream"] is True and seen["body"]["model"] == "test-model"
+    assert seen["body"]["max_tokens"] == 20 and seen["body"]["top_p"] == 0.9
+    stats = client.get_stats()
+    assert stats["requests"] == 1 and stats["in_flight"] == 0
+    assert stats["avg_first_token_ms"] is not None
+
+
+def test_http_and_provider_errors_raise_llm_error():
+    async def failing(request):
+        return httpx.Response(503, text="overloaded")
+
+    async def error_event(request):
+        return httpx.Response(200, content=b'data: {"error": {"message": "bad model"}}\n\n')
+
+    async def run(handler):
+        client = _client(handler)
+        with pytest.raises(LLMError) as info:
+            await client.chat([{"role": "user", "content": "hi"}])
+        return client, str(info.value)
+
+    client, message = asyncio.run(run(failing))
+    assert "503" in message and client.get_stats()["errors"] == 1
+    _, message = asyncio.run(run(error_event))
+    assert "bad model" in message
+
+
+def test_concurrency_limit_and_cancellation_release_slots():
+    counter = {"open": 0, "max_open": 0}
+
+    async def handler(request):
+        return httpx.Response(200, stream=_SlowStream(["a", "b", "c"], 0.01, counter))
+
+    async def run():
+        client = _client(handler, concurrency=2)
+        replies = await asyncio.gather(*(client.chat([{"role": "user", "content": str(i)}]) for i in range(5)))
+
+        # Cancel a consumer mid-stream: its slot must come back
+        async def consume():
+            async for _ in client.stream_chat([{"role": "user", "content": "x"}]):
+                await asyncio.sleep(1)
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return client, replies
+
+    client, replies = asyncio.run(run())
+    assert replies == ["abc"] * 5
+    assert counter["max_open"] == 2
+    stats = client.get_stats()
+    assert stats["in_flight"] == 0 and stats["cancelled"] == 1
+    assert client._slot._value == 2
+
+
+def test_missing_api_key_fails_fast():
+    client = AsyncLLMClient("test", "https://llm.test/v1", None, "m")
+
+    async def run():
+        with pytest.raises(LLMError):
+            await client.chat([{"role": "user", "content": "hi"}])
+
+    asyncio.run(run())
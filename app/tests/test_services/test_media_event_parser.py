@@ -0,0 +1,74 @@
+"""
+Parity tests for app.services.media_event_parser: every fast path and JSON
+backend must agree with a plain json.loads parse.
+"""
+import base64
+import binascii
+import json
+
+import pytest
+
+from app.services import media_event_parser
+from app.services.media_event_parser import TwilioMessage, parse_twilio_message
+
+AUDIO = bytes(range(256))[:160]
+PAYLOAD = base64.b64encode(AUDIO).decode("ascii")
+
+FAST_PATHS = [media_event_parser._scan_fast_path]
+if media_event_parser.MSGSPEC_AVAILABLE:
+    FAST_PATHS.append(media_event_parser._msgspec_fast_path)
+
+LOADERS = [json.loads]
+if media_event_parser.ORJSON_AVAILABLE:
+    LOADERS.append(media_event_parser.orjson.loads)
+if media_event_parser.MSGSPEC_AVAILABLE:
+    LOADERS.append(media_event_parser.msgspec.json.decode)
+
+MESSAGES = [
+    # Compact, as Twilio sends it
+    json.dumps({"event": "media", "sequenceNumber": "3", "media": {"track": "inbound", "chunk": "2", "timestamp": "40", "payload": PAYLOAD}, "streamSid": "MZ1"}, separators=(",", ":")),
+    # Pretty-printed and with the payload before the event
+    json.dumps({"media": {"payload": PAYLOAD}, "event": "media", "streamSid": "MZ1"}, indent=1),
+    json.dumps({"event": "media", "media": {"payload": ""}}),
+    json.dumps({"event": "start", "start": {"streamSid": "MZ1", "callSid": "CA1", "customParameters": {"goal": 'say "media"'}}}),
+    json.dumps({"event": "mark", "streamSid": "MZ1", "mark": {"name": "seg-4"}}),
+    json.dumps({"event": "stop", "streamSid": "MZ1", "stop": {"callSid": "CA1"}}),
+    json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}),
+]
+
+MALFORMED = [
+    '{"event":"media","media":{"payload":"' + PAYLOAD + '"}',   # Truncated
+    '{"event":"media","media":{"payload":"@@@"}}',              # Bad base64
+    'not json',
+    '',
+]
+
+
+def _reference(raw: str) -> TwilioMessage:
+    msg = json.loads(raw)
+    if msg.get("event") == "media":
+        return TwilioMessage("media", binascii.a2b_base64(msg["media"]["payload"], strict_mode=True))
+    return TwilioMessage(msg.get("event"), None, msg)
+
+
+@pytest.fixture(params=[(f, l) for f in FAST_PATHS for l in LOADERS], ids=lambda p: f"{p[0].__name__}-{p[1].__module__}")
+def backend(request, monkeypatch):
+    fast_path, loads = request.param
+    monkeypatch.setattr(media_event_parser, "_media_fast_path", fast_path)
+    monkeypatch.setattr(media_event_parser, "_loads", loads)
+
+
+@pytest.mark.parametrize("raw", MESSAGES)
+def test_every_backend_matches_json(backend, raw):
+    expected = _reference(raw)
+    parsed = parse_twilio_message(raw)
+    assert parsed.event == expected.event
+    assert parsed.payload == expected.payload
+    if expected.event != "media":
+        assert parsed.message == expected.message
+
+
+@pytest.mark.parametrize("raw", MALFORMED)
+def test_every_backend_rejects_malformed_frames(backend, raw):
+    with pytest.raises(ValueError):
+        parse_twilio_message(raw)
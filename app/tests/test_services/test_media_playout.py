@@ -0,0 +1,86 @@
+"""
+Tests for clock-paced outbound media in app.services.media_playout.
+"""
+import asyncio
+import types
+
+from app.services import media_playout
+from app.services.media_playout import FRAME_BYTES, FRAME_DURATION, MediaPlayout
+
+
+class _FakeClock:
+    """monotonic() that only moves when the code under test sleeps (and oversleeps)."""
+
+    def __init__(self, oversleep=0.004):
+        self.now = 1000.0
+        self.oversleep = oversleep
+        self.sleeps = 0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps += 1
+        self.now += seconds + self.oversleep  # Every wake-up is late
+        await asyncio.sleep(0)
+
+
+def _install(monkeypatch, clock):
+    monkeypatch.setattr(media_playout, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(media_playout, "asyncio", types.SimpleNamespace(sleep=clock.sleep, Event=asyncio.Event))
+
+
+def test_absolute_deadlines_do_not_drift(monkeypatch):
+    clock = _FakeClock(oversleep=0.004)
+    _install(monkeypatch, clock)
+    sent_at = []
+
+    async def send_frame(frame):
+        assert len(frame) == FRAME_BYTES
+        sent_at.append(clock.now)
+
+    n = 500
+    playout = MediaPlayout(send_frame, lookahead_ms=60)
+    start = clock.now
+    frames = asyncio.run(playout.play(b"\x00" * (FRAME_BYTES * n)))
+
+    assert frames == n
+    # Sleeping 20 ms per frame would be 2 s late by now (500 x 4 ms)
+    expected_last = start + (n - 1) * FRAME_DURATION - playout.lookahead
+    assert abs(sent_at[-1] - expected_last) <= FRAME_DURATION
+    # Never more than the lookahead (plus one frame) ahead of real time
+    for i, t in enumerate(sent_at):
+        assert start + i * FRAME_DURATION - t <= playout.lookahead + FRAME_DURATION + 1e-9
+    assert playout.buffered_seconds <= playout.lookahead + FRAME_DURATION
+
+
+def test_interrupt_stops_within_a_frame_and_clear_resets_the_clock(monkeypatch):
+    clock = _FakeClock(oversleep=0.0)
+    _install(monkeypatch, clock)
+    interrupt = asyncio.Event()
+    sent = []
+
+    async def send_frame(frame):
+        sent.append(frame)
+        if len(sent) == 10:
+            interrupt.set()  # Barge-in while frame 10 goes out
+
+    playout = MediaPlayout(send_frame, lookahead_ms=60)
+
+    async def run():
+        frames = await playout.play(b"\x01" * (FRAME_BYTES * 200), interrupt)
+        buffered = playout.buffered_seconds
+        playout.clear()
+        return frames, buffered
+
+    frames, buffered = asyncio.run(run())
+    assert frames == 10 and len(sent) == 10
+    assert buffered > 0 and playout.buffered_seconds == 0
+
+    # After clear the next reply starts at once, not after the flushed audio
+    sleeps_before = clock.sleeps
+    asyncio.run(playout.play(b"\x02" * FRAME_BYTES))
+    assert clock.sleeps == sleeps_before and len(sent) == 11
+    # A short final frame is padded with silence
+    asyncio.run(playout.play(b"\x03" * 10))
+    assert sent[-1] == b"\x03" * 10 + b"\xff" * (FRAME_BYTES - 10)
@@ -0,0 +1,69 @@
+"""
+Tests for app.services.playback_tracker.PlaybackTracker.
+"""
+from app.services import playback_tracker
+from app.services.playback_tracker import PlaybackTracker
+
+
+def _tracker():
+    history = [{"role": "user", "content": "What does it cost?"}]
+    idle = []
+    return history, idle, PlaybackTracker(history, on_idle=lambda: idle.append(True))
+
+
+def test_marks_in_order_go_idle_once_after_the_last():
+    history, idle, tracker = _tracker()
+    segments = [tracker.track(b"\xff" * 160) for _ in range(3)]
+    tracker.on_mark(segments[0].mark_name)
+    tracker.on_mark(segments[1].mark_name)
+    assert tracker.is_playing and not idle
+    tracker.on_mark(segments[2].mark_name)
+    assert not tracker.is_playing and idle == [True]
+    assert all(segment.played for segment in segments)
+
+
+def test_later_mark_settles_earlier_segments():
+    history, idle, tracker = _tracker()
+    first, second = tracker.track(b"\xff" * 160), tracker.track(b"\xff" * 160)
+    tracker.on_mark(second.mark_name)
+    assert first.played and not tracker.is_playing and idle == [True]
+    # The earlier mark turning up late changes nothing
+    tracker.on_mark(first.mark_name)
+    assert idle == [True]
+
+
+def test_stale_mark_after_interrupt_is_ignored():
+    history, idle, tracker = _tracker()
+    old = tracker.track(b"\xff" * 160)
+    tracker.interrupt()
+    new = tracker.track(b"\xff" * 160)
+    tracker.on_mark(old.mark_name)
+    assert tracker.is_playing and not new.played and not idle
+    tracker.on_mark(new.mark_name)
+    assert idle == [True]
+
+
+def test_interrupt_keeps_only_the_heard_part_of_the_message(monkeypatch):
+    history, idle, tracker = _tracker()
+    message = {"role": "assistant", "content": "The pro plan is forty dollars. It includes ten seats."}
+    history.append(message)
+    heard = tracker.track(b"\xff" * 800, message, "The pro plan is forty dollars.")
+    cut = tracker.track(b"\xff" * 800, message, "It includes ten seats.")
+    tracker.on_mark(heard.mark_name)
+    # Just over half of the second sentence has played
+    cut.started_at, cut.duration = 100.0, 0.1
+    monkeypatch.setattr(playback_tracker.time, "monotonic", lambda: 100.06)
+
+    assert tracker.interrupt() == "ten seats."
+    assert message["content"] == "The pro plan is forty dollars. It includes"
+    assert history[-1] is message and not tracker.is_playing
+
+
+def test_interrupt_before_any_audio_played_drops_the_message():
+    history, idle, tracker = _tracker()
+    message = {"role": "assistant", "content": "Let me check that for you."}
+    history.append(message)
+    tracker.track(b"\xff" * 1600, message)
+    assert tracker.interrupt() == "Let me check that for you."
+    assert history == [{"role": "user", "content": "What does it cost?"}]
+    assert not idle
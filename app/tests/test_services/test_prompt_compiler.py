@@ -0,0 +1,85 @@
+"""
+Tests for app.services.prompt_compiler and the prompt builders in llm_service.
+"""
+from app.services import llm_service
+from app.services.prompt_compiler import PromptCompiler, count_tokens, prompt_compiler
+
+
+def test_system_prompt_is_compiled_once_per_key():
+    compiler = PromptCompiler(max_prompts=2)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return "  You are a helpful agent.  "
+
+    first = compiler.compile(("stream", "agent-a"), build)
+    second = compiler.compile(("stream", "agent-a"), build)
+    assert first is second and len(builds) == 1
+    assert first.text == "You are a helpful agent."
+    assert first.tokens == count_tokens(first.text)
+
+    compiler.compile(("stream", "agent-b"), build)
+    compiler.compile(("stream", "agent-c"), build)  # evicts agent-a
+    compiler.compile(("stream", "agent-a"), build)
+    assert len(builds) == 4
+    stats = compiler.get_stats()
+    assert stats["compiled"] == 4 and stats["reused"] == 1 and stats["cached_prompts"] == 2
+
+
+def test_current_transcript_is_not_repeated_from_history():
+    history = [
+        {"role": "assistant", "content": "Hi, this is Sam."},
+        {"role": "user", "content": ""},
+        {"role": "user", "content": "What does it cost?"},
+    ]
+    past = PromptCompiler.history_messages(history, "What does it cost?")
+    assert past == [{"role": "assistant", "content": "Hi, this is Sam."}]
+
+    compiler = PromptCompiler()
+    system = compiler.compile("s", lambda: "System")
+    messages, tokens = compiler.assemble(system, history, "Customer: What does it cost?", "What does it cost?")
+    assert [m["role"] for m in messages] == ["system", "assistant", "user"]
+    assert tokens.total == tokens.system + tokens.history + tokens.turn
+    assert tokens.history == count_tokens("Hi, this is Sam.") + 4
+    assert compiler.get_stats()["prompt_tokens"] == tokens.total
+
+
+def test_consecutive_turns_share_a_prompt_prefix():
+    history = []
+    turns = []
+    for user, reply in (("Hello?", "Hi! How can I help?"), ("Tell me the price.", "It is ten dollars."), ("Okay.", "")):
+        history.append({"role": "user", "content": user})
+        messages, _ = llm_service._build_stream_messages(
+            user, "Sell plans", history, context="Plans cost $10.", personality="friendly",
+            company_name="Acme", agent_name="Sam"
+        )
+        turns.append(messages)
+        if reply:
+            history.append({"role": "assistant", "content": reply})
+
+    for previous, current in zip(turns, turns[1:]):
+        # Everything before the previous turn's message is reused verbatim
+        assert current[:len(previous) - 1] == previous[:-1]
+        assert current[len(previous) - 1]["content"] == history[len(previous) - 2]["content"]
+    assert "Introduce yourself as Sam from Acme" in turns[0][-1]["content"]
+    assert "Introduce yourself" not in turns[1][-1]["content"]
+    # Per-turn material stays out of the cached system prompt
+    assert "Plans cost" not in turns[0][0]["content"]
+
+
+def test_tool_prompt_is_static_per_agent():
+    first = llm_service._build_tool_messages("I use a competitor.", "Sell plans", [], "KB one", "professional", "Acme", "Sam")
+    second = llm_service._build_tool_messages(
+        "नमस्ते", "Sell plans",
+        [{"role": "user", "content": "I use a competitor."}, {"role": "assistant", "content": "Got it."}],
+        "KB two", "professional", "Acme", "Sam"
+    )
+    assert first[0] == second[0]
+    assert "AVAILABLE TOOLS" in first[0]["content"] and "KB one" not in first[0]["content"]
+    assert second[1:3] == [
+        {"role": "user", "content": "I use a competitor."},
+        {"role": "assistant", "content": "Got it."},
+    ]
+    assert "KB two" in second[-1]["content"] and "Hindi" in second[-1]["content"]
+    assert prompt_compiler.get_stats()["turns"] >= 2
@@ -0,0 +1,125 @@
+"""
+Tests for the in-memory inbound routing table (app.services.routing_table)
+against a fake Firestore.
+"""
+import asyncio
+from datetime import datetime
+
+from app.database import firestore as firestore_module
+from app.services import routing_table as routing_module
+from app.services.routing_table import RoutingTableService
+
+
+class _Doc:
+    def __init__(self, id, data):
+        self.id = id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _Collection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+
+    def where(self, filter=None):
+        return self  # The fake only stores inbound campaigns
+
+    def stream(self):
+        self.db.reads += 1
+        return [_Doc(id, data) for id, data in self.db.data[self.name].items()]
+
+    def on_snapshot(self, callback):
+        if self.db.fail_listeners:
+            raise RuntimeError("listeners not supported")
+        self.db.listeners[self.name] = callback
+        callback(self.stream(), [], None)
+        return self
+
+
+class _FakeFirestore:
+    def __init__(self, fail_listeners=False):
+        self.fail_listeners = fail_listeners
+        self.reads = 0
+        self.listeners = {}
+        self.data = {
+            "virtual_phone_numbers": {
+                "pn1": {"phone_number": "+1 (555) 010-0001", "is_active": True, "assigned_agents": ["agent-a"]},
+                "pn2": {"phone_number": "+15550100002", "is_active": True, "assigned_agents": []},
+            },
+            "campaigns": {
+                "c-old": {"type": "inbound", "status": "active", "custom_agent_id": "agent-a", "updated_at": datetime(2026, 1, 1)},
+                "c-new": {"type": "inbound", "status": "active", "custom_agent_id": "agent-a", "updated_at": datetime(2026, 3, 1)},
+                "c-paused": {"type": "inbound", "status": "paused", "custom_agent_id": "agent-a", "updated_at": datetime(2026, 6, 1)},
+                "c-other": {"type": "inbound", "status": "active", "custom_agent_id": "agent-b", "updated_at": datetime(2026, 2, 1)},
+            },
+        }
+
+    def collection(self, name):
+        return _Collection(self, name)
+
+    def push(self, name):
+        """Deliver a snapshot for a collection to its listener."""
+        self.listeners[name](_Collection(self, name).stream(), [], None)
+
+
+def test_resolve_picks_newest_active_campaign_of_the_assigned_agent(monkeypatch):
+    db = _FakeFirestore()
+    monkeypatch.setattr(firestore_module, "db", db)
+    table = RoutingTableService()
+
+    async def run():
+        cold = await table.resolve("+15550100001")  # Cold table loads inline
+        return cold, table.resolve_cached("+1-555-010-0001"), table.resolve_cached("+15550100002"), table.resolve_cached("+19990000000")
+
+    assigned, formatted, unassigned, unknown = asyncio.run(run())
+    assert assigned.target_agent_id == "agent-a" and assigned.call_session.id == "c-new"
+    assert formatted == assigned
+    # No agent on the number: fall back to any active inbound campaign
+    assert unassigned.target_agent_id is None and unassigned.call_session.status == "active"
+    assert unknown.target_agent_id is None
+
+
+def test_listener_updates_apply_without_refreshing(monkeypatch):
+    db = _FakeFirestore()
+    monkeypatch.setattr(firestore_module, "db", db)
+    monkeypatch.setattr(routing_module, "ROUTING_TABLE_TTL", 0.0)
+    table = RoutingTableService()
+
+    async def run():
+        await table.start()
+        reads = db.reads
+        db.data["virtual_phone_numbers"]["pn1"]["assigned_agents"] = ["agent-b"]
+        db.push("virtual_phone_numbers")
+        route = await table.resolve("+15550100001")
+        await asyncio.sleep(0.01)
+        return route, db.reads - reads
+
+    route, reads = asyncio.run(run())
+    assert route.target_agent_id == "agent-b" and route.call_session.id == "c-other"
+    assert reads == 1  # Only the pushed snapshot; a TTL refresh never ran
+
+
+def test_ttl_refresh_serves_stale_data_and_reloads_in_background(monkeypatch):
+    db = _FakeFirestore(fail_listeners=True)
+    monkeypatch.setattr(firestore_module, "db", db)
+    table = RoutingTableService()
+
+    async def run():
+        await table.start()
+        assert table._listeners == []
+        db.data["campaigns"]["c-new"]["status"] = "paused"
+
+        fresh = await table.resolve("+15550100001")  # Within the TTL: no reload
+        monkeypatch.setattr(routing_module, "ROUTING_TABLE_TTL", 0.0)
+        stale = await table.resolve("+15550100001")
+        await table._refresh_task
+        reloaded = await table.resolve("+15550100001")
+        return fresh, stale, reloaded
+
+    fresh, stale, reloaded = asyncio.run(run())
+    assert fresh.call_session.id == "c-new"
+    assert stale.call_session.id == "c-new"  # Served from memory while refreshing
+    assert reloaded.call_session.id == "c-old"
@@ -0,0 +1,110 @@
+"""
+Tests for non-blocking Deepgram connects with early-audio buffering in
+app.services.stt_service.stream_audio_packet.
+"""
+import asyncio
+import time
+
+from app.services import stt_service
+
+
+class _FakeDeepgram:
+    """Stands in for deepgram_ws_service: slow connects, recorded sends."""
+
+    def __init__(self, connect_delay=0.05, fail_connects=0):
+        self.connect_delay = connect_delay
+        self.fail_connects = fail_connects
+        self.connections = {}
+        self.reconnect_attempts = {}
+        self.sent = []
+        self.fail_next_send = False
+        self.released = []
+
+    async def connect(self, call_sid, on_transcript, on_event=None):
+        await asyncio.sleep(self.connect_delay)
+        if self.fail_connects:
+            self.fail_connects -= 1
+            return False
+        self.connections[call_sid] = {"connected": True}
+        self.reconnect_attempts[call_sid] = 0
+        return True
+
+    async def send_audio(self, call_sid, data):
+        if self.fail_next_send:
+            self.fail_next_send = False
+            self.connections[call_sid]["connected"] = False
+            return False
+        self.sent.append(bytes(data))
+        return True
+
+    def release(self, call_sid):
+        self.released.append(call_sid)
+
+
+def _frames(start, count):
+    return [bytes([i % 256]) * 160 for i in range(start, start + count)]
+
+
+def test_frames_are_buffered_while_connecting_and_flushed_in_order(monkeypatch):
+    fake = _FakeDeepgram(connect_delay=0.05)
+    monkeypatch.setattr(stt_service, "deepgram_ws_service", fake)
+
+    async def run():
+        frames = _frames(0, 10)
+        started = time.perf_counter()
+        for frame in frames:
+            assert await stt_service.stream_audio_packet("deepgram", frame, "CA1")
+        # The media loop did not wait for the 50 ms connect
+        assert time.perf_counter() - started < 0.03
+        assert fake.sent == []
+        await stt_service._connect_tasks["CA1"]
+
+        later = _frames(10, 3)
+        for frame in later:
+            await stt_service.stream_audio_packet("deepgram", frame, "CA1")
+        stt_service.release_stream("CA1")
+        return frames + later
+
+    frames = asyncio.run(run())
+    assert b"".join(fake.sent) == b"".join(frames)
+    assert len(fake.sent) == 4  # One flush, then frame by frame
+    assert fake.released == ["CA1"] and "CA1" not in stt_service._early_audio
+
+
+def test_reconnect_keeps_audio_and_order(monkeypatch):
+    fake = _FakeDeepgram(connect_delay=0.0)
+    monkeypatch.setattr(stt_service, "deepgram_ws_service", fake)
+
+    async def run():
+        await stt_service.stream_audio_packet("deepgram", b"\x01" * 160, "CA2")
+        await stt_service._connect_tasks["CA2"]
+        fake.connect_delay = 0.02
+        fake.fail_next_send = True
+        # The frame whose send failed and the ones after it wait for the reconnect
+        for frame in _frames(2, 3):
+            await stt_service.stream_audio_packet("deepgram", frame, "CA2")
+        await stt_service._connect_tasks["CA2"]
+        stt_service.release_stream("CA2")
+
+    asyncio.run(run())
+    assert b"".join(fake.sent) == b"\x01" * 160 + b"".join(_frames(2, 3))
+
+
+def test_gives_up_after_repeated_failed_connects(monkeypatch):
+    fake = _FakeDeepgram(connect_delay=0.0, fail_connects=100)
+    monkeypatch.setattr(stt_service, "deepgram_ws_service", fake)
+    monkeypatch.setattr(stt_service, "STT_CONNECT_BACKOFF", 0.0)
+
+    async def run():
+        results = []
+        for _ in range(stt_service.STT_MAX_RECONNECTS):
+            results.append(await stt_service.stream_audio_packet("deepgram", b"\xff" * 160, "CA3"))
+            await stt_service._connect_tasks["CA3"]
+        results.append(await stt_service.stream_audio_packet("deepgram", b"\xff" * 160, "CA3"))
+        stt_service.release_stream("CA3")
+        return results
+
+    results = asyncio.run(run())
+    assert results == [True] * stt_service.STT_MAX_RECONNECTS + [False]
+    assert fake.reconnect_attempts["CA3"] == stt_service.STT_MAX_RECONNECTS
+    assert fake.sent == []
@@ -0,0 +1,96 @@
+"""
+Tests for app.services.tool_call_parser.ToolCallStreamParser.
+"""
+import json
+
+from app.services.tool_call_parser import TEXT_EVENT, TOOL_EVENT, ToolCallStreamParser
+
+END_CALL = {
+    "tool": "end_call",
+    "arguments": {
+        "reason": "competitor",
+        "final_message": "Thanks for your time. Have a great day!",
+        "lead_classification": "competitor",
+    },
+    "response": "Thanks for your time. Have a great day!",
+}
+
+
+def _feed(reply: str, step: int = 1):
+    parser = ToolCallStreamParser()
+    events = []
+    for i in range(0, len(reply), step):
+        events.extend(parser.feed(reply[i:i + step]))
+    return parser, events
+
+
+def _text(events) -> str:
+    return "".join(value for kind, value in events if kind == TEXT_EVENT)
+
+
+def test_tool_is_known_before_any_text_and_text_streams_before_the_object_closes():
+    reply = json.dumps(END_CALL, indent=2)
+    parser, events = _feed(reply)
+
+    assert events[0] == (TOOL_EVENT, "end_call")
+    assert _text(events) == END_CALL["arguments"]["final_message"]
+    # The duplicate top-level "response" is not spoken a second time
+    assert parser.spoken_field == "final_message"
+
+    partial = ToolCallStreamParser()
+    cut = reply.index("great")
+    streamed = _text(partial.feed(reply[:cut]))
+    assert streamed == "Thanks for your time. Have a "
+    assert not partial.complete
+
+    assert parser.complete
+    assert parser.close() == {"type": "tool_call", "tool": "end_call", "arguments": END_CALL["arguments"]}
+
+
+def test_escapes_split_across_chunks_are_decoded():
+    reply = json.dumps({
+        "tool": "continue_conversation",
+        "arguments": {"strategy": "build_rapport", "response": 'Café "deal"\nnow 👍 नमस्ते'},
+    })  # ensure_ascii: é, \", \n and a surrogate pair
+    for step in (1, 2, 3, 5):
+        parser, events = _feed(reply, step)
+        assert _text(events) == 'Café "deal"\nnow 👍 नमस्ते'
+        assert parser.close()["arguments"]["response"] == 'Café "deal"\nnow 👍 नमस्ते'
+
+
+def test_fences_prose_and_arrays_are_skipped():
+    reply = (
+        "Here you go:\n```json\n"
+        '{"tool": "schedule_callback", "arguments": {"tags": ["busy", "driving"], "delay_minutes": 60, '
+        '"confirmation_message": "I will call you back in an hour."}, "response": "x"}\n```'
+    )
+    parser, events = _feed(reply, 4)
+    assert [value for kind, value in events if kind == TOOL_EVENT] == ["schedule_callback"]
+    assert _text(events) == "I will call you back in an hour."
+    decision = parser.close()
+    assert decision["tool"] == "schedule_callback"
+    assert decision["arguments"]["delay_minutes"] == 60
+
+
+def test_top_level_response_is_spoken_when_arguments_have_no_message():
+    reply = '{"tool": "continue_conversation", "arguments": {"strategy": "qualify_lead"}, "response": "How big is your team?"}'
+    parser, events = _feed(reply, 7)
+    assert _text(events) == "How big is your team?"
+    assert parser.close()["arguments"] == {"strategy": "qualify_lead", "response": "How big is your team?"}
+
+
+def test_plain_text_and_truncated_replies_fall_back_to_continue_conversation():
+    parser, events = _feed("Sure, I can help with that.")
+    assert events == []
+    assert parser.close() == {
+        "type": "tool_call",
+        "tool": "continue_conversation",
+        "arguments": {"strategy": "answer_questions", "response": "Sure, I can help with that."},
+    }
+
+    # Cut off by max_tokens: the tool decision is still honored
+    parser, events = _feed('{"tool": "end_call", "arguments": {"final_message": "Goodbye for now')
+    assert _text(events) == "Goodbye for now"
+    decision = parser.close()
+    assert decision["tool"] == "end_call"
+    assert decision["arguments"]["response"] == "Goodbye for now"
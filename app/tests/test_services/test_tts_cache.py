@@ -0,0 +1,109 @@
+"""
+Tests for the two-tier (memory, disk) TTS cache in app.services.tts_cache.
+"""
+import asyncio
+
+from app.audio.transcode import MULAW_8K, PCM_16K
+from app.services.tts_cache import TTSCacheService
+
+
+def _key(text: str, voice_id: str = "voice-a", output_format=MULAW_8K) -> str:
+    return TTSCacheService.make_key("cartesia", voice_id, "sonic-2", text, output_format)
+
+
+async def _flush(cache: TTSCacheService):
+    await asyncio.gather(*list(cache._writes))
+
+
+def test_memory_hit_and_miss():
+    async def run():
+        cache = TTSCacheService(memory_bytes=1024, directory=None)
+        cache.put(_key("hello"), b"\x01" * 100)
+        return cache, await cache.get(_key("hello")), await cache.get(_key("goodbye"))
+
+    cache, hit, miss = asyncio.run(run())
+    assert hit == b"\x01" * 100 and miss is None
+    stats = cache.get_stats()
+    assert (stats["memory_hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_memory_evicts_least_recently_used():
+    async def run():
+        cache = TTSCacheService(memory_bytes=300, directory=None)
+        for text in ("one", "two", "three"):
+            cache.put(_key(text), text.encode() * 25)   # 75-125 bytes each
+        await cache.get(_key("one"))                    # "two" is now the oldest
+        cache.put(_key("four"), b"\x04" * 100)
+        return cache, [await cache.get(_key(text)) is not None for text in ("one", "two", "three", "four")]
+
+    cache, present = asyncio.run(run())
+    assert present == [True, False, True, True]
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    async def run():
+        writer = TTSCacheService(memory_bytes=1024, disk_bytes=4096, directory=str(tmp_path))
+        writer.put(_key("hello"), b"\x02" * 200)
+        await _flush(writer)
+        # A fresh instance (another worker, or after a restart) starts with an empty memory tier
+        reader = TTSCacheService(memory_bytes=1024, disk_bytes=4096, directory=str(tmp_path))
+        first = await reader.get(_key("hello"))
+        second = await reader.get(_key("hello"))
+        return reader, first, second
+
+    reader, first, second = asyncio.run(run())
+    assert first == second == b"\x02" * 200
+    stats = reader.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["memory_clips"]) == (1, 1, 1)
+
+
+def test_disk_tier_evicts_oldest_files(tmp_path):
+    async def run():
+        cache = TTSCacheService(memory_bytes=1024, disk_bytes=250, directory=str(tmp_path))
+        for text in ("one", "two", "three"):
+            cache.put(_key(text), b"\x03" * 100)
+            await _flush(cache)
+        return cache
+
+    cache = asyncio.run(run())
+    assert sorted(p.name[:-len(".audio")] for p in tmp_path.iterdir()) == sorted([_key("two"), _key("three")])
+    assert cache.get_stats()["disk_clips"] == 2
+
+
+def test_keys_differ_by_voice_and_format():
+    keys = {
+        _key("hello"),
+        _key("hello", voice_id="voice-b"),
+        _key("hello", output_format=PCM_16K),
+        _key("hello", voice_id=None),
+        _key("Hello"),
+    }
+    assert len(keys) == 5
+    assert _key("hello") == _key("hello")
+
+
+def test_both_synthesis_paths_key_on_the_resolved_voice(monkeypatch):
+    from app.services import tts_service
+
+    voices = []
+
+    async def fake_native(provider, text, voice_id, native, tts_session=None):
+        voices.append(voice_id)
+        return b"\x05" * 160, native
+
+    monkeypatch.setattr(tts_service, "tts_cache", TTSCacheService(memory_bytes=4096, directory=None))
+    monkeypatch.setattr(tts_service, "_synthesize_native", fake_native)
+
+    async def run():
+        await tts_service.synthesize_speech_with_provider("cartesia", "Thanks for calling!", output_format=MULAW_8K)
+        # The streaming path picks the same automatic voice, so it reuses the clip
+        streamed = [chunk async for chunk in tts_service.synthesize_speech_stream(
+            "cartesia", "Thanks for calling!", output_format=MULAW_8K)]
+        # Another voice is another clip
+        await tts_service.synthesize_speech_with_provider("cartesia", "Thanks for calling!", voice_id="voice-b", output_format=MULAW_8K)
+        return streamed
+
+    assert asyncio.run(run()) == [b"\x05" * 160]
+    assert voices == [tts_service.select_cartesia_voice("Thanks for calling!"), "voice-b"]
+    assert tts_service.tts_cache.get_stats()["memory_hits"] == 1
@@ -0,0 +1,125 @@
+"""
+Tests for the reader -> playout hand-off and TTS conversion in app.services.twilio_media_ws.
+"""
+import asyncio
+import functools
+import json
+
+import numpy as np
+
+from app.audio.codec import MulawAudio
+from app.audio.transcode import AudioTranscoder, MULAW_8K, PCM_16K, transcode
+from app.services import twilio_media_ws
+from app.services.media_frame_encoder import MediaFrameEncoder
+from app.services.media_playout import MediaPlayout
+from app.services.playback_tracker import PlaybackTracker
+
+
+class _FakeWS:
+    class client_state:
+        name = "CONNECTED"
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def test_full_queue_never_drops_segments_or_sentinels():
+    async def run():
+        queue = asyncio.Queue(maxsize=twilio_media_ws.PLAYOUT_QUEUE_MAXSIZE)
+        pending = set()
+        items = list(range(40)) + [twilio_media_ws._CLEAR]
+        for item in items:
+            twilio_media_ws._enqueue_playout(queue, item, pending)
+        received = []
+        while len(received) < len(items):
+            received.append(await queue.get())
+            await asyncio.sleep(0)
+        return items, received
+
+    items, received = asyncio.run(run())
+    assert received == items
+
+
+def test_long_reply_is_played_in_full_and_every_mark_arrives(monkeypatch):
+    # 1 ms frames so 40 segments play quickly
+    monkeypatch.setattr(twilio_media_ws, "MediaPlayout", functools.partial(MediaPlayout, frame_duration=0.001, lookahead_ms=1))
+    idle = []
+    tracker = PlaybackTracker([], on_idle=lambda: idle.append(True))
+    message = {"role": "assistant", "content": "word " * 40}
+    outbound = asyncio.Queue()
+    segments = [tracker.track(MulawAudio(bytes([i]) * 160), message, "word") for i in range(40)]
+
+    async def run():
+        for segment in segments:
+            outbound.put_nowait(segment)
+        ws = _FakeWS()
+        playout_queue = asyncio.Queue(maxsize=twilio_media_ws.PLAYOUT_QUEUE_MAXSIZE)
+        pending = set()
+        task = asyncio.create_task(twilio_media_ws._playout_loop(ws, MediaFrameEncoder("MZ1"), playout_queue, asyncio.Event()))
+        # The reader: one pull per inbound frame, only when playout has room
+        while not outbound.empty():
+            if not playout_queue.full():
+                twilio_media_ws._enqueue_playout(playout_queue, outbound.get_nowait(), pending)
+            await asyncio.sleep(0.0005)
+        await playout_queue.put(twilio_media_ws._STOP)
+        await asyncio.wait_for(task, timeout=5)
+        return ws.sent
+
+    sent = asyncio.run(run())
+    marks = [msg["mark"]["name"] for msg in sent if msg["event"] == "mark"]
+    assert marks == [segment.mark_name for segment in segments]
+    for name in marks:
+        tracker.on_mark(name)
+    assert not tracker.is_playing and idle == [True]
+
+
+def test_barge_in_cancels_puts_still_waiting_for_room():
+    async def run():
+        queue = asyncio.Queue(maxsize=2)
+        pending = set()
+        interrupt_event = asyncio.Event()
+        for item in ("old-1", "old-2", "old-3", "old-4"):
+            twilio_media_ws._enqueue_playout(queue, item, pending)
+        await asyncio.sleep(0)
+        assert queue.full() and len(pending) == 2
+
+        twilio_media_ws._interrupt_playout(queue, pending, interrupt_event)
+        twilio_media_ws._enqueue_playout(queue, "new", pending)
+        await asyncio.sleep(0.01)
+        received = []
+        while not queue.empty():
+            received.append(queue.get_nowait())
+        return received, interrupt_event.is_set(), pending
+
+    received, interrupted, pending = asyncio.run(run())
+    # Nothing from the interrupted reply lands after the clear
+    assert received == [twilio_media_ws._CLEAR, "new"]
+    assert interrupted and not pending
+
+
+class _RecordingPlayout:
+    def __init__(self):
+        self.audio = bytearray()
+
+    async def play(self, audio, interrupt_event=None):
+        if audio != twilio_media_ws._SILENCE_MULAW_20MS:
+            self.audio += audio
+        return len(audio) // 160
+
+
+def test_odd_byte_splits_and_flush_match_one_shot_conversion():
+    t = np.arange(16000) / 16000
+    pcm = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16).tobytes()
+    # Chunk boundaries inside a sample, the last chunk flushes the tail
+    cuts = [0, 3201, 6400, 9999, len(pcm)]
+
+    async def run():
+        playout, transcoder = _RecordingPlayout(), AudioTranscoder(PCM_16K, MULAW_8K)
+        for start, end in zip(cuts, cuts[1:]):
+            await twilio_media_ws._send_tts_chunked(playout, transcoder, pcm[start:end], flush=end == len(pcm))
+        return bytes(playout.audio)
+
+    assert asyncio.run(run()) == transcode(pcm, PCM_16K, MULAW_8K)
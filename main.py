@@ -166,6 +166,16 @@ async def startup_event():
     # asyncio.create_task(callback_scheduler._run_scheduler())
     logger.info("✅ Callback scheduler configured (lazy initialization)")
     
+    # Load inbound routing table (phone -> agent -> campaign) into memory
+    from app.services.routing_table import routing_table
+    asyncio.create_task(routing_table.start())
+    logger.info("✅ Inbound routing table loading in background")
+    
+    # Pre-render fixed error/fallback prompts so failures never wait on TTS
+    from app.services.prompt_audio_bank import prompt_audio_bank
+    prompt_audio_bank.ensure_voice()
+    logger.info("✅ Prompt audio bank warming up in background")
+    
     # Start SIP trunk monitoring
     logger.info("🔍 Starting SIP trunk monitoring...")
     from google.cloud import firestore
@@ -204,6 +214,12 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown"""
+    from app.services.routing_table import routing_table
+    from app.services.llm_client import close_llm_clients
+    from app.services.deepgram_websocket import deepgram_ws_service
+    routing_table.stop()
+    await close_llm_clients()
+    await deepgram_ws_service.close_pool()
     logger.info("=" * 60)
     logger.info("🛑 AI Voice Agent API Stopped")
     logger.info("=" * 60)